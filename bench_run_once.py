@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Benchmark de TradingBot.run_once contra el exchange simulado (src/mock_exchange.py).
+# Mide, por número de símbolos y por estado del bot, cuánto cuesta un ciclo completo:
+# tiempo de CPU por ciclo, latencia p50/p99 de run_once, asignaciones de memoria y RSS pico.
+# Todo corre offline: el cliente de Binance se reemplaza por MockUMFutures y la DB por no-ops.
+#
+# Uso:
+#   python bench_run_once.py                                  # 10,40,200,1000 símbolos x todos los estados
+#   python bench_run_once.py --symbols 40 --states IDLE --cycles 20 --output bench.json
+#   python bench_run_once.py --klines-file velas_btc_1m.json  # usar velas grabadas (formato client.klines)
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+import numpy as np
+
+ALL_SYMBOL_COUNTS = [10, 40, 200, 1000]
+ALL_STATES = ['IDLE', 'IN_POSITION', 'WAITING_ENTRY_FILL', 'WAITING_EXIT_FILL']
+
+# Parámetros base: los de la estrategia por defecto, con valores que mantienen al bot en el estado medido
+# (la entrada nunca se dispara y el TP/SL quedan lejos del precio).
+BENCH_TRADING_PARAMS = {
+    'rsi_interval': '1m',
+    'rsi_period': 14,
+    'rsi_threshold_up': 1000.0,
+    'rsi_threshold_down': -1000.0,
+    'rsi_entry_level_low': 25.0,
+    'rsi_entry_level_high': 75.0,
+    'volume_sma_period': 20,
+    'volume_factor': 1.5,
+    'position_size_usdt': 50,
+    'take_profit_usdt': 1000000,
+    'stop_loss_usdt': -45,
+    'order_timeout_seconds': 10 ** 9,
+    'downtrend_check_candles': 3,
+    'downtrend_level_check': 3,
+    'required_uptrend_candles': 2,
+    'enable_price_trailing_stop': False,
+    'enable_pnl_trailing_stop': False,
+    'enable_trailing_rsi_stop': False,
+    'enable_tick_exit_monitor': False, # Sin websocket real en el benchmark
+    'enable_local_pnl': False,
+    'enable_order_chasing': False,
+    'enable_order_book_cache': False,
+    'async_order_execution': False, # Órdenes en línea: el benchmark mide run_once completo
+}
+
+
+def _percentile_ms(values: list[float], q: float) -> float:
+    return float(np.percentile(np.asarray(values), q) * 1000.0) if values else 0.0
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _build_klines(symbols: list[str], candles: int, seed: int, klines_file: str | None) -> dict:
+    from src.mock_exchange import generate_random_walk_klines, load_klines_file
+
+    if klines_file:
+        recorded = load_klines_file(klines_file)
+        return {symbol: recorded for symbol in symbols}
+    return {symbol: generate_random_walk_klines(candles, start_price=100.0, seed=seed + i) for i, symbol in enumerate(symbols)}
+
+
+def _prepare_bot(symbol: str, state: str, mock_client, trading_params):
+    """Construye un TradingBot y lo deja en el estado pedido usando órdenes reales del exchange simulado."""
+    from src.bot import TradingBot, BotState
+    from src.binance_client import create_futures_limit_order
+
+    current_price = Decimal(mock_client.book_ticker(symbol=symbol)['bidPrice'])
+    quantity = (trading_params.position_size_usdt / current_price).quantize(Decimal('0.001'))
+    if state in ('IN_POSITION', 'WAITING_EXIT_FILL'):
+        mock_client.set_position(symbol, float(quantity), float(current_price))
+
+    bot = TradingBot(symbol, trading_params)
+
+    if state == 'WAITING_ENTRY_FILL':
+        order = create_futures_limit_order(symbol, 'BUY', float(quantity), float(bot._adjust_price(current_price / 2)))
+        bot.pending_entry_order_id = order['orderId']
+        bot.pending_order_timestamp = time.time()
+        bot._update_state(BotState.WAITING_ENTRY_FILL)
+    elif state == 'WAITING_EXIT_FILL':
+        order = create_futures_limit_order(symbol, 'SELL', float(quantity), float(bot._adjust_price(current_price * 2)))
+        bot.pending_exit_order_id = order['orderId']
+        bot.pending_order_timestamp = time.time()
+        bot.current_exit_reason = 'bench'
+        bot._update_state(BotState.WAITING_EXIT_FILL)
+    return bot
+
+
+def run_scenario(num_symbols: int, state: str, cycles: int, warmup_cycles: int, alloc_cycles: int,
+                 seed: int, klines_file: str | None) -> dict:
+    """Ejecuta un escenario (N símbolos en un estado) en el proceso actual y devuelve sus métricas."""
+    import src.bot as bot_module
+    from src.binance_client import set_futures_client
+    from src.mock_exchange import MockUMFutures
+
+    # La DB no forma parte de lo que se mide y no está disponible offline
+    bot_module.enqueue_trade = lambda *args, **kwargs: True
+    bot_module.check_if_binance_trade_exists = lambda *args, **kwargs: False
+
+    symbols = [f"BENCH{i:04d}USDT" for i in range(num_symbols)]
+    klines_by_symbol = _build_klines(symbols, candles=warmup_cycles + cycles + alloc_cycles + 200, seed=seed, klines_file=klines_file)
+    mock_client = MockUMFutures(klines_by_symbol, warmup_candles=150)
+    set_futures_client(mock_client)
+
+    from src.trading_params import TradingParams
+
+    setup_start = time.perf_counter()
+    shared_params = TradingParams.from_mapping(BENCH_TRADING_PARAMS) # Igual que api_server: un objeto compartido por todos los bots
+    bots = [_prepare_bot(symbol, state, mock_client, shared_params) for symbol in symbols]
+    setup_seconds = time.perf_counter() - setup_start
+
+    def one_cycle(latencies: list[float] | None):
+        for bot in bots:
+            start = time.perf_counter()
+            bot.run_once()
+            if latencies is not None:
+                latencies.append(time.perf_counter() - start)
+        mock_client.advance()
+
+    for _ in range(warmup_cycles):
+        one_cycle(None)
+
+    calls_before = dict(mock_client.call_counts)
+    run_once_latencies, cycle_wall, cycle_cpu = [], [], []
+    for _ in range(cycles):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        one_cycle(run_once_latencies)
+        cycle_cpu.append(time.process_time() - cpu_start)
+        cycle_wall.append(time.perf_counter() - wall_start)
+    api_calls = {method: (count - calls_before.get(method, 0)) / cycles for method, count in mock_client.call_counts.items() if count - calls_before.get(method, 0) > 0}
+
+    # Pasada aparte con tracemalloc (lo ralentiza todo, por eso no se mezcla con los tiempos)
+    alloc_peak, alloc_net = [], []
+    if alloc_cycles > 0:
+        tracemalloc.start()
+        for _ in range(alloc_cycles):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            one_cycle(None)
+            after, peak = tracemalloc.get_traced_memory()
+            alloc_peak.append(peak - before)
+            alloc_net.append(after - before)
+        tracemalloc.stop()
+
+    final_states = {}
+    for bot in bots:
+        final_states[bot.current_state.name] = final_states.get(bot.current_state.name, 0) + 1
+
+    return {
+        'symbols': num_symbols,
+        'state': state,
+        'cycles': cycles,
+        'setup_seconds': round(setup_seconds, 4),
+        'cycle_cpu_ms': {'mean': float(np.mean(cycle_cpu) * 1000.0) if cycle_cpu else 0.0,
+                         'p50': _percentile_ms(cycle_cpu, 50), 'p99': _percentile_ms(cycle_cpu, 99)},
+        'cycle_wall_ms': {'p50': _percentile_ms(cycle_wall, 50), 'p99': _percentile_ms(cycle_wall, 99), 'max': max(cycle_wall) * 1000.0 if cycle_wall else 0.0},
+        'run_once_ms': {'p50': _percentile_ms(run_once_latencies, 50), 'p99': _percentile_ms(run_once_latencies, 99)},
+        'cpu_ms_per_symbol': float(np.mean(cycle_cpu) * 1000.0 / num_symbols) if cycle_cpu else 0.0,
+        'alloc_peak_kb_per_cycle': float(np.median(alloc_peak) / 1024) if alloc_peak else None,
+        'alloc_net_kb_per_cycle': float(np.median(alloc_net) / 1024) if alloc_net else None,
+        'peak_rss_mb': round(_peak_rss_mb(), 2),
+        'api_calls_per_cycle': api_calls,
+        'final_states': final_states,
+    }
+
+
+def _run_isolated(args, num_symbols: int, state: str) -> dict:
+    """Ejecuta el escenario en un subproceso para que el RSS pico no se contamine entre escenarios."""
+    command = [sys.executable, os.path.abspath(__file__), '--single', '--symbols', str(num_symbols), '--states', state,
+               '--cycles', str(args.cycles), '--warmup-cycles', str(args.warmup_cycles), '--alloc-cycles', str(args.alloc_cycles),
+               '--seed', str(args.seed), '--log-level', args.log_level, '--log-file', args.log_file]
+    if args.klines_file:
+        command += ['--klines-file', args.klines_file]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'symbols': num_symbols, 'state': state, 'error': completed.stderr.strip()[-2000:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de TradingBot.run_once contra el exchange simulado.')
+    parser.add_argument('--symbols', default=','.join(str(n) for n in ALL_SYMBOL_COUNTS), help='Lista de cantidades de símbolos (ej. 10,40,200,1000)')
+    parser.add_argument('--states', default=','.join(ALL_STATES), help=f"Estados a medir ({', '.join(ALL_STATES)})")
+    parser.add_argument('--cycles', type=int, default=10, help='Ciclos medidos por escenario')
+    parser.add_argument('--warmup-cycles', type=int, default=2, help='Ciclos de calentamiento no medidos')
+    parser.add_argument('--alloc-cycles', type=int, default=2, help='Ciclos medidos con tracemalloc (0 = desactivado)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para las velas sintéticas')
+    parser.add_argument('--klines-file', default=None, help='Velas grabadas (JSON en formato client.klines) a reproducir en todos los símbolos')
+    parser.add_argument('--log-level', default='WARNING', help='Nivel de log del bot durante la medición')
+    parser.add_argument('--log-file', default=os.devnull, help='Archivo de log del bot (por defecto se descarta)')
+    parser.add_argument('--output', default=None, help='Ruta del JSON de resultados (por defecto stdout)')
+    parser.add_argument('--no-isolate', action='store_true', help='Ejecutar todos los escenarios en el mismo proceso')
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    symbol_counts = [int(n) for n in args.symbols.split(',') if n.strip()]
+    states = [s.strip().upper() for s in args.states.split(',') if s.strip()]
+    invalid_states = [s for s in states if s not in ALL_STATES]
+    if invalid_states:
+        parser.error(f"Estados inválidos: {invalid_states}. Válidos: {ALL_STATES}")
+
+    if args.single or args.no_isolate:
+        from src.logger_setup import setup_logging
+        bench_logger = setup_logging(log_filename=args.log_file)
+        if bench_logger:
+            # Sólo el archivo: stdout queda reservado para el JSON de resultados
+            for handler in list(bench_logger.handlers):
+                if isinstance(handler, logging.StreamHandler) and getattr(handler, 'stream', None) is sys.stdout:
+                    bench_logger.removeHandler(handler)
+            bench_logger.setLevel(getattr(logging, args.log_level.upper(), logging.WARNING))
+
+    if args.single:
+        print(json.dumps(run_scenario(symbol_counts[0], states[0], args.cycles, args.warmup_cycles, args.alloc_cycles, args.seed, args.klines_file)))
+        return
+
+    results = []
+    for num_symbols in symbol_counts:
+        for state in states:
+            print(f"Ejecutando escenario: {num_symbols} símbolos, estado {state}...", file=sys.stderr)
+            if args.no_isolate:
+                result = run_scenario(num_symbols, state, args.cycles, args.warmup_cycles, args.alloc_cycles, args.seed, args.klines_file)
+            else:
+                result = _run_isolated(args, num_symbols, state)
+            results.append(result)
+            if 'error' in result:
+                print(f"  ERROR: {result['error'].splitlines()[-1] if result['error'] else 'desconocido'}", file=sys.stderr)
+            else:
+                print(f"  CPU/ciclo p50={result['cycle_cpu_ms']['p50']:.1f}ms p99={result['cycle_cpu_ms']['p99']:.1f}ms, "
+                      f"run_once p50={result['run_once_ms']['p50']:.2f}ms p99={result['run_once_ms']['p99']:.2f}ms, RSS pico={result['peak_rss_mb']}MB",
+                      file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cycles': args.cycles,
+            'warmup_cycles': args.warmup_cycles,
+            'alloc_cycles': args.alloc_cycles,
+            'seed': args.seed,
+            'klines_file': args.klines_file,
+            'log_level': args.log_level,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Resultados guardados en {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
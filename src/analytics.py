@@ -0,0 +1,360 @@
+# Analítica de rendimiento sobre la tabla 'trades': curvas de equity, drawdown, win rate,
+# tiempo medio en posición y PnL por close_reason, por símbolo y por estrategia.
+#
+# Los trades cerrados se guardan en columnas NumPy en memoria. La carga inicial y los recálculos
+# son vectorizados; después cada trade nuevo actualiza los agregados en O(1) (incluidos los rollups
+# por minuto / hora / día), así que el dashboard no vuelve a recorrer el historial.
+# Los trades nuevos se leen de la DB por id (database.get_closed_trades_after_id): database.py avisa
+# tras cada inserción y, si el bot corre en otro proceso, se sincroniza como mucho cada ANALYTICS_SYNC_SECONDS.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .logger_setup import get_logger
+from . import database
+
+ANALYTICS_SYNC_SECONDS = float(os.environ.get('ANALYTICS_SYNC_SECONDS', '5'))
+ANALYTICS_LOAD_BATCH_SIZE = 5000
+
+ROLLUP_GRANULARITIES = {'minute': 60, 'hour': 3600, 'day': 86400}
+ALL_KEY = 'ALL'
+
+
+def _to_epoch_seconds(value) -> float | None:
+    """close/open_timestamp vienen como datetime (PostgreSQL) o isoformat (SQLite). Sin zona se asume UTC."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def strategy_fingerprint(parameters) -> tuple[str, dict]:
+    """
+    Identificador estable de la estrategia de un trade: hash corto de sus parámetros (columna 'parameters').
+    Los trades no guardan el nombre de la estrategia, así que dos trades con los mismos parámetros
+    cuentan como la misma estrategia.
+    """
+    if not parameters:
+        return 'sin-parametros', {}
+    if isinstance(parameters, str):
+        try:
+            parameters = json.loads(parameters)
+        except ValueError:
+            return 'sin-parametros', {}
+    canonical = json.dumps(parameters, sort_keys=True, default=str)
+    return f"params-{hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:10]}", parameters
+
+
+class _RunningStats:
+    """Agregados de una serie (símbolo, estrategia o total) actualizados trade a trade."""
+    __slots__ = ('trades', 'wins', 'pnl_total', 'equity_peak', 'max_drawdown', 'hold_seconds_total',
+                 'last_close_ts', 'pnl_by_reason', 'trades_by_reason', 'dirty')
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.pnl_total = 0.0
+        self.equity_peak = 0.0
+        self.max_drawdown = 0.0
+        self.hold_seconds_total = 0.0
+        self.last_close_ts = float('-inf')
+        self.pnl_by_reason = {}
+        self.trades_by_reason = {}
+        self.dirty = False
+
+    def add(self, close_ts: float, hold_seconds: float, pnl: float, reason: str):
+        if close_ts < self.last_close_ts:
+            # Llegó fuera de orden: el drawdown depende del orden, se recalcula vectorizado al consultar
+            self.dirty = True
+        self.last_close_ts = max(self.last_close_ts, close_ts)
+        self.trades += 1
+        self.wins += 1 if pnl > 0 else 0
+        self.pnl_total += pnl
+        self.hold_seconds_total += hold_seconds
+        self.pnl_by_reason[reason] = self.pnl_by_reason.get(reason, 0.0) + pnl
+        self.trades_by_reason[reason] = self.trades_by_reason.get(reason, 0) + 1
+        if not self.dirty:
+            self.equity_peak = max(self.equity_peak, self.pnl_total)
+            self.max_drawdown = max(self.max_drawdown, self.equity_peak - self.pnl_total)
+
+    def to_dict(self) -> dict:
+        return {
+            'trades': self.trades,
+            'wins': self.wins,
+            'losses': self.trades - self.wins,
+            'win_rate': (self.wins / self.trades) if self.trades else None,
+            'total_pnl_usdt': self.pnl_total,
+            'avg_pnl_usdt': (self.pnl_total / self.trades) if self.trades else None,
+            'max_drawdown_usdt': self.max_drawdown,
+            'current_drawdown_usdt': self.equity_peak - self.pnl_total,
+            'avg_hold_seconds': (self.hold_seconds_total / self.trades) if self.trades else None,
+            'pnl_by_close_reason': dict(self.pnl_by_reason),
+            'trades_by_close_reason': dict(self.trades_by_reason),
+        }
+
+
+class TradeAnalytics:
+    """Almacén columnar de trades cerrados con agregados incrementales y rollups temporales."""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._size = 0
+        self._close_ts = np.empty(initial_capacity, dtype=np.float64)
+        self._hold = np.empty(initial_capacity, dtype=np.float64)
+        self._pnl = np.empty(initial_capacity, dtype=np.float64)
+        self._series_codes = np.empty((initial_capacity, 2), dtype=np.int32) # (símbolo, estrategia)
+        self._reason_codes = np.empty(initial_capacity, dtype=np.int32)
+        self._codes = {} # clave de serie ('symbol:BTCUSDT', 'strategy:params-..') -> código
+        self._reasons = [] # código -> close_reason
+        self._reason_index = {}
+        self._strategy_params = {} # fingerprint -> parámetros
+        self._stats = {ALL_KEY: _RunningStats()}
+        self._rollups = {name: {} for name in ROLLUP_GRANULARITIES} # granularidad -> serie -> {bucket: [pnl, trades, wins]}
+        self._curve_cache = {} # serie -> (tamaño del almacén al calcularla, curva)
+        self._last_id = 0
+        self._loaded = False
+        self._needs_sync = True
+        self._last_sync = 0.0
+
+    # --- Ingesta ---
+
+    def _ensure_capacity(self, extra: int):
+        needed = self._size + extra
+        capacity = len(self._pnl)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ('_close_ts', '_hold', '_pnl', '_reason_codes', '_series_codes'):
+            old = getattr(self, name)
+            grown = np.empty((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def _code_for(self, key: str) -> int:
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self._codes)
+        return code
+
+    def _reason_code(self, reason: str) -> int:
+        code = self._reason_index.get(reason)
+        if code is None:
+            code = self._reason_index[reason] = len(self._reasons)
+            self._reasons.append(reason)
+        return code
+
+    def _append_rows(self, rows: list, update_running: bool):
+        """Añade trades de la DB. Con update_running=False (carga masiva) los agregados se recalculan después en bloque."""
+        parsed = []
+        for row in rows:
+            close_ts = _to_epoch_seconds(row.get('close_timestamp'))
+            if close_ts is None or row.get('pnl_usdt') is None:
+                continue
+            open_ts = _to_epoch_seconds(row.get('open_timestamp'))
+            fingerprint, params = strategy_fingerprint(row.get('parameters'))
+            self._strategy_params.setdefault(fingerprint, params)
+            parsed.append((close_ts, max(0.0, close_ts - open_ts) if open_ts is not None else 0.0, float(row['pnl_usdt']),
+                           str(row.get('symbol') or ''), fingerprint, row.get('close_reason') or 'desconocido'))
+        if not parsed:
+            return
+        self._ensure_capacity(len(parsed))
+        start = self._size
+        for offset, (close_ts, hold, pnl, symbol, fingerprint, reason) in enumerate(parsed):
+            i = start + offset
+            symbol_key, strategy_key = f"symbol:{symbol}", f"strategy:{fingerprint}"
+            self._close_ts[i] = close_ts
+            self._hold[i] = hold
+            self._pnl[i] = pnl
+            self._series_codes[i] = (self._code_for(symbol_key), self._code_for(strategy_key))
+            self._reason_codes[i] = self._reason_code(reason)
+            for series_key in (ALL_KEY, symbol_key, strategy_key):
+                stats = self._stats.get(series_key)
+                if stats is None:
+                    stats = self._stats[series_key] = _RunningStats()
+                    stats.dirty = not update_running
+                if update_running:
+                    stats.add(close_ts, hold, pnl, reason)
+                else:
+                    stats.dirty = True
+                for granularity, bucket_seconds in ROLLUP_GRANULARITIES.items():
+                    bucket = int(close_ts // bucket_seconds * bucket_seconds)
+                    cell = self._rollups[granularity].setdefault(series_key, {}).setdefault(bucket, [0.0, 0, 0])
+                    cell[0] += pnl
+                    cell[1] += 1
+                    cell[2] += 1 if pnl > 0 else 0
+        self._size += len(parsed)
+
+    def _mask_for(self, series_key: str) -> np.ndarray | None:
+        if series_key == ALL_KEY:
+            return None
+        code = self._codes.get(series_key)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        column = 0 if series_key.startswith('symbol:') else 1
+        return self._series_codes[:self._size, column] == code
+
+    def _recompute(self, series_key: str):
+        """Recalcula (vectorizado) los agregados de una serie desde las columnas."""
+        mask = self._mask_for(series_key)
+        close_ts = self._close_ts[:self._size] if mask is None else self._close_ts[:self._size][mask]
+        order = np.argsort(close_ts, kind='stable')
+        pnl = (self._pnl[:self._size] if mask is None else self._pnl[:self._size][mask])[order]
+        hold = self._hold[:self._size] if mask is None else self._hold[:self._size][mask]
+        reasons = self._reason_codes[:self._size] if mask is None else self._reason_codes[:self._size][mask]
+
+        stats = _RunningStats()
+        stats.trades = int(pnl.size)
+        if pnl.size:
+            equity = np.cumsum(pnl)
+            peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+            stats.wins = int(np.count_nonzero(pnl > 0))
+            stats.pnl_total = float(equity[-1])
+            stats.equity_peak = float(peak[-1])
+            stats.max_drawdown = float(np.max(peak - equity))
+            stats.hold_seconds_total = float(hold.sum())
+            stats.last_close_ts = float(close_ts[order[-1]])
+            pnl_by_reason = np.bincount(reasons, weights=self._pnl[:self._size] if mask is None else self._pnl[:self._size][mask],
+                                        minlength=len(self._reasons))
+            trades_by_reason = np.bincount(reasons, minlength=len(self._reasons))
+            for code in np.flatnonzero(trades_by_reason):
+                stats.pnl_by_reason[self._reasons[code]] = float(pnl_by_reason[code])
+                stats.trades_by_reason[self._reasons[code]] = int(trades_by_reason[code])
+        self._stats[series_key] = stats
+        return stats
+
+    # --- Sincronización con la DB ---
+
+    def notify_inserted(self, rows=None):
+        """Listener de database.py: hay trades nuevos; se leen por id en la próxima consulta."""
+        self._needs_sync = True
+
+    def sync(self, force: bool = False):
+        """Lee de la DB los trades con id mayor al último visto (carga completa la primera vez)."""
+        logger = get_logger()
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._loaded and not self._needs_sync and (now - self._last_sync) < ANALYTICS_SYNC_SECONDS:
+                return
+            self._needs_sync = False
+            self._last_sync = now
+            initial_load = not self._loaded
+            loaded_rows = 0
+            while True:
+                rows = database.get_closed_trades_after_id(self._last_id, ANALYTICS_LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                self._append_rows(rows, update_running=not initial_load)
+                self._last_id = max(self._last_id, max(int(row['id']) for row in rows))
+                loaded_rows += len(rows)
+                if len(rows) < ANALYTICS_LOAD_BATCH_SIZE:
+                    break
+            if initial_load:
+                for series_key in list(self._stats):
+                    self._recompute(series_key)
+                self._loaded = True
+                logger.info(f"Analítica de trades cargada: {loaded_rows} trade(s) cerrados, {len(self._stats)} serie(s).")
+            elif loaded_rows:
+                logger.debug(f"Analítica de trades: {loaded_rows} trade(s) nuevos incorporados.")
+
+    # --- Consultas ---
+
+    @staticmethod
+    def series_key(symbol: str | None = None, strategy: str | None = None) -> str:
+        if symbol:
+            return f"symbol:{symbol.upper()}"
+        if strategy:
+            return f"strategy:{strategy}"
+        return ALL_KEY
+
+    def _stats_for(self, series_key: str) -> dict | None:
+        stats = self._stats.get(series_key)
+        if stats is None:
+            return None
+        if stats.dirty:
+            stats = self._recompute(series_key)
+        return stats.to_dict()
+
+    def summary(self, symbol: str | None = None, strategy: str | None = None) -> dict | None:
+        """Métricas de una serie; sin símbolo ni estrategia devuelve el total más el desglose por símbolo y estrategia."""
+        self.sync()
+        with self._lock:
+            if symbol or strategy:
+                return self._stats_for(self.series_key(symbol, strategy))
+            return {
+                'overall': self._stats_for(ALL_KEY),
+                'symbols': {key.split(':', 1)[1]: self._stats_for(key) for key in self._stats if key.startswith('symbol:')},
+                'strategies': {key.split(':', 1)[1]: self._stats_for(key) for key in self._stats if key.startswith('strategy:')},
+            }
+
+    def equity_curve(self, symbol: str | None = None, strategy: str | None = None,
+                     granularity: str | None = None) -> list:
+        """
+        Curva de equity [[timestamp_ms, pnl_acumulado], ...]. Con granularidad se construye desde los
+        rollups (un punto por bucket); sin ella, un punto por trade.
+        """
+        self.sync()
+        series_key = self.series_key(symbol, strategy)
+        with self._lock:
+            if granularity:
+                buckets = self._rollups[granularity].get(series_key, {})
+                if not buckets:
+                    return []
+                bucket_ts = np.fromiter(sorted(buckets), dtype=np.int64, count=len(buckets))
+                equity = np.cumsum([buckets[ts][0] for ts in bucket_ts.tolist()])
+                return [[ts_ms, value] for ts_ms, value in zip(((bucket_ts + ROLLUP_GRANULARITIES[granularity]) * 1000).tolist(), equity.tolist())]
+            cached = self._curve_cache.get(series_key)
+            if cached and cached[0] == self._size:
+                return cached[1]
+            mask = self._mask_for(series_key)
+            close_ts = self._close_ts[:self._size] if mask is None else self._close_ts[:self._size][mask]
+            pnl = self._pnl[:self._size] if mask is None else self._pnl[:self._size][mask]
+            order = np.argsort(close_ts, kind='stable')
+            curve = [[ts_ms, value] for ts_ms, value in zip(np.round(close_ts[order] * 1000).astype(np.int64).tolist(), np.cumsum(pnl[order]).tolist())]
+            self._curve_cache[series_key] = (self._size, curve)
+            return curve
+
+    def rollups(self, granularity: str, symbol: str | None = None, strategy: str | None = None,
+                start_ms: int | None = None, end_ms: int | None = None) -> list:
+        """Buckets [[inicio_ms, pnl, trades, wins], ...] en orden temporal (start incluido, end excluido)."""
+        self.sync()
+        with self._lock:
+            buckets = self._rollups[granularity].get(self.series_key(symbol, strategy), {})
+            result = []
+            for bucket in sorted(buckets):
+                bucket_ms = bucket * 1000
+                if (start_ms is not None and bucket_ms < start_ms) or (end_ms is not None and bucket_ms >= end_ms):
+                    continue
+                pnl, trades, wins = buckets[bucket]
+                result.append([bucket_ms, pnl, trades, wins])
+            return result
+
+    def strategies(self) -> dict:
+        """fingerprint -> parámetros de los trades de esa estrategia."""
+        self.sync()
+        with self._lock:
+            return dict(self._strategy_params)
+
+
+_analytics_instance = None
+_analytics_instance_lock = threading.Lock()
+
+def get_trade_analytics() -> TradeAnalytics:
+    """Instancia compartida; se registra como listener de database.py la primera vez."""
+    global _analytics_instance
+    with _analytics_instance_lock:
+        if _analytics_instance is None:
+            _analytics_instance = TradeAnalytics()
+            database.register_trade_listener(_analytics_instance.notify_inserted)
+        return _analytics_instance
@@ -5,6 +5,7 @@ import os
 import sys
 import configparser
 import json # <--- AÑADIR IMPORT JSON
+from datetime import datetime, timezone
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import threading
@@ -21,8 +22,25 @@ import logging # Necesario para get_logger y calculate_sleep
 from src.config_loader import load_config, get_trading_symbols, CONFIG_FILE_PATH
 from src.logger_setup import setup_logging, get_logger
 from src.database import get_cumulative_pnl_by_symbol, get_last_n_trades_for_symbol, init_db_schema
+from src.database import get_trades_page, TRADE_HISTORY_DEFAULT_LIMIT, TRADE_HISTORY_MAX_LIMIT
 # Importar TradingBot y BotState para run_bot_worker
 from src.bot import TradingBot, BotState 
+from src.trading_params import TradingParams
+from src.strategy_repository import StrategyRepository
+from src.analytics import get_trade_analytics, ROLLUP_GRANULARITIES
+from src.market_stream import stop_market_stream
+from src.scheduler import next_wake_delay
+from src.clock_sync import get_clock_metrics
+from src.order_chaser import get_execution_metrics
+from src.startup_snapshot import fetch_startup_snapshot
+from src.fills_ledger import start_fills_stream
+from src.user_stream import stop_user_stream
+from src.pnl_engine import stop_pnl_engine
+from src.order_book import stop_order_book_cache
+from src.order_executor import get_order_executor, stop_order_executor
+from src.reconciler import get_order_reconciler, stop_order_reconciler
+from src.decision_journal import (get_decision_journal, stop_decision_journal, ACTION_NAMES, CONDITION_NAMES,
+                                  DECISION_QUERY_MAX_LIMIT)
 
 # --- Definición de variables compartidas para la gestión de workers ---
 worker_statuses = {} # Ej: {'BTCUSDT': {'state': 'IN_POSITION', 'pnl': 5.2}, 'ETHUSDT': ...}
@@ -31,8 +49,12 @@ stop_event = threading.Event() # Evento global para detener todos los hilos
 threads = [] # Lista para guardar las instancias de los hilos de los workers
 workers_started = False # Flag para saber si los workers están activos
 # Variables para almacenar la configuración cargada al inicio
-loaded_trading_params = {}
+loaded_trading_params = None # TradingParams validado (o None si aún no se cargó)
 loaded_symbols_to_trade = []
+# --- Registro de workers para la recarga en caliente (protegido por status_lock) ---
+worker_registry = {} # Ej: {'BTCUSDT': {'thread': Thread, 'stop_event': Event, 'bot': TradingBot | None}}
+active_trading_params = None # TradingParams que usan los workers en marcha
+draining_symbols = set() # Símbolos retirados que siguen vivos hasta cerrar su posición / órdenes
 # --------------------------------------------------------------------
 
 # --- Directorio para Estrategias Guardadas ---
@@ -49,6 +71,8 @@ if not os.path.exists(STRATEGIES_PATH):
         print(f"Directorio de estrategias creado en: {STRATEGIES_PATH}") # Usar print si el logger no está listo
     except OSError as e:
         print(f"Error al crear el directorio de estrategias {STRATEGIES_PATH}: {e}")
+# Índice en memoria de las estrategias (evita listar y parsear la carpeta en cada petición)
+strategy_repository = StrategyRepository(STRATEGIES_PATH)
 # -------------------------------------------
 
 # --- Funciones para calcular sleep (Movidas desde run_bot.py) ---
@@ -71,7 +95,7 @@ def calculate_sleep_from_interval(interval_str: str) -> int:
         logger.warning(f"Formato de intervalo inválido '{interval_str}'. Usando 60s por defecto.")
         return 60
 
-def get_sleep_seconds(trading_params: dict) -> int:
+def get_sleep_seconds(trading_params: TradingParams | dict) -> int:
     """Obtiene el tiempo de espera en segundos desde los parámetros o lo calcula."""
     logger = get_logger()
     try:
@@ -159,12 +183,13 @@ def map_frontend_trading_binance(frontend_data: dict) -> dict:
             'volume_sma_period': str(frontend_data.get('volumeSmaPeriod', 20)),
             'volume_factor': str(frontend_data.get('volumeFactor', 1.5)),
             'downtrend_check_candles': str(frontend_data.get('downtrendCheckCandles', 3)),
-            'downtrend_level_check': str(frontend_data.get('downtrend_level_check', 5)),
+            'downtrend_level_check': str(frontend_data.get('downtrend_level_check', frontend_data.get('downtrendLevelCheck', 5))),
             'required_uptrend_candles': str(frontend_data.get('requiredUptrendCandles', 0)),
             'position_size_usdt': str(frontend_data.get('positionSizeUSDT', 50)),
             'stop_loss_usdt': str(frontend_data.get('stopLossUSDT', 20)),
             'take_profit_usdt': str(frontend_data.get('takeProfitUSDT', 30)),
             'cycle_sleep_seconds': str(frontend_data.get('cycleSleepSeconds', 5)),
+            'adaptive_scheduling': str(frontend_data.get('adaptiveScheduling', True)).lower(),
             'order_timeout_seconds': str(frontend_data.get('orderTimeoutSeconds', 10)),
             'evaluate_rsi_delta': str(frontend_data.get('evaluateRsiDelta', True)).lower(),
             'evaluate_volume_filter': str(frontend_data.get('evaluateVolumeFilter', True)).lower(),
@@ -178,9 +203,17 @@ def map_frontend_trading_binance(frontend_data: dict) -> dict:
             'enable_price_trailing_stop': str(frontend_data.get('enablePriceTrailingStop', True)).lower(),
             'price_trailing_stop_distance_usdt': str(frontend_data.get('priceTrailingStopDistanceUSDT', 0.05)),
             'price_trailing_stop_activation_pnl_usdt': str(frontend_data.get('priceTrailingStopActivationPnlUSDT', 0.02)),
+            'price_trailing_stop_mode': str(frontend_data.get('priceTrailingStopMode', 'local')).lower(),
             'enable_pnl_trailing_stop': str(frontend_data.get('enablePnlTrailingStop', True)).lower(),
             'pnl_trailing_stop_activation_usdt': str(frontend_data.get('pnlTrailingStopActivationUSDT', 0.1)),
             'pnl_trailing_stop_drop_usdt': str(frontend_data.get('pnlTrailingStopDropUSDT', 0.05)),
+            'enable_tick_exit_monitor': str(frontend_data.get('enableTickExitMonitor', True)).lower(),
+            'enable_local_pnl': str(frontend_data.get('enableLocalPnl', True)).lower(),
+            'enable_order_chasing': str(frontend_data.get('enableOrderChasing', True)).lower(),
+            'order_chase_max_distance_pct': str(frontend_data.get('orderChaseMaxDistancePct', 0.3)),
+            'order_post_only': str(frontend_data.get('orderPostOnly', False)).lower(),
+            'enable_order_book_cache': str(frontend_data.get('enableOrderBookCache', True)).lower(),
+            'async_order_execution': str(frontend_data.get('asyncOrderExecution', True)).lower(),
             'evaluate_open_interest_increase': str(frontend_data.get('evaluateOpenInterestIncrease', True)).lower(),
             'open_interest_period': frontend_data.get('openInterestPeriod', '5m')
         },
@@ -195,10 +228,33 @@ def map_frontend_trading_binance(frontend_data: dict) -> dict:
             pass 
     return config_output
 
+def _wait_for_worker_stop(worker_stop_event: threading.Event, timeout: float, wake_event: threading.Event | None = None) -> bool:
+    """
+    Espera hasta `timeout` segundos. True si se pidió detener este worker o todos (stop_event global).
+    Si se pasa `wake_event` (p.ej. el monitor de ticks pidió una salida), la espera termina antes y devuelve False.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return worker_stop_event.is_set() or stop_event.is_set()
+        # Esperar en tramos cortos para reaccionar también al stop_event global
+        if wake_event is not None:
+            if wake_event.wait(timeout=min(remaining, 1.0)):
+                wake_event.clear()
+                return worker_stop_event.is_set() or stop_event.is_set()
+            if worker_stop_event.is_set() or stop_event.is_set():
+                return True
+        elif worker_stop_event.wait(timeout=min(remaining, 1.0)) or stop_event.is_set():
+            return True
+
 # --- Función run_bot_worker (Movida desde run_bot.py) ---
 # Adaptada para usar las variables globales definidas aquí
-def run_bot_worker(symbol, trading_params, stop_event_ref):
-    """Función ejecutada por cada hilo para manejar un bot de símbolo único."""
+def run_bot_worker(symbol, trading_params, stop_event_ref, snapshot=None):
+    """
+    Función ejecutada por cada hilo para manejar un bot de símbolo único.
+    `snapshot` es la foto de arranque compartida (StartupSnapshot); sin ella el bot consulta su símbolo.
+    """
     logger = get_logger()
     
     bot_instance = None
@@ -218,9 +274,15 @@ def run_bot_worker(symbol, trading_params, stop_event_ref):
         # Obtener sleep_duration aquí usando la función movida
         sleep_duration = get_sleep_seconds(trading_params)
         
-        bot_instance = TradingBot(symbol=symbol, trading_params=trading_params)
+        bot_instance = TradingBot(symbol=symbol, trading_params=trading_params, snapshot=snapshot)
         with status_lock:
              worker_statuses[symbol] = bot_instance.get_current_status() 
+             registry_entry = worker_registry.get(symbol)
+             if registry_entry and registry_entry['stop_event'] is stop_event_ref:
+                 registry_entry['bot'] = bot_instance
+             # Si hubo una recarga mientras el bot se inicializaba, adoptar la versión vigente
+             if active_trading_params is not None and active_trading_params is not bot_instance.params:
+                 bot_instance.request_params_update(active_trading_params)
         logger.info(f"[{symbol}] Worker thread iniciado. Instancia de TradingBot creada. Tiempo de espera: {sleep_duration}s") # Usar sleep_duration
     except (ValueError, ConnectionError) as init_error:
          logger.error(f"No se pudo inicializar la instancia de TradingBot para {symbol}: {init_error}. Terminando worker.", exc_info=True)
@@ -242,15 +304,33 @@ def run_bot_worker(symbol, trading_params, stop_event_ref):
               }
          return
 
-    # Ya no necesitamos get_sleep_seconds aquí si lo calculamos antes
+    sleep_params_version = bot_instance.params.version
 
-    while not stop_event_ref.is_set():
+    while not (stop_event_ref.is_set() or stop_event.is_set()):
+        wait_seconds = sleep_duration
         try:
             if bot_instance:
                 bot_instance.run_once()
             if bot_instance:
+                # Recalcular la espera si el bot adoptó parámetros nuevos (cycle_sleep_seconds / rsi_interval)
+                if bot_instance.params.version != sleep_params_version:
+                    sleep_params_version = bot_instance.params.version
+                    sleep_duration = get_sleep_seconds(bot_instance.params)
+                    wait_seconds = sleep_duration
+                # Próximo ciclo según el estado del bot (órdenes pendientes / posición / cierre de vela)
+                schedule_reason = 'fixed'
+                if bot_instance.adaptive_scheduling:
+                    wait_seconds, schedule_reason = next_wake_delay(bot_instance, sleep_duration)
+                    logger.debug(f"[{symbol}] Próximo ciclo en {wait_seconds:.1f}s ({schedule_reason}).")
+                status_snapshot = bot_instance.get_current_status()
+                status_snapshot['next_cycle_in_seconds'] = round(wait_seconds, 1)
+                status_snapshot['schedule_reason'] = schedule_reason
                 with status_lock:
-                     worker_statuses[symbol] = bot_instance.get_current_status()
+                     worker_statuses[symbol] = status_snapshot
+                # Símbolo retirado: terminar en cuanto no quede posición ni órdenes propias
+                if symbol in draining_symbols and not bot_instance.has_open_exposure():
+                    logger.info(f"[{symbol}] Símbolo retirado de la configuración y sin posición abierta. Deteniendo worker.")
+                    break
         except Exception as cycle_error:
             logger.error(f"[{symbol}] Error inesperado en el ciclo principal del worker: {cycle_error}", exc_info=True)
             if bot_instance:
@@ -272,15 +352,21 @@ def run_bot_worker(symbol, trading_params, stop_event_ref):
             # Continuar el bucle para permitir posible recuperación o apagado
             pass 
 
-        # Usar el sleep_duration calculado
-        interrupted = stop_event_ref.wait(timeout=sleep_duration)
+        # Esperar lo que decidió el planificador (o el sleep_duration fijo)
+        interrupted = _wait_for_worker_stop(stop_event_ref, wait_seconds, bot_instance.wake_event if bot_instance else None)
         if interrupted:
             logger.info(f"[{symbol}] Señal de parada recibida durante la espera.")
             break
 
+    if bot_instance:
+        bot_instance.stop_exit_monitor()
     logger.info(f"[{symbol}] Worker thread terminado.")
     # Actualizar estado final al detenerse
     with status_lock:
+         registry_entry = worker_registry.get(symbol)
+         if registry_entry and registry_entry['stop_event'] is stop_event_ref:
+             del worker_registry[symbol]
+             draining_symbols.discard(symbol)
          # Asegurarse que la entrada existe y es un diccionario
          if symbol not in worker_statuses or not isinstance(worker_statuses.get(symbol), dict):
              worker_statuses[symbol] = {'symbol': symbol} # Crear entrada mínima
@@ -288,9 +374,22 @@ def run_bot_worker(symbol, trading_params, stop_event_ref):
 # --- Fin de run_bot_worker ---
 
 
+def _registered_bots() -> dict:
+    """Bots ya inicializados de los workers en marcha ({símbolo: TradingBot}), para el conciliador de órdenes."""
+    with status_lock:
+        return {symbol: entry['bot'] for symbol, entry in worker_registry.items() if entry.get('bot') is not None}
+
 # --- Función para iniciar los workers (Movida y Adaptada) ---
+def _start_worker_locked(symbol: str, trading_params: TradingParams, snapshot=None):
+    """Lanza el hilo de un símbolo con su propio evento de parada. Llamar con status_lock tomado."""
+    worker_stop_event = threading.Event()
+    thread = threading.Thread(target=run_bot_worker, args=(symbol, trading_params, worker_stop_event, snapshot), name=f"Worker-{symbol}")
+    worker_registry[symbol] = {'thread': thread, 'stop_event': worker_stop_event, 'bot': None}
+    threads.append(thread)
+    thread.start()
+
 def start_bot_workers(bot_configs):
-    global workers_started, threads
+    global workers_started, threads, active_trading_params
     logger = get_logger()
     
     with status_lock: # Proteger acceso a workers_started y threads
@@ -300,11 +399,13 @@ def start_bot_workers(bot_configs):
 
         worker_statuses.clear() # Clear previous statuses before starting new ones
         threads.clear() # Limpiar lista de hilos anterior
+        worker_registry.clear()
+        draining_symbols.clear()
         stop_event.clear() # Asegurarse que el evento de parada no esté activo
 
         # --- FIX: Obtener la lista de símbolos desde la configuración recibida ---
         symbols_to_trade_str = bot_configs.get('symbolsToTrade', '')
-        symbols_to_trade = [s.strip() for s in symbols_to_trade_str.split(',') if s.strip()]
+        symbols_to_trade = list(dict.fromkeys(s.strip().upper() for s in symbols_to_trade_str.split(',') if s.strip()))
 
         if not symbols_to_trade:
             logger.error("No hay símbolos en la configuración recibida para iniciar los workers.")
@@ -314,24 +415,103 @@ def start_bot_workers(bot_configs):
             logger.error("No hay parámetros de trading configurados para iniciar los workers.")
             return False
 
+        # Parsear y validar los parámetros UNA sola vez; todos los workers comparten el mismo objeto inmutable
+        try:
+            shared_params = TradingParams.from_mapping(bot_configs)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Parámetros de trading inválidos, no se inician los workers: {e}")
+            return False
+
         logger.info("Iniciando workers de bot...")
-        for symbol_idx, symbol in enumerate(symbols_to_trade):
-            logger.info(f"-> Preparando worker para {symbol}...")
-            # --- FIX: Pasar el diccionario de configuración COMPLETO a cada worker ---
-            thread = threading.Thread(target=run_bot_worker, args=(symbol, bot_configs, stop_event), name=f"Worker-{symbol}")
-            threads.append(thread)
-            thread.start()
-            if (symbol_idx + 1) < len(symbols_to_trade):
-                 # Espera corta entre inicios de hilos para evitar sobrecarga inicial
-                 time.sleep(1) 
-        
+        # Tres llamadas masivas (exchange_info, posiciones, órdenes abiertas) para todos los símbolos:
+        # cada worker construye su bot desde esta foto sin REST, así que pueden arrancar todos a la vez.
+        snapshot = fetch_startup_snapshot()
+        # Fills propios por user-data stream (sin él, cada libro se sincroniza por fromId cuando lo necesita)
+        if not start_fills_stream():
+            logger.warning("User-data stream no disponible: el libro de fills se sincronizará sólo por REST (fromId).")
+        for symbol in symbols_to_trade:
+            logger.debug(f"-> Preparando worker para {symbol}...")
+            _start_worker_locked(symbol, shared_params, snapshot)
+
         num_bot_threads = len(threads)
+        active_trading_params = shared_params
         workers_started = True # Marcar como iniciados
+        # Un barrido periódico de openOrders para todos los símbolos (huérfanas, TP/SL sin registrar)
+        get_order_reconciler().start(_registered_bots)
         logger.info(f"Todos los {num_bot_threads} workers de bot iniciados.")
         return True # Indicar éxito
 # --- Fin de start_bot_workers ---
 
 
+def reload_running_workers(trading_params_source, symbols: list | None = None) -> dict:
+    """
+    Aplica una nueva configuración a los workers en marcha sin reiniciarlos.
+    - Los parámetros se validan una vez (TradingParams) y cada bot los adopta en su próximo run_once.
+    - Si se pasa `symbols`, se arrancan workers para los símbolos nuevos y se detienen los retirados
+      (los que tienen posición u órdenes vivas dejan de abrir entradas y terminan al quedar planos).
+    Lanza ValueError si los parámetros no son válidos; en ese caso no se toca ningún worker.
+    """
+    global active_trading_params, loaded_trading_params, loaded_symbols_to_trade
+    logger = get_logger()
+
+    wanted_symbols, snapshot = None, None
+    if symbols is not None:
+        wanted_symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        with status_lock:
+            new_symbols = [symbol for symbol in wanted_symbols if symbol not in worker_registry] if workers_started else []
+        # La foto son llamadas REST: se pide fuera de status_lock, que todos los workers toman tras cada run_once
+        if len(new_symbols) > 1:
+            snapshot = fetch_startup_snapshot()
+
+    with status_lock:
+        if not workers_started:
+            return {'applied': False, 'reason': 'workers not running'}
+
+        base_version = active_trading_params.version if active_trading_params else 0
+        new_params = TradingParams.from_mapping(trading_params_source, version=base_version + 1)
+        params_changed = active_trading_params is None or new_params != active_trading_params
+        if params_changed:
+            active_trading_params = new_params
+            loaded_trading_params = new_params
+        else:
+            new_params = active_trading_params
+
+        updated, started, stopped, draining = [], [], [], []
+        if params_changed:
+            for symbol, entry in worker_registry.items():
+                if entry['bot'] is not None and entry['bot'].request_params_update(new_params):
+                    updated.append(symbol)
+
+        if wanted_symbols is not None:
+            for symbol in wanted_symbols:
+                if symbol not in worker_registry:
+                    _start_worker_locked(symbol, new_params, snapshot)
+                    started.append(symbol)
+                elif symbol in draining_symbols:
+                    # Vuelve a la configuración antes de terminar de retirarse
+                    draining_symbols.discard(symbol)
+                    if worker_registry[symbol]['bot'] is not None:
+                        worker_registry[symbol]['bot'].entries_paused = False
+            for symbol, entry in list(worker_registry.items()):
+                if symbol in wanted_symbols or symbol in draining_symbols:
+                    continue
+                bot = entry['bot']
+                if bot is not None and bot.has_open_exposure():
+                    bot.entries_paused = True
+                    draining_symbols.add(symbol)
+                    draining.append(symbol)
+                else:
+                    entry['stop_event'].set()
+                    del worker_registry[symbol] # El hilo termina por su cuenta; el símbolo puede volver a añadirse
+                    stopped.append(symbol)
+            loaded_symbols_to_trade = wanted_symbols
+
+    summary = {'applied': True, 'params_version': new_params.version, 'params_changed': params_changed,
+               'updated': updated, 'started': started, 'stopped': stopped, 'draining': draining}
+    logger.info(f"Recarga en caliente aplicada: {summary}")
+    return summary
+
+
 # --- Endpoints de la API ---
 
 @app.route('/api/config', methods=['GET'])
@@ -364,6 +544,7 @@ def get_config_endpoint():
                 "stopLossUSDT": 20,
                 "takeProfitUSDT": 30,
                 "cycleSleepSeconds": 5,
+                "adaptiveScheduling": True,
                 "orderTimeoutSeconds": 10,
                 "evaluateRsiDelta": True,
                 "evaluateVolumeFilter": True,
@@ -377,9 +558,17 @@ def get_config_endpoint():
                 "enablePriceTrailingStop": True,
                 "priceTrailingStopDistanceUSDT": 0.05,
                 "priceTrailingStopActivationPnlUSDT": 0.02,
+                "priceTrailingStopMode": "local",
                 "enablePnlTrailingStop": True,
                 "pnlTrailingStopActivationUSDT": 0.1,
                 "pnlTrailingStopDropUSDT": 0.05,
+                "enableTickExitMonitor": True,
+                "enableLocalPnl": True,
+                "enableOrderChasing": True,
+                "orderChaseMaxDistancePct": 0.3,
+                "orderPostOnly": False,
+                "enableOrderBookCache": True,
+                "asyncOrderExecution": True,
                 "evaluateOpenInterestIncrease": True, # Cambio de clave aquí
                 "openInterestPeriod": "5m", # <-- Clave para el frontend
                 "symbolsToTrade": ""
@@ -413,6 +602,7 @@ def get_config_endpoint():
                 ('stop_loss_usdt', 'stopLossUSDT'),
                 ('take_profit_usdt', 'takeProfitUSDT'),
                 ('cycle_sleep_seconds', 'cycleSleepSeconds'),
+                ('adaptive_scheduling', 'adaptiveScheduling'),
                 ('order_timeout_seconds', 'orderTimeoutSeconds'),
                 ('evaluate_rsi_delta', 'evaluateRsiDelta'),
                 ('evaluate_volume_filter', 'evaluateVolumeFilter'),
@@ -426,9 +616,17 @@ def get_config_endpoint():
                 ('enable_price_trailing_stop', 'enablePriceTrailingStop'),
                 ('price_trailing_stop_distance_usdt', 'priceTrailingStopDistanceUSDT'),
                 ('price_trailing_stop_activation_pnl_usdt', 'priceTrailingStopActivationPnlUSDT'),
+                ('price_trailing_stop_mode', 'priceTrailingStopMode'),
                 ('enable_pnl_trailing_stop', 'enablePnlTrailingStop'),
                 ('pnl_trailing_stop_activation_usdt', 'pnlTrailingStopActivationUSDT'),
                 ('pnl_trailing_stop_drop_usdt', 'pnlTrailingStopDropUSDT'),
+                ('enable_tick_exit_monitor', 'enableTickExitMonitor'),
+                ('enable_local_pnl', 'enableLocalPnl'),
+                ('enable_order_chasing', 'enableOrderChasing'),
+                ('order_chase_max_distance_pct', 'orderChaseMaxDistancePct'),
+                ('order_post_only', 'orderPostOnly'),
+                ('enable_order_book_cache', 'enableOrderBookCache'),
+                ('async_order_execution', 'asyncOrderExecution'),
                 ('evaluate_open_interest_increase', 'evaluateOpenInterestIncrease'), # Cambio de clave aquí
                 ('open_interest_period', 'openInterestPeriod') # <-- CAMBIO DE CLAVE AQUÍ para el frontend
             ]:
@@ -439,7 +637,10 @@ def get_config_endpoint():
             frontend_config['symbolsToTrade'] = config_dict['SYMBOLS'].get('symbols_to_trade', '')
 
         # Asegurar que las globales también se actualizan si es la primera carga o si el archivo cambió
-        loaded_trading_params = config_dict.get('TRADING', {})
+        try:
+            loaded_trading_params = TradingParams.from_mapping(config_dict.get('TRADING', {}))
+        except (ValueError, TypeError) as e:
+            api_logger.error(f"Parámetros de [TRADING] inválidos en config.ini: {e}")
         loaded_symbols_to_trade = frontend_config.get('symbolsToTrade', '').split(',') if frontend_config.get('symbolsToTrade') else []
 
         api_logger.info(f"Configuración FINAL que se enviará al frontend vía /api/config GET: {frontend_config}")
@@ -481,6 +682,11 @@ def update_config_endpoint():
     # 2. Mapear los otros parámetros (BINANCE, TRADING)
     #    apiKey y apiSecret ya no serán procesados por map_frontend_trading_binance
     ini_other_data = map_frontend_trading_binance(frontend_data)
+    try:
+        TradingParams.from_mapping(ini_other_data['TRADING']) # Validar antes de escribir config.ini
+    except (ValueError, TypeError) as e:
+        logger.error(f"Parámetros de trading inválidos recibidos en POST /api/config: {e}")
+        return jsonify({"error": f"Invalid trading parameters: {e}"}), 400
 
     config = configparser.ConfigParser(interpolation=None, inline_comment_prefixes=(';', '#'))
     try:
@@ -509,7 +715,9 @@ def update_config_endpoint():
             config.write(configfile)
         
         logger.info(f"Archivo de configuración {CONFIG_FILE_PATH} actualizado exitosamente.")
-        return jsonify({"message": "Configuration updated successfully"}), 200
+        # 6. Aplicar en caliente a los workers en marcha (sin reiniciar hilos ni perder estado)
+        reload_summary = reload_running_workers(ini_other_data['TRADING'], symbols_list if 'symbolsToTrade' in frontend_data else None)
+        return jsonify({"message": "Configuration updated successfully", "hot_reload": reload_summary}), 200
 
     except Exception as e:
         logger.error(f"Error al escribir la configuración: {e}", exc_info=True)
@@ -523,8 +731,8 @@ def get_worker_status():
     
     try: # <--- INICIO DEL BLOQUE TRY GENERAL
         all_symbols_status = []
-        # Usar los símbolos cargados al inicio
-        configured_symbols = loaded_symbols_to_trade 
+        # Usar los símbolos configurados (más los retirados que aún cierran su posición)
+        configured_symbols = list(loaded_symbols_to_trade) + sorted(s for s in draining_symbols if s not in loaded_symbols_to_trade)
         historical_pnl_data = get_cumulative_pnl_by_symbol()
 
         logger.debug(f"Símbolos configurados (cargados al inicio): {configured_symbols}")
@@ -605,9 +813,18 @@ def shutdown_bot():
 
     workers_started = False # Marcar como detenidos
     threads.clear() # Limpiar la lista de hilos
+    stop_market_stream() # Cerrar el websocket de precios compartido
+    stop_user_stream() # Cerrar el user-data stream (fills)
+    stop_pnl_engine() # Cerrar el stream de mark price
+    stop_order_book_cache() # Cerrar el stream de profundidad
+    stop_order_reconciler() # Detener los barridos de órdenes abiertas
+    stop_order_executor() # Detener los hilos del ejecutor de órdenes
+    stop_decision_journal() # Volcar y cerrar el diario de decisiones
     # Limpiar estados individuales
     with status_lock:
         worker_statuses.clear()
+        worker_registry.clear()
+        draining_symbols.clear()
 
     return jsonify({"message": "Señal de apagado enviada y workers detenidos."}), 200
 
@@ -653,53 +870,190 @@ def load_initial_config():
          logger.error("Sección [TRADING] no encontrada en config.ini.")
          return False
          
-    # Cargar todos los parámetros de TRADING como strings inicialmente
-    temp_trading_params = dict(config['TRADING'])
-    
-    # Convertir explícitamente los parámetros a sus tipos correctos
-    loaded_trading_params = {}
-    for key, value_str in temp_trading_params.items():
-        original_value = value_str # Guardar para logs en caso de error
-        try:
-            if key in ['rsi_period', 'volume_sma_period', 'cycle_sleep_seconds', 'order_timeout_seconds', 'downtrend_check_candles', 'downtrend_level_check', 'required_uptrend_candles']:
-                loaded_trading_params[key] = int(value_str)
-            elif key in ['rsi_threshold_up', 'rsi_threshold_down', 'rsi_entry_level_low', 'rsi_entry_level_high',
-                         'rsi_target',
-                         'volume_factor', 'position_size_usdt', 'stop_loss_usdt', 'take_profit_usdt',
-                         'price_trailing_stop_distance_usdt',
-                         'price_trailing_stop_activation_pnl_usdt']:
-                loaded_trading_params[key] = float(value_str)
-            elif key == 'evaluate_rsi_delta':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'evaluate_volume_filter':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'evaluate_rsi_range':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'evaluate_downtrend_candles_block':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'evaluate_downtrend_levels_block':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'evaluate_required_uptrend':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'enable_take_profit_pnl':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'enable_stop_loss_pnl':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'enable_trailing_rsi_stop':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'enable_price_trailing_stop':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            elif key == 'enable_pnl_trailing_stop':
-                loaded_trading_params[key] = value_str.lower() == 'true'
-            else:
-                loaded_trading_params[key] = value_str # Mantener como string si no es uno de los conocidos numéricos
-        except ValueError:
-            logger.error(f"Error al convertir el parámetro de TRADING '{key}' con valor '{original_value}' a su tipo numérico esperado. Usando string o fallback si aplica.")
-            loaded_trading_params[key] = original_value # Mantener el valor original como string si falla la conversión
+    # Convertir y validar los parámetros de TRADING una sola vez (tipos, defaults y rangos en TradingParams)
+    try:
+        loaded_trading_params = TradingParams.from_mapping(dict(config['TRADING']))
+    except (ValueError, TypeError) as e:
+        logger.error(f"Error al procesar los parámetros de [TRADING] de config.ini: {e}")
+        return False
 
     logger.info(f"Configuración inicial cargada: {len(loaded_symbols_to_trade)} símbolos, Params procesados: {loaded_trading_params}")
     return True
 
+def _parse_time_param(value: str | None) -> datetime | None:
+    """Acepta epoch en milisegundos o ISO 8601 ('2024-05-01', '2024-05-01T10:00:00Z'). Sin zona se asume UTC."""
+    if value is None or value == '':
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+# --- HISTORIAL DE TRADES PAGINADO (CURSOR) ---
+@app.route('/api/trades', methods=['GET'])
+def get_trade_history_page():
+    """
+    Historial de trades cerrados con paginación por cursor, del más reciente al más antiguo.
+    Parámetros: symbols=BTCUSDT,ETHUSDT (o symbol=), start / end (epoch ms o ISO 8601; end excluido),
+    limit (1-TRADE_HISTORY_MAX_LIMIT) y cursor (el next_cursor de la respuesta anterior).
+    """
+    logger = get_logger()
+    symbols_param = request.args.get('symbols') or request.args.get('symbol') or ''
+    symbols = [s.strip().upper() for s in symbols_param.split(',') if s.strip()] or None
+    try:
+        limit_param = int(request.args.get('limit', TRADE_HISTORY_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un entero."}), 400
+    if not 1 <= limit_param <= TRADE_HISTORY_MAX_LIMIT:
+        return jsonify({"error": f"El parámetro 'limit' debe estar entre 1 y {TRADE_HISTORY_MAX_LIMIT}."}), 400
+    try:
+        start = _parse_time_param(request.args.get('start'))
+        end = _parse_time_param(request.args.get('end'))
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "Los parámetros 'start'/'end' deben ser epoch en ms o fechas ISO 8601."}), 400
+
+    try:
+        trades, next_cursor = get_trades_page(symbols=symbols, start=start, end=end,
+                                              cursor=request.args.get('cursor') or None, limit=limit_param)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener historial de trades paginado: {e}", exc_info=True)
+        return jsonify({"error": "Failed to retrieve trade history"}), 500
+
+    logger.debug(f"Devolviendo {len(trades)} trades (symbols={symbols}, limit={limit_param}, next_cursor={next_cursor})")
+    return jsonify({"trades": trades, "next_cursor": next_cursor, "limit": limit_param})
+
+# --- ANALÍTICA DE RENDIMIENTO (ver src/analytics.py) ---
+def _analytics_series_args():
+    """symbol o strategy (fingerprint de parámetros) desde la query string."""
+    symbol = (request.args.get('symbol') or '').strip().upper() or None
+    strategy = (request.args.get('strategy') or '').strip() or None
+    return symbol, strategy
+
+@app.route('/api/analytics/summary', methods=['GET'])
+def get_analytics_summary():
+    """Equity final, drawdown, win rate, tiempo medio en posición y PnL por close_reason."""
+    logger = get_logger()
+    symbol, strategy = _analytics_series_args()
+    try:
+        summary = get_trade_analytics().summary(symbol=symbol, strategy=strategy)
+    except Exception as e:
+        logger.error(f"Error al calcular la analítica de trades: {e}", exc_info=True)
+        return jsonify({"error": "Failed to compute analytics"}), 500
+    if summary is None:
+        return jsonify({"error": "No hay trades para la serie solicitada."}), 404
+    return jsonify(summary)
+
+@app.route('/api/analytics/equity', methods=['GET'])
+def get_analytics_equity_curve():
+    """Curva de equity [[timestamp_ms, pnl_acumulado]]; ?granularity=minute|hour|day para una curva agregada."""
+    logger = get_logger()
+    symbol, strategy = _analytics_series_args()
+    granularity = request.args.get('granularity') or None
+    if granularity is not None and granularity not in ROLLUP_GRANULARITIES:
+        return jsonify({"error": f"'granularity' debe ser uno de {list(ROLLUP_GRANULARITIES)}."}), 400
+    try:
+        curve = get_trade_analytics().equity_curve(symbol=symbol, strategy=strategy, granularity=granularity)
+    except Exception as e:
+        logger.error(f"Error al construir la curva de equity: {e}", exc_info=True)
+        return jsonify({"error": "Failed to compute equity curve"}), 500
+    return jsonify({"symbol": symbol, "strategy": strategy, "granularity": granularity, "points": curve})
+
+@app.route('/api/analytics/rollups', methods=['GET'])
+def get_analytics_rollups():
+    """PnL, trades y wins por bucket de minuto / hora / día: [[inicio_ms, pnl, trades, wins]]."""
+    logger = get_logger()
+    symbol, strategy = _analytics_series_args()
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ROLLUP_GRANULARITIES:
+        return jsonify({"error": f"'granularity' debe ser uno de {list(ROLLUP_GRANULARITIES)}."}), 400
+    try:
+        start = _parse_time_param(request.args.get('start'))
+        end = _parse_time_param(request.args.get('end'))
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "Los parámetros 'start'/'end' deben ser epoch en ms o fechas ISO 8601."}), 400
+    try:
+        buckets = get_trade_analytics().rollups(granularity, symbol=symbol, strategy=strategy,
+                                                start_ms=int(start.timestamp() * 1000) if start else None,
+                                                end_ms=int(end.timestamp() * 1000) if end else None)
+    except Exception as e:
+        logger.error(f"Error al obtener rollups de analítica: {e}", exc_info=True)
+        return jsonify({"error": "Failed to compute rollups"}), 500
+    return jsonify({"symbol": symbol, "strategy": strategy, "granularity": granularity, "buckets": buckets})
+
+@app.route('/api/analytics/strategies', methods=['GET'])
+def get_analytics_strategies():
+    """Estrategias vistas en los trades (fingerprint -> parámetros), para interpretar ?strategy=."""
+    return jsonify(get_trade_analytics().strategies())
+
+@app.route('/api/clock', methods=['GET'])
+def get_clock_status():
+    """Offset y RTT estimados contra el reloj de Binance (ver clock_sync.py)."""
+    return jsonify(get_clock_metrics())
+
+@app.route('/api/execution', methods=['GET'])
+def get_execution_status():
+    """
+    Tasa de llenado, tiempo hasta el llenado y re-precios de las órdenes LIMIT (ver order_chaser.py), más la cola
+    y las latencias por prioridad del ejecutor de órdenes (clave 'order_executor', ver order_executor.py).
+    """
+    metrics = get_execution_metrics()
+    metrics['order_executor'] = get_order_executor().stats()
+    return jsonify(metrics)
+
+@app.route('/api/reconciliation', methods=['GET'])
+def get_reconciliation_status():
+    """Barridos de órdenes abiertas y reparaciones (adoptadas, canceladas, desaparecidas), ver reconciler.py."""
+    return jsonify(get_order_reconciler().stats())
+
+def _decision_window_args():
+    """symbol, since y until (epoch ms o ISO 8601; until excluido) de la query string, como ms."""
+    symbol = (request.args.get('symbol') or '').strip().upper() or None
+    since = _parse_time_param(request.args.get('since'))
+    until = _parse_time_param(request.args.get('until'))
+    return (symbol, int(since.timestamp() * 1000) if since else None,
+            int(until.timestamp() * 1000) if until else None)
+
+@app.route('/api/decisions', methods=['GET'])
+def get_decisions():
+    """
+    Registros del diario de decisiones de entrada (ver decision_journal.py), del más reciente al más antiguo.
+    Parámetros: symbol, since / until, action (p. ej. no_signal, entry_submitted), failed (condición evaluada
+    que no se cumplió: rsi_range, rsi_delta, volume, uptrend, oi_increase, downtrend_levels, downtrend_candles) y limit.
+    """
+    try:
+        symbol, since_ms, until_ms = _decision_window_args()
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "Los parámetros 'since'/'until' deben ser epoch en ms o fechas ISO 8601."}), 400
+    try:
+        limit_param = int(request.args.get('limit', 500))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un entero."}), 400
+    if not 1 <= limit_param <= DECISION_QUERY_MAX_LIMIT:
+        return jsonify({"error": f"El parámetro 'limit' debe estar entre 1 y {DECISION_QUERY_MAX_LIMIT}."}), 400
+    action = failed = None
+    if request.args.get('action'):
+        action = next((code for code, name in ACTION_NAMES.items() if name == request.args['action']), None)
+        if action is None:
+            return jsonify({"error": f"'action' debe ser uno de {list(ACTION_NAMES.values())}."}), 400
+    if request.args.get('failed'):
+        failed = next((flag for flag, name in CONDITION_NAMES.items() if name == request.args['failed']), None)
+        if failed is None:
+            return jsonify({"error": f"'failed' debe ser uno de {list(CONDITION_NAMES.values())}."}), 400
+    journal = get_decision_journal()
+    records = journal.query(symbol=symbol, since_ms=since_ms, until_ms=until_ms, action=action, failed=failed, limit=limit_param)
+    return jsonify({"decisions": records, "limit": limit_param, "journal": journal.stats()})
+
+@app.route('/api/decisions/summary', methods=['GET'])
+def get_decisions_summary():
+    """Evaluaciones, acciones y cuántas veces bloqueó cada condición (symbol, since / until opcionales)."""
+    try:
+        symbol, since_ms, until_ms = _decision_window_args()
+    except (ValueError, OverflowError, OSError):
+        return jsonify({"error": "Los parámetros 'since'/'until' deben ser epoch en ms o fechas ISO 8601."}), 400
+    return jsonify(get_decision_journal().summarize(symbol=symbol, since_ms=since_ms, until_ms=until_ms))
+
 # --- NUEVO ENDPOINT PARA HISTORIAL DE TRADES POR SÍMBOLO ---
 @app.route('/api/trades/<symbol>', methods=['GET'])
 def get_symbol_trade_history(symbol: str):
@@ -709,8 +1063,8 @@ def get_symbol_trade_history(symbol: str):
     
     # --- LEER Y VALIDAR EL PARÁMETRO 'limit' --- 
     limit_param = request.args.get('limit', default=2, type=int) # Default 2 como en el frontend
-    if not 1 <= limit_param <= 50: # Poner límites razonables (ej. 1 a 50)
-        logger.warning(f"Parámetro 'limit' ({limit_param}) fuera de rango [1-50]. Usando 2.")
+    if not 1 <= limit_param <= TRADE_HISTORY_MAX_LIMIT: # La consulta usa el índice (symbol, close_timestamp)
+        logger.warning(f"Parámetro 'limit' ({limit_param}) fuera de rango [1-{TRADE_HISTORY_MAX_LIMIT}]. Usando 2.")
         limit_param = 2 # Volver al default si está fuera de rango
     # -------------------------------------------
     
@@ -734,11 +1088,9 @@ def get_symbol_trade_history(symbol: str):
 # Funciones auxiliares refactorizadas para manejar la lógica de cada método
 def _save_strategy_logic(strategy_name: str, data: dict):
     logger = get_logger()
-    strategy_file_path = os.path.join(STRATEGIES_PATH, f"{strategy_name}.json")
     try:
-        with open(strategy_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        logger.info(f"Estrategia '{strategy_name}' guardada exitosamente en {strategy_file_path}")
+        strategy_repository.save(strategy_name, data)
+        logger.info(f"Estrategia '{strategy_name}' guardada exitosamente en {STRATEGIES_PATH}")
         return jsonify({"message": f"Estrategia '{strategy_name}' guardada exitosamente."}), 201
     except Exception as e:
         logger.error(f"Error al guardar la estrategia '{strategy_name}': {e}", exc_info=True)
@@ -746,37 +1098,34 @@ def _save_strategy_logic(strategy_name: str, data: dict):
 
 def _load_strategy_logic(strategy_name: str):
     logger = get_logger()
-    strategy_file_path = os.path.join(STRATEGIES_PATH, f"{strategy_name}.json")
-    if not os.path.exists(strategy_file_path):
-        logger.error(f"No se encontró el archivo de estrategia: {strategy_file_path}")
+    if not strategy_repository.exists(strategy_name):
+        logger.error(f"No se encontró el archivo de estrategia '{strategy_name}' en {STRATEGIES_PATH}")
         return jsonify({"error": f"Estrategia '{strategy_name}' no encontrada."}), 404
     try:
-        with open(strategy_file_path, 'r', encoding='utf-8') as f:
-            strategy_data = json.load(f)
-        logger.info(f"Estrategia '{strategy_name}' cargada exitosamente.")
+        strategy_data = strategy_repository.get(strategy_name)
+        if strategy_data is None:
+            logger.error(f"Error al decodificar JSON para la estrategia '{strategy_name}'.")
+            return jsonify({"error": f"Error al leer el archivo de la estrategia '{strategy_name}'. Formato JSON inválido."}), 500
+        logger.debug(f"Estrategia '{strategy_name}' servida desde el índice.")
         return jsonify(strategy_data), 200
-    except json.JSONDecodeError as e_json:
-        logger.error(f"Error al decodificar JSON para la estrategia '{strategy_name}' desde {strategy_file_path}: {e_json}", exc_info=True)
-        return jsonify({"error": f"Error al leer el archivo de la estrategia '{strategy_name}'. Formato JSON inválido."}), 500
     except Exception as e:
-        logger.error(f"Error al cargar la estrategia '{strategy_name}' desde {strategy_file_path}: {e}", exc_info=True)
+        logger.error(f"Error al cargar la estrategia '{strategy_name}': {e}", exc_info=True)
         return jsonify({"error": f"Error interno al cargar la estrategia: {str(e)}"}), 500
 
 def _delete_strategy_logic(strategy_name: str):
     logger = get_logger()
-    strategy_file_path = os.path.join(STRATEGIES_PATH, f"{strategy_name}.json")
-    if not os.path.exists(strategy_file_path):
-        logger.error(f"No se encontró el archivo de estrategia para eliminar: {strategy_file_path}")
+    if not strategy_repository.exists(strategy_name):
+        logger.error(f"No se encontró el archivo de estrategia para eliminar: '{strategy_name}' en {STRATEGIES_PATH}")
         return jsonify({"error": f"Estrategia '{strategy_name}' no encontrada."}), 404
     try:
-        os.remove(strategy_file_path)
-        logger.info(f"Estrategia '{strategy_name}' eliminada exitosamente de {strategy_file_path}")
+        strategy_repository.delete(strategy_name)
+        logger.info(f"Estrategia '{strategy_name}' eliminada exitosamente de {STRATEGIES_PATH}")
         return jsonify({"message": f"Estrategia '{strategy_name}' eliminada exitosamente."}), 200
     except OSError as e_os:
-        logger.error(f"Error de OS al eliminar la estrategia '{strategy_name}' desde {strategy_file_path}: {e_os}", exc_info=True)
+        logger.error(f"Error de OS al eliminar la estrategia '{strategy_name}': {e_os}", exc_info=True)
         return jsonify({"error": f"Error del sistema al eliminar la estrategia '{strategy_name}'."}), 500
     except Exception as e:
-        logger.error(f"Error inesperado al eliminar la estrategia '{strategy_name}' desde {strategy_file_path}: {e}", exc_info=True)
+        logger.error(f"Error inesperado al eliminar la estrategia '{strategy_name}': {e}", exc_info=True)
         return jsonify({"error": f"Error interno inesperado al eliminar la estrategia: {str(e)}"}), 500
 
 @app.route('/api/strategies/<strategy_name>', methods=['GET', 'POST', 'DELETE'])
@@ -809,14 +1158,31 @@ def handle_specific_strategy(strategy_name: str):
 
 @app.route('/api/strategies', methods=['GET'])
 def list_strategies():
-    """Devuelve una lista de nombres de estrategias guardadas."""
-    if not os.path.exists(STRATEGIES_PATH):
-        return jsonify([]) # Devolver array vacío si el directorio no existe
-
+    """
+    Devuelve los nombres de las estrategias guardadas (desde el índice en memoria).
+    Sin parámetros responde la lista simple de siempre. Con ?limit=&offset=&sort=name|mtime y/o filtros
+    por parámetro (p.ej. ?rsiPeriod=5&rsiInterval=1m) responde {"items", "total", "offset", "limit"}.
+    """
+    paging_keys = ('limit', 'offset', 'sort')
     try:
-        # Filtrar solo archivos .json y quitar la extensión
-        strategy_files = [f.replace('.json', '') for f in os.listdir(STRATEGIES_PATH) if f.endswith('.json')]
-        return jsonify(strategy_files)
+        filters = {key: value for key, value in request.args.items() if key not in paging_keys}
+        if not request.args:
+            names, _ = strategy_repository.list_names()
+            return jsonify(names)
+
+        try:
+            offset = int(request.args.get('offset', 0))
+            limit = int(request.args['limit']) if 'limit' in request.args else None
+        except ValueError:
+            return jsonify({"error": "Los parámetros 'limit' y 'offset' deben ser enteros."}), 400
+        if offset < 0 or (limit is not None and limit <= 0):
+            return jsonify({"error": "'offset' debe ser >= 0 y 'limit' mayor que 0."}), 400
+        sort = request.args.get('sort', 'name')
+        if sort not in ('name', 'mtime'):
+            return jsonify({"error": "'sort' debe ser 'name' o 'mtime'."}), 400
+
+        names, total = strategy_repository.list_names(filters=filters, offset=offset, limit=limit, sort=sort)
+        return jsonify({"items": names, "total": total, "offset": offset, "limit": limit})
     except Exception as e:
         api_logger.error(f"Error al listar estrategias: {e}", exc_info=True)
         return jsonify({"error": "No se pudieron listar las estrategias"}), 500
@@ -838,12 +1204,33 @@ def set_active_strategy(strategy_name: str):
         # Establecer el nombre de la estrategia activa
         config.set('STRATEGY_INFO', 'active_strategy_name', strategy_name)
 
+        # Si existe el archivo de la estrategia, sus parámetros y símbolos pasan a ser los activos
+        strategy_data = strategy_repository.get(strategy_name)
+        ini_strategy_data = map_frontend_trading_binance(strategy_data) if strategy_data else None
+        if ini_strategy_data:
+            try:
+                TradingParams.from_mapping(ini_strategy_data['TRADING'])
+            except (ValueError, TypeError) as e:
+                api_logger.error(f"La estrategia '{strategy_name}' tiene parámetros inválidos: {e}")
+                return jsonify({"error": f"Invalid trading parameters in strategy '{strategy_name}': {e}"}), 400
+            # Sin symbolsToTrade en la estrategia se mantienen los símbolos actuales
+            sections_to_write = ('TRADING', 'SYMBOLS') if strategy_data.get('symbolsToTrade') else ('TRADING',)
+            for section in sections_to_write:
+                if not config.has_section(section):
+                    config.add_section(section)
+                for key, value in ini_strategy_data[section].items():
+                    config.set(section, key, str(value))
+
         # Guardar los cambios en el archivo
         with open(CONFIG_FILE_PATH, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
         
         api_logger.info(f"Estrategia activa actualizada a '{strategy_name}' en {CONFIG_FILE_PATH}")
-        return jsonify({"message": f"Estrategia activa establecida a: {strategy_name}"}), 200
+        reload_summary = None
+        if ini_strategy_data:
+            symbols_list = [s for s in ini_strategy_data['SYMBOLS']['symbols_to_trade'].split(',') if s] or None
+            reload_summary = reload_running_workers(ini_strategy_data['TRADING'], symbols_list)
+        return jsonify({"message": f"Estrategia activa establecida a: {strategy_name}", "hot_reload": reload_summary}), 200
 
     except Exception as e:
         api_logger.error(f"Error al establecer la estrategia activa '{strategy_name}': {e}", exc_info=True)
@@ -4,8 +4,11 @@
 # Importar UMFutures para USDT-Margined Futures
 from binance.um_futures import UMFutures
 # Importar excepciones específicas si las usamos, o un error general
-from binance.error import ClientError
+from binance.error import ClientError, ServerError
 import pandas as pd
+import requests
+import hashlib
+import itertools
 import time
 import os # Import the os module
 from decimal import Decimal
@@ -13,6 +16,8 @@ from decimal import Decimal
 # Importamos nuestra configuración y logger
 from .config_loader import load_config
 from .logger_setup import get_logger
+from .clock_sync import ClockSyncedUMFutures, start_clock_sync
+from .order_filters import check_order, register_symbol_filters
 
 # Variable global para el cliente de Binance Futures (para reutilizar la instancia)
 futures_client_instance = None
@@ -60,14 +65,18 @@ def get_futures_client():
             base_url_to_use = "https://fapi.binance.me"
             logger.info(f"URL base de Futuros (Live) forzada a: {base_url_to_use}")
 
-        # Crear instancia del cliente UMFutures
-        client = UMFutures(key=api_key, secret=api_secret, base_url=base_url_to_use)
+        # Crear instancia del cliente UMFutures (firma con la hora del servidor estimada por ClockSync)
+        client = ClockSyncedUMFutures(key=api_key, secret=api_secret, base_url=base_url_to_use)
 
         # Intentar hacer una llamada simple para verificar la conexión y las claves API
         try:
             logger.info(f"Verificando conexión con Futures API ({base_url_to_use}) usando time()...")
             server_time = client.time()
             logger.info(f"Conexión con Binance Futures {('Testnet' if mode != 'live' else 'Live')} exitosa. Hora del servidor: {server_time}")
+            # Estimar offset/RTT con el servidor y mantenerlo actualizado en segundo plano
+            clock = start_clock_sync(client)
+            clock.sync_now()
+            client.clock = clock
             futures_client_instance = client
             return futures_client_instance
 
@@ -84,6 +93,16 @@ def get_futures_client():
         logger.critical(f"Error inesperado durante la inicialización de UMFutures Client: {e}")
         return None
 
+def set_futures_client(client):
+    """
+    Inyecta un cliente ya construido (por ejemplo mock_exchange.MockUMFutures) como instancia global.
+    Todas las funciones de este módulo lo usarán a partir de ese momento. Pasar None fuerza a que
+    la próxima llamada a get_futures_client() vuelva a crear el cliente real desde config.ini.
+    """
+    global futures_client_instance
+    futures_client_instance = client
+    return futures_client_instance
+
 def get_historical_klines(symbol: str, interval: str, limit: int = 500):
     """
     Obtiene datos históricos de velas (klines) para un símbolo y un intervalo dados.
@@ -169,6 +188,7 @@ def get_futures_symbol_info(symbol: str):
             if item['symbol'] == symbol:
                 logger.info(f"Información encontrada para {symbol}: Precision Cantidad={item['quantityPrecision']}, Precision Precio={item['pricePrecision']}")
                 logger.debug(f"Filtros para {symbol}: {item['filters']}")
+                register_symbol_filters(item)
                 return item
 
         logger.error(f"No se encontró información para el símbolo {symbol} en exchange_info.")
@@ -182,10 +202,117 @@ def get_futures_symbol_info(symbol: str):
         logger.error(f"Error inesperado al obtener exchange_info: {e}", exc_info=True)
         return None
 
-def create_futures_market_order(symbol: str, side: str, quantity: float):
+# --- IDs de cliente y reenvío idempotente de órdenes ---
+CLIENT_ORDER_ID_PREFIX = 'bl' # Identifica las órdenes del bot en Binance
+ORDER_SUBMIT_ATTEMPTS = int(os.environ.get('ORDER_SUBMIT_ATTEMPTS', '3'))
+ORDER_RETRY_BACKOFF_SECONDS = float(os.environ.get('ORDER_RETRY_BACKOFF_SECONDS', '0.25'))
+UNKNOWN_STATUS_ERROR_CODES = (-1006, -1007) # Binance: "execution status unknown"
+DUPLICATE_CLIENT_ORDER_ID_CODE = -4116
+ORDER_DOES_NOT_EXIST_CODE = -2013
+_client_order_id_counter = itertools.count(1)
+
+def make_client_order_id(symbol: str, intent: str, key=None) -> str:
+    """
+    newClientOrderId de una intención de orden ('en' entrada, 'ex' salida, 'tp', 'sl', 'ts' trailing, 'mk' mercado...).
+    Con `key` es determinista: la misma intención produce siempre el mismo ID, de modo que un reenvío tras un
+    timeout no puede duplicar la orden (Binance exige que sea único entre las órdenes abiertas). Sin `key`
+    se genera uno único para el proceso. Formato compatible con ^[.A-Z:/a-z0-9_-]{1,36}$.
+    """
+    if key is None:
+        key = f"{time.time_ns()}:{next(_client_order_id_counter)}"
+    digest = hashlib.sha1(f"{symbol.upper()}|{intent}|{key}".encode()).hexdigest()[:20]
+    return f"{CLIENT_ORDER_ID_PREFIX}-{intent}-{digest}"[:36]
+
+def _is_unknown_status_error(e: Exception) -> bool:
+    """Errores tras los que no se sabe si la orden llegó a crearse (timeout, conexión, 5xx, -1006/-1007)."""
+    if isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, ServerError)):
+        return True
+    return isinstance(e, ClientError) and e.error_code in UNKNOWN_STATUS_ERROR_CODES
+
+def _query_order_by_client_id(client, symbol: str, client_id: str) -> dict | None:
+    """La orden con ese origClientOrderId, o None si Binance responde que no existe (-2013)."""
+    try:
+        return client.query_order(symbol=symbol, origClientOrderId=client_id)
+    except ClientError as e:
+        if e.error_code == ORDER_DOES_NOT_EXIST_CODE:
+            return None
+        raise
+
+def submit_order_idempotent(client, params: dict) -> dict:
+    """
+    new_order con newClientOrderId y reintento seguro. Si el resultado de un envío es desconocido (timeout,
+    conexión, 5xx, -1006/-1007) antes de reenviar se consulta la orden por origClientOrderId: si existe se
+    devuelve y, sólo si Binance confirma que no existe, se reenvía con el mismo ID. Un -4116 (ID duplicado)
+    significa que un envío anterior sí llegó: se devuelve esa orden.
+    Lanza la excepción si el rechazo es definitivo o si no se resuelve en ORDER_SUBMIT_ATTEMPTS intentos.
+    """
+    logger = get_logger()
+    params = dict(params)
+    symbol = params['symbol']
+    client_id = params.setdefault('newClientOrderId', make_client_order_id(symbol, 'o'))
+    last_error = None
+    outcome_unknown = False # Hubo un envío cuyo resultado no se conoce: consultar antes de reenviar
+    for attempt in range(1, ORDER_SUBMIT_ATTEMPTS + 1):
+        if outcome_unknown:
+            try:
+                existing = _query_order_by_client_id(client, symbol, client_id)
+            except Exception as query_error:
+                logger.warning(f"[{symbol}] No se pudo consultar la orden {client_id} (intento {attempt}/{ORDER_SUBMIT_ATTEMPTS}): {query_error}")
+                time.sleep(ORDER_RETRY_BACKOFF_SECONDS * attempt)
+                continue
+            if existing:
+                logger.info(f"[{symbol}] La orden {client_id} sí se creó ({existing.get('orderId')}, {existing.get('status')}). No se reenvía.")
+                return existing
+            outcome_unknown = False
+            logger.info(f"[{symbol}] La orden {client_id} no llegó a Binance. Reenviando con el mismo ID.")
+        try:
+            return client.new_order(**params)
+        except ClientError as e:
+            if e.error_code == DUPLICATE_CLIENT_ORDER_ID_CODE:
+                existing = _query_order_by_client_id(client, symbol, client_id)
+                if existing:
+                    logger.warning(f"[{symbol}] La orden {client_id} ya existía (envío previo). Se usa la existente: {existing.get('orderId')}.")
+                    return existing
+            if not _is_unknown_status_error(e):
+                raise
+            last_error = e
+        except Exception as e:
+            if not _is_unknown_status_error(e):
+                raise
+            last_error = e
+        outcome_unknown = True
+        logger.warning(f"[{symbol}] Resultado desconocido al enviar la orden {client_id} (intento {attempt}/{ORDER_SUBMIT_ATTEMPTS}): {last_error}")
+        time.sleep(ORDER_RETRY_BACKOFF_SECONDS * attempt)
+    if outcome_unknown:
+        existing = _query_order_by_client_id(client, symbol, client_id)
+        if existing:
+            return existing
+    raise last_error or RuntimeError(f"No se pudo confirmar la orden {client_id}.")
+
+def preflight_order_rejection(params: dict):
+    """
+    Valida localmente los parámetros de una orden (los mismos que new_order) contra los filtros del símbolo
+    (order_filters.py). Devuelve el OrderCheck con los motivos si la orden se rechaza, o None si puede enviarse
+    (o si aún no hay filtros compilados para el símbolo).
+    """
+    close_position = str(params.get('closePosition', 'false')).lower() == 'true'
+    # Bot sólo LONG: una venta sobre positionSide LONG siempre reduce la posición (exenta de MIN_NOTIONAL)
+    reduce_only = str(params.get('reduceOnly', 'false')).lower() == 'true' or \
+        (params.get('positionSide') == 'LONG' and str(params.get('side', '')).upper() == 'SELL')
+    check = check_order(params['symbol'], params['type'], params['side'],
+                        quantity=params.get('quantity'), price=params.get('price'),
+                        stop_price=params.get('stopPrice', params.get('activationPrice')),
+                        close_position=close_position, reduce_only=reduce_only)
+    if check is None or check.ok:
+        return None
+    get_logger().warning(f"[{params['symbol']}] Orden {params['type']} {params['side']} rechazada localmente por filtros del exchange (no se envía): {check.summary()}")
+    return check
+
+def create_futures_market_order(symbol: str, side: str, quantity: float, client_order_id: str | None = None):
     """
     Crea una orden de mercado de futuros (MARKET).
     (Adaptado para binance-futures-connector)
+    client_order_id: newClientOrderId de la intención (ver make_client_order_id); si no se da se genera uno.
     """
     logger = get_logger()
     client = get_futures_client()
@@ -209,14 +336,18 @@ def create_futures_market_order(symbol: str, side: str, quantity: float):
         'side': side,
         'type': 'MARKET', # Usar string 'MARKET'
         'quantity': quantity, # La librería debería manejar el formato
-        'positionSide': position_side_to_use # Obligatorio para Hedge Mode
+        'positionSide': position_side_to_use, # Obligatorio para Hedge Mode
+        'newClientOrderId': client_order_id or make_client_order_id(symbol, 'mk')
     }
 
+    if preflight_order_rejection(params):
+        return None
+
     logger.warning(f"Intentando crear orden de mercado: {side} {quantity} {symbol} (PositionSide={position_side_to_use}) con params: {params}")
 
     try:
         # La función se llama 'new_order'
-        order = client.new_order(**params) # Usar ** para desempaquetar el diccionario
+        order = submit_order_idempotent(client, params) # Reintento seguro por newClientOrderId
         logger.info(f"Orden de mercado creada exitosamente: ID={order.get('orderId', 'N/A')}, Symbol={order.get('symbol')}, Side={order.get('side')}, Qty={order.get('origQty')}, Status={order.get('status')}")
         logger.debug(f"Respuesta completa de la orden: {order}")
         return order
@@ -279,6 +410,63 @@ def get_futures_position(symbol: str):
         logger.error(f"Error inesperado al obtener información de posición/riesgo para {symbol}: {e}", exc_info=True)
         return None
 
+# --- Consultas masivas (arranque de todos los workers con una sola foto de la cuenta) ---
+
+def get_exchange_symbols_info() -> dict | None:
+    """
+    Una sola llamada a exchange_info, indexada por símbolo: {'BTCUSDT': {...}, ...}.
+    Cada valor tiene el mismo formato que devuelve get_futures_symbol_info.
+    """
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error("No se pudo obtener el cliente UMFutures para obtener exchange_info.")
+        return None
+    try:
+        exchange_info = client.exchange_info()
+        symbols_info = {item['symbol']: item for item in exchange_info.get('symbols', [])}
+        for item in symbols_info.values():
+            register_symbol_filters(item)
+        return symbols_info
+    except ClientError as e:
+        logger.error(f"Error de API al obtener exchange_info: Status={e.status_code}, Code={e.error_code}, Msg={e.error_message}")
+        return None
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener exchange_info: {e}", exc_info=True)
+        return None
+
+def get_all_positions() -> list[dict] | None:
+    """Posiciones/riesgo de TODOS los símbolos en una llamada (get_position_risk sin símbolo)."""
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error("No se pudo obtener el cliente UMFutures para obtener las posiciones.")
+        return None
+    try:
+        return client.get_position_risk()
+    except ClientError as e:
+        logger.error(f"Error de API al obtener todas las posiciones: Status={e.status_code}, Code={e.error_code}, Msg={e.error_message}")
+        return None
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener todas las posiciones: {e}", exc_info=True)
+        return None
+
+def get_all_open_orders() -> list[dict] | None:
+    """Órdenes abiertas de TODOS los símbolos en una llamada (openOrders sin símbolo, peso 40)."""
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error("No se pudo obtener el cliente UMFutures para obtener las órdenes abiertas.")
+        return None
+    try:
+        return client.get_orders()
+    except ClientError as e:
+        logger.error(f"Error de API al obtener todas las órdenes abiertas: Status={e.status_code}, Code={e.error_code}, Msg={e.error_message}")
+        return None
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener todas las órdenes abiertas: {e}", exc_info=True)
+        return None
+
 # --- Funciones existentes ---
 # get_historical_klines(...)
 # get_futures_symbol_info(...)
@@ -327,16 +515,35 @@ def get_order_book_ticker(symbol: str) -> dict | None:
         logger.error(f"Error al obtener el book ticker para {symbol} con 'book_ticker': {e}")
         return None
 
-def create_futures_limit_order(symbol: str, side: str, quantity: float, price: float) -> dict | None:
+def get_order_book_depth(symbol: str, limit: int = 100) -> dict | None:
+    """
+    Foto del order book (GET /fapi/v1/depth): {'lastUpdateId', 'bids': [[precio, cantidad], ...], 'asks': [...]}.
+    Base para sincronizar el libro local (order_book.py). None si hay error.
+    """
+    client = get_futures_client()
+    logger = get_logger()
+    if not client:
+        logger.error("Cliente Binance no disponible para get_order_book_depth.")
+        return None
+    try:
+        return client.depth(symbol=symbol.upper(), limit=limit)
+    except Exception as e:
+        logger.error(f"Error al obtener la profundidad del order book para {symbol}: {e}")
+        return None
+
+def create_futures_limit_order(symbol: str, side: str, quantity: float, price: float, time_in_force: str = 'GTC',
+                               client_order_id: str | None = None) -> dict | None:
     """
     Crea una orden LIMIT en Binance Futures.
-    Utiliza timeInForce='GTC' (Good 'Til Canceled).
+    Utiliza timeInForce='GTC' (Good 'Til Canceled) salvo que se pida 'GTX' (post-only: se rechaza si cruzaría el libro).
 
     Args:
         symbol: Símbolo del par (ej: 'BTCUSDT').
         side: 'BUY' o 'SELL'.
         quantity: La cantidad a comprar/vender.
         price: El precio límite para la orden.
+        time_in_force: 'GTC' o 'GTX'.
+        client_order_id: newClientOrderId de la intención (ver make_client_order_id); si no se da se genera uno.
 
     Returns:
         El diccionario de respuesta de la API si la orden se creó exitosamente, None si falló.
@@ -352,17 +559,22 @@ def create_futures_limit_order(symbol: str, side: str, quantity: float, price: f
         logger.error(f"Lado inválido '{side}' para crear orden LIMIT.")
         return None
 
+    params = {
+        'symbol': symbol.upper(),
+        'side': side,
+        'type': 'LIMIT',
+        'timeInForce': time_in_force,
+        'quantity': quantity,
+        'price': price,
+        'positionSide': 'LONG',
+        'newClientOrderId': client_order_id or make_client_order_id(symbol, 'lm')
+    }
+    if preflight_order_rejection(params):
+        return None
+
     try:
-        logger.info(f"Intentando crear orden LIMIT {side} para {quantity} {symbol} @ {price}")
-        order = client.new_order(
-            symbol=symbol.upper(),
-            side=side,
-            type='LIMIT',
-            timeInForce='GTC',
-            quantity=quantity,
-            price=price,
-            positionSide='LONG'
-        )
+        logger.info(f"Intentando crear orden LIMIT {side} ({time_in_force}) para {quantity} {symbol} @ {price}")
+        order = submit_order_idempotent(client, params)
         logger.info(f"Orden LIMIT {side} creada para {symbol}. Respuesta API: {order}")
         # La respuesta contendrá el orderId, status ('NEW'), etc.
         return order
@@ -370,6 +582,35 @@ def create_futures_limit_order(symbol: str, side: str, quantity: float, price: f
         logger.error(f"Error al crear orden LIMIT {side} para {symbol} @ {price}: {e}", exc_info=True)
         return None
 
+def modify_futures_limit_order(symbol: str, order_id: int, side: str, quantity: float, price: float) -> dict | None:
+    """
+    Cambia el precio de una orden LIMIT abierta sin cancelarla (PUT /fapi/v1/order).
+    Binance exige reenviar lado y cantidad; la orden conserva su orderId y su timeInForce
+    y pasa al final de la cola del nuevo nivel de precio.
+
+    Returns:
+        La orden modificada, o None si Binance rechazó la modificación (el llamador puede hacer cancel+new).
+    """
+    client = get_futures_client()
+    logger = get_logger()
+    if not client:
+        logger.error("Cliente Binance no disponible para modify_futures_limit_order.")
+        return None
+    if preflight_order_rejection({'symbol': symbol.upper(), 'side': side.upper(), 'type': 'LIMIT', 'quantity': quantity,
+                                  'price': price, 'positionSide': 'LONG'}):
+        return None
+    try:
+        order = client.modify_order(symbol=symbol.upper(), side=side.upper(), quantity=quantity, price=price,
+                                    orderId=order_id, positionSide='LONG')
+        logger.debug(f"[{symbol}] Orden {order_id} modificada a {price}. Respuesta API: {order}")
+        return order
+    except ClientError as e:
+        logger.warning(f"[{symbol}] Binance rechazó modificar la orden {order_id} a {price}: Code={e.error_code}, Msg={e.error_message}")
+        return None
+    except Exception as e:
+        logger.error(f"[{symbol}] Error inesperado al modificar la orden {order_id}: {e}", exc_info=True)
+        return None
+
 def get_order_status(symbol: str, order_id: int) -> dict | None:
     """
     Consulta el estado de una orden específica en Binance Futures.
@@ -424,20 +665,20 @@ def cancel_futures_order(symbol: str, order_id: int) -> dict | None:
         logger.error(f"Error al intentar cancelar orden {order_id} ({symbol}): {e}", exc_info=False) # No mostrar traceback completo para errores esperados
         return None
 
-# --- Funciones para colocar órdenes TP/SL ---
-def create_futures_take_profit_order(symbol: str, side: str, quantity: float, take_profit_price: str, close_position: bool = True) -> dict | None:
+def cancel_order_and_get_status(symbol: str, order_id: int) -> tuple[dict | None, dict | None]:
     """
-    Coloca una orden TAKE_PROFIT_MARKET en Binance Futures.
-    Para una posición LONG, side='SELL'.
-    take_profit_price es el precio al que se activa la orden de mercado.
+    Cancela una orden y vuelve a consultar su estado (la cancelación puede cruzarse con un llenado).
+    Devuelve (respuesta de cancelación, estado tras cancelar); cualquiera de los dos puede ser None.
     """
-    logger = get_logger()
-    client = get_futures_client()
-    if not client:
-        logger.error("Cliente de Binance no inicializado al intentar crear orden Take Profit.")
-        return None
+    cancel_result = cancel_futures_order(symbol, order_id)
+    return cancel_result, get_order_status(symbol, order_id)
 
-    params = {
+# --- Funciones para colocar órdenes TP/SL ---
+def build_take_profit_order_params(symbol: str, side: str, quantity: float, take_profit_price: str, close_position: bool = True,
+                                   client_order_id: str | None = None) -> dict:
+    """Construye los parámetros de una orden TAKE_PROFIT_MARKET (usados tanto en new_order como en batchOrders)."""
+    return {
+        'newClientOrderId': client_order_id or make_client_order_id(symbol, 'tp'),
         'symbol': symbol,
         'side': side,                    # 'BUY' o 'SELL'
         'type': 'TAKE_PROFIT_MARKET',    # Tipo de orden
@@ -447,10 +688,41 @@ def create_futures_take_profit_order(symbol: str, side: str, quantity: float, ta
         'positionSide': 'LONG'           # Asumiendo que el bot solo opera LONG
         # 'timeInForce': 'GTC', # No usualmente necesario para TAKE_PROFIT_MARKET con closePosition=true
     }
+
+def build_stop_loss_order_params(symbol: str, side: str, quantity: float, stop_loss_price: str, close_position: bool = True,
+                                 client_order_id: str | None = None) -> dict:
+    """Construye los parámetros de una orden STOP_MARKET (usados tanto en new_order como en batchOrders)."""
+    return {
+        'newClientOrderId': client_order_id or make_client_order_id(symbol, 'sl'),
+        'symbol': symbol,
+        'side': side,                   # 'BUY' o 'SELL'
+        'type': 'STOP_MARKET',          # Tipo de orden
+        'quantity': quantity,           # Cantidad a comprar/vender
+        'stopPrice': stop_loss_price,   # Precio de activación para SL
+        'closePosition': str(close_position).lower(), # 'true' o 'false'
+        'positionSide': 'LONG'          # Asumiendo que el bot solo opera LONG
+        # 'timeInForce': 'GTC', # No usualmente necesario para STOP_MARKET con closePosition=true
+    }
+
+def create_futures_take_profit_order(symbol: str, side: str, quantity: float, take_profit_price: str, close_position: bool = True,
+                                     client_order_id: str | None = None) -> dict | None:
+    """
+    Coloca una orden TAKE_PROFIT_MARKET en Binance Futures.
+    Para una posición LONG, side='SELL'.
+    take_profit_price es el precio al que se activa la orden de mercado.
+    """
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error("Cliente de Binance no inicializado al intentar crear orden Take Profit.")
+        return None
+
+    params = build_take_profit_order_params(symbol, side, quantity, take_profit_price, close_position, client_order_id)
+    if preflight_order_rejection(params):
+        return None
     logger.info(f"Intentando colocar orden TAKE_PROFIT_MARKET para {symbol}: Side={side}, Qty={quantity}, TP Price={take_profit_price}, ClosePos={close_position}")
     try:
-        # Usar client.new_order() que es el método estándar para crear órdenes
-        order = client.new_order(**params)
+        order = submit_order_idempotent(client, params)
         logger.info(f"Orden TAKE_PROFIT_MARKET creada: ID={order.get('orderId')}, Status={order.get('status')}")
         logger.debug(f"Respuesta completa de orden TP: {order}")
         return order
@@ -461,7 +733,8 @@ def create_futures_take_profit_order(symbol: str, side: str, quantity: float, ta
         logger.error(f"Error al colocar la orden TAKE_PROFIT_MARKET para {symbol} @ {take_profit_price}: {e}", exc_info=True)
         return None
 
-def create_futures_stop_loss_order(symbol: str, side: str, quantity: float, stop_loss_price: str, close_position: bool = True) -> dict | None:
+def create_futures_stop_loss_order(symbol: str, side: str, quantity: float, stop_loss_price: str, close_position: bool = True,
+                                   client_order_id: str | None = None) -> dict | None:
     """
     Coloca una orden STOP_MARKET en Binance Futures.
     Para una posición LONG, side='SELL'.
@@ -473,20 +746,12 @@ def create_futures_stop_loss_order(symbol: str, side: str, quantity: float, stop
         logger.error("Cliente de Binance no inicializado al intentar crear orden Stop Loss.")
         return None
 
-    params = {
-        'symbol': symbol,
-        'side': side,                   # 'BUY' o 'SELL'
-        'type': 'STOP_MARKET',          # Tipo de orden
-        'quantity': quantity,           # Cantidad a comprar/vender
-        'stopPrice': stop_loss_price,   # Precio de activación para SL
-        'closePosition': str(close_position).lower(), # 'true' o 'false'
-        'positionSide': 'LONG'          # Asumiendo que el bot solo opera LONG
-        # 'timeInForce': 'GTC', # No usualmente necesario para STOP_MARKET con closePosition=true
-    }
+    params = build_stop_loss_order_params(symbol, side, quantity, stop_loss_price, close_position, client_order_id)
+    if preflight_order_rejection(params):
+        return None
     logger.info(f"Intentando colocar orden STOP_MARKET para {symbol}: Side={side}, Qty={quantity}, SL Price={stop_loss_price}, ClosePos={close_position}")
     try:
-        # Usar client.new_order()
-        order = client.new_order(**params)
+        order = submit_order_idempotent(client, params)
         logger.info(f"Orden STOP_MARKET creada: ID={order.get('orderId')}, Status={order.get('status')}")
         logger.debug(f"Respuesta completa de orden SL: {order}")
         return order
@@ -497,6 +762,181 @@ def create_futures_stop_loss_order(symbol: str, side: str, quantity: float, stop
         logger.error(f"Error al colocar la orden STOP_MARKET para {symbol} @ {stop_loss_price}: {e}", exc_info=True)
         return None
 
+# --- Trailing stop nativo de Binance (TRAILING_STOP_MARKET) ---
+TRAILING_STOP_CALLBACK_RATE_MIN = Decimal('0.1') # % mínimo que acepta Binance
+TRAILING_STOP_CALLBACK_RATE_MAX = Decimal('5')  # % máximo que acepta Binance en USDT-M (más da -2007/-1102)
+TRAILING_STOP_CALLBACK_RATE_STEP = Decimal('0.1')
+
+def trailing_callback_rate_from_distance(distance: Decimal, reference_price: Decimal) -> tuple[Decimal | None, bool]:
+    """
+    Convierte una distancia de precio (como price_trailing_stop_distance_usdt) en el callbackRate (%)
+    equivalente respecto de `reference_price`, redondeado al paso de 0.1 y acotado a [0.1, 5].
+    Devuelve (callback_rate, fue_acotado). callback_rate es None si los datos no son válidos.
+    """
+    if distance is None or reference_price is None or distance <= Decimal('0') or reference_price <= Decimal('0'):
+        return None, False
+    raw_rate = (distance / reference_price * Decimal('100')).quantize(TRAILING_STOP_CALLBACK_RATE_STEP)
+    callback_rate = min(max(raw_rate, TRAILING_STOP_CALLBACK_RATE_MIN), TRAILING_STOP_CALLBACK_RATE_MAX)
+    return callback_rate, callback_rate != raw_rate
+
+def build_trailing_stop_order_params(symbol: str, side: str, quantity: float, callback_rate: str, activation_price: str | None = None,
+                                     client_order_id: str | None = None) -> dict:
+    """
+    Construye los parámetros de una orden TRAILING_STOP_MARKET.
+    Binance no admite closePosition en este tipo: se envía la cantidad de la posición (positionSide LONG).
+    Sin activation_price la orden se activa al colocarla, siguiendo el máximo desde ese momento.
+    """
+    params = {
+        'newClientOrderId': client_order_id or make_client_order_id(symbol, 'ts'),
+        'symbol': symbol,
+        'side': side,                     # 'SELL' para cerrar un LONG
+        'type': 'TRAILING_STOP_MARKET',
+        'quantity': quantity,
+        'callbackRate': callback_rate,    # % de retroceso desde el máximo (0.1 - 5)
+        'positionSide': 'LONG'            # Asumiendo que el bot solo opera LONG
+    }
+    if activation_price is not None:
+        params['activationPrice'] = activation_price
+    return params
+
+def create_futures_trailing_stop_order(symbol: str, side: str, quantity: float, callback_rate: str, activation_price: str | None = None,
+                                       client_order_id: str | None = None) -> dict | None:
+    """
+    Coloca una orden TRAILING_STOP_MARKET en Binance Futures.
+    Para una posición LONG, side='SELL'. El seguimiento del máximo lo hace el exchange.
+    """
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error("Cliente de Binance no inicializado al intentar crear orden Trailing Stop.")
+        return None
+
+    params = build_trailing_stop_order_params(symbol, side, quantity, callback_rate, activation_price, client_order_id)
+    if preflight_order_rejection(params):
+        return None
+    logger.info(f"Intentando colocar orden TRAILING_STOP_MARKET para {symbol}: Side={side}, Qty={quantity}, CallbackRate={callback_rate}%, Activación={activation_price or 'inmediata'}")
+    try:
+        order = submit_order_idempotent(client, params)
+        logger.info(f"Orden TRAILING_STOP_MARKET creada: ID={order.get('orderId')}, Status={order.get('status')}")
+        logger.debug(f"Respuesta completa de orden Trailing Stop: {order}")
+        return order
+    except ClientError as e:
+        logger.error(f"Error de API al colocar la orden TRAILING_STOP_MARKET para {symbol} (callbackRate {callback_rate}%): Status={e.status_code}, Code={e.error_code}, Msg={e.error_message}", exc_info=True)
+        return None
+    except Exception as e:
+        logger.error(f"Error al colocar la orden TRAILING_STOP_MARKET para {symbol} (callbackRate {callback_rate}%): {e}", exc_info=True)
+        return None
+
+# --- Órdenes en lote (/fapi/v1/batchOrders) ---
+BATCH_ORDERS_MAX_LEGS = 5 # Límite de Binance para POST /fapi/v1/batchOrders
+BATCH_CANCEL_MAX_IDS = 10 # Límite de Binance para DELETE /fapi/v1/batchOrders
+
+def create_futures_batch_orders(symbol: str, orders: list[dict]) -> list[dict] | None:
+    """
+    Envía varias órdenes en una sola petición firmada a /fapi/v1/batchOrders.
+    Útil para colocar el par TP/SL juntos: la posición queda protegida tras un único round-trip
+    y se consume el peso de API de una sola petición.
+
+    Args:
+        symbol: Símbolo del par (ej: 'BTCUSDT'). Sólo se usa para logs.
+        orders: Lista de diccionarios de parámetros (como los de new_order). Máximo 5.
+
+    Returns:
+        Una lista con un resultado por pierna, en el mismo orden que `orders`.
+        Cada resultado es la respuesta de la orden (con 'orderId') si esa pierna se creó,
+        o un diccionario con 'code' y 'msg' si Binance la rechazó.
+        None si la petición completa falló (red, firma, etc.).
+    """
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error(f"[{symbol}] Cliente de Binance no inicializado al intentar crear órdenes en lote.")
+        return None
+
+    if not orders:
+        return []
+    if len(orders) > BATCH_ORDERS_MAX_LEGS:
+        logger.error(f"[{symbol}] Demasiadas órdenes en el lote ({len(orders)}). Máximo permitido: {BATCH_ORDERS_MAX_LEGS}.")
+        return None
+
+    # Las piernas que no pasan los filtros locales no se envían: su resultado es el rechazo local
+    local_results = {}
+    for index, order in enumerate(orders):
+        rejection = preflight_order_rejection(order)
+        if rejection:
+            local_results[index] = {'code': 'LOCAL_FILTER', 'msg': rejection.summary(), 'reasons': rejection.reasons}
+    # Cada pierna lleva su newClientOrderId: si el lote falla con resultado desconocido se consulta una a una
+    orders_to_send = [dict(order, newClientOrderId=order.get('newClientOrderId') or make_client_order_id(symbol, 'b'))
+                      for index, order in enumerate(orders) if index not in local_results]
+    if not orders_to_send:
+        return [local_results[index] for index in range(len(orders))]
+
+    # batchOrders exige que todos los valores viajen como strings dentro del JSON
+    batch_payload = [{key: str(value) for key, value in order.items() if value is not None} for order in orders_to_send]
+    logger.info(f"[{symbol}] Intentando colocar {len(batch_payload)} órdenes en lote: {[o.get('type') for o in batch_payload]}")
+    try:
+        results = client.new_batch_order(batchOrders=batch_payload)
+    except Exception as e:
+        if not _is_unknown_status_error(e):
+            if isinstance(e, ClientError):
+                logger.error(f"[{symbol}] Error de API al colocar órdenes en lote: Status={e.status_code}, Code={e.error_code}, Msg={e.error_message}")
+            else:
+                logger.error(f"[{symbol}] Error inesperado al colocar órdenes en lote: {e}", exc_info=True)
+            return None
+        logger.warning(f"[{symbol}] Resultado desconocido del lote ({e}). Consultando cada pierna por origClientOrderId...")
+        results = []
+        for leg in batch_payload:
+            try:
+                existing = _query_order_by_client_id(client, symbol, leg['newClientOrderId'])
+            except Exception as query_error:
+                logger.error(f"[{symbol}] No se pudo consultar la pierna {leg['newClientOrderId']} del lote: {query_error}")
+                return None
+            # Las piernas que no llegaron se devuelven como rechazo: el llamador las reenvía (mismo ID, sin duplicar)
+            results.append(existing or {'code': ORDER_DOES_NOT_EXIST_CODE, 'msg': 'La orden no llegó a Binance (lote con resultado desconocido).'})
+
+    if not isinstance(results, list) or len(results) != len(batch_payload):
+        logger.error(f"[{symbol}] Respuesta inesperada de batchOrders (se esperaban {len(batch_payload)} resultados): {results}")
+        return None
+
+    for leg, result in zip(batch_payload, results):
+        if isinstance(result, dict) and result.get('orderId'):
+            logger.info(f"[{symbol}] Orden {leg.get('type')} creada en lote: ID={result.get('orderId')}, Status={result.get('status')}")
+        else:
+            logger.error(f"[{symbol}] Orden {leg.get('type')} RECHAZADA dentro del lote: {result}")
+    if local_results:
+        sent_results = iter(results)
+        results = [local_results[index] if index in local_results else next(sent_results) for index in range(len(orders))]
+    return results
+
+def cancel_futures_batch_orders(symbol: str, order_ids: list[int]) -> list[dict] | None:
+    """
+    Cancela varias órdenes de un símbolo en una sola petición (DELETE /fapi/v1/batchOrders).
+
+    Returns:
+        Una lista con un resultado por orden, en el mismo orden que `order_ids`
+        (respuesta de cancelación o diccionario con 'code'/'msg'), o None si la petición completa falló.
+    """
+    logger = get_logger()
+    client = get_futures_client()
+    if not client:
+        logger.error(f"[{symbol}] Cliente Binance no disponible para cancel_futures_batch_orders.")
+        return None
+
+    if not order_ids:
+        return []
+    if len(order_ids) > BATCH_CANCEL_MAX_IDS:
+        logger.error(f"[{symbol}] Demasiadas órdenes para cancelar en lote ({len(order_ids)}). Máximo permitido: {BATCH_CANCEL_MAX_IDS}.")
+        return None
+
+    try:
+        logger.warning(f"[{symbol}] Intentando cancelar en lote las órdenes {order_ids}...")
+        results = client.cancel_batch_order(symbol=symbol.upper(), orderIdList=[int(order_id) for order_id in order_ids], origClientOrderIdList=None)
+        logger.info(f"[{symbol}] Respuesta de cancelación en lote: {results}")
+        return results
+    except Exception as e:
+        logger.error(f"[{symbol}] Error al cancelar órdenes en lote {order_ids}: {e}", exc_info=False)
+        return None
+
 # --- FIN MODIFICACIONES ---
 
 # --- Nueva función para obtener historial de trades del usuario ---
@@ -520,10 +960,10 @@ def get_user_trade_history(symbol: str, start_time_ms: int | None = None, limit:
         if start_time_ms is not None:
             params['startTime'] = start_time_ms
         
-        # client.futures_account_trades() suele devolver los más recientes si no se especifica orderId o fromId.
+        # client.get_account_trades() (GET /fapi/v1/userTrades) suele devolver los más recientes si no se especifica orderId o fromId.
         # La documentación indica que los trades se devuelven en orden ascendente por 'time'.
         # Para obtener los más recientes relacionados con un cierre, podríamos necesitar buscar desde el final.
-        trades = client.futures_account_trades(**params)
+        trades = client.get_account_trades(**params)
         
         if trades:
             # Ordenar por 'time' descendente (más nuevo primero) para procesar cierres recientes primero.
@@ -5,8 +5,12 @@ import time
 import pandas as pd
 from decimal import Decimal, ROUND_DOWN, ROUND_UP
 import math
+import logging
 from enum import Enum # <-- Importar Enum
 import os
+import threading
+from collections import deque
+from functools import partial
 
 # Importamos los módulos que hemos creado
 # from .config_loader import load_config # No se usa directamente aquí ahora
@@ -20,13 +24,35 @@ from .binance_client import (
     create_futures_limit_order,
     get_order_status,
     cancel_futures_order,
+    cancel_order_and_get_status,
     create_futures_take_profit_order, # <-- NUEVA IMPORTACIÓN
     create_futures_stop_loss_order,    # <-- NUEVA IMPORTACIÓN
-    get_user_trade_history, # <-- NUEVA IMPORTACIÓN
+    create_futures_batch_orders,
+    cancel_futures_batch_orders,
+    build_take_profit_order_params,
+    build_stop_loss_order_params,
+    create_futures_trailing_stop_order,
+    make_client_order_id,
+    trailing_callback_rate_from_distance,
     get_open_interest_history # <-- NUEVA IMPORTACIÓN
 )
 from .rsi_calculator import calculate_rsi
-from .database import init_db_schema, record_trade # Importamos solo las necesarias
+from .trading_params import TradingParams
+from .exit_monitor import ExitMonitor
+from .fills_ledger import get_fills_ledger
+from .pnl_engine import get_pnl_engine
+from .order_chaser import OrderChaser, get_best_bid_ask
+from .order_book import get_order_book_cache
+from .order_filters import register_symbol_filters
+from .fixed_point import TickScale
+from .decision_journal import (get_decision_journal, DecisionTrace, COND_DOWNTREND_LEVELS, COND_DOWNTREND_CANDLES,
+                               COND_RSI_RANGE, COND_RSI_DELTA, COND_VOLUME, COND_UPTREND, COND_OI_INCREASE,
+                               ACTION_NO_SIGNAL, ACTION_ENTRY_SUBMITTED, ACTION_BLOCKED_DOWNTREND, ACTION_NO_RSI,
+                               ACTION_NO_PRICE, ACTION_INVALID_QUANTITY, ACTION_FILTER_REJECTED)
+from .order_executor import get_order_executor, PRIORITY_CANCEL, PRIORITY_PROTECTIVE, PRIORITY_ENTRY
+from .reconciler import get_order_reconciler, is_bot_order, is_long_protective_order, ORDER_RECONCILE_TRUST_SECONDS
+from .user_stream import get_user_stream
+from .database import init_db_schema, enqueue_trade # Importamos solo las necesarias (enqueue_trade no bloquea el hilo de trading)
 # --- NUEVA IMPORTACIÓN DE DB ---
 from .database import check_if_binance_trade_exists 
 # -----------------------------
@@ -54,16 +80,22 @@ class TradingBot:
     Diseñada para ser instanciada por cada símbolo a operar.
     Ahora usa órdenes LIMIT.
     """
-    def __init__(self, symbol: str, trading_params: dict):
+    def __init__(self, symbol: str, trading_params: TradingParams | dict, snapshot=None):
         """
         Inicializa el bot para un símbolo específico.
         Lee parámetros, inicializa el cliente, obtiene información del símbolo y estado inicial.
+        Con `snapshot` (StartupSnapshot, ver startup_snapshot.py) la información del símbolo, la posición y
+        las órdenes abiertas salen de la foto compartida de arranque en lugar de consultas individuales.
         """
         self.symbol = symbol.upper()
         self.logger = get_logger()
-        self.params = trading_params # <-- STORE the params dictionary
-        self.logger.info(f"[{self.symbol}] Inicializando worker con parámetros RECIBIDOS: {self.params}")
-        self.logger.info(f"[{self.symbol}] Inicializando worker con parámetros: {self.params}")
+        # Los parámetros llegan ya validados (TradingParams compartido entre bots); un dict se convierte una sola vez
+        try:
+            self.params = TradingParams.from_mapping(trading_params)
+        except (ValueError, TypeError) as e:
+            self.logger.critical(f"[{self.symbol}] Error al procesar parámetros de trading recibidos: {e}", exc_info=True)
+            raise ValueError(f"Parámetros de trading inválidos para {self.symbol}")
+        self.logger.debug(f"[{self.symbol}] Inicializando worker con parámetros: {self.params}")
 
         # --- Estado Interno ---
         self.current_state = BotState.INITIALIZING # Estado inicial
@@ -73,11 +105,7 @@ class TradingBot:
         self.tp_price = None
         self.entry_reason = ""
         self.exit_reason = ""
-        self.downtrend_check_candles = trading_params.get('downtrend_check_candles', 0) # <-- Nuevo atributo
-        self.downtrend_level_check = int(trading_params.get('downtrend_level_check', 0)) # <-- NUEVO: Para el check de niveles, asegurando tipo int
-        self.required_uptrend_candles = int(trading_params.get('required_uptrend_candles', 0)) # <-- NUEVO PARÁMETRO
         self.rsi_at_entry = None # <-- NUEVO: Para guardar el RSI al momento de la entrada
-        self.rsi_target = float(self.params.get('rsi_target', 50.0)) # Nuevo campo para RSI objetivo
         self.rsi_objetivo_activado = False  # <-- MOVIDO AQUÍ: Indica si el objetivo ya fue alcanzado
         self.rsi_objetivo_alcanzado_en = None  # <-- MOVIDO AQUÍ: Guarda el valor de RSI cuando se alcanzó el objetivo
         self.rsi_peak_since_target = None # Almacenará el RSI más alto desde que rsi_target fue alcanzado
@@ -85,34 +113,35 @@ class TradingBot:
         # --- NUEVO: IDs para órdenes TP/SL ---
         self.pending_tp_order_id = None
         self.pending_sl_order_id = None
-        self.evaluate_rsi_delta = trading_params.get('evaluate_rsi_delta', True) # <-- NUEVO: Leer el parámetro
-        self.evaluate_volume_filter = trading_params.get('evaluate_volume_filter', True) # <-- NUEVO: Leer parámetro de filtro de volumen
-        # --- Cargar todos los nuevos parámetros de control ---
-        self.evaluate_rsi_range = trading_params.get('evaluate_rsi_range', True)
-        self.evaluate_downtrend_candles_block = trading_params.get('evaluate_downtrend_candles_block', True)
-        self.evaluate_downtrend_levels_block = trading_params.get('evaluate_downtrend_levels_block', True)
-        self.evaluate_required_uptrend = trading_params.get('evaluate_required_uptrend', True)
-        self.enable_take_profit_pnl = trading_params.get('enable_take_profit_pnl', True)
-        self.enable_stop_loss_pnl = trading_params.get('enable_stop_loss_pnl', True)
-        self.enable_trailing_rsi_stop = trading_params.get('enable_trailing_rsi_stop', True)
-        # --- NUEVOS PARÁMETROS Y ESTADO PARA TRAILING STOP DE PRECIO ---
-        self.enable_price_trailing_stop = trading_params.get('enable_price_trailing_stop', True)
-        self.price_trailing_stop_distance_usdt = Decimal(str(trading_params.get('price_trailing_stop_distance_usdt', '0.05')))
-        self.price_trailing_stop_activation_pnl_usdt = Decimal(str(trading_params.get('price_trailing_stop_activation_pnl_usdt', '0.02')))
-        self.price_peak_since_entry = None # Precio más alto desde la entrada
+        # --- Estado para trailing stop de precio ---
+        self.price_peak_ticks = None # Precio más alto desde la entrada, en ticks enteros (fixed_point.TickScale)
+        self.price_trailing_distance_ticks = None # Distancia del trailing en ticks, se recalcula con cada parámetro aplicado
+        self.tick_scale = None # Se crea al leer los filtros del símbolo (más abajo)
         self.price_trailing_stop_armed = False # Si el PNL de activación se ha alcanzado
-        # --- NUEVOS PARÁMETROS Y ESTADO PARA TRAILING STOP DE PNL ---
-        self.enable_pnl_trailing_stop = trading_params.get('enable_pnl_trailing_stop', True)
-        self.pnl_trailing_stop_activation_usdt = Decimal(str(trading_params.get('pnl_trailing_stop_activation_usdt', '0.1')))
-        self.pnl_trailing_stop_drop_usdt = Decimal(str(trading_params.get('pnl_trailing_stop_drop_usdt', '0.05')))
+        self.pending_trailing_order_id = None # Orden TRAILING_STOP_MARKET (price_trailing_stop_mode='exchange')
+        self.exchange_trailing_unavailable = False # Si Binance rechazó el trailing nativo, se evalúa en local
+        # --- Estado para trailing stop de PNL ---
         self.pnl_peak_since_activation = None # PNL más alto desde que el PNL trailing stop se armó
         self.pnl_trailing_stop_armed = False # Si el PNL trailing stop está armado
-        # --- NUEVO: Para Open Interest ---
-        self.evaluate_open_interest_increase = str(trading_params.get('evaluate_open_interest_increase', 'True')).lower() == 'true'
-        self.open_interest_period = trading_params.get('open_interest_period', '5m') # <-- NUEVO: Leer el período para OI
-        # -------------------------------------------------------------
-        # -------------------------------------------------------------
-        # --------------------------------------------------
+
+        self._apply_trading_params(self.params)
+        # --- Recarga en caliente de parámetros (ver request_params_update) ---
+        self._params_lock = threading.Lock()
+        self._pending_params = None # Nueva versión a adoptar en el próximo punto seguro de run_once
+        self.entries_paused = False # True mientras el símbolo se retira de la configuración: no abrir nuevas posiciones
+        # --- Salidas por tick (ver exit_monitor.py) ---
+        self._exit_lock = threading.RLock() # Protege picos/armado de trailing stops (hilo del worker vs hilo del stream)
+        self.wake_event = threading.Event() # El worker espera en este evento: un tick que dispara salida lo despierta
+        self.tick_exit_reason = None # Salida pedida por el monitor de ticks, pendiente de ejecutar en run_once
+        self.tick_exit_price = None
+        self.exit_monitor = ExitMonitor(self)
+        self.fills_ledger = get_fills_ledger(self.symbol) # Fills propios por orderId/tradeId (cálculo de PnL de cierre)
+        # --- Datos para el planificador de ciclos (scheduler.py) ---
+        self.consecutive_downtrend_blocks = 0 # Ciclos seguidos con la entrada bloqueada por _check_downtrend_levels
+        # Registro binario de cada evaluación de entrada (decision_journal.py); sustituye a los logs INFO por condición
+        self.decision_trace = DecisionTrace(self.symbol)
+        self.decision_journal = get_decision_journal()
+        self.last_candle_range_pct = None # Rango medio (high-low)/close de las últimas velas, como fracción
 
         # Cliente Binance (se inicializa una vez por bot)
         self.client = get_futures_client()
@@ -122,46 +151,11 @@ class TradingBot:
             # Lanzar una excepción para detener la inicialización de este worker
             raise ConnectionError("Failed to initialize Binance client for worker.")
 
-        # Extraer parámetros necesarios de self.params (usando .get con defaults)
-        try:
-            self.rsi_interval = str(self.params.get('rsi_interval', '5m'))
-            self.rsi_period = int(self.params.get('rsi_period', 14))
-            self.rsi_threshold_up = float(self.params.get('rsi_threshold_up', 1.5))
-            self.rsi_threshold_down = float(self.params.get('rsi_threshold_down', -1.0))
-            self.rsi_entry_level_low = float(self.params.get('rsi_entry_level_low', 25.0))
-            self.rsi_entry_level_high = float(self.params.get('rsi_entry_level_high', 75.0))
-            # --- Leer parámetros de volumen --- 
-            self.volume_sma_period = int(self.params.get('volume_sma_period', 20))
-            self.volume_factor = float(self.params.get('volume_factor', 1.5))
-            # ----------------------------------
-            self.position_size_usdt = Decimal(str(self.params.get('position_size_usdt', '50')))
-            self.take_profit_usdt = Decimal(str(self.params.get('take_profit_usdt', '0')))
-            self.stop_loss_usdt = Decimal(str(self.params.get('stop_loss_usdt', '0')))
-            
-            # --- Nuevo parámetro para timeout de órdenes LIMIT ---
-            self.order_timeout_seconds = int(self.params.get('order_timeout_seconds', 60))
-            if self.order_timeout_seconds < 0:
-                self.logger.warning(f"[{self.symbol}] ORDER_TIMEOUT_SECONDS ({self.order_timeout_seconds}) debe ser >= 0. Usando 60.")
-                self.order_timeout_seconds = 60
-            # ---------------------------------------------------
-
-            # Validaciones básicas de parámetros
-            if self.volume_sma_period <= 0:
-                 self.logger.warning(f"[{self.symbol}] VOLUME_SMA_PERIOD ({self.volume_sma_period}) debe ser positivo. Usando 20.")
-                 self.volume_sma_period = 20
-            # if self.volume_factor <= 0: # Comentado para permitir volume_factor = 0 desde config
-            #     self.logger.warning(f"[{self.symbol}] VOLUME_FACTOR ({self.volume_factor}) debe ser positivo. Usando 1.5.")
-            #     self.volume_factor = 1.5
-            if self.take_profit_usdt < 0:
-                 self.logger.warning(f"[{self.symbol}] TAKE_PROFIT_USDT ({self.take_profit_usdt}) debe ser positivo o cero. Usando 0.")
-                 self.take_profit_usdt = Decimal('0')
-
-        except (ValueError, TypeError) as e:
-            self.logger.critical(f"[{self.symbol}] Error al procesar parámetros de trading recibidos: {e}", exc_info=True)
-            raise ValueError(f"Parámetros de trading inválidos para {self.symbol}")
-
         # Obtener información del símbolo (precisión, tick size) - usa self.symbol
-        self.symbol_info = get_futures_symbol_info(self.symbol)
+        if snapshot is not None and snapshot.symbols_info is not None:
+            self.symbol_info = snapshot.symbol_info(self.symbol)
+        else:
+            self.symbol_info = get_futures_symbol_info(self.symbol)
         if not self.symbol_info:
             self.logger.critical(f"[{self.symbol}] No se pudo obtener información para el símbolo. Abortando worker.")
             raise ValueError(f"Información de símbolo {self.symbol} no disponible")
@@ -174,6 +168,14 @@ class TradingBot:
                 break
         if self.price_tick_size is None:
              self.logger.warning(f"[{self.symbol}] No se encontró PRICE_FILTER tickSize, redondeo de precio puede ser impreciso.")
+        # Filtros compilados (LOT_SIZE, MIN_NOTIONAL, PERCENT_PRICE...) para validar las órdenes antes de enviarlas
+        self.order_filters = register_symbol_filters(self.symbol_info)
+        self.last_order_rejection = None # Motivos estructurados del último rechazo local (order_filters.py)
+        # Precios y cantidades en enteros de ticks/lotes para el camino caliente; Decimal sólo en el borde con la API
+        step_size = self.order_filters.step_size if self.order_filters is not None and self.order_filters.step_size else Decimal('1e-' + str(self.qty_precision))
+        self.tick_scale = TickScale(self.price_tick_size, step_size)
+        self.price_precision_log = self.tick_scale.price_decimals if self.price_tick_size and self.price_tick_size > Decimal('0') else 2
+        self._refresh_tick_params()
 
         # La inicialización de DB y esquema es global, no se hace aquí
 
@@ -186,12 +188,23 @@ class TradingBot:
         self.pending_entry_order_id = None  # Guarda el ID de la orden LIMIT BUY pendiente
         self.pending_exit_order_id = None   # Guarda el ID de la orden LIMIT SELL pendiente
         self.pending_order_timestamp = None # Guarda el time.time() cuando se creó la orden pendiente
+        self.order_chaser = None # OrderChaser de la orden LIMIT pendiente (entrada o salida), ver order_chaser.py
+        # newClientOrderId por intención: época del worker + secuencia (ver _client_order_id)
+        self._intent_epoch_ms = int(time.time() * 1000)
+        self._intent_seq = 0
+        # Operaciones de órdenes en el ejecutor (order_executor.py) y sus resultados pendientes de aplicar
+        self._order_completions = deque() # (intención, generación, on_complete), la rellenan los hilos del ejecutor
+        self._order_intents_in_flight = {} # tipo de intención -> número en curso
+        self._order_intent_generation = 0 # _reset_state la incrementa: los resultados de antes ya no aplican
+        # Conciliación de órdenes abiertas (ver reconciler.py)
+        self._pending_reconciliation = None # (órdenes abiertas del símbolo, hora del barrido), lo deja el hilo del conciliador
+        self._swept_open_order_ids = (frozenset(), 0.0) # IDs abiertos según el último barrido aplicado y su hora
         # self.current_exit_reason = None # Movido arriba con otros estados internos
         # --------------------------------------------------
         
         # self.last_known_pnl = None # Ya inicializado arriba
         
-        self._check_initial_position() # Llama a get_futures_position con self.symbol
+        self._check_initial_position(snapshot) # Usa la foto de arranque o get_futures_position con self.symbol
 
         # --- LÓGICA DE ESTADO FINAL MODIFICADA ---
         # Si no estamos en un estado de error después de las verificaciones iniciales...
@@ -206,15 +219,17 @@ class TradingBot:
         # Si hubo un error antes, el estado ya será BotState.ERROR y no se cambia aquí.
         # --- FIN DE LÓGICA MODIFICADA ---
 
+        if self.enable_order_book_cache and not get_order_book_cache().track(self.symbol):
+            self.logger.warning(f"[{self.symbol}] Libro local de órdenes no disponible. Los precios de entrada/salida se pedirán por REST (book_ticker).")
+
         self.logger.info(f"[{self.symbol}] Worker inicializado exitosamente (Timeout Órdenes: {self.order_timeout_seconds}s).")
 
         # --- NUEVA VARIABLE PARA TRAILING RSI STOP ---
         self.rsi_peak_since_target = None # Almacenará el RSI más alto desde que rsi_target fue alcanzado
         # --------------------------------------------
 
-        # --- Limpiar también estado de trailing de precio ---
-        self.price_peak_since_entry = None
-        self.price_trailing_stop_armed = False
+        # (El estado de trailing de precio ya se inicializó arriba; no se limpia aquí para conservar
+        #  un TRAILING_STOP_MARKET recuperado en _check_initial_position)
         # --- Limpiar también estado de trailing de PNL ---
         self.pnl_peak_since_activation = None
         self.pnl_trailing_stop_armed = False
@@ -222,10 +237,98 @@ class TradingBot:
         # self.previous_open_interest_usdt = None # <-- YA NO SE NECESITA
         # ----------------------------------------------------
 
-    def _check_initial_position(self):
-        """Consulta a Binance si ya existe una posición para self.symbol."""
-        self.logger.info(f"[{self.symbol}] Verificando posición inicial...")
-        position_data = get_futures_position(self.symbol) # Usa self.symbol
+    def _apply_trading_params(self, params: TradingParams):
+        """Copia los parámetros ya validados a atributos del bot (acceso directo en el camino caliente)."""
+        self.rsi_interval = params.rsi_interval
+        self.rsi_period = params.rsi_period
+        self.rsi_threshold_up = params.rsi_threshold_up
+        self.rsi_threshold_down = params.rsi_threshold_down
+        self.rsi_entry_level_low = params.rsi_entry_level_low
+        self.rsi_entry_level_high = params.rsi_entry_level_high
+        self.rsi_target = params.rsi_target
+        self.volume_sma_period = params.volume_sma_period
+        self.volume_factor = params.volume_factor
+        self.downtrend_check_candles = params.downtrend_check_candles
+        self.downtrend_level_check = params.downtrend_level_check
+        self.required_uptrend_candles = params.required_uptrend_candles
+        self.position_size_usdt = params.position_size_usdt
+        self.take_profit_usdt = params.take_profit_usdt
+        self.stop_loss_usdt = params.stop_loss_usdt
+        self.order_timeout_seconds = params.order_timeout_seconds
+        self.evaluate_rsi_delta = params.evaluate_rsi_delta
+        self.evaluate_volume_filter = params.evaluate_volume_filter
+        self.evaluate_rsi_range = params.evaluate_rsi_range
+        self.evaluate_downtrend_candles_block = params.evaluate_downtrend_candles_block
+        self.evaluate_downtrend_levels_block = params.evaluate_downtrend_levels_block
+        self.evaluate_required_uptrend = params.evaluate_required_uptrend
+        self.enable_take_profit_pnl = params.enable_take_profit_pnl
+        self.enable_stop_loss_pnl = params.enable_stop_loss_pnl
+        self.enable_trailing_rsi_stop = params.enable_trailing_rsi_stop
+        self.enable_price_trailing_stop = params.enable_price_trailing_stop
+        self.price_trailing_stop_distance_usdt = params.price_trailing_stop_distance_usdt
+        self._refresh_tick_params()
+        self.price_trailing_stop_activation_pnl_usdt = params.price_trailing_stop_activation_pnl_usdt
+        self.price_trailing_stop_mode = params.price_trailing_stop_mode
+        self.enable_pnl_trailing_stop = params.enable_pnl_trailing_stop
+        self.pnl_trailing_stop_activation_usdt = params.pnl_trailing_stop_activation_usdt
+        self.pnl_trailing_stop_drop_usdt = params.pnl_trailing_stop_drop_usdt
+        self.evaluate_open_interest_increase = params.evaluate_open_interest_increase
+        self.open_interest_period = params.open_interest_period
+        self.enable_tick_exit_monitor = params.enable_tick_exit_monitor
+        self.enable_local_pnl = params.enable_local_pnl
+        self.enable_order_chasing = params.enable_order_chasing
+        self.order_chase_max_distance_pct = params.order_chase_max_distance_pct
+        self.order_post_only = params.order_post_only
+        self.enable_order_book_cache = params.enable_order_book_cache
+        self.async_order_execution = params.async_order_execution
+        self.adaptive_scheduling = params.adaptive_scheduling
+
+    def request_params_update(self, new_params) -> bool:
+        """
+        Programa el cambio a una nueva versión de parámetros sin reiniciar el worker.
+        Se valida aquí (en el hilo que llama) y se adopta al inicio del próximo run_once,
+        nunca a mitad de un ciclo. Devuelve False si los parámetros no son válidos.
+        """
+        try:
+            validated_params = TradingParams.from_mapping(new_params)
+        except (ValueError, TypeError) as e:
+            self.logger.error(f"[{self.symbol}] Nuevos parámetros rechazados, se mantienen los actuales (v{self.params.version}): {e}")
+            return False
+        with self._params_lock:
+            self._pending_params = validated_params
+        return True
+
+    def _apply_pending_params(self):
+        """Punto seguro de run_once: adopta la versión de parámetros pendiente, con rollback si falla."""
+        with self._params_lock:
+            new_params, self._pending_params = self._pending_params, None
+        if new_params is None or new_params is self.params:
+            return
+        old_params = self.params
+        changes = new_params.diff(old_params)
+        try:
+            self._apply_trading_params(new_params)
+            self.params = new_params
+        except Exception as e:
+            self.logger.error(f"[{self.symbol}] Error al aplicar parámetros v{new_params.version}: {e}. Restaurando v{old_params.version}.", exc_info=True)
+            self._apply_trading_params(old_params)
+            return
+        self.logger.info(f"[{self.symbol}] Parámetros actualizados en caliente v{old_params.version} -> v{new_params.version}. Cambios: {changes}")
+        if self.in_position and (self.pending_tp_order_id or self.pending_sl_order_id) and \
+                any(name in changes for name in ('take_profit_usdt', 'stop_loss_usdt', 'enable_take_profit_pnl', 'enable_stop_loss_pnl')):
+            self.logger.info(f"[{self.symbol}] Las órdenes TP/SL ya colocadas se mantienen; los nuevos valores se aplican a la próxima entrada.")
+
+    def has_open_exposure(self) -> bool:
+        """True si el bot tiene posición u órdenes de entrada/salida vivas (no debe detenerse todavía)."""
+        return bool(self.in_position or self.pending_entry_order_id or self.pending_exit_order_id)
+
+    def _check_initial_position(self, snapshot=None):
+        """Consulta a Binance (o a la foto de arranque) si ya existe una posición para self.symbol."""
+        if snapshot is not None and snapshot.has_positions:
+            position_data = snapshot.position(self.symbol)
+        else:
+            self.logger.info(f"[{self.symbol}] Verificando posición inicial...")
+            position_data = get_futures_position(self.symbol) # Usa self.symbol
         if position_data:
             pos_amt = Decimal(position_data.get('positionAmt', '0'))
             entry_price = Decimal(position_data.get('entryPrice', '0'))
@@ -233,14 +336,15 @@ class TradingBot:
             if abs(pos_amt) > Decimal('1e-9'):
                  if pos_amt > 0: # Solo LONG
                      self.logger.warning(f"[{self.symbol}] ¡Posición LONG existente encontrada! Cantidad: {pos_amt}, Precio Entrada: {entry_price}, PnL Inicial: {unrealized_pnl}")
-                     self.in_position = True
-                     self.current_position = {
-                         'entry_price': entry_price,
-                         'quantity': pos_amt,
-                         'entry_time': pd.Timestamp.now(tz='UTC'), # Placeholder time
-                         'position_size_usdt': abs(pos_amt * entry_price),
-                         'positionAmt': pos_amt
-                     }
+                     with self._exit_lock:
+                         self.in_position = True
+                         self.current_position = {
+                             'entry_price': entry_price,
+                             'quantity': pos_amt,
+                             'entry_time': pd.Timestamp.now(tz='UTC'), # Placeholder time
+                             'position_size_usdt': abs(pos_amt * entry_price),
+                             'positionAmt': pos_amt
+                         }
                      self.last_known_pnl = unrealized_pnl
                  else:
                       self.logger.warning(f"[{self.symbol}] ¡Posición SHORT existente encontrada! Cantidad: {pos_amt}. Este bot no maneja SHORTs.")
@@ -254,8 +358,9 @@ class TradingBot:
                      self._reset_state()
                 else:
                     # Ensure these are None if no position
-                    self.in_position = False
-                    self.current_position = None
+                    with self._exit_lock:
+                        self.in_position = False
+                        self.current_position = None
                     self.last_known_pnl = None
         else:
             # Could not get position info or no position exists
@@ -264,8 +369,9 @@ class TradingBot:
             if self.in_position:
                 self._reset_state()
             else:
-                self.in_position = False
-                self.current_position = None
+                with self._exit_lock:
+                    self.in_position = False
+                    self.current_position = None
                 self.last_known_pnl = None
 
         # Asegurarse de que no hay órdenes pendientes si encontramos una posición inicial
@@ -275,22 +381,53 @@ class TradingBot:
              self.pending_order_timestamp = None
              self.current_exit_reason = None # <-- Resetear razón de salida
              # Si estamos en posición, es posible que TP/SL ya existan si el bot se reinició.
-             # Por ahora, el bot no tiene lógica para recuperar TP/SL existentes al inicio.
-             # Se asumirá que si se reinicia en posición, se manejará manualmente o por lógica de PnL si TP/SL no se colocan.
-             self.pending_tp_order_id = None # Limpiar al inicio por ahora
-             self.pending_sl_order_id = None # Limpiar al inicio por ahora
-
-        self.pnl_peak_since_activation = None
-        self.pnl_trailing_stop_armed = False
+             self.pending_tp_order_id = None
+             self.pending_sl_order_id = None
+             # Con la foto de arranque se recuperan las órdenes de protección que sigan vivas en Binance
+             if snapshot is not None and snapshot.has_open_orders:
+                 self._adopt_open_exit_orders(snapshot.open_orders(self.symbol))
+
+        with self._exit_lock:
+            self.pnl_peak_since_activation = None
+            self.pnl_trailing_stop_armed = False
         # --- NUEVO: Limpiar estado de Open Interest --- # ESTA SECCIÓN YA NO ES NECESARIA
         # self.previous_open_interest_usdt = None # <-- YA NO SE NECESITA
         # ----------------------------------------------------
 
         # Limpiar el PnL conocido (aunque se recalculará si se entra en nueva posición)
 
+    def _adopt_open_exit_orders(self, open_orders: list[dict], source: str = "al inicio") -> int:
+        """Retoma las TP/SL/TRAILING del LONG que quedaron abiertas (de una ejecución anterior o sin registrar)."""
+        adopted = 0
+        for order in open_orders:
+            if order.get('side') != 'SELL' or order.get('positionSide', 'LONG') not in ('LONG', 'BOTH'):
+                continue
+            order_type = order.get('type') or order.get('origType')
+            order_id = order.get('orderId')
+            if order_type == 'TAKE_PROFIT_MARKET' and not self.pending_tp_order_id:
+                self.pending_tp_order_id = order_id
+            elif order_type == 'STOP_MARKET' and not self.pending_sl_order_id:
+                self.pending_sl_order_id = order_id
+            elif order_type == 'TRAILING_STOP_MARKET' and not self.pending_trailing_order_id:
+                self.pending_trailing_order_id = order_id
+                self.price_trailing_stop_armed = True # Sólo se coloca una vez armado
+            else:
+                continue
+            adopted += 1
+            self.logger.info(f"[{self.symbol}] Orden {order_type} {order_id} existente recuperada {source}.")
+        return adopted
+
+    def _refresh_tick_params(self):
+        """Pasa a ticks las distancias de precio de los parámetros (al arrancar y en cada recarga de parámetros)."""
+        if self.tick_scale is None:
+            return
+        distance = self.price_trailing_stop_distance_usdt
+        # Con precios alineados al tick: precio <= pico - distancia  <=>  pico_ticks - precio_ticks >= ceil(distancia / tick)
+        self.price_trailing_distance_ticks = self.tick_scale.ceil_ticks(distance) if distance > Decimal('0') else None
+
     def _adjust_quantity(self, quantity: Decimal) -> float:
-        """Ajusta la cantidad a la precisión requerida por self.symbol."""
-        adjusted_qty = quantity.quantize(Decimal('1e-' + str(self.qty_precision)), rounding=ROUND_DOWN)
+        """Ajusta la cantidad al stepSize de LOT_SIZE (o, sin filtros, a la precisión de cantidad de self.symbol)."""
+        adjusted_qty = self.tick_scale.to_quantity(self.tick_scale.floor_lots(quantity))
         self.logger.debug(f"[{self.symbol}] Cantidad original: {quantity:.8f}, Precisión: {self.qty_precision}, Cantidad ajustada: {adjusted_qty:.8f}")
         return float(adjusted_qty)
 
@@ -301,12 +438,10 @@ class TradingBot:
             # No es necesario convertir a float y luego de vuelta a Decimal si ya es Decimal.
             # Solo aseguramos que sea Decimal.
             return price if isinstance(price, Decimal) else Decimal(str(price))
-            
-        # Asegurarse que price es Decimal para la operación //
-        price_decimal = price if isinstance(price, Decimal) else Decimal(str(price))
-        
-        adjusted_price = (price_decimal // self.price_tick_size) * self.price_tick_size
-        self.logger.debug(f"[{self.symbol}] Precio original: {price_decimal}, Tick Size: {self.price_tick_size}, Precio ajustado: {adjusted_price}")
+
+        # Redondeo hacia abajo en ticks enteros (TickScale); Decimal sólo para devolver el precio a la API
+        adjusted_price = self.tick_scale.to_price(self.tick_scale.floor_ticks(price))
+        self.logger.debug(f"[{self.symbol}] Precio original: {price}, Tick Size: {self.price_tick_size}, Precio ajustado: {adjusted_price}")
         return adjusted_price # Devuelve Decimal directamente
 
     # --- Method to calculate Volume SMA --- ADDED
@@ -413,6 +548,9 @@ class TradingBot:
         """
         Coloca órdenes Take Profit y Stop Loss después de que una entrada se haya llenado.
         Usa TAKE_PROFIT_MARKET y STOP_MARKET.
+        Cuando ambas piernas están habilitadas se envían juntas en una sola petición batchOrders,
+        de modo que la posición queda protegida tras un único round-trip. Si alguna pierna es
+        rechazada (o el lote falla por completo) se reintenta esa pierna con una orden individual.
         """
         if not self.in_position or not self.current_position:
             self.logger.warning(f"[{self.symbol}] Se intentó colocar TP/SL pero no se está en posición.")
@@ -427,51 +565,88 @@ class TradingBot:
         quantity_float = float(quantity_to_close)
 
         tp_price_dec, sl_price_dec = self._calculate_tp_sl_prices()
+        price_precision = self.price_precision_log
 
-        # Colocar orden Take Profit
+        # Cada pierna: (etiqueta, parámetros para batchOrders, función individual de respaldo, precio formateado)
+        legs = []
+
+        # Pierna Take Profit
         if self.enable_take_profit_pnl and tp_price_dec and self.take_profit_usdt > Decimal('0'): # <-- MODIFICADO: Añadido self.enable_take_profit_pnl
-            tp_price_str = f"{tp_price_dec:.{self.price_tick_size.as_tuple().exponent * -1}f}" # Formatear a la precisión correcta
-            self.logger.info(f"[{self.symbol}] Intentando colocar orden TAKE_PROFIT_MARKET @ {tp_price_str} para cantidad {quantity_float} (Habilitado)")
-            tp_order_result = create_futures_take_profit_order(
-                symbol=self.symbol,
-                side='SELL', # Para cerrar una posición LONG
-                quantity=quantity_float,
-                take_profit_price=tp_price_str,
-                close_position=True
-            )
-            if tp_order_result and tp_order_result.get('orderId'):
-                self.pending_tp_order_id = tp_order_result['orderId']
-                self.logger.info(f"[{self.symbol}] Orden TAKE_PROFIT_MARKET {self.pending_tp_order_id} colocada @ {tp_price_str}.")
-            else:
-                self.logger.error(f"[{self.symbol}] Fallo al colocar la orden TAKE_PROFIT_MARKET @ {tp_price_str}. Respuesta: {tp_order_result}")
-                # Considerar si se debe reintentar o entrar en estado de error
+            tp_price_str = f"{tp_price_dec:.{price_precision}f}" # Formatear a la precisión correcta
+            self.logger.info(f"[{self.symbol}] Preparando orden TAKE_PROFIT_MARKET @ {tp_price_str} para cantidad {quantity_float} (Habilitado)")
+            legs.append(('TP', build_take_profit_order_params(self.symbol, 'SELL', quantity_float, tp_price_str, True, self._client_order_id('tp')), create_futures_take_profit_order, tp_price_str))
         elif not self.enable_take_profit_pnl:
             self.logger.info(f"[{self.symbol}] Colocación de orden Take Profit DESHABILITADA por configuración (enable_take_profit_pnl=False).")
 
-        # Colocar orden Stop Loss
+        # Pierna Stop Loss
         if self.enable_stop_loss_pnl and sl_price_dec and self.stop_loss_usdt < Decimal('0'): # <-- MODIFICADO: Añadido self.enable_stop_loss_pnl
-            sl_price_str = f"{sl_price_dec:.{self.price_tick_size.as_tuple().exponent * -1}f}"
-            self.logger.info(f"[{self.symbol}] Intentando colocar orden STOP_MARKET @ {sl_price_str} para cantidad {quantity_float} (Habilitado)")
-            sl_order_result = create_futures_stop_loss_order(
-                symbol=self.symbol,
-                side='SELL', # Para cerrar una posición LONG
-                quantity=quantity_float,
-                stop_loss_price=sl_price_str,
-                close_position=True
-            )
-            if sl_order_result and sl_order_result.get('orderId'):
-                self.pending_sl_order_id = sl_order_result['orderId']
-                self.logger.info(f"[{self.symbol}] Orden STOP_MARKET {self.pending_sl_order_id} colocada @ {sl_price_str}.")
-            else:
-                self.logger.error(f"[{self.symbol}] Fallo al colocar la orden STOP_MARKET @ {sl_price_str}. Respuesta: {sl_order_result}")
-                # Considerar si se debe reintentar o entrar en estado de error
+            sl_price_str = f"{sl_price_dec:.{price_precision}f}"
+            self.logger.info(f"[{self.symbol}] Preparando orden STOP_MARKET @ {sl_price_str} para cantidad {quantity_float} (Habilitado)")
+            legs.append(('SL', build_stop_loss_order_params(self.symbol, 'SELL', quantity_float, sl_price_str, True, self._client_order_id('sl')), create_futures_stop_loss_order, sl_price_str))
         elif not self.enable_stop_loss_pnl:
             self.logger.info(f"[{self.symbol}] Colocación de orden Stop Loss DESHABILITADA por configuración (enable_stop_loss_pnl=False).")
 
+        if not legs:
+            return
+
+        # El envío va al ejecutor con prioridad de protección; los IDs se registran al aplicar el resultado
+        self._submit_order_intent('tp_sl', PRIORITY_PROTECTIVE, self._send_tp_sl_legs, legs, quantity_float,
+                                  on_complete=partial(self._apply_tp_sl_results, legs))
+
+    def _send_tp_sl_legs(self, legs: list, quantity_float: float) -> list:
+        """
+        Envía las piernas TP/SL (en el hilo del ejecutor): con más de una pierna se usa batchOrders y cada
+        pierna rechazada se reintenta de forma individual. Devuelve la respuesta de cada pierna, en orden.
+        """
+        batch_results = None
+        if len(legs) > 1:
+            batch_results = create_futures_batch_orders(self.symbol, [leg_params for _, leg_params, _, _ in legs])
+            if batch_results is None:
+                self.logger.error(f"[{self.symbol}] Fallo el envío en lote de TP/SL. Se reintentará cada pierna de forma individual.")
+
+        results = []
+        for index, (label, leg_params, single_order_func, price_str) in enumerate(legs):
+            order_result = batch_results[index] if batch_results else None
+            if not (isinstance(order_result, dict) and order_result.get('orderId')):
+                if batch_results:
+                    self.logger.warning(f"[{self.symbol}] Pierna {label} rechazada en el lote (Code={order_result.get('code') if isinstance(order_result, dict) else None}, Msg={order_result.get('msg') if isinstance(order_result, dict) else order_result}). Reintentando de forma individual.")
+                price_kwarg = 'take_profit_price' if label == 'TP' else 'stop_loss_price'
+                order_result = single_order_func(
+                    symbol=self.symbol,
+                    side='SELL', # Para cerrar una posición LONG
+                    quantity=quantity_float,
+                    close_position=True,
+                    client_order_id=leg_params['newClientOrderId'], # Mismo ID: si la pierna sí llegó no se duplica
+                    **{price_kwarg: price_str}
+                )
+            results.append(order_result)
+        return results
+
+    def _apply_tp_sl_results(self, legs: list, results: list | None, error: Exception | None):
+        """Registra los IDs de las órdenes TP/SL colocadas (en el hilo del worker)."""
+        results = results or [None] * len(legs)
+        if not self.in_position or self.current_state != BotState.IN_POSITION:
+            # Mientras se colocaban, la posición pasó a cerrarse por otra vía: las piernas sobran
+            self._cancel_orphan_orders([r for r in results if isinstance(r, dict)], 'TP/SL colocadas tras dejar la posición')
+            return
+        for (label, _leg_params, _single_order_func, price_str), order_result in zip(legs, results):
+            if order_result and order_result.get('orderId'):
+                if label == 'TP':
+                    self.pending_tp_order_id = order_result['orderId']
+                    self.logger.info(f"[{self.symbol}] Orden TAKE_PROFIT_MARKET {self.pending_tp_order_id} colocada @ {price_str}.")
+                else:
+                    self.pending_sl_order_id = order_result['orderId']
+                    self.logger.info(f"[{self.symbol}] Orden STOP_MARKET {self.pending_sl_order_id} colocada @ {price_str}.")
+            else:
+                order_type_name = 'TAKE_PROFIT_MARKET' if label == 'TP' else 'STOP_MARKET'
+                self.logger.error(f"[{self.symbol}] Fallo al colocar la orden {order_type_name} @ {price_str}. Respuesta: {order_result}")
+                # Considerar si se debe reintentar o entrar en estado de error
+
     def _check_tp_sl_order_status(self):
         """
         Verifica el estado de las órdenes TP/SL pendientes.
         Si una se llena, registra el trade, cancela la otra y resetea el estado.
+        Las que el último barrido de órdenes abiertas confirma vivas no se consultan (ver _order_confirmed_open).
         Devuelve True si una orden TP/SL se llenó y manejó, False de lo contrario.
         """
         if not self.in_position: # No debería llamarse si no estamos en posición
@@ -480,7 +655,7 @@ class TradingBot:
         order_filled_and_handled = False
 
         # Verificar Orden Take Profit
-        if self.pending_tp_order_id:
+        if self.pending_tp_order_id and not self._order_confirmed_open(self.pending_tp_order_id):
             tp_status_response = get_order_status(self.symbol, self.pending_tp_order_id)
             if tp_status_response and tp_status_response.get('status') == 'FILLED':
                 self.logger.info(f"[{self.symbol}] ¡TAKE PROFIT ORDEN {self.pending_tp_order_id} LLENADA! Detalles: {tp_status_response}")
@@ -506,7 +681,7 @@ class TradingBot:
                 # Intentar cancelar la orden SL hermana (Binance debería hacerlo si closePosition=True)
                 if self.pending_sl_order_id:
                     self.logger.info(f"[{self.symbol}] Intentando cancelar orden SL hermana {self.pending_sl_order_id} después de llenado de TP.")
-                    cancel_futures_order(self.symbol, self.pending_sl_order_id)
+                    self._submit_order_intent('cancel_sibling', PRIORITY_CANCEL, cancel_futures_order, self.symbol, self.pending_sl_order_id)
                     self.pending_sl_order_id = None # Limpiar ID
                 
                 self.pending_tp_order_id = None # Limpiar ID de TP
@@ -522,7 +697,7 @@ class TradingBot:
             return True # <--- INDENTAR ESTA LÍNEA
 
         # Verificar Orden Stop Loss
-        if self.pending_sl_order_id:
+        if self.pending_sl_order_id and not self._order_confirmed_open(self.pending_sl_order_id):
             sl_status_response = get_order_status(self.symbol, self.pending_sl_order_id)
             if sl_status_response and sl_status_response.get('status') == 'FILLED':
                 self.logger.info(f"[{self.symbol}] ¡STOP LOSS ORDEN {self.pending_sl_order_id} LLENADA! Detalles: {sl_status_response}")
@@ -548,7 +723,7 @@ class TradingBot:
                 # Intentar cancelar la orden TP hermana
                 if self.pending_tp_order_id:
                     self.logger.info(f"[{self.symbol}] Intentando cancelar orden TP hermana {self.pending_tp_order_id} después de llenado de SL.")
-                    cancel_futures_order(self.symbol, self.pending_tp_order_id)
+                    self._submit_order_intent('cancel_sibling', PRIORITY_CANCEL, cancel_futures_order, self.symbol, self.pending_tp_order_id)
                     self.pending_tp_order_id = None
                 
                 self.pending_sl_order_id = None
@@ -559,6 +734,42 @@ class TradingBot:
                 self.logger.warning(f"[{self.symbol}] Orden SL {self.pending_sl_order_id} encontrada como {sl_status_response.get('status')}. Limpiando ID.")
                 self.pending_sl_order_id = None
 
+        if order_filled_and_handled:
+            return True
+
+        # Verificar Orden Trailing Stop nativa (price_trailing_stop_mode='exchange')
+        if self.pending_trailing_order_id and not self._order_confirmed_open(self.pending_trailing_order_id):
+            trailing_status_response = get_order_status(self.symbol, self.pending_trailing_order_id)
+            if trailing_status_response and trailing_status_response.get('status') == 'FILLED':
+                self.logger.info(f"[{self.symbol}] ¡TRAILING STOP ORDEN {self.pending_trailing_order_id} LLENADA! Detalles: {trailing_status_response}")
+                filled_price = Decimal(trailing_status_response.get('avgPrice', '0'))
+                filled_qty = Decimal(trailing_status_response.get('executedQty', '0'))
+                update_time_ms = trailing_status_response.get('updateTime', time.time() * 1000)
+                close_timestamp = pd.Timestamp.fromtimestamp(update_time_ms / 1000, tz='UTC')
+                trailing_order_id_filled = str(trailing_status_response.get('orderId'))
+                filled_trailing_order_id, self.pending_trailing_order_id = self.pending_trailing_order_id, None
+
+                if filled_price > Decimal('0') and filled_qty > Decimal('0'):
+                    self._handle_successful_closure(
+                        close_price=filled_price,
+                        quantity_closed=filled_qty,
+                        reason=f"trailing_stop_order_filled ({filled_trailing_order_id})",
+                        close_timestamp=close_timestamp,
+                        binance_order_id_of_closure=trailing_order_id_filled
+                    )
+                else:
+                    self.logger.error(f"[{self.symbol}] Trailing Stop Orden {filled_trailing_order_id} llena pero con datos inválidos. Realizando reseteo forzado.")
+                    self._handle_external_closure_or_discrepancy(reason=f"trailing_order_invalid_fill_data_{filled_trailing_order_id}")
+
+                self._reset_state() # Cancela las órdenes TP/SL hermanas y deja el bot sin posición
+                self._update_state(BotState.IDLE)
+                order_filled_and_handled = True
+            elif trailing_status_response and trailing_status_response.get('status') in ['CANCELED', 'REJECTED', 'EXPIRED', 'PENDING_CANCEL']:
+                self.logger.warning(f"[{self.symbol}] Orden Trailing Stop {self.pending_trailing_order_id} encontrada como {trailing_status_response.get('status')}. "
+                                    f"Limpiando ID; el trailing de precio pasa a evaluarse en local.")
+                self.pending_trailing_order_id = None
+                self.exchange_trailing_unavailable = True
+
         return order_filled_and_handled
 
     def run_once(self):
@@ -567,6 +778,23 @@ class TradingBot:
         Ahora maneja órdenes LIMIT, su estado pendiente/timeout y actualiza self.current_state.
         """
         try:
+            # Punto seguro para adoptar parámetros nuevos (recarga en caliente)
+            if self._pending_params is not None:
+                self._apply_pending_params()
+
+            # Resultados de operaciones de órdenes terminadas en el ejecutor (colocaciones, cancelaciones)
+            if self._order_completions:
+                self._process_order_completions()
+            # Barrido de órdenes abiertas (reconciler.py): adoptar / cancelar lo que no cuadre
+            if self._pending_reconciliation is not None:
+                self._apply_reconciliation()
+
+            # Salida disparada por el monitor de ticks: ejecutarla antes que cualquier otra cosa
+            if self.tick_exit_reason is not None:
+                self._execute_tick_exit()
+                return
+            self._sync_exit_monitor()
+
             # LOG AÑADIDO AQUÍ
             self.logger.info(f"[{self.symbol}] --- Inicio run_once. Estado: {self.current_state.value}, En Posición: {self.in_position}, Orden Entrada Pendiente: {self.pending_entry_order_id}, Orden Salida Pendiente: {self.pending_exit_order_id} ---")
             self.logger.debug(f"[{self.symbol}] Running cycle. Current state: {self.current_state.value}")
@@ -630,10 +858,14 @@ class TradingBot:
                     self._verify_position_status()
 
             # LOG AÑADIDO AQUÍ
-            self.logger.info(f"[{self.symbol}] --- Antes de evaluar lógica principal de estados. Estado actual: {self.current_state.value} ---")
+            self.logger.debug(f"[{self.symbol}] --- Antes de evaluar lógica principal de estados. Estado actual: {self.current_state.value} ---")
 
             # --- Lógica Principal de Estados ---
             if self.current_state == BotState.IDLE:
+                if self.entries_paused:
+                    self.logger.debug(f"[{self.symbol}] Entradas pausadas (símbolo retirado de la configuración). No se evalúan entradas.")
+                    return
+                self._begin_decision_trace(klines_df)
                 temp_rsi_values_for_downtrend_check = None
                 if hasattr(self, 'downtrend_check_candles') and self.downtrend_check_candles >= 2 and self.evaluate_downtrend_candles_block:
                     if klines_df is not None and not klines_df.empty and 'close' in klines_df.columns:
@@ -646,12 +878,15 @@ class TradingBot:
                 if self.evaluate_downtrend_levels_block: # Solo evaluar si el control está activado
                     if hasattr(self, 'downtrend_level_check') and self.downtrend_level_check > 0:
                         if self._check_downtrend_levels(klines_df):
-                            self.logger.info(f"[{self.symbol}] CONDICIÓN DE NO ENTRADA (PRE-CHECK): Se detectó tendencia bajista por niveles (evaluación activada). No se evaluarán otras condiciones de entrada.")
+                            self.logger.debug(f"[{self.symbol}] CONDICIÓN DE NO ENTRADA (PRE-CHECK): Se detectó tendencia bajista por niveles (evaluación activada). No se evaluarán otras condiciones de entrada.")
                             block_due_to_downtrend_levels = True
                 else:
-                    self.logger.info(f"[{self.symbol}] PRE-CHECK: Evaluación de tendencia bajista por niveles DESACTIVADA.")
+                    self.logger.debug(f"[{self.symbol}] PRE-CHECK: Evaluación de tendencia bajista por niveles DESACTIVADA.")
+                self.decision_trace.condition(COND_DOWNTREND_LEVELS, self.evaluate_downtrend_levels_block, not block_due_to_downtrend_levels)
                 
                 if block_due_to_downtrend_levels:
+                    self.consecutive_downtrend_blocks += 1 # El planificador espacia los ciclos mientras dure el bloqueo
+                    self._journal_decision(ACTION_BLOCKED_DOWNTREND)
                     # Actualizar previous_rsi_value si tenemos datos (similar a como estaba)
                     if temp_rsi_values_for_downtrend_check is not None and not temp_rsi_values_for_downtrend_check.empty:
                         current_rsi_val = temp_rsi_values_for_downtrend_check.iloc[-1]
@@ -659,17 +894,21 @@ class TradingBot:
                             self.previous_rsi_value = current_rsi_val
                     return
 
+                self.consecutive_downtrend_blocks = 0
+
                 # --- Luego verificar tendencia bajista por velas consecutivas --- (MODIFICADO)
                 block_due_to_downtrend_candles = False
                 if self.evaluate_downtrend_candles_block: # Solo evaluar si el control está activado
                     if hasattr(self, 'downtrend_check_candles') and self.downtrend_check_candles >= 2:
                         if self._is_recent_downtrend(klines_df):
-                            self.logger.info(f"[{self.symbol}] CONDICIÓN DE NO ENTRADA (PRE-CHECK): Se detectó tendencia bajista reciente ({self.downtrend_check_candles} velas) (evaluación activada). No se evaluarán otras condiciones de entrada.")
+                            self.logger.debug(f"[{self.symbol}] CONDICIÓN DE NO ENTRADA (PRE-CHECK): Se detectó tendencia bajista reciente ({self.downtrend_check_candles} velas) (evaluación activada). No se evaluarán otras condiciones de entrada.")
                             block_due_to_downtrend_candles = True
                 else:
-                    self.logger.info(f"[{self.symbol}] PRE-CHECK: Evaluación de tendencia bajista por velas consecutivas DESACTIVADA.")
+                    self.logger.debug(f"[{self.symbol}] PRE-CHECK: Evaluación de tendencia bajista por velas consecutivas DESACTIVADA.")
+                self.decision_trace.condition(COND_DOWNTREND_CANDLES, self.evaluate_downtrend_candles_block, not block_due_to_downtrend_candles)
                 
                 if block_due_to_downtrend_candles:
+                    self._journal_decision(ACTION_BLOCKED_DOWNTREND)
                     if temp_rsi_values_for_downtrend_check is not None and not temp_rsi_values_for_downtrend_check.empty:
                         current_rsi_val = temp_rsi_values_for_downtrend_check.iloc[-1]
                         if isinstance(current_rsi_val, (int, float)):
@@ -680,9 +919,13 @@ class TradingBot:
                 self._check_entry_conditions(klines_df)
 
             elif self.current_state == BotState.IN_POSITION:
+                self.consecutive_downtrend_blocks = 0
+                # Volatilidad reciente para que el planificador ajuste la frecuencia de sondeo
+                recent_candles = klines_df.tail(14)
+                self.last_candle_range_pct = float(((recent_candles['high'] - recent_candles['low']) / recent_candles['close']).mean())
                 # --- CAMBIO DE ORDEN DE OPERACIONES ---
                 # 1. PRIMERO, chequear si nuestras órdenes TP/SL (las que el bot conoce) se han llenado.
-                if self.pending_tp_order_id or self.pending_sl_order_id:
+                if self.pending_tp_order_id or self.pending_sl_order_id or self.pending_trailing_order_id:
                     if self._check_tp_sl_order_status(): # Devuelve True si una orden se llenó y el estado cambió a IDLE
                         self.logger.info(f"[{self.symbol}] Orden TP/SL llenada y manejada. El bot está ahora en estado IDLE.")
                         return # La posición se cerró, ciclo completado para esta posición.
@@ -722,13 +965,15 @@ class TradingBot:
                 # 4. SI AÚN ESTAMOS EN POSICIÓN (es decir, ni TP/SL ni salida dinámica se activaron)
                 #    Y no tenemos órdenes TP/SL activas (ej. reinicio, fallo previo al colocar, o fueron canceladas y la salida dinámica no procedió).
                 if self.current_state == BotState.IN_POSITION: # Re-chequear estado por si acaso
-                    if not self.pending_tp_order_id and not self.pending_sl_order_id:
+                    if self._order_intent_in_flight('tp_sl'):
+                        self.logger.info(f"[{self.symbol}] EN POSICIÓN. Colocación de TP/SL en curso en el ejecutor de órdenes.")
+                    elif not self.pending_tp_order_id and not self.pending_sl_order_id:
                         self.logger.warning(f"[{self.symbol}] EN POSICIÓN (y sin salida dinámica activada), pero el bot no tiene órdenes TP/SL activas registradas. Intentando colocar TP/SL estándar ahora.")
                         self._place_tp_sl_orders()
                         # El próximo ciclo de run_once verificará el estado de estas nuevas órdenes.
                     else:
                         # Si llegamos aquí, las órdenes TP/SL están puestas y pendientes (y la salida dinámica no se activó).
-                        price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
+                        price_precision_log = self.price_precision_log
                         pnl_display = f"{self.last_known_pnl:.4f}" if self.last_known_pnl is not None else "N/A"
                         self.logger.info(f"[{self.symbol}] EN POSICIÓN. PnL: {pnl_display}. Esperando TP ({self.pending_tp_order_id}) o SL ({self.pending_sl_order_id}). Salida dinámica no activada.")
                 # --- FIN DEL CAMBIO DE ORDEN ---
@@ -748,10 +993,13 @@ class TradingBot:
             self._set_error_state(f"Failed to get current price: {e}")
             return
 
-    def _handle_successful_closure(self, close_price, quantity_closed, reason, close_timestamp=None, binance_order_id_of_closure: str | None = None):
+    def _handle_successful_closure(self, close_price, quantity_closed, reason, close_timestamp=None, binance_order_id_of_closure: str | None = None,
+                                   closure_order_ids: list | None = None):
         """
         Registra el trade completado en la DB y resetea el estado interno del bot para este símbolo.
         Intenta obtener PNL realizado de Binance; si falla, lo calcula manualmente.
+        closure_order_ids: órdenes cuyos fills forman el cierre (una salida perseguida con cancel+new);
+        por defecto sólo binance_order_id_of_closure.
         """
         if not self.current_position:
             self.logger.error(f"[{self.symbol}] Se intentó registrar cierre, pero no había datos de posición interna guardada.")
@@ -770,46 +1018,24 @@ class TradingBot:
         # Intentar obtener PNL de Binance
         if binance_order_id_of_closure: # Si tenemos el orderId del cierre
             self.logger.info(f"[{self.symbol}] Buscando detalles del trade de cierre en Binance para orderId: {binance_order_id_of_closure}...")
-            # Necesitamos buscar en userTrades un trade que tenga este orderId
-            # y que sea un 'SELL' (para cerrar nuestro LONG) y que coincida aproximadamente en tiempo y cantidad
+            # Los fills de la orden se leen del libro local (fills_ledger.py): llega por el user-data stream o,
+            # si aún no está, se sincroniza una vez por fromId; si suma menos que el executedQty, por orderId.
+            # Se agregan todos los fills parciales de la orden.
             try:
-                # Buscar hasta 5 trades recientes, usualmente el nuestro estará entre los primeros.
-                # Aumentar límite si es necesario, pero ser cauteloso con los límites de API.
-                user_trades = get_user_trade_history(symbol=self.symbol, limit=10) 
-                
-                found_closing_trade_in_history = False
-                if user_trades:
-                    for trade_detail in user_trades:
-                        trade_order_id = str(trade_detail.get('orderId'))
-                        trade_id_from_api = trade_detail.get('id') # Este es el binance_trade_id
-                        trade_qty_api = Decimal(trade_detail.get('qty', '0'))
-                        trade_side_api = trade_detail.get('side', '').upper()
-
-                        # Comparar orderId, lado y cantidad (con una pequeña tolerancia)
-                        if trade_order_id == binance_order_id_of_closure and \
-                           trade_side_api == 'SELL' and \
-                           abs(trade_qty_api - quantity_dec) < (quantity_dec * Decimal('0.01')): # Tolerancia del 1% en cantidad
-
-                            pnl_from_api_str = trade_detail.get('realizedPnl')
-                            if pnl_from_api_str is not None:
-                                final_pnl = Decimal(pnl_from_api_str)
-                                actual_binance_trade_id_for_db = int(trade_id_from_api)
-                                self.logger.info(f"[{self.symbol}] PNL de Binance OBTENIDO para orderId {binance_order_id_of_closure} (TradeID: {actual_binance_trade_id_for_db}): {final_pnl:.4f} USDT")
-                                
-                                # Actualizar close_price y close_timestamp con los datos del trade de Binance si son más precisos
-                                api_close_price_str = trade_detail.get('price')
-                                api_time_ms = trade_detail.get('time')
-                                if api_close_price_str:
-                                    close_price_dec = Decimal(api_close_price_str)
-                                if api_time_ms and close_timestamp is None: # Solo actualizar si no teníamos uno más específico
-                                    close_timestamp = pd.Timestamp.fromtimestamp(int(api_time_ms) / 1000, tz='UTC')
-                                    self.logger.info(f"[{self.symbol}] Precio/tiempo de cierre actualizados desde trade de Binance: Precio={close_price_dec}, Tiempo={close_timestamp}")
-                                found_closing_trade_in_history = True
-                                break # Encontramos el trade
-                    if not found_closing_trade_in_history:
-                         self.logger.warning(f"[{self.symbol}] No se encontró un trade SELL coincidente en el historial reciente de Binance para orderId {binance_order_id_of_closure}. Se usará PNL calculado.")
+                closing_summary = self.fills_ledger.orders_summary(closure_order_ids or [binance_order_id_of_closure], executed_qty=quantity_dec)
+                if closing_summary and closing_summary['side'] == 'SELL':
+                    if abs(closing_summary['quantity'] - quantity_dec) >= (quantity_dec * Decimal('0.01')): # Tolerancia del 1% en cantidad
+                        self.logger.warning(f"[{self.symbol}] Cantidad ejecutada en Binance ({closing_summary['quantity']}) difiere de la cerrada ({quantity_dec}) para orderId {binance_order_id_of_closure}.")
+                    final_pnl = closing_summary['realized_pnl']
+                    actual_binance_trade_id_for_db = closing_summary['last_trade_id']
+                    self.logger.info(f"[{self.symbol}] PNL de Binance OBTENIDO para orderId {binance_order_id_of_closure} (TradeID: {actual_binance_trade_id_for_db}, {closing_summary['fills']} fills): {final_pnl:.4f} USDT")
+                    # Actualizar close_price y close_timestamp con los datos de los fills si son más precisos
+                    close_price_dec = closing_summary['avg_price']
+                    if closing_summary['time_ms'] and close_timestamp is None: # Solo actualizar si no teníamos uno más específico
+                        close_timestamp = pd.Timestamp.fromtimestamp(closing_summary['time_ms'] / 1000, tz='UTC')
+                        self.logger.info(f"[{self.symbol}] Precio/tiempo de cierre actualizados desde fills de Binance: Precio={close_price_dec}, Tiempo={close_timestamp}")
                 else:
-                    self.logger.warning(f"[{self.symbol}] No se pudo obtener el historial de trades de Binance para buscar PNL para orderId {binance_order_id_of_closure}. Se usará PNL calculado.")
+                    self.logger.warning(f"[{self.symbol}] No se encontraron fills SELL para orderId {binance_order_id_of_closure} en el libro de fills. Se usará PNL calculado.")
             except Exception as e_api_pnl:
                 self.logger.error(f"[{self.symbol}] Error intentando obtener PNL de Binance para orderId {binance_order_id_of_closure}: {e_api_pnl}. Se usará PNL calculado.", exc_info=True)
         else:
@@ -841,18 +1067,18 @@ class TradingBot:
                 'rsi_threshold_down': self.rsi_threshold_down,
                 'rsi_entry_level_low': self.rsi_entry_level_low,
                 'rsi_entry_level_high': self.rsi_entry_level_high,
-                'position_size_usdt': float(self.position_size_usdt),
-                'take_profit_usdt': float(self.take_profit_usdt),
-                'stop_loss_usdt': float(self.stop_loss_usdt),
+                'position_size_usdt': self.params.position_size_usdt_float,
+                'take_profit_usdt': self.params.take_profit_usdt_float,
+                'stop_loss_usdt': self.params.stop_loss_usdt_float,
                 'downtrend_check_candles': self.downtrend_check_candles,
                 'order_timeout_seconds': self.order_timeout_seconds,
                 'rsi_target': self.rsi_target,
                 'enable_price_trailing_stop': self.enable_price_trailing_stop,
-                'price_trailing_stop_distance_usdt': float(self.price_trailing_stop_distance_usdt),
-                'price_trailing_stop_activation_pnl_usdt': float(self.price_trailing_stop_activation_pnl_usdt),
+                'price_trailing_stop_distance_usdt': self.params.price_trailing_stop_distance_usdt_float,
+                'price_trailing_stop_activation_pnl_usdt': self.params.price_trailing_stop_activation_pnl_usdt_float,
                 'enable_pnl_trailing_stop': self.enable_pnl_trailing_stop,
-                'pnl_trailing_stop_activation_usdt': float(self.pnl_trailing_stop_activation_usdt),
-                'pnl_trailing_stop_drop_usdt': float(self.pnl_trailing_stop_drop_usdt)
+                'pnl_trailing_stop_activation_usdt': self.params.pnl_trailing_stop_activation_usdt_float,
+                'pnl_trailing_stop_drop_usdt': self.params.pnl_trailing_stop_drop_usdt_float
             }
 
             self.logger.info(f"[{self.symbol}] _handle_successful_closure: Intentando registrar con los siguientes datos -> "
@@ -861,7 +1087,7 @@ class TradingBot:
                              f"PosSizeUSDT: {float(position_size_usdt_est)}, PNL: {float(final_pnl)}, Reason: '{simplified_reason}', "
                              f"Params: {db_trade_params}, BinanceTradeID: {actual_binance_trade_id_for_db}")
 
-            record_trade(
+            enqueue_trade(
                 symbol=self.symbol,
                 trade_type='LONG',
                 open_timestamp=open_ts_for_db,
@@ -875,7 +1101,7 @@ class TradingBot:
                 parameters=db_trade_params,
                 binance_trade_id=actual_binance_trade_id_for_db # <-- Usar el ID del trade de cierre
             )
-            self.logger.info(f"[{self.symbol}] _handle_successful_closure: Trade registrado exitosamente en DB.")
+            self.logger.info(f"[{self.symbol}] _handle_successful_closure: Trade encolado para registro en DB.")
         except Exception as e:
             self.logger.error(f"[{self.symbol}] ERROR CRÍTICO en _handle_successful_closure al registrar el trade en la DB: {e}", exc_info=True)
             self.logger.error(f"[{self.symbol}] Datos que se intentaron registrar: Symbol: {self.symbol}, Type: LONG, OpenTS: {open_ts_for_db}, CloseTS: {close_ts_for_db}, "
@@ -888,8 +1114,19 @@ class TradingBot:
     def _reset_state(self):
         """Resetea el estado relacionado con órdenes pendientes y posición."""
         self.logger.debug(f"[{self.symbol}] Reseteando estado de orden pendiente/posición.")
-        self.in_position = False
-        self.current_position = None
+        # El monitor de ticks lee posición y trailing stops desde el hilo del stream: se limpian todos bajo su lock
+        with self._exit_lock:
+            self.in_position = False
+            self.current_position = None
+            # --- Limpiar también estado de trailing de precio ---
+            self.price_peak_ticks = None
+            self.price_trailing_stop_armed = False
+            self.exchange_trailing_unavailable = False
+            # --- Limpiar también estado de trailing de PNL ---
+            self.pnl_peak_since_activation = None
+            self.pnl_trailing_stop_armed = False
+        self._order_intent_generation += 1 # Las operaciones de órdenes aún en vuelo ya no aplican
+        get_pnl_engine().untrack(self.symbol)
         # --- Resetear también estado de órdenes pendientes ---
         self.pending_entry_order_id = None
         self.pending_exit_order_id = None
@@ -898,27 +1135,17 @@ class TradingBot:
         self.rsi_at_entry = None # <-- NUEVO: Resetear RSI de entrada
         self.last_known_pnl = None # <-- ASEGURAR QUE EL PNL SE RESETEA
         self.previous_rsi_value = None # <-- NUEVO: Resetear el RSI anterior
+        # Sin posición no hay nada que vigilar por tick
+        self.exit_monitor.stop()
+        self.tick_exit_reason = None
+        self.tick_exit_price = None
         # --- NUEVO: Cancelar y limpiar órdenes TP/SL pendientes ---
-        if self.pending_tp_order_id:
-            self.logger.info(f"[{self.symbol}] ResetState: Intentando cancelar orden TP pendiente {self.pending_tp_order_id}.")
-            cancel_futures_order(self.symbol, self.pending_tp_order_id)
-            self.pending_tp_order_id = None
-        if self.pending_sl_order_id:
-            self.logger.info(f"[{self.symbol}] ResetState: Intentando cancelar orden SL pendiente {self.pending_sl_order_id}.")
-            cancel_futures_order(self.symbol, self.pending_sl_order_id)
-            self.pending_sl_order_id = None
+        self._cancel_active_tp_sl_orders(reason="ResetState")
         # ---------------------------------------------------
         # self.last_rsi_value = None # Podríamos mantenerlo o resetearlo
         self.rsi_objetivo_activado = False
         self.rsi_objetivo_alcanzado_en = None
         self.rsi_peak_since_target = None # Limpiar el pico de RSI para el trailing stop
-
-        # --- Limpiar también estado de trailing de precio ---
-        self.price_peak_since_entry = None
-        self.price_trailing_stop_armed = False
-        # --- Limpiar también estado de trailing de PNL ---
-        self.pnl_peak_since_activation = None
-        self.pnl_trailing_stop_armed = False
         # --- NUEVO: Limpiar estado de Open Interest ---
         # self.previous_open_interest_usdt = None # <-- YA NO SE NECESITA
         # ----------------------------------------------------
@@ -950,7 +1177,11 @@ class TradingBot:
              'pending_exit_order_id': self.pending_exit_order_id, # Este es el ID de la orden de salida general (si se usara la lógica antigua)
              'pending_tp_order_id': self.pending_tp_order_id,    # <-- NUEVO
              'pending_sl_order_id': self.pending_sl_order_id,    # <-- NUEVO
-             'last_error': self.last_error_message
+             'pending_trailing_order_id': self.pending_trailing_order_id,
+             'last_error': self.last_error_message,
+             'last_order_rejection': self.last_order_rejection,
+             'params_version': self.params.version,
+             'entries_paused': self.entries_paused
          }
          return status_data
 
@@ -960,13 +1191,22 @@ class TradingBot:
         self.last_error_message = message
         self.logger.error(f"[{self.symbol}] Entering ERROR state: {message}")
 
+    def _get_book_ticker(self) -> dict | None:
+        """Mejor bid/ask con el formato de book_ticker: del libro local en memoria o, en su defecto, por REST."""
+        if self.enable_order_book_cache:
+            best = get_order_book_cache().best_bid_ask(self.symbol)
+            if best is not None:
+                return {'symbol': self.symbol, 'bidPrice': str(best[0]), 'askPrice': str(best[1]), 'source': 'local'}
+        return get_order_book_ticker(self.symbol)
+
     def _get_best_entry_price(self, side: str) -> Decimal | None:
         """
         Obtiene el mejor precio disponible del order book para una orden de ENTRADA.
         Para entrar en un LONG (BUY), usamos el mejor Ask.
         Para entrar en un SHORT (SELL), usamos el mejor Bid (si se implementara).
+        Se lee del libro local (order_book.py) si está sincronizado; si no, book_ticker por REST.
         """
-        ticker = get_order_book_ticker(self.symbol)
+        ticker = self._get_book_ticker()
         if not ticker:
             self.logger.error(f"[{self.symbol}] No se pudo obtener el order book ticker para el precio de entrada.")
             return None
@@ -997,8 +1237,9 @@ class TradingBot:
         Obtiene el mejor precio disponible del order book para una orden de SALIDA.
         Para salir de un LONG (SELL), usamos el mejor Bid.
         Para salir de un SHORT (BUY), usamos el mejor Ask.
+        Se lee del libro local (order_book.py) si está sincronizado; si no, book_ticker por REST.
         """
-        ticker = get_order_book_ticker(self.symbol)
+        ticker = self._get_book_ticker()
         if not ticker:
             self.logger.error(f"[{self.symbol}] No se pudo obtener el order book ticker para el precio de salida.")
             return None
@@ -1039,18 +1280,46 @@ class TradingBot:
         self._update_state(BotState.PLACING_EXIT)
 
         # Usar el precio proporcionado (ya debería ser el mejor bid o ask según el caso)
+        if self.order_post_only:
+            # GTX: la venta debe quedar en el libro, en el mejor ASK
+            best_bid_ask = get_best_bid_ask(self.symbol)
+            if best_bid_ask:
+                price = best_bid_ask[1]
         limit_sell_price_adjusted = self._adjust_price(price)
         quantity_to_sell = self._adjust_quantity(self.current_position['quantity'])
         
         # Calcular la precisión del precio para el log de forma segura
-        price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
+        price_precision_log = self.price_precision_log
         self.logger.info(f"[{self.symbol}] Calculado para salida: Precio LIMIT SELL={limit_sell_price_adjusted:.{price_precision_log}f}, Cantidad={quantity_to_sell}")
 
-        order_result = create_futures_limit_order(self.symbol, 'SELL', quantity_to_sell, limit_sell_price_adjusted)
+        self._submit_order_intent('exit', PRIORITY_PROTECTIVE, create_futures_limit_order,
+                                  self.symbol, 'SELL', quantity_to_sell, limit_sell_price_adjusted,
+                                  time_in_force='GTX' if self.order_post_only else 'GTC',
+                                  client_order_id=self._client_order_id('ex', reason),
+                                  on_complete=partial(self._on_exit_order_placed, reason, limit_sell_price_adjusted, price_precision_log))
 
+    def _cancel_tp_sl_then_place_exit(self, price: Decimal, reason: str):
+        """
+        Cancela las TP/SL/trailing activas y coloca la LIMIT SELL de salida cuando la cancelación ha terminado.
+        En modo asíncrono las dos intenciones irían a hilos distintos del ejecutor y la venta podría llegar a
+        Binance antes que las cancelaciones (y ejecutarse junto a una TP/SL todavía viva).
+        """
+        self._update_state(BotState.PLACING_EXIT) # Mientras se cancela, run_once y el monitor no repiten la salida
+        place_exit = partial(self._on_tp_sl_cancelled_for_exit, price, reason)
+        if not self._cancel_active_tp_sl_orders(on_complete=place_exit):
+            place_exit(None, None) # No había nada que cancelar
+
+    def _on_tp_sl_cancelled_for_exit(self, price: Decimal, reason: str, cancel_result, error: Exception | None):
+        """Cancelación de TP/SL terminada (en el hilo del worker): ahora sí se coloca la orden de salida."""
+        self._place_exit_order(price=price, reason=reason)
+
+    def _on_exit_order_placed(self, reason: str, limit_sell_price_adjusted: Decimal, price_precision_log: int,
+                              order_result: dict | None, error: Exception | None):
+        """Resultado de la colocación de la LIMIT SELL de salida (en el hilo del worker)."""
         if order_result and order_result.get('orderId'):
             self.pending_exit_order_id = order_result['orderId']
             self.pending_order_timestamp = time.time()
+            self.order_chaser = self._new_order_chaser('exit', 'SELL', order_result)
             # Guardar la razón de la salida para usarla al registrar en DB si se llena
             self.current_exit_reason = reason 
             self.logger.warning(f"[{self.symbol}] Orden LIMIT SELL {self.pending_exit_order_id} colocada @ {limit_sell_price_adjusted:.{price_precision_log}f}. Esperando ejecución...")
@@ -1060,6 +1329,15 @@ class TradingBot:
             self._set_error_state(f"Failed to place exit order (reason: {reason}).")
     # --- Fin del nuevo método ---
 
+    def _begin_decision_trace(self, klines_df: pd.DataFrame):
+        """Reinicia el registro de decisión para la evaluación de entrada de este ciclo (vela y precio de cierre)."""
+        candle_open_ms = int(klines_df['open_time'].iloc[-1].value // 10**6) if 'open_time' in klines_df else 0
+        self.decision_trace.reset(candle_open_ms, float(klines_df['close'].iloc[-1]))
+
+    def _journal_decision(self, action: int):
+        """Cierra la evaluación de entrada escribiendo su registro en el diario de decisiones."""
+        self.decision_journal.append(self.decision_trace, action)
+
     def _check_entry_conditions(self, klines_df: pd.DataFrame):
         """
         Verifica si se cumplen las condiciones para entrar en una posición LONG.
@@ -1069,19 +1347,21 @@ class TradingBot:
             self._update_state(BotState.CHECKING_CONDITIONS)
             current_price = Decimal(klines_df.iloc[-1]['close'])
 
-            # --- LOGS DE DEPURACIÓN ADICIONALES ---
-            self.logger.info(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] (primeros 5): {klines_df['close'].head().to_list() if not klines_df.empty else 'DataFrame vacío'}")
-            self.logger.info(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] (últimos 5): {klines_df['close'].tail().to_list() if not klines_df.empty else 'DataFrame vacío'}")
-            self.logger.info(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] contiene NaNs?: {klines_df['close'].isnull().any()}")
-            self.logger.info(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] dtype: {klines_df['close'].dtype}")
+            # --- LOGS DE DEPURACIÓN ADICIONALES (sólo en DEBUG: construirlos cuesta más que la propia evaluación) ---
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] (primeros 5): {klines_df['close'].head().to_list() if not klines_df.empty else 'DataFrame vacío'}")
+                self.logger.debug(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] (últimos 5): {klines_df['close'].tail().to_list() if not klines_df.empty else 'DataFrame vacío'}")
+                self.logger.debug(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] contiene NaNs?: {klines_df['close'].isnull().any()}")
+                self.logger.debug(f"[{self.symbol}] Pasando a calculate_rsi - klines_df['close'] dtype: {klines_df['close'].dtype}")
             # --- FIN LOGS DE DEPURACIÓN ---
 
             rsi_values = calculate_rsi(klines_df['close'], period=self.rsi_period)
             
-            self.logger.info(f"[{self.symbol}] Resultado de calculate_rsi: {'None o vacío' if rsi_values is None or rsi_values.empty else 'Serie OK, último valor: ' + str(rsi_values.iloc[-1])}") 
+            self.logger.debug(f"[{self.symbol}] Resultado de calculate_rsi: {'None o vacío' if rsi_values is None or rsi_values.empty else 'Serie OK, último valor: ' + str(rsi_values.iloc[-1])}") 
 
             if rsi_values is None or rsi_values.empty:
                 self.logger.warning(f"[{self.symbol}] No se pudieron calcular los valores RSI.")
+                self._journal_decision(ACTION_NO_RSI)
                 # Asegurar que previous_rsi_value no se quede desactualizado si el cálculo actual falla
                 # y antes sí teníamos un valor. No lo ponemos a None aquí directamente,
                 # sino que no lo actualizamos con un valor inválido.
@@ -1090,9 +1370,11 @@ class TradingBot:
 
             # self.last_rsi_value se actualiza aquí
             self.last_rsi_value = rsi_values.iloc[-1]
+            trace = self.decision_trace
+            trace.rsi = float(self.last_rsi_value)
             # Calcular la precisión del precio para el log de forma segura
-            price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
-            self.logger.info(f"[{self.symbol}] Precio actual: {current_price:.{price_precision_log}f}, RSI({self.rsi_period}, {self.rsi_interval}): {self.last_rsi_value:.2f}")
+            price_precision_log = self.price_precision_log
+            self.logger.debug(f"[{self.symbol}] Precio actual: {current_price:.{price_precision_log}f}, RSI({self.rsi_period}, {self.rsi_interval}): {self.last_rsi_value:.2f}")
 
             # --- NUEVA LÓGICA PARA EL DELTA DEL RSI ---
             rsi_delta = None
@@ -1100,33 +1382,37 @@ class TradingBot:
                 # Asegurarse que ambos son números antes de restar
                 if isinstance(self.previous_rsi_value, (int, float)) and isinstance(self.last_rsi_value, (int, float)):
                     rsi_delta = self.last_rsi_value - self.previous_rsi_value
-                    self.logger.info(f"[{self.symbol}] Chequeo Delta RSI: Actual={self.last_rsi_value:.2f}, Anterior={self.previous_rsi_value:.2f}, Delta={rsi_delta:.2f}")
+                    trace.rsi_delta = float(rsi_delta)
+                    self.logger.debug(f"[{self.symbol}] Chequeo Delta RSI: Actual={self.last_rsi_value:.2f}, Anterior={self.previous_rsi_value:.2f}, Delta={rsi_delta:.2f}")
                 else:
                     self.logger.warning(f"[{self.symbol}] Chequeo Delta RSI: RSI actual o anterior no son numéricos (Actual: {self.last_rsi_value}, Anterior: {self.previous_rsi_value}).")
             else:
-                self.logger.info(f"[{self.symbol}] Chequeo Delta RSI: No hay RSI anterior o actual para calcular delta (Actual={self.last_rsi_value}, Anterior={self.previous_rsi_value})")
+                self.logger.debug(f"[{self.symbol}] Chequeo Delta RSI: No hay RSI anterior o actual para calcular delta (Actual={self.last_rsi_value}, Anterior={self.previous_rsi_value})")
             # --- FIN NUEVA LÓGICA DELTA RSI ---
 
             # --- Lógica de Volumen --- MODIFICADA
             volume_check_passed = False # Por defecto, no pasa
             if not self.evaluate_volume_filter: # Si la evaluación del filtro de volumen está DESACTIVADA
                 volume_check_passed = True # Considerar esta condición como cumplida por defecto
-                self.logger.info(f"[{self.symbol}] Filtro de Volumen: Evaluación DESACTIVADA (evaluate_volume_filter=False). Condición de volumen cumplida por defecto.")
+                self.logger.debug(f"[{self.symbol}] Filtro de Volumen: Evaluación DESACTIVADA (evaluate_volume_filter=False). Condición de volumen cumplida por defecto.")
             elif self.volume_sma_period > 0 and self.volume_factor > 0: # Si está ACTIVADA y los parámetros son válidos
                 volume_data = self._calculate_volume_sma(klines_df)
                 if volume_data:
                     current_volume, average_volume, factor = volume_data
+                    if average_volume:
+                        trace.volume_ratio = float(current_volume / average_volume)
                     if current_volume > (average_volume * factor):
                         volume_check_passed = True
-                        self.logger.info(f"[{self.symbol}] CONDICIÓN DE VOLUMEN CUMPLIDA (Evaluación Activada): Actual={current_volume:.2f} > Promedio({self.volume_sma_period})={average_volume:.2f} * Factor={factor}")
+                        self.logger.debug(f"[{self.symbol}] CONDICIÓN DE VOLUMEN CUMPLIDA (Evaluación Activada): Actual={current_volume:.2f} > Promedio({self.volume_sma_period})={average_volume:.2f} * Factor={factor}")
                     else:
-                        self.logger.info(f"[{self.symbol}] CONDICIÓN DE VOLUMEN NO CUMPLIDA (Evaluación Activada): Actual={current_volume:.2f} <= Promedio({self.volume_sma_period})={average_volume:.2f} * Factor={factor}")
+                        self.logger.debug(f"[{self.symbol}] CONDICIÓN DE VOLUMEN NO CUMPLIDA (Evaluación Activada): Actual={current_volume:.2f} <= Promedio({self.volume_sma_period})={average_volume:.2f} * Factor={factor}")
                 else:
                     self.logger.warning(f"[{self.symbol}] No se pudieron obtener datos de volumen SMA (Evaluación Activada). Condición de volumen NO cumplida.")
                     # volume_check_passed permanece False
             else: # Si está ACTIVADA pero los params (period/factor) no son positivos
-                 self.logger.info(f"[{self.symbol}] Filtro de Volumen (Evaluación Activada): Chequeo desactivado por parámetros (SMA Period o Factor no positivos). Condición de volumen cumplida por defecto en este caso.")
+                 self.logger.debug(f"[{self.symbol}] Filtro de Volumen (Evaluación Activada): Chequeo desactivado por parámetros (SMA Period o Factor no positivos). Condición de volumen cumplida por defecto en este caso.")
                  volume_check_passed = True 
+            trace.condition(COND_VOLUME, self.evaluate_volume_filter, volume_check_passed)
             # --- Fin Lógica de Volumen ---
 
             # --- Lógica de Entrada MODIFICADA ---
@@ -1137,17 +1423,19 @@ class TradingBot:
             condition_rsi_in_range = False
             if not self.evaluate_rsi_range: # Si la evaluación de rango RSI está DESACTIVADA
                 condition_rsi_in_range = True
-                self.logger.info(f"[{self.symbol}] Chequeo RSI en Rango: Evaluación DESACTIVADA (evaluate_rsi_range=False). Condición cumplida por defecto.")
+                self.logger.debug(f"[{self.symbol}] Chequeo RSI en Rango: Evaluación DESACTIVADA (evaluate_rsi_range=False). Condición cumplida por defecto.")
             elif self.last_rsi_value is not None and self.rsi_entry_level_low <= self.last_rsi_value <= self.rsi_entry_level_high:
                 condition_rsi_in_range = True
                 # MODIFICADO: Formateo del RSI para el log
                 rsi_value_str = f"{self.last_rsi_value:.2f}" if self.last_rsi_value is not None else "N/A"
-                self.logger.info(f"[{self.symbol}] Chequeo RSI en Rango (Activado) [{self.rsi_entry_level_low}, {self.rsi_entry_level_high}]? Sí (RSI={rsi_value_str})")
+                self.logger.debug(f"[{self.symbol}] Chequeo RSI en Rango (Activado) [{self.rsi_entry_level_low}, {self.rsi_entry_level_high}]? Sí (RSI={rsi_value_str})")
             else:
                 condition_rsi_in_range = False
                 # MODIFICADO: Formateo del RSI para el log
                 rsi_value_str = f"{self.last_rsi_value:.2f}" if self.last_rsi_value is not None else "N/A"
-                self.logger.info(f"[{self.symbol}] Chequeo RSI en Rango (Activado) [{self.rsi_entry_level_low}, {self.rsi_entry_level_high}]? No (RSI={rsi_value_str})")
+                self.logger.debug(f"[{self.symbol}] Chequeo RSI en Rango (Activado) [{self.rsi_entry_level_low}, {self.rsi_entry_level_high}]? No (RSI={rsi_value_str})")
+
+            trace.condition(COND_RSI_RANGE, self.evaluate_rsi_range, condition_rsi_in_range)
 
             # --- Definir condition_rsi_change_meets_thresh_up y rsi_delta_str ---
             condition_rsi_change_meets_thresh_up = False
@@ -1157,17 +1445,18 @@ class TradingBot:
                 rsi_delta_str = f"{rsi_delta:.2f}" # Formatear para el log
                 if not self.evaluate_rsi_delta: # Si la evaluación de delta RSI está DESACTIVADA
                     condition_rsi_change_meets_thresh_up = True # Considerar esta condición como cumplida
-                    self.logger.info(f"[{self.symbol}] Chequeo Delta RSI: Evaluación DESACTIVADA (evaluate_rsi_delta=False). Condición de delta cumplida por defecto. (Delta real: {rsi_delta_str})")
+                    self.logger.debug(f"[{self.symbol}] Chequeo Delta RSI: Evaluación DESACTIVADA (evaluate_rsi_delta=False). Condición de delta cumplida por defecto. (Delta real: {rsi_delta_str})")
                 elif rsi_delta >= self.rsi_threshold_up: # Si está ACTIVADA, evaluar normalmente
                     condition_rsi_change_meets_thresh_up = True
             else: # rsi_delta es None
                 if not self.evaluate_rsi_delta: # Si la evaluación está DESACTIVADA
                     condition_rsi_change_meets_thresh_up = True
-                    self.logger.info(f"[{self.symbol}] Chequeo Delta RSI: Evaluación DESACTIVADA (evaluate_rsi_delta=False). Condición de delta cumplida por defecto. (Delta real: {rsi_delta_str})")
+                    self.logger.debug(f"[{self.symbol}] Chequeo Delta RSI: Evaluación DESACTIVADA (evaluate_rsi_delta=False). Condición de delta cumplida por defecto. (Delta real: {rsi_delta_str})")
                 # Si rsi_delta es None y la evaluación está activada, condition_rsi_change_meets_thresh_up permanece False.
             
             if self.evaluate_rsi_delta: # Log de la condición de delta solo si la evaluación está activa
-                self.logger.info(f"[{self.symbol}] Chequeo Delta RSI (Activado) >= {self.rsi_threshold_up}? {'Sí' if condition_rsi_change_meets_thresh_up else 'No'} (Delta={rsi_delta_str})")
+                self.logger.debug(f"[{self.symbol}] Chequeo Delta RSI (Activado) >= {self.rsi_threshold_up}? {'Sí' if condition_rsi_change_meets_thresh_up else 'No'} (Delta={rsi_delta_str})")
+            trace.condition(COND_RSI_DELTA, self.evaluate_rsi_delta, condition_rsi_change_meets_thresh_up)
             # --------------------------------------------------------------------
 
             # Condición 1: Cambio (Delta) en RSI cumple el umbral positivo (Lógica ya modificada previamente)
@@ -1180,12 +1469,13 @@ class TradingBot:
             condition_required_uptrend_met = False
             if not self.evaluate_required_uptrend: # Si la evaluación está DESACTIVADA
                 condition_required_uptrend_met = True
-                self.logger.info(f"[{self.symbol}] Chequeo Requisito Velas Alcistas: Evaluación DESACTIVADA (evaluate_required_uptrend=False). Condición cumplida por defecto.")
+                self.logger.debug(f"[{self.symbol}] Chequeo Requisito Velas Alcistas: Evaluación DESACTIVADA (evaluate_required_uptrend=False). Condición cumplida por defecto.")
             else: # Si está ACTIVADA, evaluar normalmente
                 condition_required_uptrend_met = self._check_required_uptrend(klines_df)
 
             if self.evaluate_required_uptrend: # Log solo si la evaluación está activa
-                self.logger.info(f"[{self.symbol}] Chequeo Entrada (Activado): Requisito Velas Alcistas ({self.required_uptrend_candles} velas)? {'Sí' if condition_required_uptrend_met else 'No'}")
+                self.logger.debug(f"[{self.symbol}] Chequeo Entrada (Activado): Requisito Velas Alcistas ({self.required_uptrend_candles} velas)? {'Sí' if condition_required_uptrend_met else 'No'}")
+            trace.condition(COND_UPTREND, self.evaluate_required_uptrend, condition_required_uptrend_met)
 
             # --- NUEVO: Lógica de Open Interest ---
             condition_oi_increase_met = False # Por defecto, no pasa
@@ -1195,7 +1485,7 @@ class TradingBot:
 
             if not self.evaluate_open_interest_increase: # Si la evaluación de OI está DESACTIVADA
                 condition_oi_increase_met = True
-                self.logger.info(f"[{self.symbol}] Chequeo Open Interest: Evaluación DESACTIVADA (evaluate_open_interest_increase=False). Condición OI cumplida por defecto.")
+                self.logger.debug(f"[{self.symbol}] Chequeo Open Interest: Evaluación DESACTIVADA (evaluate_open_interest_increase=False). Condición OI cumplida por defecto.")
             else:
                 # Usar la nueva función para obtener los 2 últimos puntos de OI
                 # La función get_open_interest_history ya está importada desde .binance_client
@@ -1211,11 +1501,12 @@ class TradingBot:
                     current_oi_value_for_log = f"{current_oi_usdt:.2f}"
                     previous_oi_value_for_log = f"{previous_oi_usdt:.2f}"
                     open_interest_delta_str = f"{current_oi_usdt - previous_oi_usdt:.2f}"
+                    trace.oi_delta = float(current_oi_usdt - previous_oi_usdt)
 
                     if current_oi_usdt > previous_oi_usdt:
                         condition_oi_increase_met = True
                     
-                    self.logger.info(f"[{self.symbol}] Chequeo Open Interest (Activado, Período: {self.open_interest_period}): "
+                    self.logger.debug(f"[{self.symbol}] Chequeo Open Interest (Activado, Período: {self.open_interest_period}): "
                                      f"Actual OI USDT ({latest_oi_data.get('timestamp')}): {current_oi_value_for_log}, "
                                      f"Anterior OI USDT ({previous_oi_data.get('timestamp')}): {previous_oi_value_for_log}, "
                                      f"Aumento? {'Sí' if condition_oi_increase_met else 'No'}. Delta: {open_interest_delta_str}")
@@ -1228,9 +1519,10 @@ class TradingBot:
                 else:
                     self.logger.warning(f"[{self.symbol}] Chequeo Open Interest (Activado, Período: {self.open_interest_period}): No se pudieron obtener suficientes datos de OI (recibidos: {len(oi_history) if oi_history else 'None'}). Condición NO cumplida.")
                     # condition_oi_increase_met permanece False
+            trace.condition(COND_OI_INCREASE, self.evaluate_open_interest_increase, condition_oi_increase_met)
             # --- FIN Lógica de Open Interest ---
 
-            self.logger.info(f"[{self.symbol}] Resumen Chequeo Entrada: RSI en rango? {'Sí' if condition_rsi_in_range else 'No'} (Eval Activa: {self.evaluate_rsi_range}), "
+            self.logger.debug(f"[{self.symbol}] Resumen Chequeo Entrada: RSI en rango? {'Sí' if condition_rsi_in_range else 'No'} (Eval Activa: {self.evaluate_rsi_range}), "
                              f"Incremento RSI OK? {'Sí' if condition_rsi_change_meets_thresh_up else 'No'} (Eval Activa: {self.evaluate_rsi_delta}), "
                              f"Volumen OK? {'Sí' if volume_check_passed else 'No'} (Eval Activa: {self.evaluate_volume_filter}), "
                              f"Req Velas Alcistas OK? {'Sí' if condition_required_uptrend_met else 'No'} (Eval Activa: {self.evaluate_required_uptrend}), "
@@ -1252,7 +1544,7 @@ class TradingBot:
                 if not volume_check_passed: fail_reasons.append("Volumen")
                 if not condition_required_uptrend_met: fail_reasons.append(f"Req_Velas_Alcistas({self.required_uptrend_candles} velas)") # Actualizar mensaje de fallo
                 if not condition_oi_increase_met: fail_reasons.append(f"OI_Increase (Delta={open_interest_delta_str})") # Añadir fallo de OI
-                self.logger.info(f"[{self.symbol}] CONDICIÓN DE ENTRADA COMBINADA NO CUMPLIDA. Fallos: {' | '.join(fail_reasons) if fail_reasons else 'Ninguno específico (revisar lógica)'}")
+                self.logger.debug(f"[{self.symbol}] CONDICIÓN DE ENTRADA COMBINADA NO CUMPLIDA. Fallos: {' | '.join(fail_reasons) if fail_reasons else 'Ninguno específico (revisar lógica)'}")
 
             # --- Actualizar el RSI anterior para el próximo ciclo ---
             # Es importante hacer esto aquí, después de todos los cálculos y logs que usan self.last_rsi_value y self.previous_rsi_value de ESTE ciclo.
@@ -1274,9 +1566,11 @@ class TradingBot:
             if entry_signal:
                  # Calcular precio y cantidad para la orden LIMIT BUY
                 # Para precio LIMIT, podemos usar el precio actual o el mejor ASK del order book
-                best_ask_price = self._get_best_entry_price('BUY') 
+                # (con order_post_only se usa el mejor BID: la orden GTX debe quedar en el libro como maker)
+                best_ask_price = self._get_best_exit_price('SELL') if self.order_post_only else self._get_best_entry_price('BUY')
                 if not best_ask_price:
                     self.logger.error(f"[{self.symbol}] No se pudo obtener el mejor precio Ask para la entrada. No se colocará orden.")
+                    self._journal_decision(ACTION_NO_PRICE)
                     self._update_state(BotState.IDLE)
                     return
                 
@@ -1285,26 +1579,34 @@ class TradingBot:
                 
                 if quantity <= 0:
                     self.logger.error(f"[{self.symbol}] Cantidad calculada para la orden es cero o negativa ({quantity}). No se puede entrar.")
+                    self._journal_decision(ACTION_INVALID_QUANTITY)
                     self._update_state(BotState.IDLE)
                     return
 
+                # Validación local contra los filtros del exchange: un rechazo no gasta petición ni pasa a ERROR
+                if self.order_filters is not None:
+                    check = self.order_filters.check('LIMIT', 'BUY', quantity=quantity, price=limit_buy_price, reference_price=best_ask_price)
+                    if not check.ok:
+                        self.last_order_rejection = check.reasons
+                        self.logger.warning(f"[{self.symbol}] Entrada descartada por filtros del exchange (position_size_usdt={self.position_size_usdt}): {check.summary()}")
+                        self._journal_decision(ACTION_FILTER_REJECTED)
+                        self._update_state(BotState.IDLE)
+                        return
+
                 # Calcular la precisión del precio para el log de forma segura
-                price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
+                price_precision_log = self.price_precision_log
                 self.logger.warning(f"[{self.symbol}] SEÑAL DE ENTRADA ({self.entry_reason}). Intentando colocar orden LIMIT BUY @ {limit_buy_price:.{price_precision_log}f}, Cantidad={quantity}")
                 self._update_state(BotState.PLACING_ENTRY)
-                order_result = create_futures_limit_order(self.symbol, 'BUY', quantity, limit_buy_price)
-
-                if order_result and order_result.get('orderId'):
-                    self.pending_entry_order_id = order_result['orderId']
-                    self.pending_order_timestamp = time.time()
-                    # NO guardamos rsi_at_entry aquí, sino cuando la orden se LLENA.
-                    self.logger.warning(f"[{self.symbol}] Orden LIMIT BUY {self.pending_entry_order_id} colocada @ {limit_buy_price:.{price_precision_log}f}. Esperando ejecución...")
-                    self._update_state(BotState.WAITING_ENTRY_FILL)
-                else:
-                    self.logger.error(f"[{self.symbol}] Fallo al colocar la orden LIMIT BUY.")
-                    self._set_error_state("Failed to place entry order.") 
+                self._journal_decision(ACTION_ENTRY_SUBMITTED)
+                signal_candle_ms = int(klines_df['open_time'].iloc[-1].value // 10**6) if 'open_time' in klines_df else None
+                self._submit_order_intent('entry', PRIORITY_ENTRY, create_futures_limit_order,
+                                          self.symbol, 'BUY', quantity, limit_buy_price,
+                                          time_in_force='GTX' if self.order_post_only else 'GTC',
+                                          client_order_id=self._client_order_id('en', signal_candle_ms),
+                                          on_complete=partial(self._on_entry_order_placed, limit_buy_price, price_precision_log))
             else:
                 # self.logger.debug(f"[{self.symbol}] No hay señal de entrada en este ciclo.") # Ya logueado arriba
+                self._journal_decision(ACTION_NO_SIGNAL)
                 self._update_state(BotState.IDLE) 
         else:
             if self.in_position:
@@ -1314,6 +1616,20 @@ class TradingBot:
                 self.logger.debug(f"[{self.symbol}] Ya hay una orden de entrada pendiente ({self.pending_entry_order_id}). Saltando nuevo chequeo de entrada.")
                 self._update_state(BotState.WAITING_ENTRY_FILL)
 
+    def _on_entry_order_placed(self, limit_buy_price: Decimal, price_precision_log: int,
+                               order_result: dict | None, error: Exception | None):
+        """Resultado de la colocación de la LIMIT BUY de entrada (en el hilo del worker)."""
+        if order_result and order_result.get('orderId'):
+            self.pending_entry_order_id = order_result['orderId']
+            self.pending_order_timestamp = time.time()
+            self.order_chaser = self._new_order_chaser('entry', 'BUY', order_result)
+            # NO guardamos rsi_at_entry aquí, sino cuando la orden se LLENA.
+            self.logger.warning(f"[{self.symbol}] Orden LIMIT BUY {self.pending_entry_order_id} colocada @ {limit_buy_price:.{price_precision_log}f}. Esperando ejecución...")
+            self._update_state(BotState.WAITING_ENTRY_FILL)
+        else:
+            self.logger.error(f"[{self.symbol}] Fallo al colocar la orden LIMIT BUY.")
+            self._set_error_state("Failed to place entry order.")
+
     def _check_pending_entry_order(self, current_market_price: Decimal | None = None):
         """
         Verifica el estado de una orden de entrada pendiente y maneja el timeout.
@@ -1323,6 +1639,8 @@ class TradingBot:
             self.logger.warning(f"[{self.symbol}] _check_pending_entry_order llamado sin pending_entry_order_id. Forzando a IDLE.")
             self._update_state(BotState.IDLE)
             return
+        if self._order_intent_in_flight('chase'):
+            return # Re-precio en curso (cancel+new): el estado de la orden se mira cuando termine
 
         order_status_response = get_order_status(self.symbol, self.pending_entry_order_id)
         if not order_status_response:
@@ -1339,57 +1657,74 @@ class TradingBot:
             self._handle_filled_entry_order(order_status_response)
             return # Importante: Salir después de manejar la orden llena
 
+        if status_val in ['CANCELED', 'REJECTED', 'EXPIRED', 'PENDING_CANCEL'] and self._has_partial_fill(order_status_response):
+            self.logger.warning(f"[{self.symbol}] Orden de entrada {self.pending_entry_order_id} {status_val} con parte ejecutada. Procesando lo ejecutado como entrada.")
+            self._handle_filled_entry_order(order_status_response)
+            return
+
         if status_val in ['CANCELED', 'REJECTED', 'EXPIRED', 'PENDING_CANCEL']:
             self.logger.warning(f"[{self.symbol}] Orden de entrada {self.pending_entry_order_id} ya no está activa (estado: {status_val}). Reseteando y volviendo a IDLE.")
             self._reset_pending_order_state() # Limpia pending_entry_order_id
             self._update_state(BotState.IDLE)
             return
 
+        # Si sigue 'NEW' y no venció el timeout, perseguir el mejor precio (order_chaser.py)
+        if status_val == 'NEW' and not self._pending_order_timed_out() and self._chase_pending_order():
+            return
+
         # Si sigue 'NEW' o 'PARTIALLY_FILLED', chequear timeout
         if self.order_timeout_seconds > 0 and self.pending_order_timestamp and \
            (time.time() - self.pending_order_timestamp) > self.order_timeout_seconds:
             self.logger.warning(f"[{self.symbol}] Orden de entrada {self.pending_entry_order_id} (estado {status_val}) ha excedido timeout de {self.order_timeout_seconds}s. Cancelando...")
             # Guardar el ID de la orden que se intenta cancelar ANTES de la llamada de cancelación
             order_id_to_cancel = self.pending_entry_order_id
-            # self._update_state(BotState.CANCELING_ORDER) # Opcional: estado intermedio
-            
-            cancel_result = cancel_futures_order(self.symbol, order_id_to_cancel)
-            
-            # Re-chequear estado DESPUÉS del intento de cancelación usando el ID guardado
-            current_status_after_cancel = get_order_status(self.symbol, order_id_to_cancel)
-            final_status_val = current_status_after_cancel.get('status') if current_status_after_cancel else "UNKNOWN"
-
-            if final_status_val == 'FILLED':
-                self.logger.info(f"[{self.symbol}] Orden {order_id_to_cancel} se llenó durante/después del intento de cancelación por timeout.")
-                self._handle_filled_entry_order(current_status_after_cancel) # Procesar la orden llena
-            elif final_status_val == 'CANCELED':
-                self.logger.warning(f"[{self.symbol}] Orden de entrada {order_id_to_cancel} cancelada exitosamente por timeout.")
-                self._reset_pending_order_state() # Limpiar el ID de la orden cancelada
-                self._update_state(BotState.IDLE) # Volver a IDLE para reevaluar condiciones
-            else:
-                # Si la cancelación falló (ej. unknown order) o el estado final es incierto.
-                self.logger.error(f"[{self.symbol}] Fallo al cancelar la orden de entrada {order_id_to_cancel} por timeout o estado final ({final_status_val}) no es CANCELED/FILLED. Respuesta API de cancelación: {cancel_result}. Considerar revisión manual.")
-                # Es importante resetear el pending_order_id para no quedar en un bucle de cancelación si la orden ya no existe.
-                # Si la orden realmente aún existe pero no se pudo cancelar, esto podría ser un problema. Pero 'Unknown order' sugiere que ya no es manejable
-                if "Unknown order sent" in str(cancel_result) or final_status_val == "UNKNOWN": # Asumir que ya no es manejable
-                     self.logger.warning(f"[{self.symbol}] Asumiendo que la orden {order_id_to_cancel} ya no existe o es irrecuperable. Reseteando pending order y volviendo a IDLE.")
-                     self._reset_pending_order_state()
-                     self._update_state(BotState.IDLE)
-                else: # La orden podría seguir ahí, pero la cancelación falló por otra razón.
-                    self._set_error_state(f"Failed to cancel timed-out entry order {order_id_to_cancel}, API cancel response: {cancel_result}, final status: {final_status_val}")
+            self._update_state(BotState.CANCELING_ORDER)
+            # Cancelación + re-consulta en el ejecutor (máxima prioridad); el resultado se aplica en _on_entry_cancel_done
+            self._submit_order_intent('cancel_entry', PRIORITY_CANCEL, cancel_order_and_get_status, self.symbol, order_id_to_cancel,
+                                      on_complete=partial(self._on_entry_cancel_done, order_id_to_cancel))
             return
         elif status_val not in ['NEW', 'PARTIALLY_FILLED']:
             self.logger.info(f"[{self.symbol}] Estado de orden de entrada pendiente {self.pending_entry_order_id}: {status_val} (sin acción de timeout este ciclo).")
 
+    def _on_entry_cancel_done(self, order_id_to_cancel, outcome: tuple | None, error: Exception | None):
+        """Resultado de la cancelación por timeout de la orden de entrada (en el hilo del worker)."""
+        cancel_result, current_status_after_cancel = outcome or (None, None)
+        # Re-chequear estado DESPUÉS del intento de cancelación usando el ID guardado
+        final_status_val = current_status_after_cancel.get('status') if current_status_after_cancel else "UNKNOWN"
+
+        if final_status_val == 'FILLED' or (final_status_val == 'CANCELED' and self._has_partial_fill(current_status_after_cancel)):
+            self.logger.info(f"[{self.symbol}] Orden {order_id_to_cancel} se llenó (estado {final_status_val}) durante/después del intento de cancelación por timeout.")
+            self._handle_filled_entry_order(current_status_after_cancel) # Procesar la orden llena
+        elif final_status_val == 'CANCELED':
+            self.logger.warning(f"[{self.symbol}] Orden de entrada {order_id_to_cancel} cancelada exitosamente por timeout.")
+            self._reset_pending_order_state() # Limpiar el ID de la orden cancelada
+            self._update_state(BotState.IDLE) # Volver a IDLE para reevaluar condiciones
+        else:
+            # Si la cancelación falló (ej. unknown order) o el estado final es incierto.
+            self.logger.error(f"[{self.symbol}] Fallo al cancelar la orden de entrada {order_id_to_cancel} por timeout o estado final ({final_status_val}) no es CANCELED/FILLED. Respuesta API de cancelación: {cancel_result}. Considerar revisión manual.")
+            # Es importante resetear el pending_order_id para no quedar en un bucle de cancelación si la orden ya no existe.
+            # Si la orden realmente aún existe pero no se pudo cancelar, esto podría ser un problema. Pero 'Unknown order' sugiere que ya no es manejable
+            if "Unknown order sent" in str(cancel_result) or final_status_val == "UNKNOWN": # Asumir que ya no es manejable
+                 self.logger.warning(f"[{self.symbol}] Asumiendo que la orden {order_id_to_cancel} ya no existe o es irrecuperable. Reseteando pending order y volviendo a IDLE.")
+                 self._reset_pending_order_state()
+                 self._update_state(BotState.IDLE)
+            else: # La orden podría seguir ahí, pero la cancelación falló por otra razón.
+                self._set_error_state(f"Failed to cancel timed-out entry order {order_id_to_cancel}, API cancel response: {cancel_result}, final status: {final_status_val}")
+
     def _handle_filled_entry_order(self, order_details: dict):
         """
-        Maneja la lógica cuando una orden de entrada se completa correctamente.
+        Maneja la lógica cuando una orden de entrada se completa correctamente (o se cancela con parte ejecutada:
+        la posición es lo ejecutado, sumando las órdenes que reemplazó la persecución).
         """
+        if self.order_chaser is not None:
+            order_details = self.order_chaser.combined_fill(order_details)
         self.logger.info(f"[{self.symbol}] Orden de ENTRADA {order_details.get('orderId')} COMPLETADA. Detalles: {order_details}")
+        self._finish_order_chaser(filled=True)
         self.pending_entry_order_id = None
         self.pending_order_timestamp = None
         
-        self.in_position = True 
+        with self._exit_lock:
+            self.in_position = True
         
         filled_price_str = order_details.get('avgPrice')
         filled_quantity_str = order_details.get('executedQty')
@@ -1408,13 +1743,14 @@ class TradingBot:
             self._verify_position_status() 
             return
         
-        self.current_position = {
-            'entry_price': filled_price,
-            'quantity': filled_quantity,
-            'entry_time': pd.Timestamp.fromtimestamp(update_time_ms / 1000, tz='UTC'),
-            'position_size_usdt': abs(filled_price * filled_quantity),
-            'positionAmt': filled_quantity 
-        }
+        with self._exit_lock:
+            self.current_position = {
+                'entry_price': filled_price,
+                'quantity': filled_quantity,
+                'entry_time': pd.Timestamp.fromtimestamp(update_time_ms / 1000, tz='UTC'),
+                'position_size_usdt': abs(filled_price * filled_quantity),
+                'positionAmt': filled_quantity 
+            }
         
         # --- Guardar el RSI al momento de la entrada ---
         if self.last_rsi_value is not None: # Asegurarse que tenemos un valor de RSI del ciclo de entrada
@@ -1437,10 +1773,14 @@ class TradingBot:
         # ------------------------------------
 
         # --- INICIALIZAR PARA TRAILING STOP DE PRECIO ---
-        self.price_peak_since_entry = filled_price # El precio de entrada es el primer pico
-        self.price_trailing_stop_armed = False # Resetear al entrar en nueva posición
+        with self._exit_lock:
+            self.price_peak_ticks = self.tick_scale.floor_ticks(filled_price) # El precio de entrada es el primer pico
+            self.price_trailing_stop_armed = False # Resetear al entrar en nueva posición
         # ----------------------------------------------
 
+        # Empezar a vigilar la posición por tick sin esperar al próximo ciclo
+        self._sync_exit_monitor()
+
     def _check_exit_conditions(self, klines_df: pd.DataFrame):
         """
         Verifica si se cumplen las condiciones para cerrar una posición LONG.
@@ -1456,7 +1796,7 @@ class TradingBot:
                 if self.last_rsi_value is not None:
                     current_rsi_str = f"{self.last_rsi_value:.2f}"
 
-            price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
+            price_precision_log = self.price_precision_log
             self.logger.info(f"[{self.symbol}] Chequeo Salida: Precio actual={klines_df.iloc[-1]['close']:.{price_precision_log}f}, RSI Actual={current_rsi_str}")
             rsi_at_entry_str = f"{self.rsi_at_entry:.2f}" if self.rsi_at_entry is not None else "N/A"
             self.logger.info(f"[{self.symbol}] EN POSICIÓN: Entrada @ {self.current_position['entry_price']:.{price_precision_log}f}, Cant: {self.current_position['quantity']}, PnL actual: {self.last_known_pnl:.4f} USDT, RSI Entrada: {rsi_at_entry_str}")
@@ -1482,83 +1822,18 @@ class TradingBot:
             elif not exit_signal: 
                 self.logger.info(f"[{self.symbol}] Salida por Stop Loss (PnL) DESHABILITADA.")
 
-            # --- INICIO NUEVA LÓGICA: TRAILING STOP POR PRECIO ---
-            if not exit_signal and self.enable_price_trailing_stop:
-                if self.price_trailing_stop_distance_usdt > Decimal('0') and self.current_position:
-                    # Usar el precio de cierre de la última vela como precio actual del mercado
-                    # klines_df debería estar disponible y ser reciente
-                    current_market_price = Decimal(str(klines_df.iloc[-1]['close']))
-
-                    # Actualizar el precio pico si el precio actual es mayor
-                    if self.price_peak_since_entry is None or current_market_price > self.price_peak_since_entry:
-                        self.price_peak_since_entry = current_market_price
-                        self.logger.info(f"[{self.symbol}] Nuevo precio pico para Trailing Stop de Precio: {self.price_peak_since_entry:.{price_precision_log}f}")
-
-                    # Armar el trailing stop si el PNL alcanza el umbral de activación
-                    if not self.price_trailing_stop_armed and self.last_known_pnl is not None and \
-                       self.last_known_pnl >= self.price_trailing_stop_activation_pnl_usdt:
-                        self.price_trailing_stop_armed = True
-                        self.logger.info(f"[{self.symbol}] Trailing Stop de Precio ARMADO. PnL actual ({self.last_known_pnl:.4f}) >= Activación ({self.price_trailing_stop_activation_pnl_usdt:.4f})")
-
-                    # Si está armado, verificar condición de salida
-                    if self.price_trailing_stop_armed and self.price_peak_since_entry is not None:
-                        trailing_stop_price_level = self.price_peak_since_entry - self.price_trailing_stop_distance_usdt
-                        self.logger.info(f"[{self.symbol}] Chequeo Salida Trailing Precio (Habilitado, Armado): "
-                                         f"Actual Precio ({current_market_price:.{price_precision_log}f}) vs "
-                                         f"Umbral Salida ({trailing_stop_price_level:.{price_precision_log}f} = "
-                                         f"Pico {self.price_peak_since_entry:.{price_precision_log}f} - Dist {self.price_trailing_stop_distance_usdt})")
-                        if current_market_price <= trailing_stop_price_level:
-                            self.logger.warning(f"[{self.symbol}] CONDICIÓN DE SALIDA (TRAILING STOP DE PRECIO) DETECTADA (Habilitado): "
-                                                f"Precio Actual ({current_market_price:.{price_precision_log}f}) <= Umbral ({trailing_stop_price_level:.{price_precision_log}f})")
-                            exit_signal = True
-                            self.exit_reason = (f"Price_Trailing_Stop (Precio={current_market_price:.{price_precision_log}f}, "
-                                                f"Pico={self.price_peak_since_entry:.{price_precision_log}f}, "
-                                                f"Dist={self.price_trailing_stop_distance_usdt})")
-                else:
-                    if self.price_trailing_stop_distance_usdt <= Decimal('0'):
-                        self.logger.info(f"[{self.symbol}] Trailing Stop de Precio (Habilitado) pero distancia no es positiva ({self.price_trailing_stop_distance_usdt}). No se evaluará.")
-                    # No loguear si !self.current_position porque ya se loguea al inicio de la función
-            elif not exit_signal: # Si no hay señal de salida aún y el Price Trailing está deshabilitado
-                 self.logger.info(f"[{self.symbol}] Salida por Trailing Stop de Precio DESHABILITADA.")
-            # --- FIN NUEVA LÓGICA: TRAILING STOP POR PRECIO ---
-
-            # --- INICIO NUEVA LÓGICA: TRAILING STOP POR PNL ---
-            if not exit_signal and self.enable_pnl_trailing_stop:
-                if self.pnl_trailing_stop_drop_usdt > Decimal('0') and self.last_known_pnl is not None:
-                    # Armar el PNL trailing stop si el PNL alcanza el umbral de activación de PNL Trailing
-                    if not self.pnl_trailing_stop_armed and self.last_known_pnl >= self.pnl_trailing_stop_activation_usdt:
-                        self.pnl_trailing_stop_armed = True
-                        self.pnl_peak_since_activation = self.last_known_pnl # El PNL actual es el primer pico
-                        self.logger.info(f"[{self.symbol}] Trailing Stop por PNL ARMADO. "
-                                         f"PNL actual ({self.last_known_pnl:.4f}) >= Activación PNL TS ({self.pnl_trailing_stop_activation_usdt:.4f}). "
-                                         f"Pico PNL inicial: {self.pnl_peak_since_activation:.4f}")
-
-                    # Si está armado, actualizar el pico de PNL y verificar condición de salida
-                    if self.pnl_trailing_stop_armed:
-                        if self.last_known_pnl > self.pnl_peak_since_activation:
-                            self.pnl_peak_since_activation = self.last_known_pnl
-                            self.logger.info(f"[{self.symbol}] Nuevo pico de PNL para Trailing Stop por PNL: {self.pnl_peak_since_activation:.4f}")
-
-                        # Calcular el nivel de PNL de salida
-                        pnl_trailing_exit_level = self.pnl_peak_since_activation - self.pnl_trailing_stop_drop_usdt
-                        self.logger.info(f"[{self.symbol}] Chequeo Salida Trailing PNL (Habilitado, Armado): "
-                                         f"Actual PNL ({self.last_known_pnl:.4f}) vs "
-                                         f"Umbral Salida PNL ({pnl_trailing_exit_level:.4f} = "
-                                         f"Pico PNL {self.pnl_peak_since_activation:.4f} - Caída {self.pnl_trailing_stop_drop_usdt})")
-
-                        if self.last_known_pnl <= pnl_trailing_exit_level:
-                            self.logger.warning(f"[{self.symbol}] CONDICIÓN DE SALIDA (TRAILING STOP POR PNL) DETECTADA (Habilitado): "
-                                                f"PNL Actual ({self.last_known_pnl:.4f}) <= Umbral PNL ({pnl_trailing_exit_level:.4f})")
-                            exit_signal = True
-                            self.exit_reason = (f"PNL_Trailing_Stop (PNL={self.last_known_pnl:.4f}, "
-                                                f"PicoPNL={self.pnl_peak_since_activation:.4f}, "
-                                                f"DropPNL={self.pnl_trailing_stop_drop_usdt})")
-                else:
-                    if self.pnl_trailing_stop_drop_usdt <= Decimal('0'):
-                        self.logger.info(f"[{self.symbol}] Trailing Stop por PNL (Habilitado) pero la distancia de caída no es positiva ({self.pnl_trailing_stop_drop_usdt}). No se evaluará.")
-            elif not exit_signal: # Si no hay señal de salida aún y el PNL Trailing está deshabilitado
-                 self.logger.info(f"[{self.symbol}] Salida por Trailing Stop por PNL DESHABILITADA.")
-            # --- FIN NUEVA LÓGICA: TRAILING STOP POR PNL ---
+            # --- TRAILING STOPS POR PRECIO Y POR PNL (misma lógica que el monitor por tick) ---
+            if not exit_signal:
+                close_ticks = self.tick_scale.ticks_from_float(float(klines_df.iloc[-1]['close']))
+                with self._exit_lock:
+                    trailing_exit_reason = self._evaluate_trailing_exits(close_ticks, self.last_known_pnl, log_checks=True)
+                if trailing_exit_reason:
+                    exit_signal = True
+                    self.exit_reason = trailing_exit_reason
+                elif self.enable_price_trailing_stop and self.price_trailing_stop_armed and \
+                        self._uses_exchange_trailing() and not self.pending_trailing_order_id and \
+                        not self._order_intent_in_flight('trailing'):
+                    self._place_exchange_trailing_stop(self.tick_scale.to_price(close_ticks))
 
             # 3. Activación de RSI objetivo y seguimiento del pico para Trailing Stop RSI (MODIFICADO)
             # La activación del rsi_objetivo y el seguimiento del pico se hacen independientemente de si el Trailing Stop está habilitado,
@@ -1596,10 +1871,7 @@ class TradingBot:
                 self.logger.warning(f"[{self.symbol}] SEÑAL DE SALIDA ({self.exit_reason}). Cancelando TP/SL existentes y colocando nueva orden LIMIT SELL @ {best_bid_price}")
                 
                 # --- CANCELAR ÓRDENES TP/SL EXISTENTES ANTES DE COLOCAR LA NUEVA ---
-                self._cancel_active_tp_sl_orders()
-                # --------------------------------------------------------------------
-                
-                self._place_exit_order(price=best_bid_price, reason=self.exit_reason)
+                self._cancel_tp_sl_then_place_exit(price=best_bid_price, reason=self.exit_reason)
             else:
                 self.logger.debug(f"[{self.symbol}] No hay señal de salida. Manteniendo posición.")
                 self._update_state(BotState.IN_POSITION)
@@ -1607,6 +1879,163 @@ class TradingBot:
             self.logger.error(f"[{self.symbol}] En estado IN_POSITION pero sin datos de self.current_position. Reevaluando.")
             self._verify_position_status()
 
+    def _evaluate_trailing_exits(self, current_price_ticks: int, current_pnl: Decimal | None, log_checks: bool = True) -> str | None:
+        """
+        Actualiza picos / armado de los trailing stops de precio y de PnL y devuelve la razón de salida
+        si alguno se dispara (None si no). La usan tanto _check_exit_conditions (cierre de vela, una vez
+        por ciclo) como ExitMonitor (cada tick del bookTicker); llamar con self._exit_lock tomado.
+        El precio llega en ticks enteros (self.tick_scale): pico y umbral se comparan como ints.
+        Con log_checks=False (camino por tick) sólo se loguea en DEBUG para no inundar el log.
+        """
+        log_check = self.logger.info if log_checks else self.logger.debug
+        fmt = self.tick_scale.format_price
+
+        # --- TRAILING STOP POR PRECIO ---
+        if self.enable_price_trailing_stop:
+            if self.price_trailing_distance_ticks and self.current_position:
+                # Actualizar el precio pico si el precio actual es mayor
+                if self.price_peak_ticks is None or current_price_ticks > self.price_peak_ticks:
+                    self.price_peak_ticks = current_price_ticks
+                    log_check(f"[{self.symbol}] Nuevo precio pico para Trailing Stop de Precio: {fmt(self.price_peak_ticks)}")
+
+                # Armar el trailing stop si el PNL alcanza el umbral de activación
+                if not self.price_trailing_stop_armed and current_pnl is not None and \
+                   current_pnl >= self.price_trailing_stop_activation_pnl_usdt:
+                    self.price_trailing_stop_armed = True
+                    self.logger.info(f"[{self.symbol}] Trailing Stop de Precio ARMADO. PnL actual ({current_pnl:.4f}) >= Activación ({self.price_trailing_stop_activation_pnl_usdt:.4f})")
+
+                # Con price_trailing_stop_mode='exchange' el seguimiento lo hace la orden TRAILING_STOP_MARKET
+                if self.price_trailing_stop_armed and self._uses_exchange_trailing():
+                    log_check(f"[{self.symbol}] Trailing Stop de Precio delegado al exchange (orden {self.pending_trailing_order_id or 'pendiente de colocar'}).")
+                # Si está armado, verificar condición de salida
+                elif self.price_trailing_stop_armed and self.price_peak_ticks is not None:
+                    trailing_stop_level_ticks = self.price_peak_ticks - self.price_trailing_distance_ticks
+                    log_check(f"[{self.symbol}] Chequeo Salida Trailing Precio (Habilitado, Armado): "
+                              f"Actual Precio ({fmt(current_price_ticks)}) vs "
+                              f"Umbral Salida ({fmt(trailing_stop_level_ticks)} = "
+                              f"Pico {fmt(self.price_peak_ticks)} - Dist {self.price_trailing_stop_distance_usdt})")
+                    if current_price_ticks <= trailing_stop_level_ticks:
+                        self.logger.warning(f"[{self.symbol}] CONDICIÓN DE SALIDA (TRAILING STOP DE PRECIO) DETECTADA (Habilitado): "
+                                            f"Precio Actual ({fmt(current_price_ticks)}) <= Umbral ({fmt(trailing_stop_level_ticks)})")
+                        return (f"Price_Trailing_Stop (Precio={fmt(current_price_ticks)}, "
+                                f"Pico={fmt(self.price_peak_ticks)}, "
+                                f"Dist={self.price_trailing_stop_distance_usdt})")
+            elif self.price_trailing_stop_distance_usdt <= Decimal('0'):
+                log_check(f"[{self.symbol}] Trailing Stop de Precio (Habilitado) pero distancia no es positiva ({self.price_trailing_stop_distance_usdt}). No se evaluará.")
+        else:
+            log_check(f"[{self.symbol}] Salida por Trailing Stop de Precio DESHABILITADA.")
+
+        # --- TRAILING STOP POR PNL ---
+        if self.enable_pnl_trailing_stop:
+            if self.pnl_trailing_stop_drop_usdt > Decimal('0') and current_pnl is not None:
+                # Armar el PNL trailing stop si el PNL alcanza el umbral de activación de PNL Trailing
+                if not self.pnl_trailing_stop_armed and current_pnl >= self.pnl_trailing_stop_activation_usdt:
+                    self.pnl_trailing_stop_armed = True
+                    self.pnl_peak_since_activation = current_pnl # El PNL actual es el primer pico
+                    self.logger.info(f"[{self.symbol}] Trailing Stop por PNL ARMADO. "
+                                     f"PNL actual ({current_pnl:.4f}) >= Activación PNL TS ({self.pnl_trailing_stop_activation_usdt:.4f}). "
+                                     f"Pico PNL inicial: {self.pnl_peak_since_activation:.4f}")
+
+                # Si está armado, actualizar el pico de PNL y verificar condición de salida
+                if self.pnl_trailing_stop_armed:
+                    if current_pnl > self.pnl_peak_since_activation:
+                        self.pnl_peak_since_activation = current_pnl
+                        log_check(f"[{self.symbol}] Nuevo pico de PNL para Trailing Stop por PNL: {self.pnl_peak_since_activation:.4f}")
+
+                    pnl_trailing_exit_level = self.pnl_peak_since_activation - self.pnl_trailing_stop_drop_usdt
+                    log_check(f"[{self.symbol}] Chequeo Salida Trailing PNL (Habilitado, Armado): "
+                              f"Actual PNL ({current_pnl:.4f}) vs "
+                              f"Umbral Salida PNL ({pnl_trailing_exit_level:.4f} = "
+                              f"Pico PNL {self.pnl_peak_since_activation:.4f} - Caída {self.pnl_trailing_stop_drop_usdt})")
+                    if current_pnl <= pnl_trailing_exit_level:
+                        self.logger.warning(f"[{self.symbol}] CONDICIÓN DE SALIDA (TRAILING STOP POR PNL) DETECTADA (Habilitado): "
+                                            f"PNL Actual ({current_pnl:.4f}) <= Umbral PNL ({pnl_trailing_exit_level:.4f})")
+                        return (f"PNL_Trailing_Stop (PNL={current_pnl:.4f}, "
+                                f"PicoPNL={self.pnl_peak_since_activation:.4f}, "
+                                f"DropPNL={self.pnl_trailing_stop_drop_usdt})")
+            elif self.pnl_trailing_stop_drop_usdt <= Decimal('0'):
+                log_check(f"[{self.symbol}] Trailing Stop por PNL (Habilitado) pero la distancia de caída no es positiva ({self.pnl_trailing_stop_drop_usdt}). No se evaluará.")
+        else:
+            log_check(f"[{self.symbol}] Salida por Trailing Stop por PNL DESHABILITADA.")
+        return None
+
+    # --- Salidas disparadas por el monitor de ticks (exit_monitor.py) ---
+    def request_tick_exit(self, reason: str, price: Decimal):
+        """Llamado desde el hilo del stream: deja la salida pedida y despierta al worker."""
+        self.tick_exit_price = price
+        self.tick_exit_reason = reason
+        self.wake_event.set()
+
+    def _execute_tick_exit(self):
+        """Ejecuta (en el hilo del worker) la salida pedida por el monitor de ticks."""
+        reason, price = self.tick_exit_reason, self.tick_exit_price
+        self.tick_exit_reason = None
+        self.tick_exit_price = None
+        if not self.in_position or not self.current_position or self.current_state != BotState.IN_POSITION:
+            self.logger.info(f"[{self.symbol}] Salida por tick descartada: el bot ya no está en posición sin salida pendiente (estado {self.current_state.value}).")
+            return
+        # Precio fresco del order book; si falla, el bid del tick que disparó la salida
+        exit_price = self._get_best_exit_price('SELL') or price
+        self.exit_reason = reason
+        self.logger.warning(f"[{self.symbol}] SEÑAL DE SALIDA POR TICK ({reason}). Cancelando TP/SL existentes y colocando nueva orden LIMIT SELL @ {exit_price}")
+        self._cancel_tp_sl_then_place_exit(price=exit_price, reason=reason)
+
+    def _sync_exit_monitor(self):
+        """Activa el monitor de ticks sólo mientras hay posición abierta (y el parámetro lo permite)."""
+        # Con trailing nativo ya colocado el precio lo sigue Binance; sólo queda vigilar el trailing de PnL
+        price_rule_local = self.enable_price_trailing_stop and not (self.pending_trailing_order_id and self._uses_exchange_trailing())
+        should_run = self.enable_tick_exit_monitor and self.in_position and self.current_position is not None and \
+            (price_rule_local or self.enable_pnl_trailing_stop)
+        if should_run and not self.exit_monitor.active:
+            self.exit_monitor.start()
+        elif not should_run and self.exit_monitor.active:
+            self.exit_monitor.stop()
+
+    # --- Trailing stop nativo (price_trailing_stop_mode='exchange') ---
+    def _uses_exchange_trailing(self) -> bool:
+        return self.price_trailing_stop_mode == 'exchange' and not self.exchange_trailing_unavailable
+
+    def _place_exchange_trailing_stop(self, reference_price: Decimal):
+        """
+        Coloca una TRAILING_STOP_MARKET con el callbackRate equivalente a price_trailing_stop_distance_usdt
+        respecto del precio actual. Si no se puede, el trailing de precio sigue evaluándose en local.
+        """
+        callback_rate, clamped = trailing_callback_rate_from_distance(self.price_trailing_stop_distance_usdt, reference_price)
+        if callback_rate is None:
+            self.logger.error(f"[{self.symbol}] No se pudo calcular callbackRate (distancia {self.price_trailing_stop_distance_usdt}, precio {reference_price}). Trailing de precio en local.")
+            self.exchange_trailing_unavailable = True
+            return
+        if clamped:
+            effective_distance = (reference_price * callback_rate / Decimal('100')).quantize(self.tick_scale.tick_size)
+            self.logger.warning(f"[{self.symbol}] Distancia de trailing {self.price_trailing_stop_distance_usdt} @ {reference_price} fuera del rango de Binance "
+                                f"(callbackRate 0.1-5%). CallbackRate acotado a {callback_rate}%: el exchange seguirá a ≈ {effective_distance} del máximo, no a la distancia configurada.")
+
+        quantity = self._adjust_quantity(self.current_position['quantity'])
+        self._submit_order_intent('trailing', PRIORITY_PROTECTIVE, create_futures_trailing_stop_order,
+                                  self.symbol, 'SELL', quantity, str(callback_rate),
+                                  client_order_id=self._client_order_id('ts'),
+                                  on_complete=partial(self._on_exchange_trailing_stop_placed, callback_rate, reference_price))
+
+    def _on_exchange_trailing_stop_placed(self, callback_rate, reference_price: Decimal, order_result: dict | None, error: Exception | None):
+        """Resultado de la colocación de la TRAILING_STOP_MARKET (en el hilo del worker)."""
+        if not self.in_position or self.current_state != BotState.IN_POSITION:
+            self._cancel_orphan_orders([order_result] if isinstance(order_result, dict) else [], 'trailing colocado tras dejar la posición')
+            return
+        if order_result and order_result.get('orderId'):
+            self.pending_trailing_order_id = order_result['orderId']
+            self.logger.warning(f"[{self.symbol}] Trailing Stop nativo colocado: orden {self.pending_trailing_order_id}, callbackRate {callback_rate}% "
+                                f"(≈ {self.price_trailing_stop_distance_usdt} desde {reference_price}). El seguimiento del precio pasa al exchange.")
+            self._sync_exit_monitor()
+        else:
+            self.logger.error(f"[{self.symbol}] Fallo al colocar la orden TRAILING_STOP_MARKET. El trailing de precio se evaluará en local para esta posición.")
+            self.exchange_trailing_unavailable = True
+
+    def stop_exit_monitor(self):
+        """Libera las suscripciones a streams: bookTicker y libro local (al terminar el worker)."""
+        self.exit_monitor.stop()
+        if self.enable_order_book_cache:
+            get_order_book_cache().untrack(self.symbol)
+
     def _check_pending_exit_order(self, current_market_price: Decimal | None = None):
         """
         Verifica el estado de una orden de salida pendiente y maneja el timeout.
@@ -1615,6 +2044,8 @@ class TradingBot:
             self.logger.warning(f"[{self.symbol}] _check_pending_exit_order llamado sin pending_exit_order_id. Verificando posición actual.")
             self._verify_position_status() # Podría haberse llenado o cancelado y no nos enteramos.
             return
+        if self._order_intent_in_flight('chase'):
+            return # Re-precio en curso (cancel+new): el estado de la orden se mira cuando termine
 
         order_status_response = get_order_status(self.symbol, self.pending_exit_order_id)
         if not order_status_response:
@@ -1629,53 +2060,69 @@ class TradingBot:
             self._handle_filled_exit_order(order_status_response)
             return
 
+        if status_val in ['CANCELED', 'REJECTED', 'EXPIRED', 'PENDING_CANCEL'] and self._has_partial_fill(order_status_response):
+            self.logger.warning(f"[{self.symbol}] Orden de salida {self.pending_exit_order_id} {status_val} con parte ejecutada. Registrando lo ejecutado.")
+            self._handle_filled_exit_order(order_status_response)
+            return
+
         if status_val in ['CANCELED', 'REJECTED', 'EXPIRED', 'PENDING_CANCEL']:
             self.logger.warning(f"[{self.symbol}] Orden de salida {self.pending_exit_order_id} ya no activa (estado: {status_val}). Verificando posición actual.")
             self._reset_pending_order_state() # Limpia pending_exit_order_id
             self._verify_position_status() # Re-evaluar si aún en posición y decidir próximo estado
             return
-        
+
+        # Si sigue 'NEW' y no venció el timeout, perseguir el mejor precio (order_chaser.py)
+        if status_val == 'NEW' and not self._pending_order_timed_out() and self._chase_pending_order():
+            return
+
         # Si sigue 'NEW' o 'PARTIALLY_FILLED', chequear timeout
         if self.order_timeout_seconds > 0 and self.pending_order_timestamp and \
            (time.time() - self.pending_order_timestamp) > self.order_timeout_seconds:
             self.logger.warning(f"[{self.symbol}] Orden de salida {self.pending_exit_order_id} (estado {status_val}) ha excedido timeout de {self.order_timeout_seconds}s. Cancelando...")
             order_id_to_cancel = self.pending_exit_order_id
-            # self._update_state(BotState.CANCELING_ORDER) # Opcional
-
-            cancel_result = cancel_futures_order(self.symbol, order_id_to_cancel)
-            current_status_after_cancel = get_order_status(self.symbol, order_id_to_cancel)
-            final_status_val = current_status_after_cancel.get('status') if current_status_after_cancel else "UNKNOWN"
-
-            if final_status_val == 'FILLED':
-                self.logger.info(f"[{self.symbol}] Orden de salida {order_id_to_cancel} se llenó durante/después del intento de cancelación por timeout.")
-                self._handle_filled_exit_order(current_status_after_cancel)
-            elif final_status_val == 'CANCELED':
-                self.logger.warning(f"[{self.symbol}] Orden de salida {order_id_to_cancel} cancelada exitosamente por timeout. Reevaluando condiciones de salida.")
-                self._reset_pending_order_state()
-                self._verify_position_status() # Chequear si aún en posición; si sí, el próximo ciclo intentará salir de nuevo.
-            else:
-                self.logger.error(f"[{self.symbol}] Fallo al cancelar la orden de salida {order_id_to_cancel} por timeout o estado final ({final_status_val}) no es CANCELED/FILLED. Respuesta API: {cancel_result}. Considerar revisión manual.")
-                if "Unknown order sent" in str(cancel_result) or final_status_val == "UNKNOWN":
-                     self.logger.warning(f"[{self.symbol}] Asumiendo que la orden de salida {order_id_to_cancel} ya no existe o es irrecuperable. Reseteando pending order y verificando posición.")
-                     self._reset_pending_order_state()
-                     self._verify_position_status() # Muy importante verificar si la posición sigue ahí o no.
-                else:
-                    self._set_error_state(f"Failed to cancel timed-out exit order {order_id_to_cancel}, API cancel response: {cancel_result}, final status: {final_status_val}")
+            self._update_state(BotState.CANCELING_ORDER)
+            self._submit_order_intent('cancel_exit', PRIORITY_CANCEL, cancel_order_and_get_status, self.symbol, order_id_to_cancel,
+                                      on_complete=partial(self._on_exit_cancel_done, order_id_to_cancel))
             return
         elif status_val not in ['NEW', 'PARTIALLY_FILLED']:
             self.logger.info(f"[{self.symbol}] Estado de orden de salida pendiente {self.pending_exit_order_id}: {status_val} (sin acción de timeout este ciclo).")
 
+    def _on_exit_cancel_done(self, order_id_to_cancel, outcome: tuple | None, error: Exception | None):
+        """Resultado de la cancelación por timeout de la orden de salida (en el hilo del worker)."""
+        cancel_result, current_status_after_cancel = outcome or (None, None)
+        final_status_val = current_status_after_cancel.get('status') if current_status_after_cancel else "UNKNOWN"
+
+        if final_status_val == 'FILLED' or (final_status_val == 'CANCELED' and self._has_partial_fill(current_status_after_cancel)):
+            self.logger.info(f"[{self.symbol}] Orden de salida {order_id_to_cancel} se llenó (estado {final_status_val}) durante/después del intento de cancelación por timeout.")
+            self._handle_filled_exit_order(current_status_after_cancel)
+        elif final_status_val == 'CANCELED':
+            self.logger.warning(f"[{self.symbol}] Orden de salida {order_id_to_cancel} cancelada exitosamente por timeout. Reevaluando condiciones de salida.")
+            self._reset_pending_order_state()
+            self._verify_position_status() # Chequear si aún en posición; si sí, el próximo ciclo intentará salir de nuevo.
+        else:
+            self.logger.error(f"[{self.symbol}] Fallo al cancelar la orden de salida {order_id_to_cancel} por timeout o estado final ({final_status_val}) no es CANCELED/FILLED. Respuesta API: {cancel_result}. Considerar revisión manual.")
+            if "Unknown order sent" in str(cancel_result) or final_status_val == "UNKNOWN":
+                 self.logger.warning(f"[{self.symbol}] Asumiendo que la orden de salida {order_id_to_cancel} ya no existe o es irrecuperable. Reseteando pending order y verificando posición.")
+                 self._reset_pending_order_state()
+                 self._verify_position_status() # Muy importante verificar si la posición sigue ahí o no.
+            else:
+                self._set_error_state(f"Failed to cancel timed-out exit order {order_id_to_cancel}, API cancel response: {cancel_result}, final status: {final_status_val}")
+
     def _handle_filled_exit_order(self, order_details: dict):
         """
         Maneja la lógica cuando una orden de salida se completa correctamente.
-        Registra el trade y resetea el estado.
+        Registra el trade y resetea el estado. Si se canceló con parte ejecutada, registra lo ejecutado y vuelve
+        a verificar la posición (el resto sigue abierto).
         """
+        if self.order_chaser is not None:
+            order_details = self.order_chaser.combined_fill(order_details)
         self.logger.info(f"[{self.symbol}] Orden de SALIDA {order_details.get('orderId')} COMPLETADA. Razón: {self.current_exit_reason}. Detalles: {order_details}")
         
         # Backup de la razón, ya que _reset_state la limpiará si se llama desde _handle_successful_closure
         exit_reason_to_log = self.current_exit_reason if self.current_exit_reason else f"ExitOrderFill_{order_details.get('orderId')}"
 
         # Marcar la orden pendiente como manejada ANTES de cualquier lógica que pueda fallar
+        self._finish_order_chaser(filled=True)
         original_pending_exit_order_id = self.pending_exit_order_id # Guardar para pasarlo
         self.pending_exit_order_id = None
         self.pending_order_timestamp = None
@@ -1712,12 +2159,17 @@ class TradingBot:
             quantity_closed=quantity_closed,
             reason=exit_reason_to_log,
             close_timestamp=close_timestamp,
-            binance_order_id_of_closure=str(original_pending_exit_order_id) if original_pending_exit_order_id else None # <-- PASAR EL ORDER ID
+            binance_order_id_of_closure=str(original_pending_exit_order_id) if original_pending_exit_order_id else None, # <-- PASAR EL ORDER ID
+            closure_order_ids=order_details.get('orderIds')
         )
         
         # _handle_successful_closure ya llama a _reset_state(), que limpia in_position y current_position.
         # El estado después de un cierre exitoso debe ser IDLE.
-        self._update_state(BotState.IDLE)
+        if order_details.get('status') == 'FILLED':
+            self._update_state(BotState.IDLE)
+        else:
+            self.logger.warning(f"[{self.symbol}] Salida ejecutada sólo en parte ({quantity_closed}). Verificando la posición restante.")
+            self._verify_position_status()
 
     def _verify_position_status(self):
         """
@@ -1734,18 +2186,19 @@ class TradingBot:
             if abs(pos_amt) > Decimal('1e-9'): # Hay una posición
                 if pos_amt > 0: # Es LONG
                     self.logger.info(f"[{self.symbol}] Verificación: Posición LONG activa encontrada. Cant: {pos_amt}, Entrada: {entry_price}, PnL: {unrealized_pnl}")
-                    self.in_position = True
-                    # Actualizar current_position solo si es diferente o no existe
-                    if not self.current_position or \
-                       self.current_position.get('entry_price') != entry_price or \
-                       self.current_position.get('quantity') != pos_amt:
-                        self.current_position = {
-                            'entry_price': entry_price,
-                            'quantity': pos_amt,
-                            'entry_time': self.current_position.get('entry_time') if self.current_position and self.current_position.get('entry_price') == entry_price else pd.Timestamp.now(tz='UTC'), # Conservar tiempo de entrada original si el precio no cambió
-                            'position_size_usdt': abs(entry_price * pos_amt),
-                            'positionAmt': pos_amt
-                        }
+                    with self._exit_lock:
+                        self.in_position = True
+                        # Actualizar current_position solo si es diferente o no existe
+                        if not self.current_position or \
+                           self.current_position.get('entry_price') != entry_price or \
+                           self.current_position.get('quantity') != pos_amt:
+                            self.current_position = {
+                                'entry_price': entry_price,
+                                'quantity': pos_amt,
+                                'entry_time': self.current_position.get('entry_time') if self.current_position and self.current_position.get('entry_price') == entry_price else pd.Timestamp.now(tz='UTC'), # Conservar tiempo de entrada original si el precio no cambió
+                                'position_size_usdt': abs(entry_price * pos_amt),
+                                'positionAmt': pos_amt
+                            }
                     self.last_known_pnl = unrealized_pnl
                     self._update_state(BotState.IN_POSITION)
                     # Limpiar órdenes pendientes si encontramos posición activa inesperadamente
@@ -1786,6 +2239,7 @@ class TradingBot:
         Resetea el estado de una orden pendiente y posición.
         """
         self.logger.debug(f"[{self.symbol}] Reseteando estado de orden pendiente/posición.")
+        self._finish_order_chaser(filled=False) # Sin efecto si la orden ya se registró como llenada
         self.pending_entry_order_id = None
         self.pending_exit_order_id = None
         self.pending_order_timestamp = None
@@ -1793,6 +2247,198 @@ class TradingBot:
         # ---------------------------------------------------
         # self.last_rsi_value = None # Podríamos mantenerlo o resetearlo
 
+    # --- Ejecución de órdenes fuera del bucle de decisión (ver order_executor.py) ---
+
+    def _submit_order_intent(self, kind: str, priority: int, fn, *args, on_complete=None, **kwargs):
+        """
+        Lanza una operación de órdenes (colocar, cancelar...) en el ejecutor de órdenes. Con async_order_execution
+        se encola y on_complete(resultado, error) se aplica en el hilo del worker al inicio del siguiente run_once
+        (el worker se despierta en cuanto termina); sin él se ejecuta aquí mismo y on_complete se aplica en el acto.
+        """
+        executor = get_order_executor()
+        if not self.async_order_execution:
+            intent = executor.run_inline(self.symbol, kind, priority, fn, *args, **kwargs)
+            if on_complete is not None:
+                on_complete(intent.result, intent.error)
+            return
+        self._order_intents_in_flight[kind] = self._order_intents_in_flight.get(kind, 0) + 1
+        generation = self._order_intent_generation
+        executor.submit(self.symbol, kind, priority, fn, *args,
+                        callback=lambda intent: self._on_order_intent_done(intent, generation, on_complete), **kwargs)
+
+    def _on_order_intent_done(self, intent, generation: int, on_complete):
+        """Llamado desde el hilo del ejecutor: deja el resultado para run_once y despierta al worker."""
+        self._order_completions.append((intent, generation, on_complete))
+        self.wake_event.set()
+
+    def _order_intent_in_flight(self, kind: str) -> bool:
+        return self._order_intents_in_flight.get(kind, 0) > 0
+
+    def _process_order_completions(self):
+        """Aplica (en el hilo del worker) los resultados de las operaciones de órdenes ya terminadas."""
+        while self._order_completions:
+            intent, generation, on_complete = self._order_completions.popleft()
+            self._order_intents_in_flight[intent.kind] -= 1
+            if generation != self._order_intent_generation:
+                # El estado se reseteó mientras la operación estaba en vuelo: lo que haya colocado sobra
+                if intent.priority != PRIORITY_CANCEL:
+                    results = intent.result if isinstance(intent.result, list) else [intent.result]
+                    # La persecución devuelve {'action', 'order'}: sólo la orden nueva de un 'replaced' queda viva
+                    results = [r.get('order') if isinstance(r, dict) and r.get('action') == 'replaced' else r for r in results]
+                    self._cancel_orphan_orders([r for r in results if isinstance(r, dict)], f"'{intent.kind}' terminó tras resetear el estado")
+                continue
+            if on_complete is not None:
+                on_complete(intent.result, intent.error)
+
+    def _cancel_orphan_orders(self, order_results: list, reason: str):
+        """Cancela órdenes colocadas por una operación cuyo resultado ya no aplica."""
+        for order_result in order_results:
+            if order_result.get('orderId'):
+                self.logger.warning(f"[{self.symbol}] Cancelando la orden {order_result['orderId']} ({order_result.get('type')}): {reason}.")
+                self._submit_order_intent('cancel_orphan', PRIORITY_CANCEL, cancel_futures_order, self.symbol, order_result['orderId'])
+
+    # --- Conciliación de órdenes abiertas (ver reconciler.py) ---
+
+    def request_reconciliation(self, open_orders: list[dict], fetched_at: float, expected_before: set):
+        """
+        Llamado desde el hilo del conciliador: deja el barrido para aplicarlo al inicio del próximo run_once.
+        `expected_before` son las órdenes que el bot esperaba antes de pedir openOrders.
+        """
+        self._pending_reconciliation = (open_orders, fetched_at, expected_before)
+
+    def expected_open_order_ids(self) -> set:
+        """IDs de las órdenes que el bot cree abiertas (entrada, salida, TP, SL, trailing)."""
+        return {order_id for order_id in (self.pending_entry_order_id, self.pending_exit_order_id, self.pending_tp_order_id,
+                                          self.pending_sl_order_id, self.pending_trailing_order_id) if order_id}
+
+    def _order_confirmed_open(self, order_id) -> bool:
+        """
+        True si el último barrido vio la orden abierta y desde entonces el user-data stream no trajo fills suyos
+        ni su cancelación/expiración: no hace falta consultarla. Sin stream conectado (o con el libro de fills
+        pendiente de sincronizar) se consulta.
+        """
+        swept_ids, swept_at = self._swept_open_order_ids
+        if order_id not in swept_ids or time.time() - swept_at > ORDER_RECONCILE_TRUST_SECONDS:
+            return False
+        if not get_user_stream().connected or self.fills_ledger.needs_sync:
+            return False
+        return not self.fills_ledger.order_fills(order_id) and not self.fills_ledger.order_dead(order_id)
+
+    def _apply_reconciliation(self):
+        """Compara (en el hilo del worker) las órdenes abiertas del barrido con las que el bot espera y repara."""
+        open_orders, fetched_at, expected_before = self._pending_reconciliation
+        self._pending_reconciliation = None
+        if any(self._order_intents_in_flight.values()) or self._order_completions:
+            # Una colocación en vuelo aparecería como orden no esperada: se concilia en el próximo barrido
+            self.logger.debug(f"[{self.symbol}] Conciliación omitida: hay operaciones de órdenes en curso.")
+            return
+        open_ids = frozenset(order.get('orderId') for order in open_orders)
+        self._swept_open_order_ids = (open_ids, fetched_at)
+        expected_ids = self.expected_open_order_ids()
+
+        adoptable, orphans = [], []
+        for order in open_orders:
+            if order.get('orderId') in expected_ids:
+                continue
+            if is_long_protective_order(order) and self.in_position and self.current_state == BotState.IN_POSITION:
+                adoptable.append(order)
+            elif is_bot_order(order) or (is_long_protective_order(order) and not self.in_position):
+                orphans.append(order)
+        adopted = self._adopt_open_exit_orders(adoptable, source="en la conciliación") if adoptable else 0
+        adopted_ids = self.expected_open_order_ids() - expected_ids
+        # Las protecciones que no se adoptaron (hueco ya ocupado) sólo se cancelan si son del bot
+        orphans.extend(order for order in adoptable if order.get('orderId') not in adopted_ids and is_bot_order(order))
+        if orphans:
+            self._cancel_orphan_orders(orphans, "abierta en Binance pero el bot no la espera (conciliación)")
+
+        # Las que el bot espera y ya no están abiertas se resuelven en su consulta de estado de este ciclo
+        # (llenada -> cierre; cancelada/expirada -> se limpia el ID y la TP/SL se vuelve a colocar)
+        missing = (expected_ids & expected_before) - open_ids # Las colocadas después de pedir openOrders no cuentan
+        if missing:
+            self.logger.info(f"[{self.symbol}] Conciliación: órdenes esperadas que ya no están abiertas: {sorted(missing)}. Se verificará su estado.")
+        if adopted or orphans or missing:
+            self.logger.warning(f"[{self.symbol}] Conciliación de órdenes: {adopted} adoptadas, {len(orphans)} canceladas, {len(missing)} desaparecidas.")
+        get_order_reconciler().record_result(adopted=adopted, cancelled=len(orphans), missing=len(missing))
+
+    # --- Persecución de órdenes LIMIT (ver order_chaser.py) ---
+
+    def _client_order_id(self, intent: str, ref=None) -> str:
+        """
+        newClientOrderId de una nueva intención de orden. Se calcula una vez por intención y viaja con todos sus
+        reintentos (binance_client.submit_order_idempotent), así un timeout nunca deja una orden duplicada.
+        `ref` (vela de la señal, orden de entrada...) sólo sirve para rastrear la intención.
+        """
+        self._intent_seq += 1
+        return make_client_order_id(self.symbol, intent, f"{ref}:{self._intent_epoch_ms}:{self._intent_seq}")
+
+    def _new_order_chaser(self, kind: str, side: str, order: dict) -> OrderChaser:
+        """Crea el seguimiento de la orden recién colocada (métricas siempre; re-precio si enable_order_chasing)."""
+        self._finish_order_chaser(filled=False)
+        return OrderChaser(self.symbol, kind, side, order, post_only=self.order_post_only,
+                           max_distance_pct=self.order_chase_max_distance_pct, price_adjuster=self._adjust_price)
+
+    def _finish_order_chaser(self, filled: bool):
+        if self.order_chaser is not None:
+            self.order_chaser.finish(filled)
+            self.order_chaser = None
+
+    def _has_partial_fill(self, order_details: dict) -> bool:
+        """True si la orden (o las que reemplazó su persecución) tiene algo ejecutado."""
+        if self.order_chaser is not None:
+            order_details = self.order_chaser.combined_fill(order_details)
+        return Decimal(str(order_details.get('executedQty') or '0')) > Decimal('0')
+
+    def _pending_order_timed_out(self) -> bool:
+        return bool(self.order_timeout_seconds > 0 and self.pending_order_timestamp and
+                    (time.time() - self.pending_order_timestamp) > self.order_timeout_seconds)
+
+    def _chase_pending_order(self) -> bool:
+        """
+        Lanza el re-precio de la orden LIMIT pendiente hacia el mejor precio en el ejecutor de órdenes (cancel+new
+        son varias llamadas REST). True si el ciclo queda resuelto (re-precio lanzado o en curso); False si no
+        toca perseguir. El resultado se aplica en _on_chase_step_done.
+        """
+        chaser = self.order_chaser
+        if not self.enable_order_chasing or chaser is None:
+            return False
+        if self._order_intent_in_flight('chase'):
+            return True
+        if not chaser.due():
+            return False
+        priority = PRIORITY_ENTRY if chaser.kind == 'entry' else PRIORITY_PROTECTIVE
+        self._submit_order_intent('chase', priority, chaser.step, on_complete=partial(self._on_chase_step_done, chaser))
+        return True
+
+    def _on_chase_step_done(self, chaser: OrderChaser, result: dict | None, error: Exception | None):
+        """Resultado de OrderChaser.step() (en el hilo del worker)."""
+        if error is not None or not result:
+            self.logger.error(f"[{self.symbol}] Error re-preciando la orden {chaser.kind} {chaser.order_id}: {error}")
+            return
+        action = result['action']
+        if chaser is not self.order_chaser:
+            # La orden dejó de ser la pendiente mientras se re-preciaba: la que se haya colocado sobra
+            if action == 'replaced':
+                self._cancel_orphan_orders([result['order']], "re-precio de una orden que ya no está pendiente")
+            return
+        is_entry = chaser.kind == 'entry'
+        if action == 'filled':
+            if is_entry:
+                self._handle_filled_entry_order(result['order'])
+            else:
+                self._handle_filled_exit_order(result['order'])
+        elif action == 'replaced':
+            # El timeout sigue contando desde la colocación original (pending_order_timestamp no cambia)
+            if is_entry:
+                self.pending_entry_order_id = result['order']['orderId']
+            else:
+                self.pending_exit_order_id = result['order']['orderId']
+        elif action == 'gone':
+            self._reset_pending_order_state()
+            if is_entry:
+                self._update_state(BotState.IDLE)
+            else:
+                self._verify_position_status()
+
     def _update_open_position_pnl(self):
         """
         Actualiza el PnL no realizado, precio de entrada y cantidad de la posición abierta actual
@@ -1801,11 +2447,20 @@ class TradingBot:
         en el historial de Binance y registrarlo. Si no, registra un cierre con PNL 0.
         Devuelve True si la posición sigue abierta y se actualizó, False si la posición se cerró
         o hubo un error al obtener los datos.
+        Con enable_local_pnl, entre reconciliaciones el PnL se calcula con el mark price en vivo (pnl_engine.py)
+        sin consultar positionRisk.
         """
         if not self.in_position or not self.current_position: # self.current_position es clave
             self.logger.debug(f"[{self.symbol}] _update_open_position_pnl llamado pero no se está en posición o current_position es None. Saltando.")
             return True
 
+        if self.enable_local_pnl:
+            local_pnl = get_pnl_engine().unrealized_pnl(self.symbol)
+            if local_pnl is not None:
+                self.last_known_pnl, mark_price = local_pnl
+                self.logger.debug(f"[{self.symbol}] _update_open_position_pnl: PnL local {self.last_known_pnl:.4f} USDT (mark {mark_price}).")
+                return True
+
         self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Verificando posición abierta en Binance...")
         position_data = get_futures_position(self.symbol)
 
@@ -1892,53 +2547,35 @@ class TradingBot:
                 self.logger.info(f"[{self.symbol}] _update_open_position_pnl: effective_entry_time_for_search: {effective_entry_time_for_search}")
 
                 try:
-                    user_trades = get_user_trade_history(symbol=self.symbol, limit=15)
-                    # <<< DETAILED LOGGING FOR USER TRADES FETCHED >>>
-                    if user_trades:
-                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Fetched {len(user_trades)} user_trades from Binance history: {user_trades}")
-                    else:
-                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: No user_trades fetched from Binance history.")
-                    
+                    # Órdenes SELL ejecutadas desde la entrada, según el libro local de fills (sincronizado por fromId)
+                    self.fills_ledger.sync()
+                    since_ms = int(effective_entry_time_for_search.timestamp() * 1000)
+                    sell_summaries = self.fills_ledger.order_summaries_since(since_ms, side='SELL')
+                    self.logger.info(f"[{self.symbol}] _update_open_position_pnl: {len(sell_summaries)} órdenes SELL en el libro de fills desde la entrada.")
+
                     found_match = False
-                    if user_trades:
-                        for trade_idx, trade in enumerate(user_trades):
-                            # <<< DETAILED LOGGING FOR EACH TRADE IN HISTORY >>>
-                            self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Checking Binance trade history item {trade_idx}: {trade}")
-                            binance_trade_id_from_api = trade.get('id')
-                            trade_time_dt = pd.Timestamp(trade['time'], unit='ms', tz='UTC')
-                            trade_qty = Decimal(trade.get('qty', '0'))
-                            trade_price = Decimal(trade.get('price', '0'))
-                            trade_side = trade.get('side', '').upper()
-                            trade_realized_pnl = Decimal(trade.get('realizedPnl', '0'))
-
-                            if trade_side == 'SELL' and trade_time_dt >= effective_entry_time_for_search:
-                                quantity_diff_percent = (abs(trade_qty - old_quantity_from_bot) / old_quantity_from_bot) * 100 if old_quantity_from_bot else float('inf') # Handle old_quantity_from_bot being zero
-                                self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Binance trade {binance_trade_id_from_api} (SELL, Time: {trade_time_dt}, Qty: {trade_qty}, Price: {trade_price}, PnL: {trade_realized_pnl}) vs Bot Qty: {old_quantity_from_bot}. Qty Diff %: {quantity_diff_percent:.2f}%")
-                                
-                                if quantity_diff_percent < 5.0: # Original: 5.0
-                                    binance_trade_id_int = int(binance_trade_id_from_api) if binance_trade_id_from_api else None
-                                    db_trade_exists = check_if_binance_trade_exists(binance_trade_id=binance_trade_id_int)
-                                    self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Binance trade {binance_trade_id_int} meets qty diff. DB exists check: {db_trade_exists}")
-
-                                    if not db_trade_exists:
-                                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Trade de cierre ENCONTRADO y NO REGISTRADO: BinanceID={binance_trade_id_int}, PnL API={trade_realized_pnl}")
-                                        actual_close_price = trade_price
-                                        actual_pnl_usdt = trade_realized_pnl # <-- USAR PNL REALIZADO DE BINANCE
-                                        actual_close_timestamp = trade_time_dt
-                                        associated_binance_trade_id = binance_trade_id_int # <-- USAR EL ID DEL TRADE, NO DE LA ORDEN
-                                        db_reason_for_closure = f"Cierre Externo (Historial BinanceID {associated_binance_trade_id})"
-                                        found_match = True
-                                        break
-                                    else:
-                                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Trade de cierre {binance_trade_id_from_api} ya estaba registrado. Ignorando.")
+                    for summary in sell_summaries:
+                        trade_qty = summary['quantity']
+                        quantity_diff_percent = (abs(trade_qty - old_quantity_from_bot) / old_quantity_from_bot) * 100 if old_quantity_from_bot else float('inf') # Handle old_quantity_from_bot being zero
+                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Orden {summary['order_id']} (SELL, Qty: {trade_qty}, Precio medio: {summary['avg_price']}, PnL: {summary['realized_pnl']}) vs Bot Qty: {old_quantity_from_bot}. Qty Diff %: {quantity_diff_percent:.2f}%")
+                        if quantity_diff_percent >= 5.0:
+                            continue
+                        binance_trade_id_int = summary['last_trade_id']
+                        if check_if_binance_trade_exists(binance_trade_id=binance_trade_id_int):
+                            self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Trade de cierre {binance_trade_id_int} ya estaba registrado. Ignorando.")
+                            continue
+                        self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Trade de cierre ENCONTRADO y NO REGISTRADO: BinanceID={binance_trade_id_int}, PnL API={summary['realized_pnl']}")
+                        actual_close_price = summary['avg_price']
+                        actual_pnl_usdt = summary['realized_pnl'] # <-- USAR PNL REALIZADO DE BINANCE
+                        actual_close_timestamp = pd.Timestamp(summary['time_ms'], unit='ms', tz='UTC')
+                        associated_binance_trade_id = binance_trade_id_int # <-- USAR EL ID DEL TRADE, NO DE LA ORDEN
+                        db_reason_for_closure = f"Cierre Externo (Historial BinanceID {associated_binance_trade_id})"
+                        found_match = True
+                        break
                     if not found_match:
                         self.logger.warning(f"[{self.symbol}] _update_open_position_pnl: No se encontró trade de cierre no registrado en historial. Razón actual: '{db_reason_for_closure}' (se actualizará si era el default). PNL se calculará o será 0.")
                         if db_reason_for_closure == "Cierre Externo (Detectado PnL Update)":
                            db_reason_for_closure = "Cierre Externo (No hallado en historial reciente)"
-                        # Si no se encontró PNL de API, se usará el PNL de fallback (0.0 o calculado si es muy necesario)
-                        # actual_pnl_usdt ya está inicializado a 0.0 o se podría intentar calcular aquí si es muy necesario,
-                        # pero la lógica actual de _handle_successful_closure lo haría si aquí no se define.
-                        # Por simplicidad y consistencia con el flujo, si no hay match, el PNL vendrá del cálculo manual o será 0.
 
                 except Exception as e_hist:
                     self.logger.error(f"[{self.symbol}] _update_open_position_pnl: Error buscando historial: {e_hist}", exc_info=True)
@@ -1949,7 +2586,7 @@ class TradingBot:
                 # El PNL usado será el `actual_pnl_usdt` que fue o bien obtenido de la API o es el fallback 0.0
                 try:
                     self.logger.info(f"[{self.symbol}] _update_open_position_pnl (history search path): PRE-record_trade. Symbol: {self.symbol}, OpenTS: {effective_entry_time_for_search.to_pydatetime() if pd.notna(effective_entry_time_for_search) else None}, CloseTS: {actual_close_timestamp.to_pydatetime() if pd.notna(actual_close_timestamp) else None}, OpenPrice: {float(old_entry_price_from_bot)}, ClosePrice: {float(actual_close_price)}, Qty: {float(old_quantity_from_bot)}, PNL: {float(actual_pnl_usdt)}, Reason: '{db_reason_for_closure}', BinanceID: {associated_binance_trade_id}")
-                    record_trade(
+                    enqueue_trade(
                         symbol=self.symbol, trade_type='LONG',
                         open_timestamp=effective_entry_time_for_search.to_pydatetime() if pd.notna(effective_entry_time_for_search) else None,
                         close_timestamp=actual_close_timestamp.to_pydatetime() if pd.notna(actual_close_timestamp) else None,
@@ -1980,7 +2617,7 @@ class TradingBot:
                 try:
                     # <<< DETAILED LOGGING BEFORE record_trade CALL (FALLBACK PATH) >>>
                     self.logger.info(f"[{self.symbol}] _update_open_position_pnl (fallback path): PRE-record_trade. Symbol: {self.symbol}, OpenTS: {final_open_time.to_pydatetime() if pd.notna(final_open_time) else None}, CloseTS: {actual_close_timestamp.to_pydatetime() if pd.notna(actual_close_timestamp) else None}, OpenPrice: {float(final_open_price)}, ClosePrice: {float(final_open_price)}, Qty: {float(final_quantity)}, PNL: 0.0, Reason: '{db_reason_for_closure}', BinanceID: None")
-                    record_trade(
+                    enqueue_trade(
                         symbol=self.symbol, trade_type='LONG',
                         open_timestamp=final_open_time.to_pydatetime() if pd.notna(final_open_time) else None,
                         close_timestamp=actual_close_timestamp.to_pydatetime() if pd.notna(actual_close_timestamp) else None, # Tiempo actual
@@ -2008,17 +2645,21 @@ class TradingBot:
 
         # Si llegamos aquí, la posición sigue abierta y es LONG. Actualizar datos.
         self.last_known_pnl = unrealized_pnl_binance
+        if self.enable_local_pnl:
+            # Reconciliado: hasta la próxima reconciliación el PnL se calcula en local
+            get_pnl_engine().track(self.symbol, entry_price_binance, pos_amt_binance)
         
         if self.current_position['entry_price'] != entry_price_binance or self.current_position['quantity'] != pos_amt_binance:
             self.logger.info(f"[{self.symbol}] _update_open_position_pnl: Datos de posición actualizados desde Binance: "
                              f"Viejo EntryP: {self.current_position['entry_price']}, Nuevo: {entry_price_binance}. "
                              f"Vieja Cant: {self.current_position['quantity']}, Nueva: {pos_amt_binance}.")
-            self.current_position['entry_price'] = entry_price_binance
-            self.current_position['quantity'] = pos_amt_binance
-            self.current_position['positionAmt'] = pos_amt_binance # Asegurar que actualizamos esto también
-            self.current_position['position_size_usdt'] = abs(entry_price_binance * pos_amt_binance)
+            with self._exit_lock: # El monitor de ticks calcula el PnL con entry_price y quantity a la vez
+                self.current_position['entry_price'] = entry_price_binance
+                self.current_position['quantity'] = pos_amt_binance
+                self.current_position['positionAmt'] = pos_amt_binance # Asegurar que actualizamos esto también
+                self.current_position['position_size_usdt'] = abs(entry_price_binance * pos_amt_binance)
         
-        price_precision_log = self.price_tick_size.as_tuple().exponent * -1 if self.price_tick_size and self.price_tick_size.is_finite() and self.price_tick_size > Decimal('0') else 2
+        price_precision_log = self.price_precision_log
         self.logger.debug(f"[{self.symbol}] _update_open_position_pnl: PnL actualizado: {self.last_known_pnl:.4f} USDT, Entrada: {entry_price_binance:.{price_precision_log}f}, Cant: {pos_amt_binance}")
         return True
 
@@ -2106,7 +2747,7 @@ class TradingBot:
                                  f"PosSizeUSDT: {float(abs(old_entry_price * old_quantity))}, PNL: 0.0, Reason: '{db_reason}', "
                                  f"Params: {db_trade_params}, BinanceTradeID: None")
                 try:
-                    record_trade(
+                    enqueue_trade(
                         symbol=self.symbol, trade_type='LONG',
                         open_timestamp=final_open_timestamp_dt,
                         close_timestamp=final_close_timestamp_dt,
@@ -2172,31 +2813,49 @@ class TradingBot:
             return False
 
     # --- NUEVA FUNCIÓN AUXILIAR ---
-    def _cancel_active_tp_sl_orders(self):
-        """Cancels any pending TP or SL orders the bot is tracking."""
-        cancelled_any = False
-        if self.pending_tp_order_id:
-            self.logger.info(f"[{self.symbol}] Canceling pending TP order {self.pending_tp_order_id} due to alternative exit signal.")
-            try:
-                # Asegurarse de que la función de cancelación existe y se llama correctamente
-                cancel_futures_order(self.symbol, self.pending_tp_order_id)
-            except Exception as e:
-                self.logger.error(f"[{self.symbol}] Failed to cancel TP order {self.pending_tp_order_id}: {e}", exc_info=True)
-            self.pending_tp_order_id = None # Clear ID regardless of cancellation success
-            cancelled_any = True
+    def _cancel_active_tp_sl_orders(self, reason: str = "alternative exit signal", on_complete=None):
+        """
+        Cancels any pending TP or SL orders the bot is tracking (see _send_tp_sl_cancellations).
+        on_complete(result, error) runs once the cancellations have been sent (only if there was something to cancel).
+        """
+        active_orders = [(label, order_id) for label, order_id in (('TP', self.pending_tp_order_id), ('SL', self.pending_sl_order_id),
+                                                                   ('TRAILING', self.pending_trailing_order_id)) if order_id]
+        if not active_orders:
+            return False
 
-        if self.pending_sl_order_id:
-            self.logger.info(f"[{self.symbol}] Canceling pending SL order {self.pending_sl_order_id} due to alternative exit signal.")
-            try:
-                cancel_futures_order(self.symbol, self.pending_sl_order_id)
-            except Exception as e:
-                self.logger.error(f"[{self.symbol}] Failed to cancel SL order {self.pending_sl_order_id}: {e}", exc_info=True)
-            self.pending_sl_order_id = None # Clear ID
-            cancelled_any = True
-        
-        if cancelled_any:
-            self.logger.info(f"[{self.symbol}] Pending TP/SL orders cleared/attempted cancellation.")
-        return cancelled_any # Devuelve True si se intentó cancelar algo
+        for label, order_id in active_orders:
+            self.logger.info(f"[{self.symbol}] Canceling pending {label} order {order_id} due to {reason}.")
+
+        # Clear IDs regardless of cancellation success (before submitting: without async execution on_complete runs inline)
+        self.pending_tp_order_id = None
+        self.pending_sl_order_id = None
+        self.pending_trailing_order_id = None
+
+        # Cancellations go through the order executor at top priority
+        self._submit_order_intent('cancel_tp_sl', PRIORITY_CANCEL, self._send_tp_sl_cancellations, active_orders, on_complete=on_complete)
+        self.logger.info(f"[{self.symbol}] Pending TP/SL orders cleared/attempted cancellation.")
+        return True # Devuelve True si se intentó cancelar algo
+
+    def _send_tp_sl_cancellations(self, active_orders: list):
+        """
+        Sends the TP/SL/trailing cancellations (runs on an order executor thread).
+        When more than one order is active they are cancelled in a single batch request; if the batch call
+        fails we fall back to cancelling each order individually.
+        """
+        batch_results = None
+        if len(active_orders) > 1:
+            batch_results = cancel_futures_batch_orders(self.symbol, [order_id for _, order_id in active_orders])
+            if batch_results is None:
+                self.logger.warning(f"[{self.symbol}] Batch cancel of TP/SL/trailing failed. Falling back to individual cancellations.")
+
+        if batch_results is None:
+            for label, order_id in active_orders:
+                try:
+                    # Asegurarse de que la función de cancelación existe y se llama correctamente
+                    cancel_futures_order(self.symbol, order_id)
+                except Exception as e:
+                    self.logger.error(f"[{self.symbol}] Failed to cancel {label} order {order_id}: {e}", exc_info=True)
+        return batch_results
     # --- FIN NUEVA FUNCIÓN AUXILIAR ---
 
     # --- NUEVA FUNCIÓN para verificar velas alcistas REQUERIDAS ---
@@ -0,0 +1,217 @@
+# Sincronización del reloj local con el servidor de Binance Futures.
+# Un hilo en segundo plano mide periódicamente (GET /fapi/v1/time) el offset servidor-local y el RTT
+# al estilo NTP: offset = serverTime - punto medio del round-trip. Se guardan las últimas muestras y se
+# descartan las de RTT alto (la asimetría de red hace poco fiable su offset) y los offsets atípicos.
+# El offset estimado se usa para el timestamp de las peticiones firmadas (ClockSyncedUMFutures) y para
+# alinear el planificador con el cierre real de las velas.
+
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+from binance.um_futures import UMFutures
+from binance.error import ClientError
+
+from .logger_setup import get_logger
+
+CLOCK_SYNC_INTERVAL_SECONDS = float(os.environ.get('CLOCK_SYNC_INTERVAL_SECONDS', '60'))
+CLOCK_SYNC_BURST_SAMPLES = int(os.environ.get('CLOCK_SYNC_BURST_SAMPLES', '5'))
+CLOCK_SYNC_WINDOW = 16 # Muestras que se conservan para la estimación
+CLOCK_SYNC_MAD_THRESHOLD = 3.0 # Offsets a más de 3 MAD de la mediana se consideran atípicos
+TIMESTAMP_OUTSIDE_RECV_WINDOW = -1021 # Código de Binance para timestamps fuera de recvWindow
+
+
+class ClockSync:
+    """Estimador del offset (ms) entre el reloj local y el del servidor, con su RTT."""
+
+    def __init__(self, server_time_fn, interval_seconds: float = CLOCK_SYNC_INTERVAL_SECONDS):
+        self._server_time_fn = server_time_fn # Devuelve serverTime en ms (llamada sin firmar)
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=CLOCK_SYNC_WINDOW) # (offset_ms, rtt_ms, medido_en)
+        self._offset_ms = 0.0
+        self._rtt_ms = None
+        self._last_sync = None
+        self._failures = 0
+        self._rejected = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # --- Muestreo ---
+
+    def add_sample(self, server_time_ms: float, local_send_ms: float, local_recv_ms: float):
+        """Registra una medición y recalcula la estimación."""
+        rtt_ms = max(local_recv_ms - local_send_ms, 0.0)
+        offset_ms = server_time_ms - (local_send_ms + local_recv_ms) / 2.0
+        with self._lock:
+            self._samples.append((offset_ms, rtt_ms, time.time()))
+            self._recompute_locked()
+
+    def sample_once(self) -> bool:
+        """Hace una medición contra el servidor. False si falla."""
+        logger = get_logger()
+        try:
+            local_send_ms = time.time() * 1000.0
+            server_time_ms = float(self._server_time_fn())
+            local_recv_ms = time.time() * 1000.0
+        except Exception as e:
+            self._failures += 1
+            logger.warning(f"Sincronización de reloj: fallo al consultar la hora del servidor: {e}")
+            return False
+        self.add_sample(server_time_ms, local_send_ms, local_recv_ms)
+        return True
+
+    def sync_now(self, samples: int = CLOCK_SYNC_BURST_SAMPLES) -> bool:
+        """Ráfaga de mediciones (al arrancar o tras un error -1021)."""
+        ok = False
+        for _ in range(max(samples, 1)):
+            ok = self.sample_once() or ok
+        if ok:
+            metrics = self.metrics()
+            get_logger().info(f"Reloj sincronizado con el servidor: offset={metrics['offset_ms']:.1f}ms, RTT={metrics['rtt_ms']:.1f}ms ({metrics['samples']} muestras).")
+        return ok
+
+    def _recompute_locked(self):
+        samples = list(self._samples)
+        rtts = [rtt for _, rtt, _ in samples]
+        # 1. Filtro por RTT: quedarse con las muestras de RTT <= mediana (las más simétricas)
+        rtt_cutoff = statistics.median(rtts)
+        candidates = [s for s in samples if s[1] <= rtt_cutoff]
+        # 2. Filtro de offsets atípicos (mediana ± k·MAD)
+        offsets = [offset for offset, _, _ in candidates]
+        median_offset = statistics.median(offsets)
+        mad = statistics.median([abs(offset - median_offset) for offset in offsets])
+        if mad > 0:
+            kept = [s for s in candidates if abs(s[0] - median_offset) <= CLOCK_SYNC_MAD_THRESHOLD * mad]
+        else:
+            kept = candidates
+        self._rejected = len(samples) - len(kept)
+        self._offset_ms = statistics.median([offset for offset, _, _ in kept])
+        self._rtt_ms = min(rtt for _, rtt, _ in kept)
+        self._last_sync = time.time()
+
+    # --- Hora corregida ---
+
+    @property
+    def offset_ms(self) -> float:
+        return self._offset_ms
+
+    def now_ms(self) -> int:
+        """Hora del servidor estimada, en ms (para el parámetro timestamp de las peticiones firmadas)."""
+        return int(time.time() * 1000.0 + self._offset_ms)
+
+    def now(self) -> float:
+        """Hora del servidor estimada, en segundos (para alinear con el cierre de velas)."""
+        return time.time() + self._offset_ms / 1000.0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'synced': self._last_sync is not None,
+                'offset_ms': round(self._offset_ms, 3),
+                'rtt_ms': round(self._rtt_ms, 3) if self._rtt_ms is not None else None,
+                'samples': len(self._samples),
+                'rejected_samples': self._rejected,
+                'failures': self._failures,
+                'last_sync': self._last_sync,
+                'interval_seconds': self.interval_seconds,
+            }
+
+    # --- Hilo en segundo plano ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ClockSync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            self.sample_once()
+
+
+class ClockSyncedUMFutures(UMFutures):
+    """
+    UMFutures que firma con la hora del servidor estimada por ClockSync en lugar de la hora local.
+    Si aun así Binance responde -1021 (timestamp fuera de recvWindow), re-sincroniza y reintenta una vez.
+    """
+
+    def __init__(self, *args, clock: ClockSync | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clock = clock
+
+    def _timestamp(self) -> int:
+        return self.clock.now_ms() if self.clock else int(time.time() * 1000)
+
+    def _resync_after_timestamp_error(self, error: ClientError) -> bool:
+        if error.error_code != TIMESTAMP_OUTSIDE_RECV_WINDOW or not self.clock:
+            return False
+        get_logger().warning(f"Binance rechazó el timestamp (-1021). Re-sincronizando reloj y reintentando. Offset actual: {self.clock.offset_ms:.1f}ms")
+        self.clock.sync_now()
+        return True
+
+    def sign_request(self, http_method, url_path, payload=None, special=False):
+        if payload is None:
+            payload = {}
+        for attempt in range(2):
+            payload.pop('signature', None)
+            payload['timestamp'] = self._timestamp()
+            query_string = self._prepare_params(payload, special)
+            payload['signature'] = self._get_sign(query_string)
+            try:
+                return self.send_request(http_method, url_path, payload, special)
+            except ClientError as e:
+                if attempt == 1 or not self._resync_after_timestamp_error(e):
+                    raise
+
+    def limited_encoded_sign_request(self, http_method, url_path, payload=None):
+        if payload is None:
+            payload = {}
+        for attempt in range(2):
+            payload['timestamp'] = self._timestamp()
+            query_string = self._prepare_params(payload)
+            signed_path = url_path + "?" + query_string + "&signature=" + self._get_sign(query_string)
+            try:
+                return self.send_request(http_method, signed_path)
+            except ClientError as e:
+                if attempt == 1 or not self._resync_after_timestamp_error(e):
+                    raise
+
+
+_clock_sync = None
+
+
+def start_clock_sync(client) -> ClockSync:
+    """Crea (una vez) el ClockSync del proceso a partir de un cliente UMFutures y arranca su hilo."""
+    global _clock_sync
+    if _clock_sync is None:
+        _clock_sync = ClockSync(lambda: client.time()['serverTime'])
+    _clock_sync.start()
+    return _clock_sync
+
+
+def stop_clock_sync():
+    if _clock_sync is not None:
+        _clock_sync.stop()
+
+
+def get_clock_sync() -> ClockSync | None:
+    return _clock_sync
+
+
+def server_time() -> float:
+    """Hora del servidor estimada en segundos (hora local si el reloj aún no se sincronizó)."""
+    return _clock_sync.now() if _clock_sync is not None else time.time()
+
+
+def get_clock_metrics() -> dict:
+    if _clock_sync is None:
+        return {'synced': False, 'offset_ms': 0.0, 'rtt_ms': None, 'samples': 0, 'rejected_samples': 0,
+                'failures': 0, 'last_sync': None, 'interval_seconds': CLOCK_SYNC_INTERVAL_SECONDS}
+    return _clock_sync.metrics()
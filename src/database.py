@@ -1,16 +1,64 @@
 # Este módulo interactuará con la base de datos PostgreSQL.
 
 import psycopg2
+import psycopg2.extras
 import json
 from datetime import datetime
 import os
-from typing import Union, List, Dict
+import queue
+import threading
+import time
+import atexit
+import base64
+from datetime import timezone
+from typing import Union, List, Dict, Tuple
 
 # Importamos el logger
 from .logger_setup import get_logger
+from . import sqlite_storage
 
 # La URL de la base de datos se leerá desde las variables de entorno
 DATABASE_URL = os.environ.get('DATABASE_URL')
+# Backend de almacenamiento: 'postgres' (DATABASE_URL, por defecto) o 'sqlite' (archivo local, ver sqlite_storage.py).
+# SQLite sólo con DB_BACKEND=sqlite explícito: sin DATABASE_URL, PostgreSQL sigue fallando en vez de escribir
+# los trades en un archivo local sin que nadie se entere.
+DB_BACKEND = os.environ.get('DB_BACKEND', 'postgres').lower()
+
+def _use_sqlite() -> bool:
+    return DB_BACKEND == 'sqlite'
+
+# --- Cola de escritura asíncrona de trades ---
+# Los hilos de trading encolan el trade y siguen; un hilo escritor lo inserta en lotes.
+# Si la DB no está disponible, los trades se vuelcan a un archivo JSONL local y se reintentan después.
+TRADE_QUEUE_MAX_SIZE = int(os.environ.get('TRADE_QUEUE_MAX_SIZE', '1000'))
+TRADE_WRITE_BATCH_SIZE = int(os.environ.get('TRADE_WRITE_BATCH_SIZE', '50'))
+TRADE_SPILL_RETRY_SECONDS = float(os.environ.get('TRADE_SPILL_RETRY_SECONDS', '30'))
+TRADE_SPILL_FILE = os.environ.get('TRADE_SPILL_FILE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pending_trades.jsonl'))
+# Lo que está reintentando el hilo escritor se mueve aquí para no retener el lock del volcado durante los INSERT
+TRADE_SPILL_REPLAY_FILE = TRADE_SPILL_FILE + '.replay'
+# Trades que la DB rechaza una y otra vez estando disponible (fila "venenosa"): se apartan en vez de reintentarlos siempre
+TRADE_DEAD_LETTER_FILE = os.environ.get('TRADE_DEAD_LETTER_FILE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dead_trades.jsonl'))
+TRADE_SPILL_MAX_ATTEMPTS = int(os.environ.get('TRADE_SPILL_MAX_ATTEMPTS', '3'))
+
+TRADE_COLUMNS = ('symbol', 'trade_type', 'open_timestamp', 'close_timestamp',
+                 'open_price', 'close_price', 'quantity', 'position_size_usdt',
+                 'pnl_usdt', 'close_reason', 'parameters', 'binance_trade_id')
+
+_trade_write_queue = queue.Queue(maxsize=TRADE_QUEUE_MAX_SIZE)
+_trade_writer_thread = None
+_trade_writer_stop = threading.Event()
+_trade_writer_lock = threading.Lock()
+_spill_file_lock = threading.RLock()
+# binance_trade_id encolados o en el archivo de volcado que aún no llegaron a la DB
+_pending_binance_trade_ids = set()
+_pending_ids_lock = threading.Lock()
+
+# Callbacks avisados tras cada inserción exitosa (p.ej. analytics.py para actualizar sus agregados)
+_trade_listeners = []
+
+# --- Historial de trades paginado (keyset sobre (close_timestamp, id)) ---
+TRADE_HISTORY_DEFAULT_LIMIT = 50
+TRADE_HISTORY_MAX_LIMIT = 500
 
 def get_db_connection():
     """Establece una conexión con la base de datos PostgreSQL."""
@@ -33,6 +81,8 @@ def get_db_connection():
 
 def init_db_schema():
     """Inicializa el esquema de la base de datos si la tabla 'trades' no existe."""
+    if _use_sqlite():
+        return sqlite_storage.init_db_schema()
     logger = get_logger()
     conn = None
     try:
@@ -64,6 +114,9 @@ def init_db_schema():
             
             # Crear índice si no existe para búsquedas rápidas
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_binance_trade_id ON trades (binance_trade_id)")
+            # Índices compuestos para el historial paginado (por símbolo y global), en el mismo orden que las consultas
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_symbol_close_ts ON trades (symbol, close_timestamp DESC, id DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_close_ts_id ON trades (close_timestamp DESC, id DESC)")
             conn.commit()
             
         logger.info("Esquema de la base de datos PostgreSQL inicializado/verificado.")
@@ -84,6 +137,12 @@ def record_trade(symbol: str, trade_type: str, open_timestamp: datetime,
                  parameters: Union[dict, None] = None,
                  binance_trade_id: Union[int, None] = None):
     """Registra un trade en la base de datos PostgreSQL."""
+    if _use_sqlite():
+        sqlite_storage.record_trade(symbol, trade_type, open_timestamp, open_price, quantity, position_size_usdt,
+                                    close_timestamp, close_price, pnl_usdt, close_reason, parameters, binance_trade_id)
+        _notify_trade_listeners([_build_trade_row(symbol, trade_type, open_timestamp, open_price, quantity, position_size_usdt,
+                                                  close_timestamp, close_price, pnl_usdt, close_reason, parameters, binance_trade_id)])
+        return
     logger = get_logger()
     parameters_json = json.dumps(parameters) if parameters else None
 
@@ -106,6 +165,8 @@ def record_trade(symbol: str, trade_type: str, open_timestamp: datetime,
                                  pnl_usdt, close_reason, parameters_json, binance_trade_id))
             conn.commit()
         logger.info(f"Trade para {symbol} registrado en la DB PostgreSQL. Binance Trade ID: {binance_trade_id if binance_trade_id else 'N/A'}")
+        _notify_trade_listeners([_build_trade_row(symbol, trade_type, open_timestamp, open_price, quantity, position_size_usdt,
+                                                  close_timestamp, close_price, pnl_usdt, close_reason, parameters, binance_trade_id)])
     except psycopg2.IntegrityError as ie:
         logger.error(f"Error de integridad al registrar trade para {symbol} (Binance ID: {binance_trade_id}): {ie}. Es posible que este trade ya exista.", exc_info=True)
     except psycopg2.Error as e:
@@ -114,8 +175,322 @@ def record_trade(symbol: str, trade_type: str, open_timestamp: datetime,
         if conn:
             conn.close()
 
+def _serialize_trade_value(value):
+    """Convierte un valor a algo serializable en JSON (para la cola y el archivo de volcado)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float, str, bool)):
+        return value
+    return str(value) # Decimal, numpy, etc.
+
+def _build_trade_row(symbol, trade_type, open_timestamp, open_price, quantity, position_size_usdt,
+                     close_timestamp=None, close_price=None, pnl_usdt=None, close_reason=None,
+                     parameters=None, binance_trade_id=None) -> dict:
+    return {
+        'symbol': symbol,
+        'trade_type': trade_type,
+        'open_timestamp': _serialize_trade_value(open_timestamp),
+        'close_timestamp': _serialize_trade_value(close_timestamp),
+        'open_price': _serialize_trade_value(open_price),
+        'close_price': _serialize_trade_value(close_price),
+        'quantity': _serialize_trade_value(quantity),
+        'position_size_usdt': _serialize_trade_value(position_size_usdt),
+        'pnl_usdt': _serialize_trade_value(pnl_usdt),
+        'close_reason': close_reason,
+        'parameters': json.dumps(parameters, default=str) if parameters else None,
+        'binance_trade_id': int(binance_trade_id) if binance_trade_id is not None else None,
+    }
+
+def register_trade_listener(callback):
+    """Registra callback(rows) que se llama tras cada inserción exitosa de trades (desde el hilo que inserta)."""
+    if callback not in _trade_listeners:
+        _trade_listeners.append(callback)
+
+def _notify_trade_listeners(rows: List[Dict]):
+    for callback in list(_trade_listeners):
+        try:
+            callback(rows)
+        except Exception as e:
+            get_logger().error(f"Error en listener de trades {callback}: {e}", exc_info=True)
+
+def _insert_trade_rows(rows: List[Dict]) -> bool:
+    """
+    Inserta un lote de trades (y avisa a los listeners si quedó persistido).
+    Devuelve True si el lote quedó persistido.
+    """
+    inserted = sqlite_storage.insert_trade_rows(rows) if _use_sqlite() else _insert_trade_rows_postgres(rows)
+    if inserted and rows:
+        _notify_trade_listeners(rows)
+    return inserted
+
+def _insert_trade_rows_postgres(rows: List[Dict]) -> bool:
+    """
+    Inserta un lote de trades con una sola sentencia (execute_values).
+    ON CONFLICT sobre binance_trade_id hace que reintentar un lote ya insertado sea inocuo.
+    """
+    logger = get_logger()
+    if not rows:
+        return True
+    conn = None
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        with conn.cursor() as cursor:
+            sql = f"""
+            INSERT INTO trades ({', '.join(TRADE_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (binance_trade_id) DO NOTHING
+            """
+            values = [tuple(row.get(column) for column in TRADE_COLUMNS) for row in rows]
+            psycopg2.extras.execute_values(cursor, sql, values, page_size=TRADE_WRITE_BATCH_SIZE)
+            conn.commit()
+        logger.info(f"Lote de {len(rows)} trade(s) registrado en la DB PostgreSQL.")
+        return True
+    except (psycopg2.Error, ValueError) as e:
+        logger.error(f"Error de PostgreSQL al registrar lote de {len(rows)} trade(s): {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+def _mark_rows_persisted(rows: List[Dict]):
+    with _pending_ids_lock:
+        for row in rows:
+            if row.get('binance_trade_id') is not None:
+                _pending_binance_trade_ids.discard(row['binance_trade_id'])
+
+def _append_rows_to_file(path: str, rows: List[Dict]):
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def _spill_trade_rows(rows: List[Dict]):
+    """Añade trades al archivo de volcado local (una línea JSON por trade) para reintentarlos más tarde."""
+    logger = get_logger()
+    try:
+        with _spill_file_lock:
+            _append_rows_to_file(TRADE_SPILL_FILE, rows)
+        logger.warning(f"{len(rows)} trade(s) volcados a {TRADE_SPILL_FILE} (DB no disponible o cola llena).")
+    except OSError as e:
+        logger.critical(f"Error CRÍTICO al volcar {len(rows)} trade(s) a {TRADE_SPILL_FILE}: {e}. Trades perdidos: {rows}")
+
+def _read_rows_file(path: str) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    get_logger().error(f"Línea inválida en {path} ignorada: {line[:200]}")
+    return rows
+
+def _load_spilled_rows() -> List[Dict]:
+    """Trades pendientes: los del archivo de volcado más los de un reintento que no llegó a terminar."""
+    with _spill_file_lock:
+        return _read_rows_file(TRADE_SPILL_REPLAY_FILE) + _read_rows_file(TRADE_SPILL_FILE)
+
+def _has_spilled_rows() -> bool:
+    return os.path.exists(TRADE_SPILL_FILE) or os.path.exists(TRADE_SPILL_REPLAY_FILE)
+
+def _claim_spilled_rows() -> List[Dict]:
+    """
+    Mueve el archivo de volcado al de reintento y devuelve sus filas. El lock sólo se toma para el rename:
+    enqueue_trade puede seguir volcando (a un archivo nuevo) mientras el hilo escritor inserta.
+    """
+    with _spill_file_lock:
+        if os.path.exists(TRADE_SPILL_FILE):
+            if os.path.exists(TRADE_SPILL_REPLAY_FILE):
+                # Un reintento anterior se interrumpió (caída del proceso): se juntan ambos
+                _append_rows_to_file(TRADE_SPILL_REPLAY_FILE, _read_rows_file(TRADE_SPILL_FILE))
+                os.remove(TRADE_SPILL_FILE)
+            else:
+                os.replace(TRADE_SPILL_FILE, TRADE_SPILL_REPLAY_FILE)
+    return _read_rows_file(TRADE_SPILL_REPLAY_FILE)
+
+def _db_reachable() -> bool:
+    """True si se puede abrir conexión con la DB (para distinguir una caída de una fila que la DB rechaza)."""
+    if _use_sqlite():
+        return sqlite_storage.get_db_connection() is not None
+    try:
+        conn = get_db_connection()
+    except Exception as e: # ValueError sin DATABASE_URL: no hay DB a la que llegar
+        get_logger().error(f"No se pudo comprobar la conexión con la DB: {e}")
+        return False
+    if conn is None:
+        return False
+    conn.close()
+    return True
+
+def _dead_letter_trade_rows(rows: List[Dict]):
+    logger = get_logger()
+    try:
+        _append_rows_to_file(TRADE_DEAD_LETTER_FILE, rows)
+        logger.critical(f"{len(rows)} trade(s) rechazados por la DB tras {TRADE_SPILL_MAX_ATTEMPTS} intentos; apartados en {TRADE_DEAD_LETTER_FILE}.")
+    except OSError as e:
+        logger.critical(f"Error CRÍTICO al apartar {len(rows)} trade(s) en {TRADE_DEAD_LETTER_FILE}: {e}. Trades perdidos: {rows}")
+
+def _replay_spilled_trades() -> bool:
+    """Intenta insertar los trades del archivo de volcado. Lo que no entra vuelve al archivo (o a dead-letter)."""
+    logger = get_logger()
+    rows = _claim_spilled_rows()
+    if not rows:
+        if os.path.exists(TRADE_SPILL_REPLAY_FILE):
+            os.remove(TRADE_SPILL_REPLAY_FILE)
+        return True
+    logger.info(f"Reintentando {len(rows)} trade(s) pendientes de {TRADE_SPILL_FILE}...")
+    persisted, failed_batches = [], []
+    for start in range(0, len(rows), TRADE_WRITE_BATCH_SIZE):
+        batch = rows[start:start + TRADE_WRITE_BATCH_SIZE]
+        if _insert_trade_rows(batch):
+            persisted.extend(batch)
+        else:
+            failed_batches.append(batch)
+
+    retry, dead = [], []
+    if failed_batches and (persisted or _db_reachable()):
+        # La DB responde: insertar fila a fila para aislar las que rechaza y contarles el intento
+        for row in (row for batch in failed_batches for row in batch):
+            if _insert_trade_rows([row]):
+                persisted.append(row)
+                continue
+            row['_replay_attempts'] = row.get('_replay_attempts', 0) + 1
+            (dead if row['_replay_attempts'] >= TRADE_SPILL_MAX_ATTEMPTS else retry).append(row)
+    else:
+        # DB caída: no cuenta como intento, todo vuelve al volcado tal cual
+        retry = [row for batch in failed_batches for row in batch]
+
+    _mark_rows_persisted(persisted)
+    if dead:
+        _dead_letter_trade_rows(dead)
+        _mark_rows_persisted(dead)
+    with _spill_file_lock:
+        if retry:
+            _append_rows_to_file(TRADE_SPILL_FILE, retry)
+        os.remove(TRADE_SPILL_REPLAY_FILE)
+    if retry:
+        logger.warning(f"{len(retry)} trade(s) de {TRADE_SPILL_FILE} siguen pendientes; se reintentarán en {TRADE_SPILL_RETRY_SECONDS:.0f}s.")
+        return False
+    logger.info(f"Trades pendientes de {TRADE_SPILL_FILE} registrados en la DB.")
+    return True
+
+def _trade_writer_loop():
+    """Hilo escritor: agrupa los trades encolados y los inserta por lotes; vuelca a disco si la DB falla."""
+    logger = get_logger()
+    logger.info("Hilo escritor de trades iniciado.")
+    last_spill_attempt = 0.0
+    while not (_trade_writer_stop.is_set() and _trade_write_queue.empty()):
+        try:
+            batch = [_trade_write_queue.get(timeout=1.0)]
+        except queue.Empty:
+            batch = []
+        while batch and len(batch) < TRADE_WRITE_BATCH_SIZE:
+            try:
+                batch.append(_trade_write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Un error inesperado no puede terminar el hilo: los trades siguientes se quedarían en la cola para siempre
+        if batch:
+            try:
+                inserted = _insert_trade_rows(batch)
+            except Exception as e:
+                logger.error(f"Error inesperado al registrar un lote de {len(batch)} trade(s): {e}", exc_info=True)
+                inserted = False
+            if inserted:
+                _mark_rows_persisted(batch)
+            else:
+                _spill_trade_rows(batch)
+                last_spill_attempt = time.time()
+            for _ in batch:
+                _trade_write_queue.task_done()
+        elif _has_spilled_rows() and time.time() - last_spill_attempt >= TRADE_SPILL_RETRY_SECONDS:
+            last_spill_attempt = time.time()
+            try:
+                _replay_spilled_trades()
+            except Exception as e:
+                # Lo reclamado queda en el archivo de reintento y se junta con el volcado en el próximo intento
+                logger.error(f"Error inesperado al reintentar los trades de {TRADE_SPILL_FILE}: {e}", exc_info=True)
+    logger.info("Hilo escritor de trades detenido.")
+
+def start_trade_writer():
+    """Arranca (una sola vez) el hilo escritor de trades y registra los IDs que quedaron en el archivo de volcado."""
+    global _trade_writer_thread
+    with _trade_writer_lock:
+        if _trade_writer_thread and _trade_writer_thread.is_alive():
+            return _trade_writer_thread
+        with _pending_ids_lock:
+            for row in _load_spilled_rows():
+                if row.get('binance_trade_id') is not None:
+                    _pending_binance_trade_ids.add(row['binance_trade_id'])
+        _trade_writer_stop.clear()
+        _trade_writer_thread = threading.Thread(target=_trade_writer_loop, name="TradeWriter", daemon=True)
+        _trade_writer_thread.start()
+        return _trade_writer_thread
+
+def stop_trade_writer(timeout: float = 10.0):
+    """Detiene el hilo escritor después de vaciar la cola. Lo que no se pudo escribir queda en el archivo de volcado."""
+    global _trade_writer_thread
+    with _trade_writer_lock:
+        if not _trade_writer_thread:
+            return
+        _trade_writer_stop.set()
+        _trade_writer_thread.join(timeout)
+        if _trade_writer_thread.is_alive():
+            get_logger().warning(f"El hilo escritor de trades no terminó en {timeout}s.")
+        _trade_writer_thread = None
+
+def flush_trade_queue(timeout: float = 10.0) -> bool:
+    """Espera hasta que todos los trades encolados hayan sido procesados (insertados o volcados)."""
+    deadline = time.time() + timeout
+    while _trade_write_queue.unfinished_tasks > 0:
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+def enqueue_trade(symbol: str, trade_type: str, open_timestamp: datetime,
+                  open_price: float, quantity: float, position_size_usdt: float,
+                  close_timestamp: Union[datetime, None] = None,
+                  close_price: Union[float, None] = None,
+                  pnl_usdt: Union[float, None] = None,
+                  close_reason: Union[str, None] = None,
+                  parameters: Union[dict, None] = None,
+                  binance_trade_id: Union[int, None] = None) -> bool:
+    """
+    Versión no bloqueante de record_trade para los hilos de trading (mismos argumentos).
+    El trade se encola y lo persiste el hilo escritor; si la cola está llena se vuelca
+    directamente al archivo local. Nunca espera a la DB.
+    """
+    row = _build_trade_row(symbol, trade_type, open_timestamp, open_price, quantity, position_size_usdt,
+                           close_timestamp, close_price, pnl_usdt, close_reason, parameters, binance_trade_id)
+    if row['binance_trade_id'] is not None:
+        with _pending_ids_lock:
+            _pending_binance_trade_ids.add(row['binance_trade_id'])
+
+    start_trade_writer()
+    try:
+        _trade_write_queue.put_nowait(row)
+        get_logger().debug(f"Trade para {symbol} encolado para registro en DB. Binance Trade ID: {binance_trade_id if binance_trade_id else 'N/A'}")
+    except queue.Full:
+        get_logger().warning(f"Cola de escritura de trades llena ({TRADE_QUEUE_MAX_SIZE}). Volcando trade de {symbol} al archivo local.")
+        _spill_trade_rows([row])
+    return True
+
+atexit.register(stop_trade_writer)
+
 def get_cumulative_pnl_by_symbol() -> Dict[str, float]:
     """Calcula el PnL acumulado para cada símbolo desde PostgreSQL."""
+    if _use_sqlite():
+        return sqlite_storage.get_cumulative_pnl_by_symbol()
     logger = get_logger()
     conn = None
     cumulative_pnl = {}
@@ -146,6 +521,8 @@ def get_cumulative_pnl_by_symbol() -> Dict[str, float]:
 
 def get_last_n_trades_for_symbol(symbol: str, n: int = 10) -> List[Dict]:
     """Recupera los últimos N trades cerrados para un símbolo desde PostgreSQL."""
+    if _use_sqlite():
+        return sqlite_storage.get_last_n_trades_for_symbol(symbol, n)
     logger = get_logger()
     conn = None
     trades = []
@@ -161,7 +538,7 @@ def get_last_n_trades_for_symbol(symbol: str, n: int = 10) -> List[Dict]:
                    pnl_usdt, close_reason, parameters
             FROM trades
             WHERE symbol = %s
-            ORDER BY close_timestamp DESC
+            ORDER BY close_timestamp DESC, id DESC
             LIMIT %s
             """
             cursor.execute(query, (symbol.upper(), n))
@@ -176,10 +553,143 @@ def get_last_n_trades_for_symbol(symbol: str, n: int = 10) -> List[Dict]:
             
     return trades
 
+def encode_trade_cursor(close_timestamp, trade_id: int) -> str:
+    """Cursor opaco (base64 URL-safe) que apunta a la última fila devuelta: (close_timestamp, id)."""
+    ts_str = close_timestamp.isoformat() if isinstance(close_timestamp, datetime) else str(close_timestamp)
+    raw = json.dumps([ts_str, int(trade_id)], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_trade_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverso de encode_trade_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts_str, trade_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(ts_str), int(trade_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+def _to_naive_utc(value: Union[datetime, None]) -> Union[datetime, None]:
+    """La columna TIMESTAMP de PostgreSQL no guarda zona horaria: comparar siempre en UTC sin tz."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def get_trades_page(symbols: Union[List[str], None] = None,
+                    start: Union[datetime, None] = None,
+                    end: Union[datetime, None] = None,
+                    cursor: Union[str, None] = None,
+                    limit: int = TRADE_HISTORY_DEFAULT_LIMIT) -> Tuple[List[Dict], Union[str, None]]:
+    """
+    Página de trades cerrados, del más reciente al más antiguo (close_timestamp DESC, id DESC).
+    Paginación keyset: `cursor` es el next_cursor de la página anterior, así que el coste de cada página
+    no depende de lo profundo que esté en el historial. `start` incluido, `end` excluido.
+    Devuelve (trades, next_cursor); next_cursor es None cuando no hay más filas.
+    Lanza ValueError si el cursor no es válido.
+    """
+    limit = max(1, min(int(limit), TRADE_HISTORY_MAX_LIMIT))
+    symbols = [s.strip().upper() for s in symbols if s and s.strip()] if symbols else None
+    cursor_values = decode_trade_cursor(cursor) if cursor else None
+    if _use_sqlite():
+        rows = sqlite_storage.get_trades_page(symbols, start, end, cursor_values, limit + 1)
+    else:
+        rows = _get_trades_page_postgres(symbols, start, end, cursor_values, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_trade_cursor(rows[-1]['close_timestamp'], rows[-1]['id'])
+    return rows, next_cursor
+
+def _get_trades_page_postgres(symbols, start, end, cursor_values, fetch_limit: int) -> List[Dict]:
+    logger = get_logger()
+    conditions = ["close_timestamp IS NOT NULL"]
+    params = []
+    if start is not None:
+        conditions.append("close_timestamp >= %s")
+        params.append(_to_naive_utc(start))
+    if end is not None:
+        conditions.append("close_timestamp < %s")
+        params.append(_to_naive_utc(end))
+    if cursor_values:
+        conditions.append("(close_timestamp, id) < (%s, %s)")
+        params.extend([datetime.fromisoformat(cursor_values[0]), cursor_values[1]])
+    select_sql = """
+    SELECT id, symbol, trade_type, open_timestamp, close_timestamp,
+           open_price, close_price, quantity, position_size_usdt,
+           pnl_usdt, close_reason, parameters, binance_trade_id
+    FROM trades
+    """
+    order_by = "ORDER BY close_timestamp DESC, id DESC LIMIT %s"
+    if not symbols:
+        query = f"{select_sql} WHERE {' AND '.join(conditions)} {order_by}"
+        params.append(fetch_limit)
+    else:
+        # Una rama por símbolo sobre idx_trades_symbol_close_ts, cada una limitada a fetch_limit filas
+        arm = f"({select_sql} WHERE symbol = %s AND {' AND '.join(conditions)} {order_by})"
+        query = f"SELECT * FROM ({' UNION ALL '.join(arm for _ in symbols)}) AS page {order_by}"
+        arm_params = params
+        params = []
+        for symbol in symbols:
+            params.extend([symbol, *arm_params, fetch_limit])
+        params.append(fetch_limit)
+
+    conn = None
+    trades = []
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return trades
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            trades = [dict(row) for row in cursor.fetchall()]
+    except psycopg2.Error as e:
+        logger.error(f"Error de PostgreSQL al obtener historial de trades paginado: {e}", exc_info=True)
+    finally:
+        if conn:
+            conn.close()
+    return trades
+
+def get_closed_trades_after_id(after_id: int = 0, limit: int = 5000) -> List[Dict]:
+    """
+    Trades cerrados con id > after_id en orden de id (lectura incremental por clave primaria).
+    Solo las columnas que usa analytics.py.
+    """
+    if _use_sqlite():
+        return sqlite_storage.get_closed_trades_after_id(after_id, limit)
+    logger = get_logger()
+    conn = None
+    trades = []
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return trades
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute("""
+            SELECT id, symbol, open_timestamp, close_timestamp, pnl_usdt, close_reason, parameters
+            FROM trades
+            WHERE id > %s AND close_timestamp IS NOT NULL
+            ORDER BY id
+            LIMIT %s
+            """, (int(after_id), int(limit)))
+            trades = [dict(row) for row in cursor.fetchall()]
+    except psycopg2.Error as e:
+        logger.error(f"Error de PostgreSQL al leer trades nuevos (id > {after_id}): {e}", exc_info=True)
+    finally:
+        if conn:
+            conn.close()
+    return trades
+
 def check_if_binance_trade_exists(binance_trade_id: Union[int, None]) -> bool:
     """Verifica si un trade con el binance_trade_id ya existe en PostgreSQL."""
     if binance_trade_id is None:
         return False
+
+    # Los trades encolados o volcados a disco todavía no están en la tabla, pero ya están registrados
+    with _pending_ids_lock:
+        if int(binance_trade_id) in _pending_binance_trade_ids:
+            return True
+
+    if _use_sqlite():
+        return sqlite_storage.check_if_binance_trade_exists(binance_trade_id)
         
     logger = get_logger()
     conn = None
@@ -202,6 +712,8 @@ def check_if_binance_trade_exists(binance_trade_id: Union[int, None]) -> bool:
 
 def get_trade_by_binance_id(binance_trade_id: Union[int, None]) -> Union[Dict, None]:
     """Recupera un trade por su binance_trade_id desde PostgreSQL."""
+    if _use_sqlite():
+        return sqlite_storage.get_trade_by_binance_id(binance_trade_id)
     if binance_trade_id is None:
         return None
 
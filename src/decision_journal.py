@@ -0,0 +1,269 @@
+# Diario binario de decisiones de entrada.
+# El único rastro de por qué un símbolo entró o no eran logs INFO en texto libre ("CONDICIÓN DE VOLUMEN NO
+# CUMPLIDA", ...): caros de escribir en cada ciclo e imposibles de consultar a escala. Aquí cada evaluación de
+# entrada de run_once deja UN registro de tamaño fijo (RECORD_SIZE bytes) con RSI, delta de RSI, ratio de
+# volumen, delta de OI, qué condiciones se evaluaron y cuáles pasaron, y la acción tomada. Los registros van a
+# un fichero circular mapeado en memoria (mmap): escribir es un struct.pack_into, sin formateo de texto ni E/S
+# explícita, y los más antiguos se sobrescriben al llenarse. query() y summarize() leen el mismo fichero.
+
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .logger_setup import get_logger
+
+DECISION_JOURNAL_PATH = os.environ.get('DECISION_JOURNAL_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'decision_journal.bin'))
+DECISION_JOURNAL_RECORDS = int(os.environ.get('DECISION_JOURNAL_RECORDS', '200000')) # Capacidad del anillo; 0 desactiva el diario
+DECISION_QUERY_MAX_LIMIT = 5000
+
+# Condiciones (bits de las máscaras 'evaluated' y 'passed')
+COND_DOWNTREND_LEVELS = 1 << 0 # Pasa = no hay bloqueo por niveles bajistas
+COND_DOWNTREND_CANDLES = 1 << 1 # Pasa = no hay bloqueo por velas bajistas consecutivas
+COND_RSI_RANGE = 1 << 2
+COND_RSI_DELTA = 1 << 3
+COND_VOLUME = 1 << 4
+COND_UPTREND = 1 << 5
+COND_OI_INCREASE = 1 << 6
+
+CONDITION_NAMES = {
+    COND_DOWNTREND_LEVELS: 'downtrend_levels',
+    COND_DOWNTREND_CANDLES: 'downtrend_candles',
+    COND_RSI_RANGE: 'rsi_range',
+    COND_RSI_DELTA: 'rsi_delta',
+    COND_VOLUME: 'volume',
+    COND_UPTREND: 'uptrend',
+    COND_OI_INCREASE: 'oi_increase',
+}
+
+# Acción tomada al final de la evaluación
+ACTION_NO_SIGNAL = 0
+ACTION_ENTRY_SUBMITTED = 1
+ACTION_BLOCKED_DOWNTREND = 2
+ACTION_NO_RSI = 3
+ACTION_NO_PRICE = 4
+ACTION_INVALID_QUANTITY = 5
+ACTION_FILTER_REJECTED = 6
+
+ACTION_NAMES = {
+    ACTION_NO_SIGNAL: 'no_signal',
+    ACTION_ENTRY_SUBMITTED: 'entry_submitted',
+    ACTION_BLOCKED_DOWNTREND: 'blocked_downtrend',
+    ACTION_NO_RSI: 'no_rsi',
+    ACTION_NO_PRICE: 'no_price',
+    ACTION_INVALID_QUANTITY: 'invalid_quantity',
+    ACTION_FILTER_REJECTED: 'filter_rejected',
+}
+
+# Registro: símbolo, time (ms), apertura de la vela (ms), precio, rsi, delta rsi, ratio volumen, delta OI (NaN = sin
+# dato), máscara evaluadas, máscara cumplidas, acción. 80 bytes, little-endian.
+_RECORD = struct.Struct('<16sqqdddddHHB3x')
+RECORD_SIZE = _RECORD.size
+# Cabecera: magic, tamaño de registro, capacidad, registros escritos en total (el siguiente va en written % capacity)
+_HEADER = struct.Struct('<8sIIQ')
+_HEADER_SIZE = 64
+_MAGIC = b'BLDJRNL1'
+_NAN = float('nan')
+
+
+class DecisionTrace:
+    """Valores de una evaluación en curso. Cada bot reutiliza la suya: reset() al empezar cada evaluación."""
+
+    __slots__ = ('symbol', 'candle_open_ms', 'price', 'rsi', 'rsi_delta', 'volume_ratio', 'oi_delta', 'evaluated', 'passed')
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper().encode()[:16]
+        self.reset()
+
+    def reset(self, candle_open_ms: int = 0, price: float = _NAN):
+        self.candle_open_ms = candle_open_ms
+        self.price = price
+        self.rsi = _NAN
+        self.rsi_delta = _NAN
+        self.volume_ratio = _NAN
+        self.oi_delta = _NAN
+        self.evaluated = 0
+        self.passed = 0
+
+    def condition(self, flag: int, evaluated: bool, passed: bool):
+        """Anota una condición: si estaba activa en la configuración y si se cumplió (o se dio por cumplida)."""
+        if evaluated:
+            self.evaluated |= flag
+        if passed:
+            self.passed |= flag
+
+
+def _optional(value: float):
+    return None if math.isnan(value) else value
+
+
+class DecisionJournal:
+    """Anillo de registros de decisión en un fichero mapeado en memoria, compartido por todos los bots."""
+
+    def __init__(self, path: str = DECISION_JOURNAL_PATH, capacity: int = DECISION_JOURNAL_RECORDS):
+        self.path = path
+        self.capacity = max(0, capacity)
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        self._written = 0
+        if self.capacity:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self._mm is not None
+
+    def _open(self):
+        size = _HEADER_SIZE + self.capacity * RECORD_SIZE
+        try:
+            exists = os.path.exists(self.path) and os.path.getsize(self.path) == size
+            self._file = open(self.path, 'r+b' if exists else 'w+b')
+            if not exists:
+                self._file.truncate(size)
+            self._mm = mmap.mmap(self._file.fileno(), size)
+        except OSError as e:
+            get_logger().error(f"No se pudo abrir el diario de decisiones '{self.path}': {e}. Diario desactivado.")
+            self.close()
+            return
+        magic, record_size, capacity, written = _HEADER.unpack_from(self._mm, 0)
+        if magic == _MAGIC and record_size == RECORD_SIZE and capacity == self.capacity:
+            self._written = written # Continuar el anillo de la ejecución anterior
+        else:
+            self._written = 0
+            _HEADER.pack_into(self._mm, 0, _MAGIC, RECORD_SIZE, self.capacity, 0)
+        get_logger().info(f"Diario de decisiones en '{self.path}' ({self.capacity} registros, {self._written} escritos).")
+
+    def append(self, trace: DecisionTrace, action: int):
+        """Escribe el registro de una evaluación (sin formatear texto ni hacer E/S: sólo memoria mapeada)."""
+        if self._mm is None:
+            return
+        with self._lock:
+            if self._mm is None:
+                return
+            now_ms = int(time.time() * 1000) # Dentro del lock: el anillo queda en orden de tiempo (query corta por since_ms)
+            offset = _HEADER_SIZE + (self._written % self.capacity) * RECORD_SIZE
+            _RECORD.pack_into(self._mm, offset, trace.symbol, now_ms, trace.candle_open_ms, trace.price,
+                              trace.rsi, trace.rsi_delta, trace.volume_ratio, trace.oi_delta,
+                              trace.evaluated, trace.passed, action)
+            self._written += 1
+            _HEADER.pack_into(self._mm, 0, _MAGIC, RECORD_SIZE, self.capacity, self._written)
+
+    def _iter_newest_first(self):
+        """Registros crudos del más reciente al más antiguo. Llamar con self._lock tomado."""
+        oldest = max(0, self._written - self.capacity)
+        for index in range(self._written - 1, oldest - 1, -1):
+            yield _RECORD.unpack_from(self._mm, _HEADER_SIZE + (index % self.capacity) * RECORD_SIZE)
+
+    @staticmethod
+    def _matches(raw: tuple, symbol: bytes | None, until_ms: int | None, action: int | None, failed: int | None) -> bool:
+        """Filtros de query()/summarize(); since_ms no hace falta aquí, corta el recorrido en el llamador."""
+        if symbol is not None and raw[0].rstrip(b'\0') != symbol:
+            return False
+        if until_ms is not None and raw[1] >= until_ms:
+            return False
+        if action is not None and raw[10] != action:
+            return False
+        if failed is not None and not (raw[8] & failed and not raw[9] & failed):
+            return False
+        return True
+
+    def query(self, symbol: str | None = None, since_ms: int | None = None, until_ms: int | None = None,
+              action: int | None = None, failed: int | None = None, limit: int = 500) -> list[dict]:
+        """
+        Registros del más reciente al más antiguo. failed = bit COND_* de una condición evaluada que NO se cumplió.
+        since_ms incluido, until_ms excluido.
+        """
+        if self._mm is None:
+            return []
+        symbol_key = symbol.upper().encode()[:16] if symbol else None
+        records = []
+        with self._lock:
+            for raw in self._iter_newest_first():
+                if since_ms is not None and raw[1] < since_ms:
+                    break # El anillo está en orden de escritura: lo que queda es más antiguo
+                if self._matches(raw, symbol_key, until_ms, action, failed):
+                    records.append(raw)
+                    if len(records) >= limit:
+                        break
+        return [self._to_dict(raw) for raw in records]
+
+    def summarize(self, symbol: str | None = None, since_ms: int | None = None, until_ms: int | None = None) -> dict:
+        """Evaluaciones, acciones y fallos por condición (cuántas veces bloqueó cada una) en la ventana pedida."""
+        symbol_key = symbol.upper().encode()[:16] if symbol else None
+        actions = {}
+        failures = {name: 0 for name in CONDITION_NAMES.values()}
+        evaluations = 0
+        if self._mm is not None:
+            with self._lock:
+                for raw in self._iter_newest_first():
+                    if since_ms is not None and raw[1] < since_ms:
+                        break
+                    if not self._matches(raw, symbol_key, until_ms, None, None):
+                        continue
+                    evaluations += 1
+                    action_name = ACTION_NAMES.get(raw[10], str(raw[10]))
+                    actions[action_name] = actions.get(action_name, 0) + 1
+                    failed_mask = raw[8] & ~raw[9]
+                    for flag, name in CONDITION_NAMES.items():
+                        if failed_mask & flag:
+                            failures[name] += 1
+        return {'symbol': symbol.upper() if symbol else None, 'evaluations': evaluations,
+                'actions': actions, 'failed_conditions': failures}
+
+    @staticmethod
+    def _to_dict(raw: tuple) -> dict:
+        symbol, ts_ms, candle_open_ms, price, rsi, rsi_delta, volume_ratio, oi_delta, evaluated, passed, action = raw
+        return {
+            'symbol': symbol.rstrip(b'\0').decode(),
+            'time': ts_ms,
+            'candle_open_time': candle_open_ms or None,
+            'price': _optional(price),
+            'rsi': _optional(rsi),
+            'rsi_delta': _optional(rsi_delta),
+            'volume_ratio': _optional(volume_ratio),
+            'oi_delta': _optional(oi_delta),
+            'action': ACTION_NAMES.get(action, str(action)),
+            'conditions': {name: {'evaluated': bool(evaluated & flag), 'passed': bool(passed & flag)}
+                           for flag, name in CONDITION_NAMES.items() if (evaluated | passed) & flag},
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            written = self._written
+        return {'enabled': self.enabled, 'path': self.path, 'capacity': self.capacity,
+                'record_size': RECORD_SIZE, 'written': written, 'stored': min(written, self.capacity)}
+
+    def close(self):
+        with self._lock:
+            mm, self._mm = self._mm, None
+            file, self._file = self._file, None
+        if mm is not None:
+            mm.flush()
+            mm.close()
+        if file is not None:
+            file.close()
+
+
+_decision_journal = None
+_decision_journal_lock = threading.Lock()
+
+
+def get_decision_journal() -> DecisionJournal:
+    """Instancia única del diario de decisiones para el proceso."""
+    global _decision_journal
+    with _decision_journal_lock:
+        if _decision_journal is None:
+            _decision_journal = DecisionJournal()
+        return _decision_journal
+
+
+def stop_decision_journal():
+    """Vuelca y cierra el fichero del diario (apagado de workers); el siguiente get_ lo reabre y continúa el anillo."""
+    global _decision_journal
+    with _decision_journal_lock:
+        journal, _decision_journal = _decision_journal, None
+    if journal is not None:
+        journal.close()
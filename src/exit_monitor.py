@@ -0,0 +1,80 @@
+# Monitor de salidas a nivel de tick para una posición abierta.
+# Mientras el bot está en posición se suscribe al bookTicker del símbolo (market_stream.py) y, en cada
+# tick, actualiza los picos y evalúa los trailing stops de precio y de PnL con el mejor bid (el precio al
+# que realmente se cerraría el LONG). Si se cruza un umbral no coloca órdenes desde el hilo del websocket:
+# deja la salida solicitada en el bot y despierta a su worker, que la ejecuta al instante en run_once.
+
+import time
+from decimal import Decimal
+
+from .logger_setup import get_logger
+from .market_stream import get_market_stream
+
+# Tras un fallo al suscribirse, no reintentar en cada ciclo
+EXIT_MONITOR_RETRY_SECONDS = 60.0
+
+
+class ExitMonitor:
+    """Evaluación de trailing stops por tick para el TradingBot que lo posee."""
+
+    def __init__(self, bot, stream=None):
+        self.bot = bot
+        self._stream = stream
+        self.active = False
+        self.ticks_processed = 0
+        self.last_tick_time_ms = None
+        self._retry_after = 0.0
+
+    @property
+    def stream(self):
+        if self._stream is None:
+            self._stream = get_market_stream()
+        return self._stream
+
+    def start(self) -> bool:
+        """Se suscribe al stream del símbolo. False si no hay stream disponible (se sigue por ciclo)."""
+        if self.active:
+            return True
+        if time.monotonic() < self._retry_after:
+            return False
+        logger = get_logger()
+        self.active = self.stream.subscribe(self.bot.symbol, self._on_tick)
+        if self.active:
+            self.ticks_processed = 0
+            logger.info(f"[{self.bot.symbol}] Monitor de salidas por tick ACTIVO (bookTicker).")
+        else:
+            self._retry_after = time.monotonic() + EXIT_MONITOR_RETRY_SECONDS
+            logger.warning(f"[{self.bot.symbol}] No se pudo activar el monitor de salidas por tick. Los trailing stops se evaluarán sólo en cada ciclo.")
+        return self.active
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self.stream.unsubscribe(self.bot.symbol, self._on_tick)
+        get_logger().info(f"[{self.bot.symbol}] Monitor de salidas por tick detenido ({self.ticks_processed} ticks procesados).")
+
+    def _on_tick(self, symbol: str, bid: Decimal, ask: Decimal, event_time_ms: int):
+        """Llamado desde el hilo del websocket: sólo estado en memoria, nada de llamadas REST."""
+        bot = self.bot
+        if not self.active or bot.tick_exit_reason is not None:
+            return
+        self.ticks_processed += 1
+        self.last_tick_time_ms = event_time_ms
+        with bot._exit_lock:
+            position = bot.current_position
+            # Sólo con la posición "quieta": ni salida en curso ni orden de salida pendiente
+            if not bot.in_position or not position or bot.pending_exit_order_id or bot.current_state.name != 'IN_POSITION':
+                return
+            tick_pnl = (bid - position['entry_price']) * position['quantity']
+            was_armed = bot.price_trailing_stop_armed
+            exit_reason = bot._evaluate_trailing_exits(bot.tick_scale.ticks_from_float(float(bid)), tick_pnl, log_checks=False)
+            # En modo 'exchange' el armado implica colocar la TRAILING_STOP_MARKET: la coloca el worker
+            arm_exchange_trailing = not was_armed and bot.price_trailing_stop_armed and bot._uses_exchange_trailing()
+        if arm_exchange_trailing and not exit_reason:
+            get_logger().info(f"[{symbol}] Trailing de precio armado por tick (bid={bid}). Despertando al worker para colocar el trailing nativo.")
+            bot.wake_event.set()
+        if exit_reason:
+            latency_ms = time.time() * 1000 - event_time_ms
+            get_logger().warning(f"[{symbol}] SALIDA POR TICK: {exit_reason} (bid={bid}, PnL tick={tick_pnl:.4f}, latencia evento {latency_ms:.0f}ms).")
+            bot.request_tick_exit(exit_reason, bid)
@@ -0,0 +1,295 @@
+# Libro local de ejecuciones (fills) por símbolo.
+# Sustituye las búsquedas ad-hoc en get_user_trade_history(limit=N), en las que el fill buscado podía quedar
+# fuera de la ventana en ráfagas de operaciones. Cada símbolo guarda sus fills indexados por tradeId y por
+# orderId, y se mantiene al día de dos formas:
+#   - eventos ORDER_TRADE_UPDATE del user-data stream (user_stream.py), sin llamadas REST;
+#   - sincronización incremental por fromId (userTrades desde el último tradeId conocido), al arrancar,
+#     tras una reconexión del stream o cuando se pide una orden que aún no está en el libro.
+# Así el PnL de un cierre se lee en O(1) del libro local en vez de escanear el historial.
+
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from .binance_client import get_futures_client
+from .logger_setup import get_logger
+from .user_stream import get_user_stream
+
+FILLS_LEDGER_MAX_FILLS = int(os.environ.get('FILLS_LEDGER_MAX_FILLS', '5000')) # Por símbolo; se descartan los más antiguos
+FILLS_LEDGER_BOOTSTRAP_LIMIT = 100 # Fills recientes que se cargan en la primera sincronización
+FILLS_LEDGER_PAGE_LIMIT = 1000 # Máximo de userTrades por petición
+FILLS_LEDGER_USE_USER_STREAM = os.environ.get('FILLS_LEDGER_USE_USER_STREAM', '1') == '1'
+ORDER_DEAD_EXECUTION_TYPES = ('CANCELED', 'EXPIRED', 'REJECTED') # 'x' de un ORDER_TRADE_UPDATE que cierra la orden sin fill
+
+
+def _to_decimal(value) -> Decimal:
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return Decimal('0')
+
+
+def fill_from_rest(trade: dict) -> dict:
+    """Normaliza un userTrade de REST (GET /fapi/v1/userTrades)."""
+    return {
+        'trade_id': int(trade['id']),
+        'order_id': int(trade['orderId']),
+        'side': str(trade.get('side', '')).upper(),
+        'position_side': trade.get('positionSide'),
+        'price': _to_decimal(trade.get('price')),
+        'qty': _to_decimal(trade.get('qty')),
+        'realized_pnl': _to_decimal(trade.get('realizedPnl')),
+        'commission': _to_decimal(trade.get('commission')),
+        'maker': bool(trade.get('maker')),
+        'time_ms': int(trade.get('time', 0)),
+    }
+
+
+def fill_from_stream(order_update: dict) -> dict | None:
+    """Normaliza el objeto 'o' de un ORDER_TRADE_UPDATE. None si el evento no es una ejecución."""
+    if order_update.get('x') != 'TRADE' or not order_update.get('t'):
+        return None
+    return {
+        'trade_id': int(order_update['t']),
+        'order_id': int(order_update['i']),
+        'side': str(order_update.get('S', '')).upper(),
+        'position_side': order_update.get('ps'),
+        'price': _to_decimal(order_update.get('L')),
+        'qty': _to_decimal(order_update.get('l')),
+        'realized_pnl': _to_decimal(order_update.get('rp')),
+        'commission': _to_decimal(order_update.get('n')),
+        'maker': bool(order_update.get('m')),
+        'time_ms': int(order_update.get('T', 0)),
+    }
+
+
+class FillsLedger:
+    """Fills de un símbolo indexados por tradeId y orderId."""
+
+    def __init__(self, symbol: str, max_fills: int = FILLS_LEDGER_MAX_FILLS):
+        self.symbol = symbol.upper()
+        self.max_fills = max_fills
+        self._lock = threading.RLock()
+        self._fills = OrderedDict() # trade_id -> fill (orden de llegada)
+        self._by_order = {} # order_id -> [trade_id, ...]
+        self._last_trade_id = None # Mayor tradeId conocido (stream o REST)
+        # Hasta dónde se leyó userTrades por fromId. Sólo lo mueve sync(): un fill del stream posterior a una
+        # desconexión no prueba que se tengan los anteriores, y fromId saltaría el hueco.
+        self._rest_trade_id = None
+        self._dead_orders = OrderedDict() # order_id -> 'x' del evento: cerradas sin fill según el stream (acotado)
+        self.needs_sync = True # Hay que sincronizar por REST antes de fiarse del libro (arranque / reconexión)
+        self.rest_syncs = 0
+
+    # --- Alta de fills ---
+
+    def add_fill(self, fill: dict) -> bool:
+        """Añade un fill normalizado. False si ya estaba (los duplicados stream/REST se ignoran)."""
+        trade_id = fill['trade_id']
+        with self._lock:
+            if trade_id in self._fills:
+                return False
+            self._fills[trade_id] = fill
+            self._by_order.setdefault(fill['order_id'], []).append(trade_id)
+            if self._last_trade_id is None or trade_id > self._last_trade_id:
+                self._last_trade_id = trade_id
+            while len(self._fills) > self.max_fills:
+                old_trade_id, old_fill = self._fills.popitem(last=False)
+                order_trades = self._by_order.get(old_fill['order_id'])
+                if order_trades:
+                    order_trades.remove(old_trade_id)
+                    if not order_trades:
+                        del self._by_order[old_fill['order_id']]
+        return True
+
+    def apply_order_trade_update(self, event: dict) -> bool:
+        """
+        Procesa un evento ORDER_TRADE_UPDATE del user-data stream: añade el fill o, si Binance canceló, expiró o
+        rechazó la orden, la anota como muerta (ver order_dead).
+        """
+        order_update = event.get('o', {})
+        if order_update.get('x') in ORDER_DEAD_EXECUTION_TYPES and order_update.get('i'):
+            with self._lock:
+                self._dead_orders[int(order_update['i'])] = order_update['x']
+                while len(self._dead_orders) > self.max_fills:
+                    self._dead_orders.popitem(last=False)
+            return False
+        fill = fill_from_stream(order_update)
+        return self.add_fill(fill) if fill else False
+
+    def sync(self) -> bool:
+        """
+        Trae por REST los fills posteriores al último tradeId leído por REST (paginando por fromId; los que ya
+        trajo el stream se descartan como duplicados). Sin lectura previa carga los FILLS_LEDGER_BOOTSTRAP_LIMIT
+        más recientes. False si falla.
+        """
+        logger = get_logger()
+        client = get_futures_client()
+        if not client:
+            logger.error(f"[{self.symbol}] Cliente Binance no disponible para sincronizar el libro de fills.")
+            return False
+        added = 0
+        try:
+            if self._rest_trade_id is None:
+                trades = client.get_account_trades(symbol=self.symbol, limit=FILLS_LEDGER_BOOTSTRAP_LIMIT)
+                self.rest_syncs += 1
+                added += self._add_rest_page(trades)
+            while self._rest_trade_id is not None:
+                trades = client.get_account_trades(symbol=self.symbol, fromId=self._rest_trade_id + 1, limit=FILLS_LEDGER_PAGE_LIMIT)
+                self.rest_syncs += 1
+                added += self._add_rest_page(trades)
+                if len(trades) < FILLS_LEDGER_PAGE_LIMIT:
+                    break
+        except Exception as e:
+            logger.error(f"[{self.symbol}] Error sincronizando el libro de fills (fromId={self._rest_trade_id}): {e}")
+            return False
+        self.needs_sync = False
+        if added:
+            logger.debug(f"[{self.symbol}] Libro de fills sincronizado: {added} fills nuevos (último tradeId={self._last_trade_id}).")
+        return True
+
+    def _add_rest_page(self, trades: list) -> int:
+        """Añade una página de userTrades leída en orden de tradeId y avanza el cursor de REST. Devuelve los nuevos."""
+        added = 0
+        for trade in trades:
+            fill = fill_from_rest(trade)
+            added += self.add_fill(fill)
+            if self._rest_trade_id is None or fill['trade_id'] > self._rest_trade_id:
+                self._rest_trade_id = fill['trade_id']
+        return added
+
+    # --- Consultas ---
+
+    def order_fills(self, order_id) -> list[dict]:
+        with self._lock:
+            return [self._fills[trade_id] for trade_id in self._by_order.get(int(order_id), ())]
+
+    def order_dead(self, order_id) -> bool:
+        """True si el stream trajo un CANCELED/EXPIRED/REJECTED de la orden."""
+        with self._lock:
+            return int(order_id) in self._dead_orders
+
+    def sync_order(self, order_id) -> bool:
+        """Trae por REST (userTrades con orderId) todos los fills de una orden. False si falla."""
+        client = get_futures_client()
+        if not client:
+            get_logger().error(f"[{self.symbol}] Cliente Binance no disponible para sincronizar los fills de la orden {order_id}.")
+            return False
+        try:
+            trades = client.get_account_trades(symbol=self.symbol, orderId=int(order_id))
+        except Exception as e:
+            get_logger().error(f"[{self.symbol}] Error obteniendo los fills de la orden {order_id}: {e}")
+            return False
+        self.rest_syncs += 1
+        added = sum(1 for trade in trades if self.add_fill(fill_from_rest(trade)))
+        if added:
+            get_logger().debug(f"[{self.symbol}] {added} fills de la orden {order_id} recuperados por REST.")
+        return True
+
+    def order_summary(self, order_id, executed_qty: Decimal | None = None, sync_if_missing: bool = True) -> dict | None:
+        """
+        Agregado de los fills de una orden: cantidad total, precio medio, PnL realizado y comisión,
+        último tradeId y hora. Si la orden no está en el libro (o el libro puede tener huecos tras una
+        reconexión) y se permite, sincroniza una vez por REST. Con executed_qty (el executedQty de la
+        orden) también se sincronizan los fills de la orden si el libro suma menos: el stream pudo
+        entregar sólo parte de sus TRADE.
+        """
+        fills = self.order_fills(order_id)
+        if (not fills or self.needs_sync) and sync_if_missing and self.sync():
+            fills = self.order_fills(order_id)
+        if executed_qty is not None and sync_if_missing and \
+                sum((f['qty'] for f in fills), Decimal('0')) < Decimal(str(executed_qty)) and self.sync_order(order_id):
+            fills = self.order_fills(order_id)
+        if not fills:
+            return None
+        return self._summarize(int(order_id), fills)
+
+    def orders_summary(self, order_ids: list, executed_qty: Decimal | None = None, sync_if_missing: bool = True) -> dict | None:
+        """
+        Como order_summary pero sobre los fills de varias órdenes (una orden perseguida con cancel+new reparte su
+        ejecución entre la original y sus reemplazos). El agregado lleva el orderId de la última.
+        """
+        if len(order_ids) == 1:
+            return self.order_summary(order_ids[0], executed_qty=executed_qty, sync_if_missing=sync_if_missing)
+        fills = [f for order_id in order_ids for f in self.order_fills(order_id)]
+        if (not fills or self.needs_sync) and sync_if_missing and self.sync():
+            fills = [f for order_id in order_ids for f in self.order_fills(order_id)]
+        if executed_qty is not None and sync_if_missing and sum((f['qty'] for f in fills), Decimal('0')) < Decimal(str(executed_qty)):
+            for order_id in order_ids:
+                self.sync_order(order_id)
+            fills = [f for order_id in order_ids for f in self.order_fills(order_id)]
+        if not fills:
+            return None
+        return self._summarize(int(order_ids[-1]), fills)
+
+    def order_summaries_since(self, since_ms: int, side: str | None = None) -> list[dict]:
+        """Agregados por orden de los fills desde since_ms (opcionalmente de un lado), más reciente primero."""
+        with self._lock:
+            order_ids = [order_id for order_id, trade_ids in self._by_order.items()
+                         if any(self._fills[t]['time_ms'] >= since_ms and (side is None or self._fills[t]['side'] == side) for t in trade_ids)]
+            summaries = [self._summarize(order_id, [self._fills[t] for t in self._by_order[order_id]]) for order_id in order_ids]
+        summaries.sort(key=lambda s: s['time_ms'], reverse=True)
+        return summaries
+
+    @staticmethod
+    def _summarize(order_id: int, fills: list[dict]) -> dict:
+        quantity = sum((f['qty'] for f in fills), Decimal('0'))
+        notional = sum((f['price'] * f['qty'] for f in fills), Decimal('0'))
+        last_fill = max(fills, key=lambda f: f['trade_id'])
+        return {
+            'order_id': order_id,
+            'side': last_fill['side'],
+            'quantity': quantity,
+            'avg_price': notional / quantity if quantity > 0 else last_fill['price'],
+            'realized_pnl': sum((f['realized_pnl'] for f in fills), Decimal('0')),
+            'commission': sum((f['commission'] for f in fills), Decimal('0')),
+            'last_trade_id': last_fill['trade_id'],
+            'time_ms': last_fill['time_ms'],
+            'fills': len(fills),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'fills': len(self._fills), 'orders': len(self._by_order), 'last_trade_id': self._last_trade_id,
+                    'rest_trade_id': self._rest_trade_id, 'rest_syncs': self.rest_syncs, 'needs_sync': self.needs_sync}
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+_stream_attached = False
+
+
+def get_fills_ledger(symbol: str) -> FillsLedger:
+    """Libro de fills del símbolo (uno por proceso, compartido si se recrea el bot)."""
+    symbol = symbol.upper()
+    with _ledgers_lock:
+        ledger = _ledgers.get(symbol)
+        if ledger is None:
+            ledger = _ledgers[symbol] = FillsLedger(symbol)
+        return ledger
+
+
+def _on_order_trade_update(event: dict):
+    symbol = str(event.get('o', {}).get('s', '')).upper()
+    ledger = _ledgers.get(symbol)
+    if ledger is not None:
+        ledger.apply_order_trade_update(event)
+
+
+def _on_user_stream_reconnect():
+    # Lo ejecutado mientras el stream estuvo caído sólo se recupera por REST
+    for ledger in list(_ledgers.values()):
+        ledger.needs_sync = True
+
+
+def start_fills_stream() -> bool:
+    """Engancha los libros al user-data stream. False si el stream no está disponible (sólo REST)."""
+    global _stream_attached
+    if not FILLS_LEDGER_USE_USER_STREAM:
+        return False
+    stream = get_user_stream()
+    if not _stream_attached:
+        stream.add_listener('ORDER_TRADE_UPDATE', _on_order_trade_update)
+        stream.add_reconnect_listener(_on_user_stream_reconnect)
+        _stream_attached = True
+    return stream.start()
@@ -0,0 +1,75 @@
+# Aritmética de punto fijo para precios y cantidades de un símbolo.
+# Los precios de Binance son múltiplos del tickSize y las cantidades del stepSize: en lugar de operar con Decimal
+# (redondeos con // y quantize, Decimal(str(close)) en cada ciclo, as_tuple() para la precisión de los logs) se
+# representan como enteros de ticks y de lotes. Las comparaciones y restas del trailing stop (picos y niveles)
+# son entre ints, exactas. Pasar a ticks tampoco opera con Decimal: los precios del stream y de las velas entran
+# por ticks_from_float y los que ya son Decimal (fills, parámetros) por su fracción entera (as_integer_ratio).
+# Decimal sólo se construye en el borde con la API (parámetros de órdenes). El PnL por tick y el parseo del
+# bookTicker (market_stream.py) siguen en Decimal.
+
+from decimal import Decimal
+
+DEFAULT_TICK_SIZE = Decimal('0.00000001') # Sin PRICE_FILTER (mismo valor que usaba el bot por defecto)
+
+
+def _decimals_of(step: Decimal) -> int:
+    """Decimales con los que Binance publica el paso ('0.010' -> 3), como hacía as_tuple() en los logs."""
+    return max(0, -step.as_tuple().exponent)
+
+
+class TickScale:
+    """Escala entera de un símbolo: precios en ticks (tickSize) y cantidades en lotes (stepSize)."""
+
+    __slots__ = ('tick_size', 'step_size', 'price_decimals', 'qty_decimals',
+                 '_price_scale', '_tick_units', '_qty_scale', '_step_units')
+
+    def __init__(self, tick_size: Decimal | None, step_size: Decimal | None):
+        self.tick_size = tick_size if tick_size and tick_size > 0 else DEFAULT_TICK_SIZE
+        self.step_size = step_size if step_size and step_size > 0 else Decimal('1')
+        self.price_decimals = _decimals_of(self.tick_size)
+        self.qty_decimals = _decimals_of(self.step_size)
+        # tick = _tick_units / _price_scale, ambos enteros (p. ej. tickSize 0.05 -> 5 / 100)
+        self._price_scale = 10 ** self.price_decimals
+        self._tick_units = int(self.tick_size * self._price_scale)
+        self._qty_scale = 10 ** self.qty_decimals
+        self._step_units = int(self.step_size * self._qty_scale)
+
+    # --- Precios ---
+
+    def ticks_from_float(self, price: float) -> int:
+        """Ticks de un precio que viene del exchange como float (velas): redondea el error binario, sin Decimal."""
+        return round(price * self._price_scale) // self._tick_units
+
+    def floor_ticks(self, price: Decimal) -> int:
+        """Ticks de un precio cualquiera, redondeando hacia abajo (exacto, aritmética entera)."""
+        numerator, denominator = price.as_integer_ratio()
+        return numerator * self._price_scale // (denominator * self._tick_units)
+
+    def ceil_ticks(self, amount: Decimal) -> int:
+        """Ticks necesarios para cubrir una distancia de precio, redondeando hacia arriba (exacto, aritmética entera)."""
+        numerator, denominator = amount.as_integer_ratio()
+        return -(-numerator * self._price_scale // (denominator * self._tick_units))
+
+    def to_price(self, ticks: int) -> Decimal:
+        """Ticks -> Decimal con los decimales del tickSize (borde con la API)."""
+        return Decimal(ticks * self._tick_units).scaleb(-self.price_decimals)
+
+    def format_price(self, ticks: int) -> str:
+        """Ticks -> texto con los decimales del tickSize, sin pasar por Decimal (logs y parámetros de órdenes)."""
+        units = ticks * self._tick_units
+        if not self.price_decimals:
+            return str(units)
+        sign = '-' if units < 0 else ''
+        whole, frac = divmod(abs(units), self._price_scale)
+        return f"{sign}{whole}.{frac:0{self.price_decimals}d}"
+
+    # --- Cantidades ---
+
+    def floor_lots(self, quantity: Decimal) -> int:
+        """Lotes (múltiplos del stepSize) de una cantidad, redondeando hacia abajo (exacto, aritmética entera)."""
+        numerator, denominator = quantity.as_integer_ratio()
+        return numerator * self._qty_scale // (denominator * self._step_units)
+
+    def to_quantity(self, lots: int) -> Decimal:
+        """Lotes -> Decimal con los decimales del stepSize."""
+        return Decimal(lots * self._step_units).scaleb(-self.qty_decimals)
@@ -0,0 +1,235 @@
+# Stream de precios en tiempo real (bookTicker de Binance Futures) compartido por todos los bots.
+# Un único websocket para el proceso: cada símbolo se suscribe/desuscribe al vuelo y sus listeners
+# reciben cada tick (mejor bid/ask). Si el websocket no está disponible, las suscripciones devuelven
+# False y los bots siguen funcionando sólo con el ciclo de run_once.
+
+import json
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from .config_loader import load_config
+from .logger_setup import get_logger
+
+try:
+    from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+except ImportError: # pragma: no cover - depende del entorno
+    UMFuturesWebsocketClient = None
+
+FUTURES_STREAM_URL = 'wss://fstream.binance.com'
+FUTURES_TESTNET_STREAM_URL = 'wss://stream.binancefuture.com'
+# Espera entre reintentos de reconexión (se duplica hasta el máximo)
+MARKET_STREAM_RECONNECT_SECONDS = float(os.environ.get('MARKET_STREAM_RECONNECT_SECONDS', '1'))
+MARKET_STREAM_RECONNECT_MAX_SECONDS = 30.0
+
+
+def _resolve_stream_url() -> str:
+    """URL del websocket según config.ini ([BINANCE] futures_stream_url o el modo live/paper)."""
+    config = load_config()
+    if not config:
+        return FUTURES_STREAM_URL
+    explicit_url = config.get('BINANCE', 'futures_stream_url', fallback=None)
+    if explicit_url:
+        return explicit_url
+    mode = config.get('BINANCE', 'mode', fallback='paper').lower()
+    return FUTURES_STREAM_URL if mode == 'live' else FUTURES_TESTNET_STREAM_URL
+
+
+class MarketStream:
+    """
+    Websocket bookTicker compartido. Los listeners se registran por símbolo y se llaman como
+    listener(symbol, bid: Decimal, ask: Decimal, event_time_ms: int) desde el hilo del websocket,
+    por lo que deben ser rápidos y no hacer llamadas REST.
+    """
+
+    def __init__(self, stream_url: str | None = None):
+        self.stream_url = stream_url
+        self._lock = threading.RLock()
+        self._client = None
+        self._listeners = {} # símbolo -> [listener, ...]
+        self._last_ticks = {} # símbolo -> (bid, ask, event_time_ms)
+        self._request_id = 0
+        self._reconnect_timer = None
+        self._reconnect_delay = MARKET_STREAM_RECONNECT_SECONDS
+        self._stopped = False
+
+    # --- Conexión ---
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    def _ensure_client(self) -> bool:
+        """Crea el websocket si todavía no existe. Llamar con _lock tomado."""
+        if self._client is not None:
+            return True
+        logger = get_logger()
+        if UMFuturesWebsocketClient is None:
+            logger.warning("Websocket de Binance no disponible (binance.websocket). Stream de precios deshabilitado.")
+            return False
+        if self.stream_url is None:
+            self.stream_url = _resolve_stream_url()
+        try:
+            self._client = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error,
+            )
+        except Exception as e:
+            logger.error(f"No se pudo abrir el stream de precios ({self.stream_url}): {e}")
+            self._client = None
+            return False
+        logger.info(f"Stream de precios conectado a {self.stream_url}.")
+        return True
+
+    def _send_subscription(self, symbol: str, action: str):
+        try:
+            self._client.book_ticker(symbol=symbol, id=self._next_id(), action=action)
+        except Exception as e:
+            get_logger().error(f"[{symbol}] Error al enviar {action} de bookTicker: {e}")
+
+    def _on_close(self, _socket_manager, *args):
+        logger = get_logger()
+        with self._lock:
+            self._client = None
+            if self._stopped or not self._listeners:
+                return
+            logger.warning(f"Stream de precios cerrado. Reintentando conexión en {self._reconnect_delay:.0f}s...")
+            self._schedule_reconnect()
+
+    def _on_error(self, _socket_manager, error):
+        get_logger().error(f"Error en el stream de precios: {error}")
+
+    def _schedule_reconnect(self):
+        if self._reconnect_timer is not None and self._reconnect_timer.is_alive():
+            return
+        self._reconnect_timer = threading.Timer(self._reconnect_delay, self._reconnect)
+        self._reconnect_timer.daemon = True
+        self._reconnect_timer.start()
+        self._reconnect_delay = min(self._reconnect_delay * 2, MARKET_STREAM_RECONNECT_MAX_SECONDS)
+
+    def _reconnect(self):
+        with self._lock:
+            self._reconnect_timer = None
+            if self._stopped or not self._listeners:
+                return
+            if not self._ensure_client():
+                self._schedule_reconnect()
+                return
+            for symbol in self._listeners:
+                self._send_subscription(symbol, 'SUBSCRIBE')
+            self._reconnect_delay = MARKET_STREAM_RECONNECT_SECONDS
+
+    # --- Suscripciones ---
+
+    def subscribe(self, symbol: str, listener) -> bool:
+        """Registra un listener para el símbolo. False si no hay websocket disponible."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._stopped = False
+            listeners = self._listeners.get(symbol)
+            if listeners is not None:
+                if listener not in listeners:
+                    listeners.append(listener)
+                return True
+            if not self._ensure_client():
+                return False
+            self._listeners[symbol] = [listener]
+            self._send_subscription(symbol, 'SUBSCRIBE')
+        get_logger().debug(f"[{symbol}] Suscrito a bookTicker.")
+        return True
+
+    def unsubscribe(self, symbol: str, listener):
+        """Quita el listener; al quedar sin listeners se cancela la suscripción del símbolo."""
+        symbol = symbol.upper()
+        with self._lock:
+            listeners = self._listeners.get(symbol)
+            if not listeners or listener not in listeners:
+                return
+            listeners.remove(listener)
+            if listeners:
+                return
+            del self._listeners[symbol]
+            self._last_ticks.pop(symbol, None)
+            if self._client is not None:
+                self._send_subscription(symbol, 'UNSUBSCRIBE')
+        get_logger().debug(f"[{symbol}] Desuscrito de bookTicker.")
+
+    def subscribed_symbols(self) -> list:
+        with self._lock:
+            return sorted(self._listeners)
+
+    def last_tick(self, symbol: str) -> tuple | None:
+        """Último (bid, ask, event_time_ms) recibido para el símbolo, o None."""
+        return self._last_ticks.get(symbol.upper())
+
+    def stop(self):
+        """Cierra el websocket y olvida todas las suscripciones."""
+        with self._lock:
+            self._stopped = True
+            if self._reconnect_timer is not None:
+                self._reconnect_timer.cancel()
+                self._reconnect_timer = None
+            client, self._client = self._client, None
+            self._listeners.clear()
+            self._last_ticks.clear()
+        if client is not None:
+            try:
+                client.stop()
+            except Exception as e:
+                get_logger().warning(f"Error al cerrar el stream de precios: {e}")
+
+    # --- Mensajes ---
+
+    def _on_message(self, _socket_manager, message):
+        try:
+            data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        except ValueError:
+            return
+        if isinstance(data, dict) and 'data' in data: # Formato de stream combinado
+            data = data['data']
+        if not isinstance(data, dict) or data.get('e') != 'bookTicker':
+            return # Respuestas a SUBSCRIBE/UNSUBSCRIBE y otros eventos
+        self.dispatch_book_ticker(data)
+
+    def dispatch_book_ticker(self, data: dict):
+        """Procesa un evento bookTicker ({'s', 'b', 'a', 'E'}) y avisa a los listeners del símbolo."""
+        symbol = str(data.get('s', '')).upper()
+        try:
+            bid = Decimal(data['b'])
+            ask = Decimal(data['a'])
+        except (KeyError, TypeError, InvalidOperation):
+            return
+        event_time_ms = int(data.get('E') or data.get('T') or time.time() * 1000)
+        self._last_ticks[symbol] = (bid, ask, event_time_ms)
+        listeners = self._listeners.get(symbol)
+        if not listeners:
+            return
+        for listener in tuple(listeners):
+            try:
+                listener(symbol, bid, ask, event_time_ms)
+            except Exception as e:
+                get_logger().error(f"[{symbol}] Error en listener del stream de precios: {e}", exc_info=True)
+
+
+_market_stream = None
+_market_stream_lock = threading.Lock()
+
+
+def get_market_stream() -> MarketStream:
+    """Instancia única del stream de precios para el proceso."""
+    global _market_stream
+    with _market_stream_lock:
+        if _market_stream is None:
+            _market_stream = MarketStream()
+        return _market_stream
+
+
+def stop_market_stream():
+    """Cierra el stream compartido (apagado de workers)."""
+    with _market_stream_lock:
+        stream = _market_stream
+    if stream is not None:
+        stream.stop()
@@ -0,0 +1,572 @@
+# Exchange simulado de Binance Futures (USDT-M) en proceso.
+# Implementa el subconjunto de métodos de UMFutures que usa binance_client, con un motor de
+# emparejamiento sencillo alimentado por velas reproducidas (grabadas o sintéticas).
+# Sirve para ejecutar TradingBot.run_once de forma determinista sin tocar la API real ni el testnet.
+
+import json
+import random
+import threading
+from decimal import Decimal, ROUND_DOWN
+
+import requests
+from binance.error import ClientError
+
+# Duración de una vela de 1 minuto en milisegundos (intervalo por defecto de las velas sintéticas)
+ONE_MINUTE_MS = 60_000
+
+
+def generate_random_walk_klines(num_candles: int, start_price: float = 100.0, seed: int | None = None,
+                                start_time_ms: int = 1_700_000_000_000, interval_ms: int = ONE_MINUTE_MS,
+                                volatility: float = 0.002, price_decimals: int = 4) -> list[list]:
+    """
+    Genera velas sintéticas (paseo aleatorio) en el mismo formato que devuelve client.klines().
+    Con la misma semilla siempre se obtienen las mismas velas.
+    """
+    rng = random.Random(seed)
+    klines = []
+    price = start_price
+    for i in range(num_candles):
+        open_price = price
+        close_price = max(open_price * (1 + rng.gauss(0, volatility)), 10 ** -price_decimals)
+        high_price = max(open_price, close_price) * (1 + abs(rng.gauss(0, volatility / 2)))
+        low_price = min(open_price, close_price) * (1 - abs(rng.gauss(0, volatility / 2)))
+        volume = rng.uniform(500, 1500) * (1 + 5 * abs(close_price - open_price) / open_price)
+        open_time = start_time_ms + i * interval_ms
+        klines.append([
+            open_time,
+            f"{open_price:.{price_decimals}f}",
+            f"{high_price:.{price_decimals}f}",
+            f"{low_price:.{price_decimals}f}",
+            f"{close_price:.{price_decimals}f}",
+            f"{volume:.3f}",
+            open_time + interval_ms - 1,
+            f"{volume * close_price:.4f}",
+            rng.randint(100, 1000),
+            f"{volume / 2:.3f}",
+            f"{volume * close_price / 2:.4f}",
+            "0",
+        ])
+        price = close_price
+    return klines
+
+
+def load_klines_file(path: str) -> list[list]:
+    """Carga velas grabadas desde un archivo JSON (lista de klines en formato Binance)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class MockUMFutures:
+    """
+    Reemplazo en memoria de binance.um_futures.UMFutures.
+
+    Cada símbolo tiene una lista de velas y un cursor que apunta a la última vela "actual".
+    `advance()` mueve el cursor y ejecuta el emparejamiento de las órdenes abiertas contra el
+    máximo/mínimo de la nueva vela:
+      - LIMIT BUY se llena si low <= price; LIMIT SELL si high >= price (al precio límite).
+      - TAKE_PROFIT_MARKET SELL se dispara si high >= stopPrice; STOP_MARKET SELL si low <= stopPrice.
+      - TRAILING_STOP_MARKET SELL sigue el máximo desde su activación (inmediata o al tocar activationPrice)
+        y se dispara si low <= máximo * (1 - callbackRate/100).
+      - MARKET se llena inmediatamente al cierre actual.
+    Las órdenes con closePosition=true se expiran cuando la posición LONG queda cerrada.
+    Los errores se lanzan como binance.error.ClientError con los mismos códigos que la API real.
+    """
+
+    def __init__(self, klines_by_symbol: dict[str, list[list]], warmup_candles: int = 100,
+                 tick_size: str = '0.0001', step_size: str = '0.001', quantity_precision: int = 3,
+                 leverage: int = 10, base_url: str = 'mock://umfutures'):
+        self.base_url = base_url
+        self._lock = threading.RLock()
+        self._klines = {symbol.upper(): list(rows) for symbol, rows in klines_by_symbol.items()}
+        self._cursor = {symbol: min(max(warmup_candles, 1), len(rows)) - 1 for symbol, rows in self._klines.items()}
+        self._tick_size = Decimal(tick_size)
+        self._step_size = Decimal(step_size)
+        self._quantity_precision = quantity_precision
+        self._leverage = leverage
+        self._orders: dict[int, dict] = {}
+        self._open_order_ids: dict[str, list[int]] = {symbol: [] for symbol in self._klines}
+        self._positions = {symbol: {'amount': Decimal('0'), 'entry_price': Decimal('0')} for symbol in self._klines}
+        self._trades: dict[str, list[dict]] = {symbol: [] for symbol in self._klines}
+        self._next_order_id = 1
+        self._next_trade_id = 1
+        # Contador de llamadas por método, útil para benchmarks y para verificar peso de API
+        self.call_counts: dict[str, int] = {}
+        # Respuestas "perdidas" por método: la operación se aplica pero se lanza un timeout (ver lose_next_responses)
+        self._lost_responses: dict[str, int] = {}
+
+    def lose_next_responses(self, method: str, count: int = 1):
+        """Simula timeouts de red: las próximas `count` llamadas a `method` se ejecutan pero el cliente no recibe respuesta."""
+        self._lost_responses[method] = self._lost_responses.get(method, 0) + count
+
+    def _maybe_lose_response(self, method: str):
+        if self._lost_responses.get(method):
+            self._lost_responses[method] -= 1
+            raise requests.exceptions.ReadTimeout(f"mock: respuesta de {method} perdida")
+
+    # --- Utilidades internas ---
+    def _count(self, method: str):
+        self.call_counts[method] = self.call_counts.get(method, 0) + 1
+
+    def _require_symbol(self, symbol: str) -> str:
+        symbol = (symbol or '').upper()
+        if symbol not in self._klines:
+            raise ClientError(400, -1121, 'Invalid symbol.', {})
+        return symbol
+
+    def _current_candle(self, symbol: str) -> list:
+        return self._klines[symbol][self._cursor[symbol]]
+
+    def _current_close(self, symbol: str) -> Decimal:
+        return Decimal(str(self._current_candle(symbol)[4]))
+
+    def _current_time_ms(self, symbol: str | None = None) -> int:
+        if symbol:
+            return int(self._current_candle(symbol)[6])
+        return max((int(self._current_candle(s)[6]) for s in self._klines), default=0)
+
+    def _order_view(self, order: dict) -> dict:
+        """Devuelve una copia de la orden con el formato (strings) de la API de Binance."""
+        view = dict(order)
+        for key in ('price', 'stopPrice', 'origQty', 'executedQty', 'avgPrice', 'cumQuote'):
+            view[key] = str(view[key])
+        view['closePosition'] = bool(order['closePosition'])
+        if order['type'] == 'TRAILING_STOP_MARKET':
+            view['priceRate'] = str(order['priceRate'])
+            view['activatePrice'] = str(order['activatePrice'])
+        view.pop('trailHigh', None)
+        return view
+
+    # --- Motor de emparejamiento ---
+    def _fill_order(self, order: dict, fill_price: Decimal, fill_time_ms: int):
+        symbol = order['symbol']
+        position = self._positions[symbol]
+        quantity = order['origQty']
+        if order['closePosition'] or order['reduceOnly'] or (order['positionSide'] == 'LONG' and order['side'] == 'SELL'):
+            quantity = min(quantity, position['amount']) if order['side'] == 'SELL' else quantity
+        if quantity <= Decimal('0'):
+            order['status'] = 'EXPIRED'
+            order['updateTime'] = fill_time_ms
+            return
+
+        realized_pnl = Decimal('0')
+        if order['side'] == 'BUY':
+            new_amount = position['amount'] + quantity
+            position['entry_price'] = ((position['entry_price'] * position['amount']) + (fill_price * quantity)) / new_amount
+            position['amount'] = new_amount
+        else:
+            quantity = min(quantity, position['amount'])
+            realized_pnl = (fill_price - position['entry_price']) * quantity
+            position['amount'] -= quantity
+            if position['amount'] <= Decimal('0'):
+                position['amount'] = Decimal('0')
+                position['entry_price'] = Decimal('0')
+
+        order['status'] = 'FILLED'
+        order['executedQty'] = quantity
+        order['avgPrice'] = fill_price
+        order['cumQuote'] = fill_price * quantity
+        order['updateTime'] = fill_time_ms
+        self._trades[symbol].append({
+            'symbol': symbol,
+            'id': self._next_trade_id,
+            'orderId': order['orderId'],
+            'side': order['side'],
+            'price': str(fill_price),
+            'qty': str(quantity),
+            'realizedPnl': str(realized_pnl),
+            'marginAsset': 'USDT',
+            'quoteQty': str(fill_price * quantity),
+            'commission': '0',
+            'commissionAsset': 'USDT',
+            'time': fill_time_ms,
+            'positionSide': 'LONG',
+            'buyer': order['side'] == 'BUY',
+            'maker': order['type'] == 'LIMIT',
+        })
+        self._next_trade_id += 1
+
+        if position['amount'] == Decimal('0'):
+            # Binance expira las órdenes closePosition cuando ya no queda posición
+            for other_id in list(self._open_order_ids[symbol]):
+                other = self._orders[other_id]
+                if other['status'] == 'NEW' and other['closePosition']:
+                    other['status'] = 'EXPIRED'
+                    other['updateTime'] = fill_time_ms
+        self._open_order_ids[symbol] = [oid for oid in self._open_order_ids[symbol] if self._orders[oid]['status'] == 'NEW']
+
+    def _match_symbol(self, symbol: str):
+        candle = self._current_candle(symbol)
+        high, low = Decimal(str(candle[2])), Decimal(str(candle[3]))
+        candle_time = int(candle[6])
+        for order_id in list(self._open_order_ids[symbol]):
+            order = self._orders[order_id]
+            if order['status'] != 'NEW':
+                continue
+            order_type, side = order['type'], order['side']
+            if order_type == 'LIMIT':
+                if side == 'BUY' and low <= order['price']:
+                    self._fill_order(order, order['price'], candle_time)
+                elif side == 'SELL' and high >= order['price']:
+                    self._fill_order(order, order['price'], candle_time)
+            elif order_type == 'TAKE_PROFIT_MARKET' and side == 'SELL' and high >= order['stopPrice']:
+                self._fill_order(order, order['stopPrice'], candle_time)
+            elif order_type == 'STOP_MARKET' and side == 'SELL' and low <= order['stopPrice']:
+                self._fill_order(order, order['stopPrice'], candle_time)
+            elif order_type == 'TRAILING_STOP_MARKET' and side == 'SELL':
+                if order['trailHigh'] is None:
+                    if high < order['activatePrice']:
+                        continue
+                    order['trailHigh'] = order['activatePrice']
+                order['trailHigh'] = max(order['trailHigh'], high)
+                trigger_price = order['trailHigh'] * (Decimal('1') - order['priceRate'] / Decimal('100'))
+                if low <= trigger_price:
+                    self._fill_order(order, trigger_price.quantize(self._tick_size), candle_time)
+
+    # --- Control de la reproducción ---
+    def advance(self, symbol: str | None = None, steps: int = 1) -> bool:
+        """
+        Avanza `steps` velas (en un símbolo o en todos) y ejecuta el emparejamiento de órdenes.
+        Devuelve False si algún símbolo ya no tiene más velas que reproducir.
+        """
+        with self._lock:
+            symbols = [symbol.upper()] if symbol else list(self._klines)
+            has_more = True
+            for sym in symbols:
+                for _ in range(steps):
+                    if self._cursor[sym] + 1 >= len(self._klines[sym]):
+                        has_more = False
+                        break
+                    self._cursor[sym] += 1
+                    self._match_symbol(sym)
+            return has_more
+
+    def set_position(self, symbol: str, quantity: float, entry_price: float):
+        """Fuerza una posición LONG abierta (útil para preparar escenarios IN_POSITION)."""
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            self._positions[symbol] = {'amount': Decimal(str(quantity)), 'entry_price': Decimal(str(entry_price))}
+
+    # --- Métodos públicos compatibles con UMFutures ---
+    def time(self):
+        self._count('time')
+        with self._lock:
+            return {'serverTime': self._current_time_ms()}
+
+    def exchange_info(self):
+        self._count('exchange_info')
+        price_precision = max(-self._tick_size.as_tuple().exponent, 0)
+        symbols = []
+        for symbol in self._klines:
+            symbols.append({
+                'symbol': symbol,
+                'status': 'TRADING',
+                'contractType': 'PERPETUAL',
+                'quoteAsset': 'USDT',
+                'pricePrecision': price_precision,
+                'quantityPrecision': self._quantity_precision,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': str(self._tick_size), 'maxPrice': '1000000', 'tickSize': str(self._tick_size)},
+                    {'filterType': 'LOT_SIZE', 'minQty': str(self._step_size), 'maxQty': '1000000', 'stepSize': str(self._step_size)},
+                    {'filterType': 'MARKET_LOT_SIZE', 'minQty': str(self._step_size), 'maxQty': '100000', 'stepSize': str(self._step_size)},
+                    {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                    {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500', 'multiplierDown': '0.9500', 'multiplierDecimal': '4'},
+                ],
+            })
+        return {'timezone': 'UTC', 'serverTime': self._current_time_ms(), 'symbols': symbols}
+
+    def klines(self, symbol: str, interval: str, **kwargs):
+        """Devuelve las últimas `limit` velas hasta el cursor (el intervalo se ignora: se reproduce lo cargado)."""
+        self._count('klines')
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            limit = int(kwargs.get('limit', 500))
+            end = self._cursor[symbol] + 1
+            return [list(row) for row in self._klines[symbol][max(0, end - limit):end]]
+
+    def book_ticker(self, symbol: str = None):
+        self._count('book_ticker')
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            close_price = self._current_close(symbol)
+            return {
+                'symbol': symbol,
+                'bidPrice': str(close_price),
+                'bidQty': '10',
+                'askPrice': str(close_price + self._tick_size),
+                'askQty': '10',
+                'time': self._current_time_ms(symbol),
+            }
+
+    def depth(self, symbol: str, limit: int = 500, **kwargs):
+        """Libro sintético alrededor del cierre actual (un tick de spread, como book_ticker)."""
+        self._count('depth')
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            close_price = self._current_close(symbol)
+            levels = min(int(limit), 20)
+            return {
+                'lastUpdateId': self._cursor[symbol],
+                'E': self._current_time_ms(symbol),
+                'T': self._current_time_ms(symbol),
+                'bids': [[str(close_price - self._tick_size * i), '10'] for i in range(levels)],
+                'asks': [[str(close_price + self._tick_size * (i + 1)), '10'] for i in range(levels)],
+            }
+
+    def new_order(self, symbol: str, side: str, type: str, **kwargs):
+        self._count('new_order')
+        with self._lock:
+            result = self._new_order(symbol, side, type, **kwargs)
+        self._maybe_lose_response('new_order')
+        return result
+
+    def _new_order(self, symbol: str, side: str, type: str, **kwargs):
+        symbol = self._require_symbol(symbol)
+        if side not in ('BUY', 'SELL'):
+            raise ClientError(400, -1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.", {})
+        close_position = str(kwargs.get('closePosition', 'false')).lower() == 'true'
+        reduce_only = str(kwargs.get('reduceOnly', 'false')).lower() == 'true'
+        quantity = Decimal(str(kwargs.get('quantity', '0')))
+        price = Decimal(str(kwargs.get('price', '0')))
+        stop_price = Decimal(str(kwargs.get('stopPrice', '0')))
+        position_amount = self._positions[symbol]['amount']
+        if close_position:
+            quantity = position_amount
+        if type == 'LIMIT' and price <= Decimal('0'):
+            raise ClientError(400, -4014, 'Price not increased by tick size.', {})
+        if type in ('TAKE_PROFIT_MARKET', 'STOP_MARKET') and stop_price <= Decimal('0'):
+            raise ClientError(400, -1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.", {})
+        if quantity <= Decimal('0') and not close_position:
+            raise ClientError(400, -4003, 'Quantity less than or equal to zero.', {})
+        callback_rate = Decimal(str(kwargs.get('callbackRate', '0')))
+        if type == 'TRAILING_STOP_MARKET' and not (Decimal('0.1') <= callback_rate <= Decimal('5')):
+            raise ClientError(400, -2007, 'Invalid callBack rate.', {})
+
+        close_price = self._current_close(symbol)
+        if type == 'TAKE_PROFIT_MARKET' and side == 'SELL' and stop_price <= close_price:
+            raise ClientError(400, -2021, 'Order would immediately trigger.', {})
+        if type == 'STOP_MARKET' and side == 'SELL' and stop_price >= close_price:
+            raise ClientError(400, -2021, 'Order would immediately trigger.', {})
+
+        client_order_id = kwargs.get('newClientOrderId')
+        if client_order_id and any(self._orders[i]['clientOrderId'] == client_order_id for i in self._open_order_ids[symbol]):
+            raise ClientError(400, -4116, 'ClientOrderId is duplicated.', {})
+
+        now_ms = self._current_time_ms(symbol)
+        order = {
+            'orderId': self._next_order_id,
+            'symbol': symbol,
+            'status': 'NEW',
+            'clientOrderId': kwargs.get('newClientOrderId') or f"mock_{self._next_order_id}",
+            'price': price,
+            'avgPrice': Decimal('0'),
+            'origQty': quantity,
+            'executedQty': Decimal('0'),
+            'cumQuote': Decimal('0'),
+            'timeInForce': kwargs.get('timeInForce', 'GTC'),
+            'type': type,
+            'origType': type,
+            'reduceOnly': reduce_only,
+            'closePosition': close_position,
+            'side': side,
+            'positionSide': kwargs.get('positionSide', 'BOTH'),
+            'stopPrice': stop_price,
+            'time': now_ms,
+            'updateTime': now_ms,
+        }
+        if type == 'TRAILING_STOP_MARKET':
+            activation_price = Decimal(str(kwargs['activationPrice'])) if kwargs.get('activationPrice') is not None else close_price
+            order['priceRate'] = callback_rate
+            order['activatePrice'] = activation_price
+            # Máximo seguido por el trailing; None hasta que el precio toca activationPrice
+            order['trailHigh'] = close_price if activation_price <= close_price else None
+        self._next_order_id += 1
+        self._orders[order['orderId']] = order
+        self._open_order_ids[symbol].append(order['orderId'])
+
+        # Órdenes que se ejecutan al instante (MARKET o LIMIT que cruza el libro)
+        ask_price = close_price + self._tick_size
+        if type == 'LIMIT' and order['timeInForce'] == 'GTX' and self._crosses_book(side, price, close_price):
+            order['status'] = 'EXPIRED' # Post-only que sería taker: Binance la rechaza
+            self._open_order_ids[symbol].remove(order['orderId'])
+            raise ClientError(400, -5022, 'Due to the order could not be executed as maker, the Post Only order will be rejected.', {})
+        if type == 'MARKET':
+            self._fill_order(order, ask_price if side == 'BUY' else close_price, now_ms)
+        elif type == 'LIMIT' and side == 'BUY' and price >= ask_price:
+            self._fill_order(order, ask_price, now_ms)
+        elif type == 'LIMIT' and side == 'SELL' and price <= close_price:
+            self._fill_order(order, close_price, now_ms)
+        return self._order_view(order)
+
+    def _crosses_book(self, side: str, price: Decimal, close_price: Decimal) -> bool:
+        """Bid simulado = cierre actual, ask = cierre + 1 tick."""
+        return price >= close_price + self._tick_size if side == 'BUY' else price <= close_price
+
+    def modify_order(self, symbol: str, side: str, quantity, price, orderId=None, origClientOrderId=None, **kwargs):
+        """PUT /fapi/v1/order: nuevo precio/cantidad para una LIMIT abierta (conserva orderId y timeInForce)."""
+        self._count('modify_order')
+        with self._lock:
+            order = self._find_order(symbol, orderId, origClientOrderId)
+            if order['type'] != 'LIMIT' or order['status'] != 'NEW':
+                raise ClientError(400, -2013, 'Order does not exist.', {})
+            if side != order['side']:
+                raise ClientError(400, -1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.", {})
+            new_price = Decimal(str(price))
+            close_price = self._current_close(order['symbol'])
+            if order['timeInForce'] == 'GTX' and self._crosses_book(side, new_price, close_price):
+                raise ClientError(400, -5022, 'Due to the order could not be executed as maker, the Post Only order will be rejected.', {})
+            order['price'] = new_price
+            order['origQty'] = Decimal(str(quantity))
+            order['updateTime'] = self._current_time_ms(order['symbol'])
+            if self._crosses_book(side, new_price, close_price):
+                self._fill_order(order, close_price + self._tick_size if side == 'BUY' else close_price, order['updateTime'])
+            return self._order_view(order)
+
+    def new_batch_order(self, batchOrders: list):
+        self._count('new_batch_order')
+        results = []
+        with self._lock:
+            for params in batchOrders:
+                params = dict(params)
+                try:
+                    results.append(self._new_order(params.pop('symbol', None), params.pop('side', None), params.pop('type', None), **params))
+                except ClientError as e:
+                    results.append({'code': e.error_code, 'msg': e.error_message})
+        self._maybe_lose_response('new_batch_order')
+        return results
+
+    def _find_order(self, symbol: str, orderId=None, origClientOrderId=None) -> dict:
+        symbol = self._require_symbol(symbol)
+        order = None
+        if orderId is not None:
+            order = self._orders.get(int(orderId))
+        elif origClientOrderId is not None:
+            order = next((o for o in self._orders.values() if o['clientOrderId'] == origClientOrderId), None)
+        if not order or order['symbol'] != symbol:
+            raise ClientError(400, -2013, 'Order does not exist.', {})
+        return order
+
+    def query_order(self, symbol: str, orderId=None, origClientOrderId=None, **kwargs):
+        self._count('query_order')
+        with self._lock:
+            return self._order_view(self._find_order(symbol, orderId, origClientOrderId))
+
+    def _cancel(self, symbol: str, orderId=None, origClientOrderId=None):
+        try:
+            order = self._find_order(symbol, orderId, origClientOrderId)
+        except ClientError:
+            raise ClientError(400, -2011, 'Unknown order sent.', {})
+        if order['status'] != 'NEW':
+            raise ClientError(400, -2011, 'Unknown order sent.', {})
+        order['status'] = 'CANCELED'
+        order['updateTime'] = self._current_time_ms(order['symbol'])
+        self._open_order_ids[order['symbol']].remove(order['orderId'])
+        return self._order_view(order)
+
+    def cancel_order(self, symbol: str, orderId=None, origClientOrderId=None, **kwargs):
+        self._count('cancel_order')
+        with self._lock:
+            return self._cancel(symbol, orderId, origClientOrderId)
+
+    def cancel_batch_order(self, symbol: str, orderIdList: list = None, origClientOrderIdList: list = None, **kwargs):
+        self._count('cancel_batch_order')
+        results = []
+        with self._lock:
+            for order_id in orderIdList or []:
+                try:
+                    results.append(self._cancel(symbol, orderId=order_id))
+                except ClientError as e:
+                    results.append({'code': e.error_code, 'msg': e.error_message})
+            for client_order_id in origClientOrderIdList or []:
+                try:
+                    results.append(self._cancel(symbol, origClientOrderId=client_order_id))
+                except ClientError as e:
+                    results.append({'code': e.error_code, 'msg': e.error_message})
+        return results
+
+    def get_orders(self, **kwargs):
+        """Órdenes abiertas (GET /fapi/v1/openOrders); sin símbolo devuelve las de todos."""
+        self._count('get_orders')
+        with self._lock:
+            symbols = [self._require_symbol(kwargs['symbol'])] if kwargs.get('symbol') else list(self._klines)
+            return [self._order_view(self._orders[oid]) for sym in symbols for oid in self._open_order_ids[sym]]
+
+    def get_position_risk(self, **kwargs):
+        self._count('get_position_risk')
+        with self._lock:
+            symbols = [self._require_symbol(kwargs['symbol'])] if kwargs.get('symbol') else list(self._klines)
+            result = []
+            for symbol in symbols:
+                position = self._positions[symbol]
+                mark_price = self._current_close(symbol)
+                unrealized = (mark_price - position['entry_price']) * position['amount'] if position['amount'] else Decimal('0')
+                result.append({
+                    'symbol': symbol,
+                    'positionAmt': str(position['amount']),
+                    'entryPrice': str(position['entry_price']),
+                    'markPrice': str(mark_price),
+                    'unRealizedProfit': str(unrealized),
+                    'leverage': str(self._leverage),
+                    'marginType': 'cross',
+                    'positionSide': 'LONG',
+                    'notional': str(mark_price * position['amount']),
+                    'updateTime': self._current_time_ms(symbol),
+                })
+            return result
+
+    def get_account_trades(self, symbol: str, **kwargs):
+        """userTrades (GET /fapi/v1/userTrades): por orderId, por fromId (paginado ascendente) o por rango de tiempo."""
+        self._count('get_account_trades')
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            trades = self._trades[symbol]
+            if kwargs.get('orderId') is not None:
+                trades = [t for t in trades if t['orderId'] == int(kwargs['orderId'])]
+            if kwargs.get('fromId') is not None:
+                trades = [t for t in trades if t['id'] >= int(kwargs['fromId'])]
+                trades = trades[:int(kwargs.get('limit', 500))]
+            else:
+                if kwargs.get('startTime') is not None:
+                    trades = [t for t in trades if t['time'] >= int(kwargs['startTime'])]
+                if kwargs.get('endTime') is not None:
+                    trades = [t for t in trades if t['time'] <= int(kwargs['endTime'])]
+                trades = trades[-int(kwargs.get('limit', 500)):]
+            return [dict(t) for t in trades]
+
+    def open_interest_hist(self, symbol: str, period: str, **kwargs):
+        """Open Interest sintético: volumen acumulado de las velas reproducidas hasta el cursor."""
+        self._count('open_interest_hist')
+        with self._lock:
+            symbol = self._require_symbol(symbol)
+            limit = int(kwargs.get('limit', 30))
+            end = self._cursor[symbol] + 1
+            rows = self._klines[symbol][:end]
+            history = []
+            cumulative = Decimal('0')
+            for row in rows:
+                cumulative += Decimal(str(row[5]))
+            for row in reversed(rows[-limit:]):
+                close_price = Decimal(str(row[4]))
+                history.append({
+                    'symbol': symbol,
+                    'sumOpenInterest': str(cumulative.quantize(Decimal('0.001'), rounding=ROUND_DOWN)),
+                    'sumOpenInterestValue': str((cumulative * close_price).quantize(Decimal('0.01'), rounding=ROUND_DOWN)),
+                    'timestamp': int(row[6]),
+                })
+                cumulative -= Decimal(str(row[5]))
+            history.reverse()
+            return history
+
+
+if __name__ == '__main__':
+    # Demostración rápida: reproducir velas sintéticas con el cliente simulado inyectado en binance_client.
+    from .binance_client import set_futures_client, create_futures_limit_order, get_order_status, get_futures_position
+
+    mock_client = MockUMFutures({'BTCUSDT': generate_random_walk_klines(300, start_price=30000.0, seed=42, price_decimals=1)},
+                                tick_size='0.1')
+    set_futures_client(mock_client)
+    entry_order = create_futures_limit_order('BTCUSDT', 'BUY', 0.01, float(mock_client.book_ticker(symbol='BTCUSDT')['bidPrice']) - 20)
+    while mock_client.advance() and get_order_status('BTCUSDT', entry_order['orderId'])['status'] == 'NEW':
+        pass
+    print(get_order_status('BTCUSDT', entry_order['orderId']))
+    print(get_futures_position('BTCUSDT'))
+    print(mock_client.call_counts)
@@ -0,0 +1,375 @@
+# Libro de órdenes local por símbolo, mantenido con el stream de diferencias de profundidad (@depth@100ms).
+# Sustituye la llamada REST book_ticker que _get_best_entry_price/_get_best_exit_price hacían justo antes de
+# colocar cada orden: el mejor bid/ask (y los N primeros niveles) se leen de memoria.
+# Sincronización según el procedimiento de Binance Futures:
+#   1. Se abre el stream y se guardan los eventos en un buffer.
+#   2. Se pide una foto por REST (GET /fapi/v1/depth) en un hilo aparte (nunca en el hilo del websocket).
+#   3. Se descartan los eventos con u < lastUpdateId; el primero aplicado debe cumplir U <= lastUpdateId <= u.
+#   4. Cada evento siguiente debe tener pu == u del anterior. Un hueco (o un libro cruzado) invalida el libro
+#      y se vuelve a pedir la foto; mientras tanto las consultas devuelven None y el bot usa REST.
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from decimal import Decimal, InvalidOperation
+
+from .binance_client import get_order_book_depth
+from .logger_setup import get_logger
+from .market_stream import UMFuturesWebsocketClient, _resolve_stream_url
+
+ORDER_BOOK_SNAPSHOT_LIMIT = int(os.environ.get('ORDER_BOOK_SNAPSHOT_LIMIT', '100')) # Niveles por lado de la foto REST (peso 5)
+ORDER_BOOK_MAX_AGE_SECONDS = float(os.environ.get('ORDER_BOOK_MAX_AGE_SECONDS', '5')) # Sin eventos más tiempo => no fiarse
+ORDER_BOOK_MAX_LEVELS = 1000 # Niveles por lado que se conservan (se recortan los más alejados)
+ORDER_BOOK_BUFFER_MAX_EVENTS = 1000 # Eventos guardados mientras llega la foto
+ORDER_BOOK_RESYNC_MIN_INTERVAL_SECONDS = 1.0 # Entre fotos REST del mismo símbolo
+ORDER_BOOK_RECONNECT_SECONDS = 1.0
+ORDER_BOOK_RECONNECT_MAX_SECONDS = 30.0
+
+
+class LocalOrderBook:
+    """Libro de un símbolo: niveles precio -> cantidad por lado y estado de la secuencia de updateIds."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._lock = threading.Lock()
+        self.bids = {} # precio (Decimal) -> cantidad (Decimal)
+        self.asks = {}
+        # Precios de cada lado en orden ascendente (bisect): mejor bid/ask y profundidad sin recorrer el dict
+        self._bid_prices = []
+        self._ask_prices = []
+        self.last_update_id = None # 'u' del último evento aplicado (o lastUpdateId de la foto)
+        self.synced = False
+        self.last_event_at = 0.0 # time.monotonic() del último evento aplicado
+        self.event_time_ms = 0
+        self._buffer = deque(maxlen=ORDER_BOOK_BUFFER_MAX_EVENTS)
+        self._first_event_pending = True # El primer evento tras la foto se valida con U/u, no con pu
+        self.resyncs = 0
+        self.gaps = 0
+
+    # --- Foto y diferencias ---
+
+    def invalidate(self):
+        with self._lock:
+            self.synced = False
+            self.last_update_id = None
+            self._buffer.clear()
+
+    def apply_snapshot(self, snapshot: dict) -> bool:
+        """Carga la foto REST y aplica los eventos del buffer posteriores a ella. False si hay hueco."""
+        with self._lock:
+            try:
+                self.bids = {Decimal(p): Decimal(q) for p, q in snapshot['bids'] if Decimal(q) > 0}
+                self.asks = {Decimal(p): Decimal(q) for p, q in snapshot['asks'] if Decimal(q) > 0}
+                self.last_update_id = int(snapshot['lastUpdateId'])
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                return False
+            self._bid_prices = sorted(self.bids)
+            self._ask_prices = sorted(self.asks)
+            self.synced = True
+            self._first_event_pending = True
+            self.last_event_at = time.monotonic()
+            self.resyncs += 1
+            buffered, self._buffer = list(self._buffer), deque(maxlen=ORDER_BOOK_BUFFER_MAX_EVENTS)
+            for event in buffered:
+                if not self._apply_diff_locked(event):
+                    return False
+            return True
+
+    def apply_diff(self, event: dict) -> bool:
+        """
+        Aplica un evento depthUpdate ({'U', 'u', 'pu', 'b', 'a', 'E'}). Sin foto, lo guarda en el buffer.
+        False si rompe la secuencia: el libro queda invalidado y hay que pedir otra foto.
+        """
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(event)
+                return True
+            return self._apply_diff_locked(event)
+
+    def _apply_diff_locked(self, event: dict) -> bool:
+        first_id, final_id = int(event['U']), int(event['u'])
+        if final_id < self.last_update_id:
+            return True # Anterior a la foto
+        if self._first_event_pending:
+            if first_id > self.last_update_id:
+                return self._gap_locked(event)
+            self._first_event_pending = False
+        elif int(event.get('pu', -1)) != self.last_update_id:
+            return self._gap_locked(event)
+        for levels, book, prices in ((event.get('b', ()), self.bids, self._bid_prices), (event.get('a', ()), self.asks, self._ask_prices)):
+            for price_str, qty_str in levels:
+                price, qty = Decimal(price_str), Decimal(qty_str)
+                if qty == 0:
+                    if book.pop(price, None) is not None:
+                        del prices[bisect_left(prices, price)]
+                else:
+                    if price not in book:
+                        insort(prices, price)
+                    book[price] = qty
+        self.last_update_id = final_id
+        self.last_event_at = time.monotonic()
+        self.event_time_ms = int(event.get('E') or 0)
+        if self._bid_prices and self._ask_prices and self._bid_prices[-1] >= self._ask_prices[0]:
+            return self._gap_locked(event, reason='libro cruzado')
+        if len(self.bids) > 2 * ORDER_BOOK_MAX_LEVELS or len(self.asks) > 2 * ORDER_BOOK_MAX_LEVELS:
+            self._trim_locked()
+        return True
+
+    def _gap_locked(self, event: dict, reason: str = 'hueco de secuencia') -> bool:
+        get_logger().warning(f"[{self.symbol}] Libro local invalidado ({reason}: último u={self.last_update_id}, evento U={event.get('U')} u={event.get('u')} pu={event.get('pu')}). Se pedirá una foto nueva.")
+        self.gaps += 1
+        self.synced = False
+        self.last_update_id = None
+        self._buffer.clear()
+        return False
+
+    def _trim_locked(self):
+        self._bid_prices = self._bid_prices[-ORDER_BOOK_MAX_LEVELS:]
+        self._ask_prices = self._ask_prices[:ORDER_BOOK_MAX_LEVELS]
+        self.bids = {price: self.bids[price] for price in self._bid_prices}
+        self.asks = {price: self.asks[price] for price in self._ask_prices}
+
+    # --- Consultas ---
+
+    def is_fresh(self) -> bool:
+        return self.synced and time.monotonic() - self.last_event_at <= ORDER_BOOK_MAX_AGE_SECONDS
+
+    def best_bid_ask(self) -> tuple[Decimal, Decimal] | None:
+        """(mejor bid, mejor ask) o None si el libro no está sincronizado, está viejo o vacío."""
+        with self._lock:
+            if not self.is_fresh() or not self._bid_prices or not self._ask_prices:
+                return None
+            return self._bid_prices[-1], self._ask_prices[0]
+
+    def depth(self, levels: int = 10) -> dict | None:
+        """Los `levels` primeros niveles por lado: {'bids': [(precio, cantidad), ...], 'asks': [...]}."""
+        with self._lock:
+            if not self.is_fresh():
+                return None
+            return {
+                'bids': [(price, self.bids[price]) for price in reversed(self._bid_prices[-levels:])] if levels > 0 else [],
+                'asks': [(price, self.asks[price]) for price in self._ask_prices[:levels]],
+                'last_update_id': self.last_update_id,
+                'event_time_ms': self.event_time_ms,
+            }
+
+
+class OrderBookCache:
+    """Websocket de profundidad compartido y un LocalOrderBook por símbolo seguido."""
+
+    def __init__(self, stream_url: str | None = None):
+        self.stream_url = stream_url
+        self._lock = threading.RLock()
+        self._client = None
+        self._books = {} # símbolo -> LocalOrderBook
+        self._resyncing = set() # Símbolos con una foto REST en curso
+        self._last_resync = {} # símbolo -> time.monotonic() de la última foto pedida
+        self._request_id = 0
+        self._reconnect_timer = None
+        self._reconnect_delay = ORDER_BOOK_RECONNECT_SECONDS
+        self._stopped = False
+
+    # --- Conexión ---
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    def _ensure_client_locked(self) -> bool:
+        if self._client is not None:
+            return True
+        logger = get_logger()
+        if UMFuturesWebsocketClient is None:
+            return False
+        if self.stream_url is None:
+            self.stream_url = _resolve_stream_url()
+        try:
+            self._client = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error,
+            )
+        except Exception as e:
+            logger.error(f"No se pudo abrir el stream de profundidad ({self.stream_url}): {e}")
+            self._client = None
+            return False
+        self._reconnect_delay = ORDER_BOOK_RECONNECT_SECONDS
+        logger.info(f"Stream de profundidad conectado a {self.stream_url}.")
+        return True
+
+    def _send_subscription(self, symbol: str, action: str):
+        try:
+            self._client.diff_book_depth(symbol=symbol.lower(), speed=100, id=self._next_id(), action=action)
+        except Exception as e:
+            get_logger().error(f"[{symbol}] Error al enviar {action} de depth@100ms: {e}")
+
+    def _on_close(self, _socket_manager, *args):
+        with self._lock:
+            self._client = None
+            for book in self._books.values():
+                book.invalidate()
+            if self._stopped or not self._books:
+                return
+            get_logger().warning(f"Stream de profundidad cerrado. Reintentando conexión en {self._reconnect_delay:.0f}s...")
+            if self._reconnect_timer is None or not self._reconnect_timer.is_alive():
+                self._reconnect_timer = threading.Timer(self._reconnect_delay, self._reconnect)
+                self._reconnect_timer.daemon = True
+                self._reconnect_timer.start()
+                self._reconnect_delay = min(self._reconnect_delay * 2, ORDER_BOOK_RECONNECT_MAX_SECONDS)
+
+    def _on_error(self, _socket_manager, error):
+        get_logger().error(f"Error en el stream de profundidad: {error}")
+
+    def _reconnect(self):
+        with self._lock:
+            self._reconnect_timer = None
+            if self._stopped or not self._books:
+                return
+            if not self._ensure_client_locked():
+                self._on_close(None)
+                return
+            for symbol in self._books:
+                self._send_subscription(symbol, 'SUBSCRIBE')
+                self._request_resync(symbol)
+
+    # --- Seguimiento de símbolos ---
+
+    def track(self, symbol: str) -> bool:
+        """Empieza a mantener el libro del símbolo. False si no hay websocket (se sigue con REST)."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._stopped = False
+            if symbol in self._books:
+                return True
+            if not self._ensure_client_locked():
+                return False
+            self._books[symbol] = LocalOrderBook(symbol)
+            self._send_subscription(symbol, 'SUBSCRIBE')
+            self._request_resync(symbol)
+        get_logger().debug(f"[{symbol}] Libro local de órdenes: suscrito a depth@100ms.")
+        return True
+
+    def untrack(self, symbol: str):
+        symbol = symbol.upper()
+        with self._lock:
+            if self._books.pop(symbol, None) is None:
+                return
+            self._last_resync.pop(symbol, None)
+            if self._client is not None:
+                self._send_subscription(symbol, 'UNSUBSCRIBE')
+
+    def tracked_symbols(self) -> list:
+        with self._lock:
+            return sorted(self._books)
+
+    def book(self, symbol: str) -> LocalOrderBook | None:
+        return self._books.get(symbol.upper())
+
+    def best_bid_ask(self, symbol: str) -> tuple[Decimal, Decimal] | None:
+        """Mejor bid/ask de memoria, o None si el símbolo no tiene un libro sincronizado y reciente."""
+        book = self._books.get(symbol.upper())
+        return book.best_bid_ask() if book is not None else None
+
+    def depth(self, symbol: str, levels: int = 10) -> dict | None:
+        book = self._books.get(symbol.upper())
+        return book.depth(levels) if book is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {symbol: {'synced': book.synced, 'fresh': book.is_fresh(), 'last_update_id': book.last_update_id,
+                             'bid_levels': len(book.bids), 'ask_levels': len(book.asks),
+                             'resyncs': book.resyncs, 'gaps': book.gaps}
+                    for symbol, book in self._books.items()}
+
+    # --- Foto REST ---
+
+    def _request_resync(self, symbol: str):
+        """Pide la foto en un hilo aparte; los eventos que lleguen mientras tanto quedan en el buffer."""
+        with self._lock:
+            now = time.monotonic()
+            if symbol in self._resyncing or self._stopped or now - self._last_resync.get(symbol, 0.0) < ORDER_BOOK_RESYNC_MIN_INTERVAL_SECONDS:
+                return
+            self._resyncing.add(symbol)
+            self._last_resync[symbol] = now
+        thread = threading.Thread(target=self._resync, args=(symbol,), name=f"OrderBookResync-{symbol}", daemon=True)
+        thread.start()
+
+    def _resync(self, symbol: str):
+        try:
+            book = self._books.get(symbol)
+            if book is None:
+                return
+            snapshot = get_order_book_depth(symbol, limit=ORDER_BOOK_SNAPSHOT_LIMIT)
+            if snapshot is None or self._books.get(symbol) is not book:
+                return # Sin foto: se reintenta con el siguiente evento
+            if book.apply_snapshot(snapshot):
+                get_logger().debug(f"[{symbol}] Libro local sincronizado (lastUpdateId={book.last_update_id}).")
+        finally:
+            with self._lock:
+                self._resyncing.discard(symbol)
+
+    # --- Mensajes ---
+
+    def _on_message(self, _socket_manager, message):
+        try:
+            data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        except ValueError:
+            return
+        if isinstance(data, dict) and 'data' in data: # Formato de stream combinado
+            data = data['data']
+        if not isinstance(data, dict) or data.get('e') != 'depthUpdate':
+            return # Respuestas a SUBSCRIBE/UNSUBSCRIBE
+        self.dispatch_depth_update(data)
+
+    def dispatch_depth_update(self, event: dict):
+        """Aplica un depthUpdate a su libro; si rompe la secuencia o no hay foto, pide una nueva."""
+        symbol = str(event.get('s', '')).upper()
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        try:
+            applied = book.apply_diff(event)
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            book.invalidate()
+            applied = False
+        if not applied or not book.synced:
+            self._request_resync(symbol)
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._reconnect_timer is not None:
+                self._reconnect_timer.cancel()
+                self._reconnect_timer = None
+            client, self._client = self._client, None
+            self._books.clear()
+        if client is not None:
+            try:
+                client.stop()
+            except Exception as e:
+                get_logger().warning(f"Error al cerrar el stream de profundidad: {e}")
+
+
+_order_book_cache = None
+_order_book_cache_lock = threading.Lock()
+
+
+def get_order_book_cache() -> OrderBookCache:
+    """Instancia única de la caché de libros para el proceso."""
+    global _order_book_cache
+    with _order_book_cache_lock:
+        if _order_book_cache is None:
+            _order_book_cache = OrderBookCache()
+        return _order_book_cache
+
+
+def stop_order_book_cache():
+    """Cierra el stream de profundidad (apagado de workers)."""
+    with _order_book_cache_lock:
+        cache = _order_book_cache
+    if cache is not None:
+        cache.stop()
@@ -0,0 +1,243 @@
+# Persecución de órdenes LIMIT (entrada y salida) hacia el mejor precio del libro.
+# Mientras una orden LIMIT propia sigue NEW, en cada ciclo se compara su precio con el mejor bid/ask y, si
+# el libro se ha alejado, se re-precia: primero con el endpoint de modificación (PUT /fapi/v1/order, mismo
+# orderId) y, si Binance lo rechaza, con cancel + new. La persecución se detiene si el nuevo precio se aleja
+# del precio original más de max_distance_pct; a partir de ahí manda order_timeout_seconds como siempre.
+# Si una orden se llenó en parte antes del cancel, la nueva sólo repone el resto (redondeado con los filtros del
+# símbolo) y el chaser acumula lo ejecutado: el llenado que ve el bot es la suma de todas las órdenes. Si el resto
+# no se puede colocar, lo ejecutado hasta entonces es el llenado.
+# Con post_only las órdenes van como GTX al lado pasivo del libro (bid para BUY, ask para SELL).
+
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+from .binance_client import (
+    get_order_book_ticker,
+    modify_futures_limit_order,
+    cancel_futures_order,
+    create_futures_limit_order,
+    get_order_status,
+)
+from .logger_setup import get_logger
+from .market_stream import get_market_stream
+from .order_book import get_order_book_cache
+from .order_filters import get_symbol_filters
+
+ORDER_CHASE_MIN_INTERVAL_SECONDS = float(os.environ.get('ORDER_CHASE_MIN_INTERVAL_SECONDS', '1'))
+ORDER_CHASE_TICK_MAX_AGE_SECONDS = 2.0 # Un bookTicker del stream más viejo que esto se pide por REST
+
+
+def chase_target_price(side: str, bid: Decimal, ask: Decimal, post_only: bool) -> Decimal:
+    """Precio objetivo: lado agresivo (ask para BUY, bid para SELL) o el pasivo si la orden es post-only."""
+    if side == 'BUY':
+        return bid if post_only else ask
+    return ask if post_only else bid
+
+
+def get_best_bid_ask(symbol: str) -> tuple[Decimal, Decimal] | None:
+    """Mejor bid/ask: libro local (order_book.py), último tick del stream si está fresco o book_ticker por REST."""
+    best = get_order_book_cache().best_bid_ask(symbol)
+    if best is not None:
+        return best
+    last_tick = get_market_stream().last_tick(symbol)
+    if last_tick and time.time() * 1000 - last_tick[2] <= ORDER_CHASE_TICK_MAX_AGE_SECONDS * 1000:
+        return last_tick[0], last_tick[1]
+    ticker = get_order_book_ticker(symbol)
+    if not ticker or not ticker.get('bidPrice') or not ticker.get('askPrice'):
+        return None
+    return Decimal(ticker['bidPrice']), Decimal(ticker['askPrice'])
+
+
+class ExecutionMetrics:
+    """Tasa de llenado y tiempo hasta el llenado de las órdenes LIMIT, por tipo ('entry' / 'exit')."""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._counts = {} # tipo -> {'placed', 'filled', 'unfilled', 'reprices', 'modify_fallbacks'}
+        self._fill_seconds = {} # tipo -> deque de segundos hasta el llenado
+        self._window = window
+
+    def _bucket(self, kind: str) -> dict:
+        return self._counts.setdefault(kind, {'placed': 0, 'filled': 0, 'unfilled': 0, 'reprices': 0, 'modify_fallbacks': 0})
+
+    def record(self, kind: str, event: str, amount: int = 1):
+        with self._lock:
+            self._bucket(kind)[event] += amount
+
+    def record_fill(self, kind: str, seconds: float):
+        with self._lock:
+            self._bucket(kind)['filled'] += 1
+            self._fill_seconds.setdefault(kind, deque(maxlen=self._window)).append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for kind, counts in self._counts.items():
+                finished = counts['filled'] + counts['unfilled']
+                fill_seconds = sorted(self._fill_seconds.get(kind, ()))
+                result[kind] = dict(counts)
+                result[kind]['fill_rate'] = round(counts['filled'] / finished, 4) if finished else None
+                result[kind]['time_to_fill_seconds'] = {
+                    'mean': round(statistics.fmean(fill_seconds), 3),
+                    'p50': round(statistics.median(fill_seconds), 3),
+                    'max': round(fill_seconds[-1], 3),
+                } if fill_seconds else None
+            return result
+
+
+_execution_metrics = ExecutionMetrics()
+
+
+def get_execution_metrics() -> dict:
+    return _execution_metrics.snapshot()
+
+
+class OrderChaser:
+    """Seguimiento de UNA orden LIMIT de trabajo del bot (entrada o salida)."""
+
+    def __init__(self, symbol: str, kind: str, side: str, order: dict, post_only: bool,
+                 max_distance_pct: Decimal, price_adjuster):
+        self.symbol = symbol
+        self.kind = kind # 'entry' o 'exit'
+        self.side = side
+        self.order_id = order['orderId']
+        self.price = Decimal(str(order.get('price', '0')))
+        self.quantity = order.get('origQty')
+        self.anchor_price = self.price # Precio original: referencia de la distancia máxima
+        self.post_only = post_only
+        self.max_distance_pct = max_distance_pct
+        self._adjust_price = price_adjuster # Redondeo al tick del símbolo (TradingBot._adjust_price)
+        self.placed_at = time.time()
+        self._last_step = 0.0
+        self.reprices = 0
+        self.exhausted = False # Alcanzó la distancia máxima: se deja de perseguir
+        self.finished = False
+        # Llenados parciales de las órdenes ya reemplazadas (cancel+new)
+        self.filled_qty = Decimal('0')
+        self.filled_notional = Decimal('0')
+        self.filled_order_ids = []
+        _execution_metrics.record(kind, 'placed')
+
+    def due(self) -> bool:
+        """True si toca otro step() (sigue persiguiendo y pasó ORDER_CHASE_MIN_INTERVAL_SECONDS desde el último)."""
+        return not (self.exhausted or self.finished) and time.monotonic() - self._last_step >= ORDER_CHASE_MIN_INTERVAL_SECONDS
+
+    def step(self) -> dict:
+        """
+        Re-precia la orden si hace falta. Devuelve {'action': ...}:
+          'none'      - nada que hacer (precio ya en el objetivo, cadencia, límite de distancia...);
+          'modified'  - misma orden con nuevo precio;
+          'replaced'  - cancel+new: 'order' es la orden nueva (cambia el orderId);
+          'filled'    - la orden se llenó mientras se intentaba re-preciar, o se canceló con parte ejecutada y el
+                        resto no se pudo colocar: 'order' trae su estado (pasarlo por combined_fill);
+          'gone'      - se canceló sin nada ejecutado y no se pudo colocar la nueva (el bot debe reevaluar).
+        """
+        now = time.monotonic()
+        if self.exhausted or self.finished or now - self._last_step < ORDER_CHASE_MIN_INTERVAL_SECONDS:
+            return {'action': 'none'}
+        self._last_step = now
+        logger = get_logger()
+        best = get_best_bid_ask(self.symbol)
+        if best is None:
+            return {'action': 'none'}
+        target = self._adjust_price(chase_target_price(self.side, best[0], best[1], self.post_only))
+        if target == self.price or target <= Decimal('0'):
+            return {'action': 'none'}
+        # Sólo se persigue en contra (el libro se alejó); si vino hacia la orden, se llenará sola
+        if (self.side == 'BUY' and target < self.price) or (self.side == 'SELL' and target > self.price):
+            return {'action': 'none'}
+        if self.anchor_price > Decimal('0') and self.max_distance_pct > Decimal('0'):
+            distance_pct = abs(target - self.anchor_price) / self.anchor_price * Decimal('100')
+            if distance_pct > self.max_distance_pct:
+                self.exhausted = True
+                logger.info(f"[{self.symbol}] Persecución de la orden {self.kind} {self.order_id} detenida: {target} está a {distance_pct:.3f}% del precio original {self.anchor_price} (máx {self.max_distance_pct}%).")
+                return {'action': 'none'}
+
+        modified = modify_futures_limit_order(self.symbol, self.order_id, self.side, float(self.quantity), float(target))
+        if modified and modified.get('orderId'):
+            self.price = target
+            self.reprices += 1
+            _execution_metrics.record(self.kind, 'reprices')
+            logger.info(f"[{self.symbol}] Orden {self.kind} {self.order_id} re-preciada (modify) a {target}.")
+            if modified.get('status') == 'FILLED':
+                return {'action': 'filled', 'order': modified}
+            return {'action': 'modified'}
+
+        # Fallback: cancel + new
+        _execution_metrics.record(self.kind, 'modify_fallbacks')
+        cancel_futures_order(self.symbol, self.order_id)
+        after_cancel = get_order_status(self.symbol, self.order_id)
+        status = after_cancel.get('status') if after_cancel else 'UNKNOWN'
+        if status == 'FILLED':
+            return {'action': 'filled', 'order': after_cancel}
+        if status != 'CANCELED':
+            logger.warning(f"[{self.symbol}] No se pudo cancelar la orden {self.kind} {self.order_id} para re-preciarla (estado {status}).")
+            return {'action': 'none'}
+        executed = Decimal(str(after_cancel.get('executedQty') or '0'))
+        # Se llenó en parte antes de cancelar: reponer sólo lo que falta, redondeado al stepSize
+        remainder = Decimal(str(after_cancel.get('origQty') or self.quantity)) - executed
+        filters = get_symbol_filters(self.symbol)
+        if filters is not None:
+            remainder = filters.normalize_quantity(remainder)
+            # Las salidas cierran posición: sin MIN_NOTIONAL
+            check = filters.check('LIMIT', self.side, quantity=remainder, price=target, reduce_only=self.kind == 'exit')
+            placeable, reason = check.ok, check.summary()
+        else:
+            placeable, reason = remainder > Decimal('0'), f"cantidad {remainder}"
+        has_fill = executed > Decimal('0') or self.filled_qty > Decimal('0')
+        if not placeable:
+            if has_fill:
+                logger.warning(f"[{self.symbol}] Orden {self.kind} {self.order_id} cancelada con {self.filled_qty + executed} ejecutado; el resto no se puede colocar ({reason}). Se toma lo ejecutado como el llenado.")
+                return {'action': 'filled', 'order': after_cancel}
+            logger.warning(f"[{self.symbol}] Orden {self.kind} {self.order_id} cancelada pero el resto no se puede colocar ({reason}).")
+            self.finish(filled=False)
+            return {'action': 'gone'}
+        new_order = create_futures_limit_order(self.symbol, self.side, float(remainder), float(target),
+                                               time_in_force='GTX' if self.post_only else 'GTC')
+        if not new_order or not new_order.get('orderId'):
+            if has_fill:
+                logger.warning(f"[{self.symbol}] Orden {self.kind} {self.order_id} cancelada con {self.filled_qty + executed} ejecutado y la nueva @ {target} no se pudo colocar. Se toma lo ejecutado como el llenado.")
+                return {'action': 'filled', 'order': after_cancel}
+            logger.warning(f"[{self.symbol}] Orden {self.kind} {self.order_id} cancelada pero la nueva @ {target} no se pudo colocar.")
+            self.finish(filled=False)
+            return {'action': 'gone'}
+        if executed > Decimal('0'):
+            self.filled_qty += executed
+            self.filled_notional += executed * Decimal(str(after_cancel.get('avgPrice') or self.price))
+            self.filled_order_ids.append(self.order_id)
+        self.quantity = remainder
+        logger.info(f"[{self.symbol}] Orden {self.kind} {self.order_id} re-preciada (cancel+new) a {target}: nueva orden {new_order['orderId']}.")
+        self.order_id = new_order['orderId']
+        self.price = target
+        self.reprices += 1
+        _execution_metrics.record(self.kind, 'reprices')
+        return {'action': 'replaced', 'order': new_order}
+
+    def combined_fill(self, order: dict) -> dict:
+        """
+        Estado de `order` (la orden actual) sumando lo ejecutado por las órdenes que reemplazó: executedQty total,
+        avgPrice ponderado y 'orderIds' con todas las órdenes que tienen fills. Sin parciales previos, `order` tal cual.
+        """
+        if self.filled_qty <= Decimal('0') or order.get('orderIds'):
+            return order
+        executed = Decimal(str(order.get('executedQty') or '0'))
+        total = self.filled_qty + executed
+        combined = dict(order)
+        combined['executedQty'] = str(total)
+        combined['avgPrice'] = str((self.filled_notional + executed * Decimal(str(order.get('avgPrice') or '0'))) / total)
+        combined['orderIds'] = self.filled_order_ids + ([order['orderId']] if executed > Decimal('0') else [])
+        return combined
+
+    def finish(self, filled: bool):
+        """Cierra el seguimiento y registra el resultado en las métricas (una sola vez)."""
+        if self.finished:
+            return
+        self.finished = True
+        if filled:
+            _execution_metrics.record_fill(self.kind, time.time() - self.placed_at)
+        else:
+            _execution_metrics.record(self.kind, 'unfilled')
@@ -0,0 +1,173 @@
+# Ejecutor de órdenes compartido por todos los bots, separado del bucle de decisión.
+# La colocación, cancelación y re-consulta de órdenes se hacía en línea dentro de run_once: una respuesta
+# lenta de Binance bloqueaba a ese símbolo (sus otras órdenes y sus trailing stops). Aquí cada operación es
+# una intención (OrderIntent) que se encola en una cola de prioridad atendida por su propio pool de hilos:
+# primero las cancelaciones, después las órdenes de protección/salida (TP, SL, trailing, LIMIT SELL) y al
+# final las entradas. Al terminar, el callback de la intención avisa al bot (que despierta a su worker y
+# aplica el resultado en su propio hilo), así el bucle de decisión nunca espera por E/S de órdenes.
+
+import itertools
+import os
+import queue
+import threading
+import time
+
+from .logger_setup import get_logger
+
+PRIORITY_CANCEL = 0
+PRIORITY_PROTECTIVE = 1
+PRIORITY_ENTRY = 2
+ORDER_EXECUTOR_WORKERS = int(os.environ.get('ORDER_EXECUTOR_WORKERS', '4'))
+
+_PRIORITY_NAMES = {PRIORITY_CANCEL: 'cancel', PRIORITY_PROTECTIVE: 'protective', PRIORITY_ENTRY: 'entry'}
+
+
+class OrderIntent:
+    """Una operación de órdenes pendiente de ejecutar: función a llamar, prioridad y resultado."""
+
+    def __init__(self, symbol: str, kind: str, priority: int, fn, args: tuple, kwargs: dict, callback=None):
+        self.symbol = symbol
+        self.kind = kind # 'entry', 'exit', 'tp_sl', 'cancel_entry', ...
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback # callback(intent), llamado desde el hilo del ejecutor
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def run(self):
+        self.started_at = time.monotonic()
+        try:
+            self.result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+            get_logger().error(f"[{self.symbol}] Error ejecutando la intención de orden '{self.kind}': {e}", exc_info=True)
+        self.finished_at = time.monotonic()
+        self.done.set()
+
+    @property
+    def wait_ms(self) -> float | None:
+        return (self.started_at - self.submitted_at) * 1000 if self.started_at is not None else None
+
+    @property
+    def exec_ms(self) -> float | None:
+        return (self.finished_at - self.started_at) * 1000 if self.finished_at is not None else None
+
+
+class OrderExecutor:
+    """Cola de prioridad de intenciones de órdenes y su pool de hilos (arranca con la primera intención)."""
+
+    def __init__(self, workers: int = ORDER_EXECUTOR_WORKERS):
+        self.workers = max(1, workers)
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count() # Desempate FIFO dentro de la misma prioridad
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopped = False
+        self._in_flight = 0
+        self._stats = {} # prioridad -> {'completed', 'errors', 'wait_ms_total', 'exec_ms_total', 'wait_ms_max'}
+
+    def _ensure_workers_locked(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker_loop, args=(self._queue,), name=f"OrderExecutor-{len(self._threads) + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, symbol: str, kind: str, priority: int, fn, *args, callback=None, **kwargs) -> OrderIntent:
+        """Encola una intención. El callback (si hay) recibe la intención terminada desde un hilo del ejecutor."""
+        intent = OrderIntent(symbol, kind, priority, fn, args, kwargs, callback)
+        with self._lock:
+            self._stopped = False
+            self._ensure_workers_locked()
+            self._in_flight += 1
+            self._queue.put((priority, next(self._sequence), intent))
+        return intent
+
+    def run_inline(self, symbol: str, kind: str, priority: int, fn, *args, **kwargs) -> OrderIntent:
+        """Ejecuta la intención en el hilo que llama (modo síncrono: benchmarks o ejecución asíncrona desactivada)."""
+        intent = OrderIntent(symbol, kind, priority, fn, args, kwargs)
+        intent.run()
+        self._record(intent)
+        return intent
+
+    def _worker_loop(self, work_queue: queue.PriorityQueue):
+        while True:
+            _priority, _sequence, intent = work_queue.get()
+            if intent is None: # Señal de parada
+                return
+            intent.run()
+            with self._lock:
+                self._in_flight -= 1
+            self._record(intent)
+            if intent.callback is not None:
+                try:
+                    intent.callback(intent)
+                except Exception as e:
+                    get_logger().error(f"[{intent.symbol}] Error en el callback de la intención '{intent.kind}': {e}", exc_info=True)
+
+    def _record(self, intent: OrderIntent):
+        with self._lock:
+            stats = self._stats.setdefault(intent.priority, {'completed': 0, 'errors': 0, 'wait_ms_total': 0.0, 'exec_ms_total': 0.0, 'wait_ms_max': 0.0})
+            stats['completed'] += 1
+            stats['errors'] += 1 if intent.error is not None else 0
+            stats['wait_ms_total'] += intent.wait_ms or 0.0
+            stats['exec_ms_total'] += intent.exec_ms or 0.0
+            stats['wait_ms_max'] = max(stats['wait_ms_max'], intent.wait_ms or 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_priority = {}
+            for priority, stats in sorted(self._stats.items()):
+                completed = stats['completed']
+                by_priority[_PRIORITY_NAMES.get(priority, str(priority))] = {
+                    'completed': completed,
+                    'errors': stats['errors'],
+                    'avg_wait_ms': round(stats['wait_ms_total'] / completed, 2) if completed else None,
+                    'max_wait_ms': round(stats['wait_ms_max'], 2),
+                    'avg_exec_ms': round(stats['exec_ms_total'] / completed, 2) if completed else None,
+                }
+            return {'workers': len([t for t in self._threads if t.is_alive()]), 'queued': self._queue.qsize(),
+                    'in_flight': self._in_flight, 'by_priority': by_priority}
+
+    def stop(self, timeout: float = 5.0):
+        """Deja terminar lo que está en curso y detiene los hilos (lo ya encolado se ejecuta antes de parar)."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            threads, self._threads = self._threads, []
+            # Los hilos que sigan ocupados tras el join se quedan con su cola y sus señales de parada:
+            # si se vuelve a encolar, los hilos nuevos atienden una cola nueva y no consumen esas señales
+            stopping_queue, self._queue = self._queue, queue.PriorityQueue()
+        for _ in threads:
+            # Prioridad más baja que cualquier intención: las pendientes se ejecutan antes
+            stopping_queue.put((float('inf'), next(self._sequence), None))
+        for thread in threads:
+            thread.join(timeout)
+
+
+_order_executor = None
+_order_executor_lock = threading.Lock()
+
+
+def get_order_executor() -> OrderExecutor:
+    """Instancia única del ejecutor de órdenes para el proceso."""
+    global _order_executor
+    with _order_executor_lock:
+        if _order_executor is None:
+            _order_executor = OrderExecutor()
+        return _order_executor
+
+
+def stop_order_executor():
+    """Detiene los hilos del ejecutor (apagado de workers)."""
+    with _order_executor_lock:
+        executor = _order_executor
+    if executor is not None:
+        executor.stop()
@@ -0,0 +1,213 @@
+# Validación local de órdenes contra los filtros del símbolo (exchange_info) antes de enviarlas.
+# Una orden rechazada por Binance (-1111 precisión, -4164 notional mínimo, -4003/-4005 cantidad, -4131/-4016
+# PERCENT_PRICE...) cuesta un viaje de ida y vuelta, peso de API y a menudo un estado ERROR con su ciclo de
+# reseteo. Aquí los filtros de cada símbolo se compilan una vez a Decimal (PRICE_FILTER, LOT_SIZE,
+# MARKET_LOT_SIZE, MIN_NOTIONAL, PERCENT_PRICE) y cada orden se normaliza y se comprueba en memoria.
+# Los fallos se devuelven como motivos estructurados ({'filter', 'code', 'message', 'value', 'limit'}).
+
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_UP, InvalidOperation
+
+# Tipos de orden que se validan con MARKET_LOT_SIZE en lugar de LOT_SIZE
+MARKET_ORDER_TYPES = ('MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET', 'TRAILING_STOP_MARKET')
+
+
+def _decimal_or_none(value) -> Decimal | None:
+    try:
+        result = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return result if result.is_finite() else None
+
+
+def _floor_to_step(value: Decimal, step: Decimal | None) -> Decimal:
+    if not step or step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+def _ceil_to_step(value: Decimal, step: Decimal | None) -> Decimal:
+    if not step or step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_UP) * step
+
+
+def _is_multiple(value: Decimal, step: Decimal | None) -> bool:
+    return not step or step <= 0 or value % step == 0
+
+
+class OrderCheck:
+    """Resultado de validar una orden: precio/cantidad normalizados y motivos de rechazo (vacío si es válida)."""
+
+    def __init__(self, symbol: str, order_type: str, side: str, quantity: Decimal | None, price: Decimal | None,
+                 stop_price: Decimal | None = None):
+        self.symbol = symbol
+        self.order_type = order_type
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.stop_price = stop_price
+        self.reasons = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.reasons
+
+    def reject(self, filter_type: str, code: str, message: str, value=None, limit=None):
+        self.reasons.append({'filter': filter_type, 'code': code, 'message': message,
+                             'value': str(value) if value is not None else None,
+                             'limit': str(limit) if limit is not None else None})
+
+    def summary(self) -> str:
+        return '; '.join(f"{r['filter']}/{r['code']}: {r['message']}" for r in self.reasons) or 'OK'
+
+
+class SymbolFilters:
+    """Filtros de un símbolo compilados a Decimal a partir de su entrada de exchange_info."""
+
+    def __init__(self, symbol_info: dict):
+        self.symbol = symbol_info.get('symbol', '')
+        self.tick_size = self.min_price = self.max_price = None
+        self.step_size = self.min_qty = self.max_qty = None
+        self.market_step_size = self.market_min_qty = self.market_max_qty = None
+        self.min_notional = None
+        self.multiplier_up = self.multiplier_down = None
+        for f in symbol_info.get('filters', []):
+            filter_type = f.get('filterType')
+            if filter_type == 'PRICE_FILTER':
+                self.tick_size = _decimal_or_none(f.get('tickSize'))
+                self.min_price = _decimal_or_none(f.get('minPrice'))
+                self.max_price = _decimal_or_none(f.get('maxPrice'))
+            elif filter_type == 'LOT_SIZE':
+                self.step_size = _decimal_or_none(f.get('stepSize'))
+                self.min_qty = _decimal_or_none(f.get('minQty'))
+                self.max_qty = _decimal_or_none(f.get('maxQty'))
+            elif filter_type == 'MARKET_LOT_SIZE':
+                self.market_step_size = _decimal_or_none(f.get('stepSize'))
+                self.market_min_qty = _decimal_or_none(f.get('minQty'))
+                self.market_max_qty = _decimal_or_none(f.get('maxQty'))
+            elif filter_type == 'MIN_NOTIONAL':
+                self.min_notional = _decimal_or_none(f.get('notional', f.get('minNotional')))
+            elif filter_type == 'PERCENT_PRICE':
+                self.multiplier_up = _decimal_or_none(f.get('multiplierUp'))
+                self.multiplier_down = _decimal_or_none(f.get('multiplierDown'))
+        if self.step_size is None and symbol_info.get('quantityPrecision') is not None:
+            # Sin LOT_SIZE: la precisión de cantidad hace de paso
+            self.step_size = Decimal('1e-' + str(int(symbol_info['quantityPrecision'])))
+        if self.market_step_size is None:
+            self.market_step_size = self.step_size
+
+    # --- Normalización ---
+
+    def normalize_price(self, price: Decimal) -> Decimal:
+        """Redondea el precio hacia abajo al tickSize."""
+        return _floor_to_step(Decimal(str(price)), self.tick_size)
+
+    def normalize_quantity(self, quantity: Decimal, order_type: str = 'LIMIT') -> Decimal:
+        """Redondea la cantidad hacia abajo al stepSize (MARKET_LOT_SIZE para órdenes a mercado)."""
+        step = self.market_step_size if order_type in MARKET_ORDER_TYPES else self.step_size
+        return _floor_to_step(Decimal(str(quantity)), step)
+
+    def min_quantity_for(self, price: Decimal, order_type: str = 'LIMIT') -> Decimal | None:
+        """Cantidad mínima que cumple LOT_SIZE y MIN_NOTIONAL a ese precio (redondeada al paso hacia arriba)."""
+        market = order_type in MARKET_ORDER_TYPES
+        min_qty = (self.market_min_qty if market else self.min_qty) or Decimal('0')
+        step = self.market_step_size if market else self.step_size
+        if self.min_notional and price and price > 0:
+            min_qty = max(min_qty, _ceil_to_step(self.min_notional / Decimal(str(price)), step))
+        return min_qty or None
+
+    # --- Validación ---
+
+    def check(self, order_type: str, side: str, quantity=None, price=None, stop_price=None,
+              reference_price=None, close_position: bool = False, reduce_only: bool = False) -> OrderCheck:
+        """
+        Normaliza y valida una orden. `reference_price` (mark price o mejor bid/ask) se usa para el notional de
+        las órdenes a mercado y para PERCENT_PRICE; sin él, esas comprobaciones se omiten.
+        Con close_position la cantidad no se valida (Binance la ignora); con reduce_only no aplica MIN_NOTIONAL.
+        """
+        order_type, side = order_type.upper(), side.upper()
+        quantity = _decimal_or_none(quantity) if quantity is not None else None
+        price = _decimal_or_none(price) if price is not None else None
+        stop_price = _decimal_or_none(stop_price) if stop_price is not None else None
+        reference_price = _decimal_or_none(reference_price) if reference_price is not None else None
+        result = OrderCheck(self.symbol, order_type, side, quantity, price, stop_price)
+
+        for label, value in (('price', price), ('stopPrice', stop_price)):
+            if value is not None:
+                self._check_price(result, label, value)
+
+        if not close_position:
+            if quantity is None:
+                result.reject('LOT_SIZE', 'QTY_MISSING', 'La orden no tiene cantidad.')
+            else:
+                self._check_quantity(result, order_type, quantity)
+                notional_price = price if price is not None else (stop_price if stop_price is not None else reference_price)
+                if not reduce_only and self.min_notional and notional_price and quantity > 0:
+                    notional = quantity * notional_price
+                    if notional < self.min_notional:
+                        result.reject('MIN_NOTIONAL', 'NOTIONAL_TOO_SMALL',
+                                      f"Notional {notional:.4f} menor que el mínimo {self.min_notional}.",
+                                      notional, self.min_notional)
+
+        if order_type == 'LIMIT' and price is not None and reference_price and self.multiplier_up and self.multiplier_down:
+            if side == 'BUY' and price > reference_price * self.multiplier_up:
+                result.reject('PERCENT_PRICE', 'PRICE_ABOVE_BAND',
+                              f"Precio BUY {price} por encima de {reference_price} x {self.multiplier_up}.",
+                              price, reference_price * self.multiplier_up)
+            elif side == 'SELL' and price < reference_price * self.multiplier_down:
+                result.reject('PERCENT_PRICE', 'PRICE_BELOW_BAND',
+                              f"Precio SELL {price} por debajo de {reference_price} x {self.multiplier_down}.",
+                              price, reference_price * self.multiplier_down)
+        return result
+
+    def _check_price(self, result: OrderCheck, label: str, value: Decimal):
+        if value <= 0:
+            result.reject('PRICE_FILTER', 'PRICE_NOT_POSITIVE', f"{label} {value} debe ser mayor que cero.", value)
+            return
+        if self.min_price and value < self.min_price:
+            result.reject('PRICE_FILTER', 'PRICE_BELOW_MIN', f"{label} {value} menor que minPrice {self.min_price}.", value, self.min_price)
+        if self.max_price and value > self.max_price:
+            result.reject('PRICE_FILTER', 'PRICE_ABOVE_MAX', f"{label} {value} mayor que maxPrice {self.max_price}.", value, self.max_price)
+        if not _is_multiple(value, self.tick_size):
+            result.reject('PRICE_FILTER', 'PRICE_NOT_TICK_MULTIPLE', f"{label} {value} no es múltiplo de tickSize {self.tick_size}.", value, self.tick_size)
+
+    def _check_quantity(self, result: OrderCheck, order_type: str, quantity: Decimal):
+        if order_type in MARKET_ORDER_TYPES:
+            filter_type, step, min_qty, max_qty = 'MARKET_LOT_SIZE', self.market_step_size, self.market_min_qty, self.market_max_qty
+        else:
+            filter_type, step, min_qty, max_qty = 'LOT_SIZE', self.step_size, self.min_qty, self.max_qty
+        if quantity <= 0:
+            result.reject(filter_type, 'QTY_NOT_POSITIVE', f"Cantidad {quantity} debe ser mayor que cero.", quantity)
+            return
+        if min_qty and quantity < min_qty:
+            result.reject(filter_type, 'QTY_BELOW_MIN', f"Cantidad {quantity} menor que minQty {min_qty}.", quantity, min_qty)
+        if max_qty and quantity > max_qty:
+            result.reject(filter_type, 'QTY_ABOVE_MAX', f"Cantidad {quantity} mayor que maxQty {max_qty}.", quantity, max_qty)
+        if not _is_multiple(quantity, step):
+            result.reject(filter_type, 'QTY_NOT_STEP_MULTIPLE', f"Cantidad {quantity} no es múltiplo de stepSize {step}.", quantity, step)
+
+
+_symbol_filters = {}
+_symbol_filters_lock = threading.Lock()
+
+
+def register_symbol_filters(symbol_info: dict) -> SymbolFilters | None:
+    """Compila (o recompila) los filtros de un símbolo a partir de su entrada de exchange_info."""
+    if not symbol_info or not symbol_info.get('symbol'):
+        return None
+    filters = SymbolFilters(symbol_info)
+    with _symbol_filters_lock:
+        _symbol_filters[filters.symbol.upper()] = filters
+    return filters
+
+
+def get_symbol_filters(symbol: str) -> SymbolFilters | None:
+    """Filtros compilados del símbolo, o None si todavía no se ha visto su exchange_info."""
+    return _symbol_filters.get(symbol.upper())
+
+
+def check_order(symbol: str, order_type: str, side: str, **kwargs) -> OrderCheck | None:
+    """Valida la orden con los filtros del símbolo; None si no hay filtros compilados (no se puede validar)."""
+    filters = get_symbol_filters(symbol)
+    return filters.check(order_type, side, **kwargs) if filters is not None else None
@@ -0,0 +1,205 @@
+# Motor de PnL no realizado en proceso.
+# Calcula el uPnL de cada posición LONG abierta a partir de su precio de entrada, su cantidad y el mark price
+# en vivo (stream !markPrice@arr@1s: todos los símbolos en una sola suscripción), igual que lo hace Binance
+# para positionRisk. Así _update_open_position_pnl no necesita una llamada firmada por posición y ciclo:
+# sólo reconcilia con positionRisk cada PNL_RECONCILE_SECONDS, cuando el mark price está viejo o cuando el
+# user-data stream (ACCOUNT_UPDATE) avisa de que la posición cambió en Binance.
+
+import json
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from .logger_setup import get_logger
+from .market_stream import UMFuturesWebsocketClient, _resolve_stream_url
+from .user_stream import get_user_stream
+
+PNL_RECONCILE_SECONDS = float(os.environ.get('PNL_RECONCILE_SECONDS', '60'))
+PNL_MAX_MARK_AGE_SECONDS = float(os.environ.get('PNL_MAX_MARK_AGE_SECONDS', '5')) # Mark price más viejo => reconciliar por REST
+PNL_STREAM_RECONNECT_SECONDS = 1.0
+PNL_STREAM_RECONNECT_MAX_SECONDS = 30.0
+
+
+class PnlEngine:
+    """Mark prices de todos los símbolos y posiciones seguidas (entrada/cantidad) para calcular el uPnL."""
+
+    def __init__(self, stream_url: str | None = None):
+        self.stream_url = stream_url
+        self._lock = threading.RLock()
+        self._client = None
+        self._marks = {} # símbolo -> (mark_price: Decimal, recibido_en: float monotonic)
+        self._positions = {} # símbolo -> {'entry_price', 'quantity', 'reconciled_at', 'dirty'}
+        self._reconnect_timer = None
+        self._reconnect_delay = PNL_STREAM_RECONNECT_SECONDS
+        self._stopped = False
+        self._account_listener_attached = False
+
+    # --- Stream de mark price ---
+
+    def _ensure_stream_locked(self) -> bool:
+        if self._client is not None:
+            return True
+        logger = get_logger()
+        if UMFuturesWebsocketClient is None:
+            return False
+        if self.stream_url is None:
+            self.stream_url = _resolve_stream_url()
+        try:
+            self._client = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error,
+            )
+            self._client.mark_price_all_market(speed=1, id=1, action='SUBSCRIBE')
+        except Exception as e:
+            logger.error(f"No se pudo abrir el stream de mark price ({self.stream_url}): {e}")
+            self._client = None
+            return False
+        self._reconnect_delay = PNL_STREAM_RECONNECT_SECONDS
+        logger.info(f"Stream de mark price (todos los símbolos) conectado a {self.stream_url}.")
+        return True
+
+    def _on_close(self, _socket_manager, *args):
+        with self._lock:
+            self._client = None
+            if self._stopped or not self._positions:
+                return
+            get_logger().warning(f"Stream de mark price cerrado. Reintentando conexión en {self._reconnect_delay:.0f}s...")
+            if self._reconnect_timer is None or not self._reconnect_timer.is_alive():
+                self._reconnect_timer = threading.Timer(self._reconnect_delay, self._reconnect)
+                self._reconnect_timer.daemon = True
+                self._reconnect_timer.start()
+                self._reconnect_delay = min(self._reconnect_delay * 2, PNL_STREAM_RECONNECT_MAX_SECONDS)
+
+    def _on_error(self, _socket_manager, error):
+        get_logger().error(f"Error en el stream de mark price: {error}")
+
+    def _reconnect(self):
+        with self._lock:
+            self._reconnect_timer = None
+            if self._stopped or not self._positions:
+                return
+            if not self._ensure_stream_locked():
+                self._on_close(None)
+
+    def _on_message(self, _socket_manager, message):
+        try:
+            data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        except ValueError:
+            return
+        if isinstance(data, dict) and 'data' in data: # Formato de stream combinado
+            data = data['data']
+        if isinstance(data, list):
+            self.update_marks(data)
+
+    def update_marks(self, events: list):
+        """Procesa eventos markPriceUpdate ({'s', 'p', ...}); sólo se guardan los campos necesarios."""
+        now = time.monotonic()
+        for event in events:
+            if not isinstance(event, dict) or event.get('e') != 'markPriceUpdate':
+                continue
+            try:
+                self._marks[event['s']] = (Decimal(event['p']), now)
+            except (KeyError, TypeError, InvalidOperation):
+                continue
+
+    # --- Posiciones ---
+
+    def track(self, symbol: str, entry_price: Decimal, quantity: Decimal) -> bool:
+        """
+        Registra (o actualiza) la posición tras reconciliar con positionRisk. False si no hay stream:
+        en ese caso el bot debe seguir consultando positionRisk en cada ciclo.
+        """
+        with self._lock:
+            self._stopped = False
+            self._attach_account_listener_locked()
+            self._positions[symbol] = {'entry_price': entry_price, 'quantity': quantity,
+                                       'reconciled_at': time.monotonic(), 'dirty': False}
+            return self._ensure_stream_locked()
+
+    def untrack(self, symbol: str):
+        with self._lock:
+            self._positions.pop(symbol, None)
+
+    def unrealized_pnl(self, symbol: str) -> tuple[Decimal, Decimal] | None:
+        """
+        (uPnL, mark_price) calculado localmente, o None si hay que reconciliar por REST: posición no seguida,
+        mark price ausente o viejo, aviso de cambio por ACCOUNT_UPDATE o reconciliación periódica vencida.
+        """
+        position = self._positions.get(symbol)
+        mark = self._marks.get(symbol)
+        if position is None or mark is None or position['dirty']:
+            return None
+        now = time.monotonic()
+        if now - position['reconciled_at'] >= PNL_RECONCILE_SECONDS or now - mark[1] > PNL_MAX_MARK_AGE_SECONDS:
+            return None
+        mark_price = mark[0]
+        return (mark_price - position['entry_price']) * position['quantity'], mark_price
+
+    def mark_price(self, symbol: str) -> Decimal | None:
+        mark = self._marks.get(symbol)
+        if mark is None or time.monotonic() - mark[1] > PNL_MAX_MARK_AGE_SECONDS:
+            return None
+        return mark[0]
+
+    # --- ACCOUNT_UPDATE (user-data stream) ---
+
+    def _attach_account_listener_locked(self):
+        if not self._account_listener_attached:
+            get_user_stream().add_listener('ACCOUNT_UPDATE', self._on_account_update)
+            self._account_listener_attached = True
+
+    def _on_account_update(self, event: dict):
+        """Cualquier cambio de una posición seguida (cierre externo, parcial, añadido) fuerza reconciliar."""
+        for position_update in event.get('a', {}).get('P', []):
+            if position_update.get('ps') not in ('LONG', 'BOTH'):
+                continue
+            position = self._positions.get(position_update.get('s'))
+            if position is None:
+                continue
+            try:
+                quantity = Decimal(position_update.get('pa', '0'))
+                entry_price = Decimal(position_update.get('ep', '0'))
+            except (InvalidOperation, TypeError):
+                position['dirty'] = True
+                continue
+            if quantity != position['quantity'] or entry_price != position['entry_price']:
+                position['dirty'] = True
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._reconnect_timer is not None:
+                self._reconnect_timer.cancel()
+                self._reconnect_timer = None
+            client, self._client = self._client, None
+            self._positions.clear()
+            self._marks.clear()
+        if client is not None:
+            try:
+                client.stop()
+            except Exception as e:
+                get_logger().warning(f"Error al cerrar el stream de mark price: {e}")
+
+
+_pnl_engine = None
+_pnl_engine_lock = threading.Lock()
+
+
+def get_pnl_engine() -> PnlEngine:
+    """Instancia única del motor de PnL para el proceso."""
+    global _pnl_engine
+    with _pnl_engine_lock:
+        if _pnl_engine is None:
+            _pnl_engine = PnlEngine()
+        return _pnl_engine
+
+
+def stop_pnl_engine():
+    """Cierra el stream de mark price (apagado de workers)."""
+    with _pnl_engine_lock:
+        engine = _pnl_engine
+    if engine is not None:
+        engine.stop()
@@ -0,0 +1,147 @@
+# Conciliación periódica de las órdenes abiertas de todos los símbolos.
+# Cada TradingBot sólo conoce en memoria sus IDs (entrada, salida, TP, SL, trailing) y los consulta uno a uno;
+# las órdenes huérfanas que quedan tras un reinicio o una discrepancia (TP/SL sin posición, entradas que el bot
+# ya no sigue...) no se encontraban nunca. Aquí un hilo hace cada ORDER_RECONCILE_INTERVAL_SECONDS UNA sola
+# llamada openOrders sin símbolo y reparte el resultado entre los bots. Cada bot lo aplica en su propio hilo
+# (al inicio de run_once): adopta las TP/SL/trailing del LONG que le faltan, cancela las órdenes suyas que no
+# espera y deja que sus TP/SL desaparecidas se vuelvan a colocar por el camino de siempre. Además, una orden que
+# el barrido vio abierta y sin fills posteriores en el user-data stream no se vuelve a consultar en cada ciclo
+# (salvo que el stream traiga su cancelación o expiración).
+
+import os
+import threading
+import time
+
+from .binance_client import get_all_open_orders, CLIENT_ORDER_ID_PREFIX
+from .logger_setup import get_logger
+
+ORDER_RECONCILE_INTERVAL_SECONDS = float(os.environ.get('ORDER_RECONCILE_INTERVAL_SECONDS', '30')) # 0 desactiva el barrido
+# Validez de un barrido para saltar consultas: intervalo y medio, así un solo barrido perdido ya la hace caducar
+ORDER_RECONCILE_TRUST_SECONDS = ORDER_RECONCILE_INTERVAL_SECONDS * 1.5
+
+PROTECTIVE_ORDER_TYPES = ('TAKE_PROFIT_MARKET', 'STOP_MARKET', 'TRAILING_STOP_MARKET')
+
+
+def is_bot_order(order: dict) -> bool:
+    """True si la orden la colocó este bot (newClientOrderId con el prefijo de make_client_order_id)."""
+    return str(order.get('clientOrderId', '')).startswith(f"{CLIENT_ORDER_ID_PREFIX}-")
+
+
+def is_long_protective_order(order: dict) -> bool:
+    """TP/SL/trailing de cierre del LONG (lo que el bot coloca para proteger su posición)."""
+    order_type = order.get('type') or order.get('origType')
+    return order.get('side') == 'SELL' and order.get('positionSide', 'LONG') in ('LONG', 'BOTH') and \
+        order_type in PROTECTIVE_ORDER_TYPES
+
+
+class OpenOrdersReconciler:
+    """Barrido periódico de openOrders (una llamada para todos los símbolos) repartido entre los bots."""
+
+    def __init__(self, interval_seconds: float = ORDER_RECONCILE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._bots_provider = None # Callable que devuelve {símbolo: TradingBot} de los workers en marcha
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {'sweeps': 0, 'failed_sweeps': 0, 'last_sweep_at': None, 'last_sweep_ms': None,
+                       'last_open_orders': None, 'last_unmanaged_bot_orders': None,
+                       'adopted': 0, 'cancelled': 0, 'missing': 0}
+
+    def start(self, bots_provider) -> bool:
+        """Arranca el hilo de barridos. False si el intervalo es 0 (conciliación desactivada)."""
+        with self._lock:
+            self._bots_provider = bots_provider
+            if self.interval_seconds <= 0:
+                return False
+            if self._thread is not None and self._thread.is_alive():
+                return True
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="OrderReconciler", daemon=True)
+            self._thread.start()
+        get_logger().info(f"Conciliación de órdenes abiertas activa (cada {self.interval_seconds:.0f}s).")
+        return True
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                get_logger().error(f"Error inesperado en el barrido de órdenes abiertas: {e}", exc_info=True)
+
+    def sweep(self) -> dict | None:
+        """Un barrido: openOrders de todos los símbolos y reparto a cada bot. None si la llamada falló."""
+        logger = get_logger()
+        started = time.monotonic()
+        bots = self._bots_provider() if self._bots_provider is not None else {}
+        # Lo que cada bot esperaba ANTES de la llamada: lo colocado después no puede faltar en el resultado
+        expected_before = {symbol: bot.expected_open_order_ids() for symbol, bot in bots.items()}
+        open_orders = get_all_open_orders()
+        if open_orders is None:
+            with self._lock:
+                self._stats['failed_sweeps'] += 1
+            logger.warning("Barrido de órdenes abiertas fallido (openOrders). Se reintentará en el próximo intervalo.")
+            return None
+        fetched_at = time.time()
+        by_symbol = {}
+        for order in open_orders:
+            by_symbol.setdefault(order.get('symbol'), []).append(order)
+
+        for symbol, bot in bots.items():
+            bot.request_reconciliation(by_symbol.get(symbol, []), fetched_at, expected_before[symbol])
+        # Órdenes del bot en símbolos sin worker: se informan pero no se tocan (el símbolo pudo retirarse a propósito)
+        unmanaged = sum(1 for symbol, orders in by_symbol.items() if symbol not in bots for order in orders if is_bot_order(order))
+        if unmanaged:
+            logger.warning(f"Barrido de órdenes: {unmanaged} órdenes del bot abiertas en símbolos sin worker en marcha.")
+
+        elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+        with self._lock:
+            self._stats['sweeps'] += 1
+            self._stats['last_sweep_at'] = fetched_at
+            self._stats['last_sweep_ms'] = elapsed_ms
+            self._stats['last_open_orders'] = len(open_orders)
+            self._stats['last_unmanaged_bot_orders'] = unmanaged
+        logger.debug(f"Barrido de órdenes abiertas: {len(open_orders)} órdenes, {len(bots)} bots, {elapsed_ms}ms.")
+        return {'open_orders': len(open_orders), 'bots': len(bots), 'unmanaged_bot_orders': unmanaged}
+
+    def record_result(self, adopted: int = 0, cancelled: int = 0, missing: int = 0):
+        """Los bots informan (desde su hilo) de lo que repararon al aplicar un barrido."""
+        with self._lock:
+            self._stats['adopted'] += adopted
+            self._stats['cancelled'] += cancelled
+            self._stats['missing'] += missing
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+        result['interval_seconds'] = self.interval_seconds
+        result['running'] = self._thread is not None and self._thread.is_alive()
+        return result
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._bots_provider = None
+        self._stop_event.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+_order_reconciler = None
+_order_reconciler_lock = threading.Lock()
+
+
+def get_order_reconciler() -> OpenOrdersReconciler:
+    """Instancia única del conciliador de órdenes para el proceso."""
+    global _order_reconciler
+    with _order_reconciler_lock:
+        if _order_reconciler is None:
+            _order_reconciler = OpenOrdersReconciler()
+        return _order_reconciler
+
+
+def stop_order_reconciler():
+    """Detiene el hilo de barridos (apagado de workers)."""
+    with _order_reconciler_lock:
+        reconciler = _order_reconciler
+    if reconciler is not None:
+        reconciler.stop()
@@ -0,0 +1,109 @@
+# Planificador de ciclos por símbolo.
+# En vez de que todos los workers duerman el mismo cycle_sleep_seconds, cada uno calcula cuándo volver
+# a ejecutar run_once según su estado:
+#   - órdenes pendientes (entrada/salida): sondeo rápido, sin pasarse del timeout de la orden;
+#   - en posición: tan rápido como lo pida la volatilidad frente a la distancia de los trailing stops
+#     (si el monitor de ticks está activo, los trailing ya se evalúan por tick y basta el ritmo normal);
+#   - IDLE: sólo al cierre de la vela de rsi_interval, con backoff de varias velas mientras
+#     _check_downtrend_levels siga bloqueando las entradas.
+
+import math
+import os
+import time
+from decimal import Decimal
+
+from .clock_sync import server_time
+
+SCHEDULER_MIN_SECONDS = float(os.environ.get('SCHEDULER_MIN_SECONDS', '1'))
+SCHEDULER_PENDING_ORDER_SECONDS = float(os.environ.get('SCHEDULER_PENDING_ORDER_SECONDS', '2'))
+SCHEDULER_IN_POSITION_MIN_SECONDS = float(os.environ.get('SCHEDULER_IN_POSITION_MIN_SECONDS', '1'))
+# Segundos tras el cierre de vela antes de despertar (que Binance ya tenga la vela nueva)
+SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS = float(os.environ.get('SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS', '1'))
+SCHEDULER_MAX_BACKOFF_CANDLES = int(os.environ.get('SCHEDULER_MAX_BACKOFF_CANDLES', '8'))
+# Fracción de la distancia del trailing que se tolera que el precio recorra entre dos sondeos
+SCHEDULER_TRAILING_DISTANCE_FRACTION = 0.5
+
+_INTERVAL_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Estados (BotState.name) con una orden propia esperando resolución
+_PENDING_ORDER_STATES = ('WAITING_ENTRY_FILL', 'WAITING_EXIT_FILL', 'PLACING_ENTRY', 'PLACING_EXIT', 'CANCELING_ORDER')
+
+
+def interval_to_seconds(interval_str: str) -> int | None:
+    """'1m' -> 60, '4h' -> 14400, '1d' -> 86400. None si el formato no es válido."""
+    try:
+        value, unit = int(str(interval_str)[:-1]), str(interval_str)[-1].lower()
+    except (ValueError, IndexError):
+        return None
+    if unit not in _INTERVAL_UNIT_SECONDS or value <= 0:
+        return None
+    return value * _INTERVAL_UNIT_SECONDS[unit]
+
+
+def seconds_until_candle_close(interval_seconds: int, now: float | None = None, candles_ahead: int = 1) -> float:
+    """
+    Segundos hasta el cierre de la vela actual (o de `candles_ahead` velas más adelante), más el margen.
+    `now` es la hora del servidor (las velas de Binance se cierran según su reloj, no el local).
+    """
+    now = server_time() if now is None else now
+    next_close = (math.floor(now / interval_seconds) + max(candles_ahead, 1)) * interval_seconds
+    return next_close - now + SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS
+
+
+def _tightest_trailing_fraction(bot) -> float | None:
+    """Distancia (fracción del precio de entrada) del trailing stop más ajustado activo, o None."""
+    position = bot.current_position
+    if not position or position.get('entry_price') is None or position['entry_price'] <= Decimal('0'):
+        return None
+    entry_price = position['entry_price']
+    distances = []
+    if bot.enable_price_trailing_stop and bot.price_trailing_stop_distance_usdt > Decimal('0') and not bot.pending_trailing_order_id:
+        distances.append(bot.price_trailing_stop_distance_usdt / entry_price)
+    if bot.enable_pnl_trailing_stop and bot.pnl_trailing_stop_drop_usdt > Decimal('0') and position.get('quantity'):
+        # Caída de PnL convertida a distancia de precio: drop / cantidad
+        distances.append(bot.pnl_trailing_stop_drop_usdt / abs(position['quantity']) / entry_price)
+    return float(min(distances)) if distances else None
+
+
+def next_wake_delay(bot, base_sleep: float, now: float | None = None) -> tuple[float, str]:
+    """
+    Devuelve (segundos hasta el próximo run_once, motivo) para el bot según su estado.
+    `base_sleep` es la espera fija de siempre (cycle_sleep_seconds / rsi_interval) y actúa de tope
+    para los estados activos. `now` es la hora del servidor (ver clock_sync.server_time).
+    """
+    now = server_time() if now is None else now
+    state = bot.current_state.name
+    interval_seconds = interval_to_seconds(bot.rsi_interval)
+
+    if state in _PENDING_ORDER_STATES:
+        delay = SCHEDULER_PENDING_ORDER_SECONDS
+        # Despertar justo cuando vence el timeout de la orden para cancelarla sin retraso
+        if bot.order_timeout_seconds and bot.pending_order_timestamp:
+            # pending_order_timestamp es hora local (time.time() al colocar la orden)
+            remaining_timeout = bot.pending_order_timestamp + bot.order_timeout_seconds - time.time()
+            if remaining_timeout > 0:
+                delay = min(delay, remaining_timeout + 0.05)
+        return max(delay, SCHEDULER_MIN_SECONDS), 'pending_order'
+
+    if state == 'IN_POSITION':
+        if bot.exit_monitor.active:
+            return max(base_sleep, SCHEDULER_MIN_SECONDS), 'in_position_tick_monitor'
+        trailing_fraction = _tightest_trailing_fraction(bot)
+        volatility = bot.last_candle_range_pct
+        if trailing_fraction is None or not volatility or not interval_seconds:
+            return max(base_sleep, SCHEDULER_MIN_SECONDS), 'in_position'
+        # Movimiento esperado en t segundos ~ rango_vela * sqrt(t / intervalo) (paseo aleatorio);
+        # elegir t para que no supere la fracción tolerada de la distancia del trailing.
+        tolerated_move = SCHEDULER_TRAILING_DISTANCE_FRACTION * trailing_fraction
+        delay = interval_seconds * (tolerated_move / volatility) ** 2
+        return min(max(delay, SCHEDULER_IN_POSITION_MIN_SECONDS), base_sleep), 'in_position_volatility'
+
+    if state == 'IDLE' and interval_seconds:
+        blocked_cycles = bot.consecutive_downtrend_blocks
+        if blocked_cycles > 0:
+            # Backoff exponencial en velas: 1, 2, 4, ... hasta SCHEDULER_MAX_BACKOFF_CANDLES
+            candles_ahead = min(2 ** (blocked_cycles - 1), SCHEDULER_MAX_BACKOFF_CANDLES)
+            return seconds_until_candle_close(interval_seconds, now, candles_ahead), f'downtrend_backoff_{candles_ahead}_candles'
+        return seconds_until_candle_close(interval_seconds, now), 'candle_close'
+
+    return max(base_sleep, SCHEDULER_MIN_SECONDS), 'fixed'
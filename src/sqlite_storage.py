@@ -0,0 +1,270 @@
+# Backend de almacenamiento embebido (SQLite) para despliegues de una sola máquina.
+# Expone la misma API que database.py (record_trade, get_cumulative_pnl_by_symbol, ...) y
+# database.py delega aquí cuando DB_BACKEND=sqlite.
+
+import sqlite3
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Union, List, Dict, Tuple
+
+from .logger_setup import get_logger
+
+# Mismo archivo que lee check_db_pnl.py (raíz del proyecto)
+SQLITE_DB_PATH = os.environ.get('SQLITE_DB_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'trades_limit.db'))
+
+TRADE_COLUMNS = ('symbol', 'trade_type', 'open_timestamp', 'close_timestamp',
+                 'open_price', 'close_price', 'quantity', 'position_size_usdt',
+                 'pnl_usdt', 'close_reason', 'parameters', 'binance_trade_id')
+
+# Sentencias constantes: sqlite3 las mantiene preparadas en la caché de cada conexión
+_INSERT_TRADE_SQL = f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) VALUES ({', '.join('?' for _ in TRADE_COLUMNS)})"
+_CUMULATIVE_PNL_SQL = "SELECT symbol, SUM(COALESCE(pnl_usdt, 0)) FROM trades GROUP BY symbol"
+_LAST_N_TRADES_SQL = """
+    SELECT id, symbol, trade_type, open_timestamp, close_timestamp,
+           open_price, close_price, quantity, position_size_usdt,
+           pnl_usdt, close_reason, parameters
+    FROM trades
+    WHERE symbol = ?
+    ORDER BY close_timestamp DESC, id DESC
+    LIMIT ?
+"""
+_TRADES_PAGE_SELECT = """
+    SELECT id, symbol, trade_type, open_timestamp, close_timestamp,
+           open_price, close_price, quantity, position_size_usdt,
+           pnl_usdt, close_reason, parameters, binance_trade_id
+    FROM trades
+"""
+_CLOSED_TRADES_AFTER_ID_SQL = """
+    SELECT id, symbol, open_timestamp, close_timestamp, pnl_usdt, close_reason, parameters
+    FROM trades
+    WHERE id > ? AND close_timestamp IS NOT NULL
+    ORDER BY id
+    LIMIT ?
+"""
+_TRADE_EXISTS_SQL = "SELECT EXISTS(SELECT 1 FROM trades WHERE binance_trade_id = ?)"
+_TRADE_BY_BINANCE_ID_SQL = "SELECT * FROM trades WHERE binance_trade_id = ?"
+
+# Una conexión por hilo (los objetos sqlite3.Connection no deben compartirse entre hilos)
+_thread_local = threading.local()
+
+def get_db_connection() -> sqlite3.Connection | None:
+    """Devuelve la conexión SQLite del hilo actual (la crea en modo WAL la primera vez)."""
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is not None:
+        return conn
+    logger = get_logger()
+    try:
+        db_dir = os.path.dirname(SQLITE_DB_PATH)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        conn = sqlite3.connect(SQLITE_DB_PATH, timeout=10.0, cached_statements=64)
+        conn.row_factory = sqlite3.Row
+        # WAL: los lectores (API) no bloquean al escritor y cada commit es un append secuencial
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        _thread_local.conn = conn
+        return conn
+    except sqlite3.Error as e:
+        logger.critical(f"Error CRÍTICO al abrir la base de datos SQLite '{SQLITE_DB_PATH}': {e}")
+        return None
+
+def _to_db_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat() # Mismo formato que usa la cola de escritura (database._build_trade_row)
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value) # Decimal y similares: la afinidad REAL de la columna lo convierte
+
+def init_db_schema():
+    """Inicializa el esquema SQLite (misma tabla 'trades' que en PostgreSQL) y sus índices."""
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        with conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                trade_type TEXT NOT NULL,
+                open_timestamp TEXT NOT NULL,
+                close_timestamp TEXT,
+                open_price REAL NOT NULL,
+                close_price REAL,
+                quantity REAL NOT NULL,
+                position_size_usdt REAL,
+                pnl_usdt REAL,
+                close_reason TEXT,
+                parameters TEXT,
+                binance_trade_id INTEGER UNIQUE
+            )
+            """)
+            # Bases antiguas (trades_limit.db) pueden no tener la columna binance_trade_id
+            existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+            if 'binance_trade_id' not in existing_columns:
+                conn.execute("ALTER TABLE trades ADD COLUMN binance_trade_id INTEGER")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_binance_trade_id ON trades (binance_trade_id)")
+            # id es el rowid: ambos índices quedan ordenados por (.., close_timestamp, id) para la paginación keyset
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_symbol_close_ts ON trades (symbol, close_timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_close_ts ON trades (close_timestamp)")
+        logger.info(f"Esquema de la base de datos SQLite inicializado/verificado ({SQLITE_DB_PATH}).")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error al inicializar/verificar el esquema de la DB SQLite: {e}", exc_info=True)
+        return False
+
+def insert_trade_rows(rows: List[Dict]) -> bool:
+    """Inserta un lote de trades en una sola transacción. Los binance_trade_id repetidos se ignoran."""
+    logger = get_logger()
+    if not rows:
+        return True
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        with conn:
+            conn.executemany(_INSERT_TRADE_SQL, [tuple(_to_db_value(row.get(column)) for column in TRADE_COLUMNS) for row in rows])
+        logger.info(f"Lote de {len(rows)} trade(s) registrado en la DB SQLite.")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al registrar lote de {len(rows)} trade(s): {e}")
+        return False
+
+def record_trade(symbol: str, trade_type: str, open_timestamp: datetime,
+                 open_price: float, quantity: float, position_size_usdt: float,
+                 close_timestamp: Union[datetime, None] = None,
+                 close_price: Union[float, None] = None,
+                 pnl_usdt: Union[float, None] = None,
+                 close_reason: Union[str, None] = None,
+                 parameters: Union[dict, None] = None,
+                 binance_trade_id: Union[int, None] = None):
+    """Registra un trade en la base de datos SQLite."""
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return
+    values = (symbol, trade_type, _to_db_value(open_timestamp), _to_db_value(close_timestamp),
+              _to_db_value(open_price), _to_db_value(close_price), _to_db_value(quantity), _to_db_value(position_size_usdt),
+              _to_db_value(pnl_usdt), close_reason, json.dumps(parameters, default=str) if parameters else None, binance_trade_id)
+    try:
+        with conn:
+            conn.execute(_INSERT_TRADE_SQL, values)
+        logger.info(f"Trade para {symbol} registrado en la DB SQLite. Binance Trade ID: {binance_trade_id if binance_trade_id else 'N/A'}")
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al registrar trade para {symbol}: {e}", exc_info=True)
+
+def get_cumulative_pnl_by_symbol() -> Dict[str, float]:
+    """Calcula el PnL acumulado para cada símbolo desde SQLite."""
+    logger = get_logger()
+    cumulative_pnl = {}
+    conn = get_db_connection()
+    if conn is None:
+        return cumulative_pnl
+    try:
+        for symbol, total_pnl in conn.execute(_CUMULATIVE_PNL_SQL):
+            if symbol and total_pnl is not None:
+                cumulative_pnl[symbol] = float(total_pnl)
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al calcular PnL acumulado: {e}", exc_info=True)
+    return cumulative_pnl
+
+def get_last_n_trades_for_symbol(symbol: str, n: int = 10) -> List[Dict]:
+    """Recupera los últimos N trades cerrados para un símbolo desde SQLite."""
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return []
+    try:
+        return [dict(row) for row in conn.execute(_LAST_N_TRADES_SQL, (symbol.upper(), n))]
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al obtener trades para {symbol}: {e}", exc_info=True)
+        return []
+
+def _to_query_timestamp(value: datetime) -> str:
+    """Los timestamps se guardan como isoformat() en UTC: comparar con el mismo formato."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+def get_trades_page(symbols: Union[List[str], None], start: Union[datetime, None], end: Union[datetime, None],
+                    cursor_values: Union[Tuple[str, int], None], fetch_limit: int) -> List[Dict]:
+    """Consulta keyset de database.get_trades_page para SQLite (close_timestamp DESC, id DESC)."""
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return []
+    conditions = ["close_timestamp IS NOT NULL"]
+    params = []
+    if start is not None:
+        conditions.append("close_timestamp >= ?")
+        params.append(_to_query_timestamp(start))
+    if end is not None:
+        conditions.append("close_timestamp < ?")
+        params.append(_to_query_timestamp(end))
+    if cursor_values:
+        conditions.append("(close_timestamp, id) < (?, ?)")
+        params.extend(cursor_values)
+    order_by = "ORDER BY close_timestamp DESC, id DESC LIMIT ?"
+    if not symbols:
+        query = f"{_TRADES_PAGE_SELECT} WHERE {' AND '.join(conditions)} {order_by}"
+        params.append(fetch_limit)
+    else:
+        # Una rama por símbolo, cada una leyendo como mucho fetch_limit filas del índice (symbol, close_timestamp);
+        # así el coste no crece con el tamaño de la tabla aunque se pidan varios símbolos.
+        arm = f"SELECT * FROM ({_TRADES_PAGE_SELECT} WHERE symbol = ? AND {' AND '.join(conditions)} {order_by})"
+        query = f"SELECT * FROM ({' UNION ALL '.join(arm for _ in symbols)}) {order_by}"
+        arm_params = params
+        params = []
+        for symbol in symbols:
+            params.extend([symbol, *arm_params, fetch_limit])
+        params.append(fetch_limit)
+    try:
+        return [dict(row) for row in conn.execute(query, params)]
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al obtener historial de trades paginado: {e}", exc_info=True)
+        return []
+
+def get_closed_trades_after_id(after_id: int = 0, limit: int = 5000) -> List[Dict]:
+    """Trades cerrados con id > after_id en orden de id (ver database.get_closed_trades_after_id)."""
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return []
+    try:
+        return [dict(row) for row in conn.execute(_CLOSED_TRADES_AFTER_ID_SQL, (int(after_id), int(limit)))]
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al leer trades nuevos (id > {after_id}): {e}", exc_info=True)
+        return []
+
+def check_if_binance_trade_exists(binance_trade_id: Union[int, None]) -> bool:
+    """Verifica si un trade con el binance_trade_id ya existe en SQLite."""
+    if binance_trade_id is None:
+        return False
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        return bool(conn.execute(_TRADE_EXISTS_SQL, (int(binance_trade_id),)).fetchone()[0])
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al verificar trade ID {binance_trade_id}: {e}", exc_info=True)
+        return False
+
+def get_trade_by_binance_id(binance_trade_id: Union[int, None]) -> Union[Dict, None]:
+    """Recupera un trade por su binance_trade_id desde SQLite."""
+    if binance_trade_id is None:
+        return None
+    logger = get_logger()
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(_TRADE_BY_BINANCE_ID_SQL, (int(binance_trade_id),)).fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Error de SQLite al obtener trade por ID {binance_trade_id}: {e}", exc_info=True)
+        return None
@@ -0,0 +1,94 @@
+# Foto de la cuenta para el arranque de los workers.
+# En lugar de que cada TradingBot pida exchange_info completo y su posición por separado (40 símbolos =
+# 80 llamadas REST, con exchange_info pesando 1 cada vez), se hacen tres llamadas masivas en paralelo:
+# exchange_info, posiciones de todos los símbolos y órdenes abiertas de todos los símbolos.
+# Los bots se construyen a partir de esta foto sin tocar la red; si alguna de las tres partes falla,
+# los bots afectados vuelven a la consulta individual de siempre.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger_setup import get_logger
+from .binance_client import get_exchange_symbols_info, get_all_positions, get_all_open_orders
+
+
+class StartupSnapshot:
+    """Información de símbolos, posiciones y órdenes abiertas tomadas en un mismo instante."""
+
+    def __init__(self, symbols_info: dict | None, positions: list | None, open_orders: list | None):
+        self.symbols_info = symbols_info # None si exchange_info falló
+        self.fetched_at = time.time()
+        # Posiciones indexadas por símbolo (sólo las que tienen cantidad distinta de cero)
+        self._positions = None
+        if positions is not None:
+            self._positions = {}
+            for position in positions:
+                try:
+                    position_amt = float(position.get('positionAmt', '0'))
+                except (TypeError, ValueError):
+                    continue
+                if abs(position_amt) <= 1e-9:
+                    continue
+                symbol = position.get('symbol')
+                # En hedge mode puede haber LONG y SHORT: el bot sólo gestiona el LONG
+                if symbol not in self._positions or position.get('positionSide') == 'LONG':
+                    self._positions[symbol] = position
+        self._open_orders = None
+        if open_orders is not None:
+            self._open_orders = {}
+            for order in open_orders:
+                self._open_orders.setdefault(order.get('symbol'), []).append(order)
+
+    @property
+    def has_positions(self) -> bool:
+        return self._positions is not None
+
+    @property
+    def has_open_orders(self) -> bool:
+        return self._open_orders is not None
+
+    def symbol_info(self, symbol: str) -> dict | None:
+        if self.symbols_info is None:
+            return None
+        return self.symbols_info.get(symbol)
+
+    def position(self, symbol: str) -> dict | None:
+        """Misma forma que get_futures_position: el dict de position_risk o None si no hay posición."""
+        if self._positions is None:
+            return None
+        return self._positions.get(symbol)
+
+    def open_orders(self, symbol: str) -> list[dict]:
+        if self._open_orders is None:
+            return []
+        return list(self._open_orders.get(symbol, []))
+
+    def summary(self) -> dict:
+        return {
+            'symbols_info': len(self.symbols_info) if self.symbols_info is not None else None,
+            'open_positions': len(self._positions) if self._positions is not None else None,
+            'open_orders': sum(len(orders) for orders in self._open_orders.values()) if self._open_orders is not None else None,
+        }
+
+
+def fetch_startup_snapshot() -> StartupSnapshot | None:
+    """
+    Lanza las tres consultas masivas a la vez y devuelve la foto.
+    None si fallaron las tres (los bots se inicializarán con consultas individuales).
+    """
+    logger = get_logger()
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="StartupSnapshot") as executor:
+        symbols_future = executor.submit(get_exchange_symbols_info)
+        positions_future = executor.submit(get_all_positions)
+        orders_future = executor.submit(get_all_open_orders)
+        symbols_info = symbols_future.result()
+        positions = positions_future.result()
+        open_orders = orders_future.result()
+
+    if symbols_info is None and positions is None and open_orders is None:
+        logger.error("No se pudo obtener la foto de arranque (exchange_info, posiciones y órdenes fallaron). Se usarán consultas individuales.")
+        return None
+    snapshot = StartupSnapshot(symbols_info, positions, open_orders)
+    logger.info(f"Foto de arranque obtenida en {time.monotonic() - started:.2f}s: {snapshot.summary()}")
+    return snapshot
@@ -0,0 +1,180 @@
+# Repositorio de estrategias guardadas (carpeta strategies/, un JSON por estrategia).
+# Mantiene en memoria un índice nombre -> (mtime, tamaño, contenido ya parseado) que se revalida con
+# os.scandir + stat (como mucho una vez cada STRATEGY_INDEX_TTL_SECONDS), de modo que listar, paginar
+# y filtrar por parámetros no vuelve a leer ni parsear los archivos que no cambiaron.
+
+import json
+import os
+import threading
+import time
+
+from .logger_setup import get_logger
+from .trading_params import PARAM_SPECS
+
+STRATEGY_INDEX_TTL_SECONDS = float(os.environ.get('STRATEGY_INDEX_TTL_SECONDS', '2'))
+STRATEGY_FILE_EXTENSION = '.json'
+
+# Claves del JSON que nunca se indexan (credenciales) o que no tiene sentido filtrar por igualdad
+_NON_INDEXED_KEYS = {'apiKey', 'apiSecret', 'symbolsToTrade'}
+# Permitir filtrar con las claves de config.ini (rsi_period=5) además de las del frontend (rsiPeriod=5)
+_SNAKE_TO_CAMEL = {name: camel for name, (_, _, camel) in PARAM_SPECS.items()}
+
+
+def _normalize_filter_value(value) -> str:
+    """Forma canónica para comparar valores del JSON con los de la query string ('5' == 5 == 5.0, 'True' == true)."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    value_str = str(value).strip().lower()
+    if value_str in ('true', 'false'):
+        return value_str
+    try:
+        return repr(float(value_str))
+    except ValueError:
+        return value_str
+
+
+class StrategyRepository:
+    """Índice en memoria de las estrategias de un directorio, con revalidación por stat."""
+
+    def __init__(self, strategies_path: str, ttl_seconds: float = STRATEGY_INDEX_TTL_SECONDS):
+        self.strategies_path = strategies_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._entries = {} # nombre -> {'mtime_ns', 'size', 'data'}
+        self._value_index = {} # clave -> {valor_normalizado -> set(nombres)}
+        self._last_scan = 0.0
+
+    def _file_path(self, name: str) -> str:
+        return os.path.join(self.strategies_path, f"{name}{STRATEGY_FILE_EXTENSION}")
+
+    # --- Mantenimiento del índice ---
+
+    def _index_add(self, name: str, data: dict):
+        for key, value in data.items():
+            if key in _NON_INDEXED_KEYS or isinstance(value, (dict, list)):
+                continue
+            self._value_index.setdefault(key, {}).setdefault(_normalize_filter_value(value), set()).add(name)
+
+    def _index_remove(self, name: str):
+        entry = self._entries.pop(name, None)
+        if not entry or not entry['data']:
+            return
+        for key, value in entry['data'].items():
+            names = self._value_index.get(key, {}).get(_normalize_filter_value(value)) if not isinstance(value, (dict, list)) else None
+            if names:
+                names.discard(name)
+
+    def _load_entry(self, name: str, mtime_ns: int, size: int):
+        """(Re)parsea un archivo y actualiza el índice. Un JSON inválido queda listado pero sin datos."""
+        logger = get_logger()
+        self._index_remove(name)
+        data = None
+        try:
+            with open(self._file_path(name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                logger.warning(f"La estrategia '{name}' no contiene un objeto JSON. Se lista sin parámetros.")
+                data = None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"No se pudo indexar la estrategia '{name}': {e}")
+        self._entries[name] = {'mtime_ns': mtime_ns, 'size': size, 'data': data}
+        if data:
+            self._index_add(name, data)
+
+    def refresh(self, force: bool = False):
+        """Revalida el índice contra el disco (como mucho una vez por TTL salvo force=True)."""
+        logger = get_logger()
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_scan and (now - self._last_scan) < self.ttl_seconds:
+                return
+            self._last_scan = now
+            seen = set()
+            try:
+                with os.scandir(self.strategies_path) as it:
+                    for dir_entry in it:
+                        if not dir_entry.name.endswith(STRATEGY_FILE_EXTENSION) or not dir_entry.is_file():
+                            continue
+                        name = dir_entry.name[:-len(STRATEGY_FILE_EXTENSION)]
+                        seen.add(name)
+                        stat_result = dir_entry.stat()
+                        cached = self._entries.get(name)
+                        if cached is None or cached['mtime_ns'] != stat_result.st_mtime_ns or cached['size'] != stat_result.st_size:
+                            self._load_entry(name, stat_result.st_mtime_ns, stat_result.st_size)
+            except FileNotFoundError:
+                pass # Directorio aún no creado: índice vacío
+            except OSError as e:
+                logger.error(f"Error al escanear el directorio de estrategias {self.strategies_path}: {e}")
+                return
+            for name in [name for name in self._entries if name not in seen]:
+                self._index_remove(name)
+
+    def invalidate(self):
+        """Fuerza un re-escaneo en la próxima consulta."""
+        with self._lock:
+            self._last_scan = 0.0
+
+    # --- Consultas ---
+
+    def list_names(self, filters: dict | None = None, offset: int = 0, limit: int | None = None,
+                   sort: str = 'name') -> tuple[list, int]:
+        """
+        Devuelve (nombres de la página, total que cumple los filtros).
+        `filters` es {clave: valor}; las claves pueden ser las del JSON (rsiPeriod) o las de config.ini (rsi_period).
+        `sort`: 'name' (alfabético) o 'mtime' (modificadas más recientemente primero).
+        """
+        self.refresh()
+        with self._lock:
+            candidates = None
+            for key, value in (filters or {}).items():
+                json_key = key if key in self._value_index else _SNAKE_TO_CAMEL.get(key, key)
+                matches = self._value_index.get(json_key, {}).get(_normalize_filter_value(value), set())
+                candidates = set(matches) if candidates is None else candidates & matches
+                if not candidates:
+                    return [], 0
+            names = list(self._entries) if candidates is None else list(candidates)
+            if sort == 'mtime':
+                names.sort(key=lambda n: (-self._entries[n]['mtime_ns'], n))
+            else:
+                names.sort()
+        total = len(names)
+        offset = max(0, offset)
+        page = names[offset:] if limit is None else names[offset:offset + max(0, limit)]
+        return page, total
+
+    def get(self, name: str) -> dict | None:
+        """Contenido de una estrategia (None si no existe o no es JSON válido). Siempre revalida su stat."""
+        with self._lock:
+            try:
+                stat_result = os.stat(self._file_path(name))
+            except FileNotFoundError:
+                self._index_remove(name)
+                return None
+            cached = self._entries.get(name)
+            if cached is None or cached['mtime_ns'] != stat_result.st_mtime_ns or cached['size'] != stat_result.st_size:
+                self._load_entry(name, stat_result.st_mtime_ns, stat_result.st_size)
+                cached = self._entries[name]
+            return dict(cached['data']) if cached['data'] is not None else None
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self._file_path(name))
+
+    # --- Escritura (mantiene el índice al día sin esperar al TTL) ---
+
+    def save(self, name: str, data: dict):
+        """Guarda la estrategia en disco y actualiza el índice. Propaga OSError/TypeError al llamador."""
+        with self._lock:
+            os.makedirs(self.strategies_path, exist_ok=True)
+            file_path = self._file_path(name)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+            stat_result = os.stat(file_path)
+            self._index_remove(name)
+            self._entries[name] = {'mtime_ns': stat_result.st_mtime_ns, 'size': stat_result.st_size, 'data': dict(data)}
+            self._index_add(name, data)
+
+    def delete(self, name: str):
+        """Elimina la estrategia del disco y del índice. Propaga OSError al llamador."""
+        with self._lock:
+            os.remove(self._file_path(name))
+            self._index_remove(name)
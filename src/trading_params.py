@@ -0,0 +1,218 @@
+# Parámetros de trading validados una sola vez.
+# config.ini ([TRADING], snake_case) y el frontend / estrategias guardadas (camelCase) se convierten
+# aquí en un único objeto inmutable que se comparte por referencia entre todos los TradingBot.
+
+from decimal import Decimal, InvalidOperation
+
+from .logger_setup import get_logger
+
+# Especificación de cada parámetro: nombre -> (tipo, valor por defecto, clave camelCase del frontend)
+# Tipos: 'int', 'float', 'decimal' (se guarda como Decimal y también como float en <nombre>_float), 'bool', 'str'.
+PARAM_SPECS = {
+    'rsi_interval': ('str', '5m', 'rsiInterval'),
+    'rsi_period': ('int', 14, 'rsiPeriod'),
+    'rsi_threshold_up': ('float', 1.5, 'rsiThresholdUp'),
+    'rsi_threshold_down': ('float', -1.0, 'rsiThresholdDown'),
+    'rsi_entry_level_low': ('float', 25.0, 'rsiEntryLevelLow'),
+    'rsi_entry_level_high': ('float', 75.0, 'rsiEntryLevelHigh'),
+    'rsi_target': ('float', 50.0, 'rsiTarget'),
+    'volume_sma_period': ('int', 20, 'volumeSmaPeriod'),
+    'volume_factor': ('float', 1.5, 'volumeFactor'),
+    'downtrend_check_candles': ('int', 0, 'downtrendCheckCandles'),
+    'downtrend_level_check': ('int', 0, 'downtrendLevelCheck'),
+    'required_uptrend_candles': ('int', 0, 'requiredUptrendCandles'),
+    'position_size_usdt': ('decimal', '50', 'positionSizeUSDT'),
+    'take_profit_usdt': ('decimal', '0', 'takeProfitUSDT'),
+    'stop_loss_usdt': ('decimal', '0', 'stopLossUSDT'),
+    'cycle_sleep_seconds': ('int', None, 'cycleSleepSeconds'),
+    'adaptive_scheduling': ('bool', True, 'adaptiveScheduling'),
+    'order_timeout_seconds': ('int', 60, 'orderTimeoutSeconds'),
+    'evaluate_rsi_delta': ('bool', True, 'evaluateRsiDelta'),
+    'evaluate_volume_filter': ('bool', True, 'evaluateVolumeFilter'),
+    'evaluate_rsi_range': ('bool', True, 'evaluateRsiRange'),
+    'evaluate_downtrend_candles_block': ('bool', True, 'evaluateDowntrendCandlesBlock'),
+    'evaluate_downtrend_levels_block': ('bool', True, 'evaluateDowntrendLevelsBlock'),
+    'evaluate_required_uptrend': ('bool', True, 'evaluateRequiredUptrend'),
+    'enable_take_profit_pnl': ('bool', True, 'enableTakeProfitPnl'),
+    'enable_stop_loss_pnl': ('bool', True, 'enableStopLossPnl'),
+    'enable_trailing_rsi_stop': ('bool', True, 'enableTrailingRsiStop'),
+    'enable_price_trailing_stop': ('bool', True, 'enablePriceTrailingStop'),
+    'price_trailing_stop_distance_usdt': ('decimal', '0.05', 'priceTrailingStopDistanceUSDT'),
+    'price_trailing_stop_activation_pnl_usdt': ('decimal', '0.02', 'priceTrailingStopActivationPnlUSDT'),
+    'price_trailing_stop_mode': ('str', 'local', 'priceTrailingStopMode'),
+    'enable_pnl_trailing_stop': ('bool', True, 'enablePnlTrailingStop'),
+    'pnl_trailing_stop_activation_usdt': ('decimal', '0.1', 'pnlTrailingStopActivationUSDT'),
+    'pnl_trailing_stop_drop_usdt': ('decimal', '0.05', 'pnlTrailingStopDropUSDT'),
+    'enable_tick_exit_monitor': ('bool', True, 'enableTickExitMonitor'),
+    'enable_local_pnl': ('bool', True, 'enableLocalPnl'),
+    'enable_order_chasing': ('bool', True, 'enableOrderChasing'),
+    'order_chase_max_distance_pct': ('decimal', '0.3', 'orderChaseMaxDistancePct'),
+    'order_post_only': ('bool', False, 'orderPostOnly'),
+    'enable_order_book_cache': ('bool', True, 'enableOrderBookCache'),
+    'async_order_execution': ('bool', True, 'asyncOrderExecution'),
+    'evaluate_open_interest_increase': ('bool', True, 'evaluateOpenInterestIncrease'),
+    'open_interest_period': ('str', '5m', 'openInterestPeriod'),
+}
+
+# 'local': el bot evalúa el trailing de precio (por ciclo / por tick) y cierra con LIMIT SELL.
+# 'exchange': al armarse se coloca una orden TRAILING_STOP_MARKET y el seguimiento lo hace Binance.
+PRICE_TRAILING_STOP_MODES = ('local', 'exchange')
+
+_DECIMAL_FIELDS = tuple(name for name, (kind, _, _) in PARAM_SPECS.items() if kind == 'decimal')
+_CAMEL_TO_SNAKE = {camel: name for name, (_, _, camel) in PARAM_SPECS.items()}
+
+_TRUE_STRINGS = ('true', '1', 'yes', 'y', 'on', 'si', 'sí')
+_FALSE_STRINGS = ('false', '0', 'no', 'n', 'off', '')
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    value_str = str(value).strip().lower()
+    if value_str in _TRUE_STRINGS:
+        return True
+    if value_str in _FALSE_STRINGS:
+        return False
+    raise ValueError(f"valor booleano inválido '{value}'")
+
+
+def _parse_value(kind: str, value):
+    if value is None:
+        return None
+    if kind == 'bool':
+        return _parse_bool(value)
+    if kind == 'int':
+        if isinstance(value, str) and value.strip() == '':
+            return None
+        return int(float(value)) if not isinstance(value, int) else value
+    if kind == 'float':
+        return float(value)
+    if kind == 'decimal':
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"valor decimal inválido '{value}'")
+    return str(value).strip()
+
+
+class TradingParams:
+    """
+    Conjunto inmutable y validado de parámetros de trading.
+
+    Se construye una vez (from_mapping) a partir de config.ini, del JSON del frontend o de una
+    estrategia guardada, y se comparte por referencia entre todos los bots. Los parámetros
+    monetarios se guardan como Decimal y, precalculados, como float en `<nombre>_float`.
+    """
+    __slots__ = tuple(PARAM_SPECS) + tuple(f"{name}_float" for name in _DECIMAL_FIELDS) + ('version',)
+
+    def __init__(self, version: int = 1, **values):
+        unknown = [key for key in values if key not in PARAM_SPECS]
+        if unknown:
+            raise ValueError(f"Parámetros de trading desconocidos: {unknown}")
+        errors = []
+        for name, (kind, default, _) in PARAM_SPECS.items():
+            raw_value = values.get(name, default)
+            try:
+                parsed = _parse_value(kind, raw_value)
+            except (ValueError, TypeError) as e:
+                errors.append(f"{name}={raw_value!r} ({e})")
+                continue
+            if parsed is None and default is not None:
+                parsed = _parse_value(kind, default)
+            object.__setattr__(self, name, parsed)
+        if errors:
+            raise ValueError(f"Parámetros de trading inválidos: {', '.join(errors)}")
+
+        self._validate()
+        for name in _DECIMAL_FIELDS:
+            object.__setattr__(self, f"{name}_float", float(getattr(self, name)))
+        object.__setattr__(self, 'version', int(version))
+
+    def _validate(self):
+        """Corrige valores fuera de rango con los mismos criterios que usaba TradingBot."""
+        logger = get_logger()
+        if self.order_timeout_seconds < 0:
+            logger.warning(f"ORDER_TIMEOUT_SECONDS ({self.order_timeout_seconds}) debe ser >= 0. Usando 60.")
+            object.__setattr__(self, 'order_timeout_seconds', 60)
+        if self.volume_sma_period <= 0:
+            logger.warning(f"VOLUME_SMA_PERIOD ({self.volume_sma_period}) debe ser positivo. Usando 20.")
+            object.__setattr__(self, 'volume_sma_period', 20)
+        trailing_mode = (self.price_trailing_stop_mode or 'local').lower()
+        if trailing_mode not in PRICE_TRAILING_STOP_MODES:
+            logger.warning(f"PRICE_TRAILING_STOP_MODE ({self.price_trailing_stop_mode}) debe ser uno de {PRICE_TRAILING_STOP_MODES}. Usando 'local'.")
+            trailing_mode = 'local'
+        object.__setattr__(self, 'price_trailing_stop_mode', trailing_mode)
+        if self.take_profit_usdt < 0:
+            logger.warning(f"TAKE_PROFIT_USDT ({self.take_profit_usdt}) debe ser positivo o cero. Usando 0.")
+            object.__setattr__(self, 'take_profit_usdt', Decimal('0'))
+        if self.rsi_period <= 0:
+            raise ValueError(f"Parámetros de trading inválidos: rsi_period={self.rsi_period} debe ser positivo")
+        if self.position_size_usdt <= 0:
+            raise ValueError(f"Parámetros de trading inválidos: position_size_usdt={self.position_size_usdt} debe ser positivo")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TradingParams es inmutable; usar with_overrides() para obtener una copia modificada.")
+
+    def __delattr__(self, name):
+        raise AttributeError("TradingParams es inmutable.")
+
+    @classmethod
+    def from_mapping(cls, mapping, version: int = 1) -> 'TradingParams':
+        """
+        Crea los parámetros desde un diccionario con claves snake_case (config.ini) o camelCase
+        (frontend / estrategias). Las claves que no son parámetros de trading (symbolsToTrade,
+        mode, apiKey, ...) se ignoran. Si recibe un TradingParams lo devuelve tal cual.
+        """
+        if isinstance(mapping, TradingParams):
+            return mapping
+        values = {}
+        for key, value in (mapping or {}).items():
+            name = key if key in PARAM_SPECS else _CAMEL_TO_SNAKE.get(key)
+            if name is not None:
+                values[name] = value
+        return cls(version=version, **values)
+
+    def with_overrides(self, version: int | None = None, **changes) -> 'TradingParams':
+        """Devuelve una copia con los cambios indicados (validada de nuevo)."""
+        values = {name: getattr(self, name) for name in PARAM_SPECS}
+        values.update(changes)
+        return TradingParams(version=self.version + 1 if version is None else version, **values)
+
+    def get(self, name: str, default=None):
+        """Acceso estilo diccionario, para el código que todavía trata los parámetros como dict."""
+        if name in PARAM_SPECS:
+            value = getattr(self, name)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, name: str):
+        if name not in PARAM_SPECS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name) -> bool:
+        return name in PARAM_SPECS
+
+    def __bool__(self) -> bool:
+        return True
+
+    def to_dict(self) -> dict:
+        """Diccionario snake_case con tipos JSON (los Decimal se devuelven como float)."""
+        return {name: (getattr(self, f"{name}_float") if name in _DECIMAL_FIELDS else getattr(self, name)) for name in PARAM_SPECS}
+
+    def diff(self, other: 'TradingParams') -> dict:
+        """Parámetros que cambian respecto de `other`: {nombre: (valor_anterior, valor_nuevo)}."""
+        return {name: (getattr(other, name), getattr(self, name)) for name in PARAM_SPECS if getattr(other, name) != getattr(self, name)}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TradingParams):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in PARAM_SPECS)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in PARAM_SPECS))
+
+    def __repr__(self) -> str:
+        return f"TradingParams(v{self.version}, {self.to_dict()})"
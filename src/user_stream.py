@@ -0,0 +1,242 @@
+# Stream de datos de usuario (user-data stream) de Binance Futures compartido por el proceso.
+# Se crea un listenKey por REST, se suscribe el websocket a él y se renueva cada USER_STREAM_KEEPALIVE_SECONDS
+# (Binance lo caduca a los 60 min sin keepalive). Los eventos (ORDER_TRADE_UPDATE, ACCOUNT_UPDATE, ...) se
+# reparten a los listeners registrados por tipo de evento. Si el websocket o el listenKey no están
+# disponibles, start() devuelve False y los consumidores siguen con sus consultas REST de siempre.
+
+import json
+import os
+import threading
+
+from .binance_client import get_futures_client
+from .logger_setup import get_logger
+from .market_stream import UMFuturesWebsocketClient, _resolve_stream_url
+
+USER_STREAM_KEEPALIVE_SECONDS = float(os.environ.get('USER_STREAM_KEEPALIVE_SECONDS', '1800'))
+USER_STREAM_RECONNECT_SECONDS = float(os.environ.get('USER_STREAM_RECONNECT_SECONDS', '1'))
+USER_STREAM_RECONNECT_MAX_SECONDS = 30.0
+
+
+class UserDataStream:
+    """
+    Websocket del user-data stream. Los listeners se registran por tipo de evento ('e') y se llaman como
+    listener(event: dict) desde el hilo del websocket: deben ser rápidos y no hacer llamadas REST.
+    Los listeners de reconexión (add_reconnect_listener) se llaman sin argumentos cada vez que el stream
+    se (re)conecta, para que los consumidores recuperen por REST lo que pudo perderse mientras estuvo caído.
+    """
+
+    def __init__(self, stream_url: str | None = None):
+        self.stream_url = stream_url
+        self._lock = threading.RLock()
+        self._client = None
+        self._listen_key = None
+        self._listeners = {} # tipo de evento -> [listener, ...]
+        self._reconnect_listeners = []
+        self._keepalive_timer = None
+        self._reconnect_timer = None
+        self._reconnect_delay = USER_STREAM_RECONNECT_SECONDS
+        self._stopped = True
+        self._request_id = 0
+        self.events_received = 0
+
+    # --- Listeners ---
+
+    def add_listener(self, event_type: str, listener):
+        with self._lock:
+            listeners = self._listeners.setdefault(event_type, [])
+            if listener not in listeners:
+                listeners.append(listener)
+
+    def remove_listener(self, event_type: str, listener):
+        with self._lock:
+            listeners = self._listeners.get(event_type)
+            if listeners and listener in listeners:
+                listeners.remove(listener)
+
+    def add_reconnect_listener(self, listener):
+        with self._lock:
+            if listener not in self._reconnect_listeners:
+                self._reconnect_listeners.append(listener)
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    # --- Conexión ---
+
+    def start(self) -> bool:
+        """Abre el stream si no está abierto. False si no hay websocket o listenKey disponibles."""
+        with self._lock:
+            self._stopped = False
+            if self._client is not None:
+                return True
+            return self._connect_locked()
+
+    def _connect_locked(self) -> bool:
+        logger = get_logger()
+        if UMFuturesWebsocketClient is None:
+            logger.warning("Websocket de Binance no disponible (binance.websocket). User-data stream deshabilitado.")
+            return False
+        client = get_futures_client()
+        if not client:
+            logger.error("No se pudo obtener el cliente UMFutures para crear el listenKey.")
+            return False
+        try:
+            self._listen_key = client.new_listen_key()['listenKey']
+        except Exception as e:
+            logger.error(f"No se pudo crear el listenKey del user-data stream: {e}")
+            return False
+        if self.stream_url is None:
+            self.stream_url = _resolve_stream_url()
+        try:
+            self._client = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error,
+            )
+            self._request_id += 1
+            self._client.user_data(listen_key=self._listen_key, id=self._request_id, action='SUBSCRIBE')
+        except Exception as e:
+            logger.error(f"No se pudo abrir el user-data stream ({self.stream_url}): {e}")
+            self._client = None
+            return False
+        self._reconnect_delay = USER_STREAM_RECONNECT_SECONDS
+        self._schedule_keepalive()
+        logger.info(f"User-data stream conectado a {self.stream_url}.")
+        for listener in tuple(self._reconnect_listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error en listener de reconexión del user-data stream: {e}", exc_info=True)
+        return True
+
+    def _schedule_keepalive(self):
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+        self._keepalive_timer = threading.Timer(USER_STREAM_KEEPALIVE_SECONDS, self._keepalive)
+        self._keepalive_timer.daemon = True
+        self._keepalive_timer.start()
+
+    def _keepalive(self):
+        with self._lock:
+            if self._stopped or self._listen_key is None:
+                return
+            listen_key = self._listen_key
+        try:
+            get_futures_client().renew_listen_key(listenKey=listen_key)
+            get_logger().debug("listenKey del user-data stream renovado.")
+        except Exception as e:
+            get_logger().warning(f"Fallo al renovar el listenKey ({e}). Reconectando user-data stream.")
+            self._drop_and_reconnect()
+            return
+        with self._lock:
+            if not self._stopped:
+                self._schedule_keepalive()
+
+    def _drop_and_reconnect(self):
+        with self._lock:
+            client, self._client = self._client, None
+            self._listen_key = None
+            if not self._stopped:
+                self._schedule_reconnect()
+        if client is not None:
+            try:
+                client.stop()
+            except Exception:
+                pass
+
+    def _on_close(self, _socket_manager, *args):
+        with self._lock:
+            self._client = None
+            if self._stopped:
+                return
+            get_logger().warning(f"User-data stream cerrado. Reintentando conexión en {self._reconnect_delay:.0f}s...")
+            self._schedule_reconnect()
+
+    def _on_error(self, _socket_manager, error):
+        get_logger().error(f"Error en el user-data stream: {error}")
+
+    def _schedule_reconnect(self):
+        if self._reconnect_timer is not None and self._reconnect_timer.is_alive():
+            return
+        self._reconnect_timer = threading.Timer(self._reconnect_delay, self._reconnect)
+        self._reconnect_timer.daemon = True
+        self._reconnect_timer.start()
+        self._reconnect_delay = min(self._reconnect_delay * 2, USER_STREAM_RECONNECT_MAX_SECONDS)
+
+    def _reconnect(self):
+        with self._lock:
+            self._reconnect_timer = None
+            if self._stopped or self._client is not None:
+                return
+            if not self._connect_locked():
+                self._schedule_reconnect()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            for timer in (self._keepalive_timer, self._reconnect_timer):
+                if timer is not None:
+                    timer.cancel()
+            self._keepalive_timer = self._reconnect_timer = None
+            client, self._client = self._client, None
+            listen_key, self._listen_key = self._listen_key, None
+        if client is not None:
+            try:
+                client.stop()
+            except Exception as e:
+                get_logger().warning(f"Error al cerrar el user-data stream: {e}")
+        if listen_key is not None:
+            try:
+                get_futures_client().close_listen_key(listenKey=listen_key)
+            except Exception:
+                pass
+
+    # --- Mensajes ---
+
+    def _on_message(self, _socket_manager, message):
+        try:
+            data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        except ValueError:
+            return
+        if isinstance(data, dict) and 'data' in data: # Formato de stream combinado
+            data = data['data']
+        if not isinstance(data, dict) or 'e' not in data:
+            return # Respuestas a SUBSCRIBE
+        self.dispatch_event(data)
+
+    def dispatch_event(self, event: dict):
+        """Reparte un evento del user-data stream a los listeners de su tipo."""
+        event_type = event.get('e')
+        self.events_received += 1
+        if event_type == 'listenKeyExpired':
+            get_logger().warning("listenKey del user-data stream caducado. Reconectando.")
+            self._drop_and_reconnect()
+            return
+        for listener in tuple(self._listeners.get(event_type, ())):
+            try:
+                listener(event)
+            except Exception as e:
+                get_logger().error(f"Error en listener del user-data stream ({event_type}): {e}", exc_info=True)
+
+
+_user_stream = None
+_user_stream_lock = threading.Lock()
+
+
+def get_user_stream() -> UserDataStream:
+    """Instancia única del user-data stream para el proceso."""
+    global _user_stream
+    with _user_stream_lock:
+        if _user_stream is None:
+            _user_stream = UserDataStream()
+        return _user_stream
+
+
+def stop_user_stream():
+    """Cierra el stream compartido (apagado de workers)."""
+    with _user_stream_lock:
+        stream = _user_stream
+    if stream is not None:
+        stream.stop()
@@ -0,0 +1,61 @@
+# Configuración común de las pruebas: todo corre offline contra el exchange simulado (src/mock_exchange.py)
+# y una base SQLite temporal (src/sqlite_storage.py). Las variables de entorno se fijan antes de importar `src`
+# porque los módulos leen sus rutas y constantes al importarse.
+
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix='bot_tests_')
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_DB_PATH'] = os.path.join(_TMP_DIR, 'trades_test.db')
+os.environ['TRADE_SPILL_FILE'] = os.path.join(_TMP_DIR, 'pending_trades.jsonl')
+os.environ['TRADE_DEAD_LETTER_FILE'] = os.path.join(_TMP_DIR, 'dead_trades.jsonl')
+os.environ['DECISION_JOURNAL_PATH'] = os.path.join(_TMP_DIR, 'decision_journal.bin')
+os.environ['FILLS_LEDGER_USE_USER_STREAM'] = '0'
+os.environ['ORDER_RETRY_BACKOFF_SECONDS'] = '0'
+os.environ['ORDER_RECONCILE_INTERVAL_SECONDS'] = '0'
+
+import pytest
+
+from src.logger_setup import setup_logging
+
+setup_logging(log_filename=os.path.join(_TMP_DIR, 'tests.log'))
+
+from src import binance_client, database, market_stream, order_book, pnl_engine, sqlite_storage, user_stream
+from src.mock_exchange import MockUMFutures, generate_random_walk_klines
+
+SYMBOL = 'TESTUSDT'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def stop_background_threads():
+    """Detiene los hilos de fondo antes de que pytest cierre la salida capturada (logs de apagado)."""
+    yield
+    database.stop_trade_writer()
+
+
+@pytest.fixture(autouse=True)
+def no_websockets(monkeypatch):
+    """Sin websockets reales: los streams se quedan en su modo REST de respaldo."""
+    for module in (market_stream, user_stream, order_book, pnl_engine):
+        monkeypatch.setattr(module, 'UMFuturesWebsocketClient', None)
+
+
+@pytest.fixture
+def mock_client():
+    """Exchange simulado con un símbolo (velas sintéticas deterministas) instalado como cliente global."""
+    client = MockUMFutures({SYMBOL: generate_random_walk_klines(400, start_price=100.0, seed=7)}, warmup_candles=150)
+    binance_client.set_futures_client(client)
+    binance_client.get_exchange_symbols_info() # Registra los filtros del símbolo (order_filters)
+    yield client
+    binance_client.set_futures_client(None)
+
+
+@pytest.fixture
+def sqlite_db():
+    """Tabla 'trades' vacía en la base SQLite temporal de la sesión."""
+    assert sqlite_storage.init_db_schema()
+    conn = sqlite_storage.get_db_connection()
+    with conn:
+        conn.execute("DELETE FROM trades")
+    yield conn
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from src import sqlite_storage
+from src.analytics import TradeAnalytics
+
+
+def _trade(binance_trade_id, symbol, pnl, minutes):
+    close_timestamp = datetime(2026, 1, 1, 12, 0) + timedelta(minutes=minutes)
+    return {'symbol': symbol, 'trade_type': 'LONG', 'open_timestamp': close_timestamp - timedelta(seconds=30),
+            'close_timestamp': close_timestamp, 'open_price': 100.0, 'close_price': 100.0 + pnl, 'quantity': 1.0,
+            'position_size_usdt': 100.0, 'pnl_usdt': pnl, 'close_reason': 'take_profit' if pnl > 0 else 'stop_loss',
+            'parameters': None, 'binance_trade_id': binance_trade_id}
+
+
+def test_summary_and_drawdown_follow_the_trades_table(sqlite_db):
+    sqlite_storage.insert_trade_rows([_trade(1, 'AAAUSDT', 3.0, 0), _trade(2, 'AAAUSDT', -2.0, 1), _trade(3, 'BBBUSDT', 1.0, 2)])
+    analytics = TradeAnalytics()
+
+    overall = analytics.summary()['overall']
+    assert overall['trades'] == 3
+    assert overall['wins'] == 2
+    assert overall['total_pnl_usdt'] == 2.0
+    assert overall['max_drawdown_usdt'] == 2.0
+    assert overall['avg_hold_seconds'] == 30.0
+
+    # Los trades nuevos se incorporan en la siguiente consulta tras el aviso de database.py
+    sqlite_storage.insert_trade_rows([_trade(4, 'AAAUSDT', -1.5, 3)])
+    analytics.notify_inserted()
+    assert analytics.summary(symbol='AAAUSDT')['total_pnl_usdt'] == -0.5
+    assert analytics.summary(symbol='AAAUSDT')['trades_by_close_reason'] == {'take_profit': 1, 'stop_loss': 2}
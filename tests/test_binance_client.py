@@ -0,0 +1,71 @@
+import pytest
+import requests
+from binance.error import ClientError
+
+from src import binance_client
+from src.binance_client import make_client_order_id, submit_order_idempotent
+
+from .conftest import SYMBOL
+
+
+@pytest.fixture
+def resting_buy(mock_client):
+    """Parámetros de una LIMIT BUY que queda abierta (lejos del precio) con un newClientOrderId determinista."""
+    price = round(float(mock_client._current_close(SYMBOL)) * 0.9, 4)
+    return {'symbol': SYMBOL, 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC', 'quantity': 1.0, 'price': price,
+            'positionSide': 'LONG', 'newClientOrderId': make_client_order_id(SYMBOL, 'en', 'vela-1')}
+
+
+def test_make_client_order_id_is_deterministic_with_key():
+    first = make_client_order_id(SYMBOL, 'tp', 42)
+    assert first == make_client_order_id(SYMBOL, 'tp', 42)
+    assert first != make_client_order_id(SYMBOL, 'sl', 42)
+    assert first.startswith(f"{binance_client.CLIENT_ORDER_ID_PREFIX}-tp-") and len(first) <= 36
+    assert make_client_order_id(SYMBOL, 'tp') != make_client_order_id(SYMBOL, 'tp') # Sin key: únicos
+
+
+def test_lost_response_is_resolved_by_query_without_duplicate(mock_client, resting_buy):
+    mock_client.lose_next_responses('new_order')
+
+    order = submit_order_idempotent(mock_client, resting_buy)
+
+    assert order['clientOrderId'] == resting_buy['newClientOrderId']
+    assert mock_client.call_counts['new_order'] == 1
+    assert mock_client.call_counts['query_order'] == 1
+    assert [o['orderId'] for o in mock_client.get_orders(symbol=SYMBOL)] == [order['orderId']]
+
+
+def test_duplicate_client_order_id_returns_existing_order(mock_client, resting_buy):
+    first = mock_client.new_order(**resting_buy)
+
+    order = submit_order_idempotent(mock_client, resting_buy) # -4116: el envío anterior sí llegó
+
+    assert order['orderId'] == first['orderId']
+    assert mock_client.call_counts['new_order'] == 2
+    assert len(mock_client.get_orders(symbol=SYMBOL)) == 1
+
+
+def test_order_that_never_arrived_is_resubmitted_with_same_id(mock_client, resting_buy, monkeypatch):
+    real_new_order = mock_client.new_order
+    attempts = []
+
+    def new_order_dropped_once(**params):
+        attempts.append(params['newClientOrderId'])
+        if len(attempts) == 1:
+            raise requests.exceptions.ConnectTimeout("la petición no llegó al exchange")
+        return real_new_order(**params)
+
+    monkeypatch.setattr(mock_client, 'new_order', new_order_dropped_once)
+
+    order = submit_order_idempotent(mock_client, resting_buy) # query -> -2013 -> reenvío
+
+    assert attempts == [resting_buy['newClientOrderId']] * 2
+    assert mock_client.call_counts['query_order'] == 1
+    assert [o['orderId'] for o in mock_client.get_orders(symbol=SYMBOL)] == [order['orderId']]
+
+
+def test_definitive_rejection_is_not_retried(mock_client, resting_buy):
+    with pytest.raises(ClientError):
+        submit_order_idempotent(mock_client, {**resting_buy, 'price': 0})
+    assert mock_client.call_counts['new_order'] == 1
+    assert 'query_order' not in mock_client.call_counts
@@ -0,0 +1,104 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from src import database
+from src.bot import BotState, TradingBot
+from src.trading_params import TradingParams
+
+from .conftest import SYMBOL
+
+# La entrada nunca se dispara y nada abre websockets: el bot sólo gestiona la posición que encuentra
+BOT_PARAMS = {
+    'rsi_interval': '1m',
+    'rsi_threshold_up': 1000.0,
+    'rsi_threshold_down': -1000.0,
+    'position_size_usdt': 50,
+    'take_profit_usdt': 0.2,
+    'stop_loss_usdt': -0.2,
+    'order_timeout_seconds': 10 ** 9,
+    'enable_price_trailing_stop': False,
+    'enable_pnl_trailing_stop': False,
+    'enable_trailing_rsi_stop': False,
+    'enable_tick_exit_monitor': False,
+    'enable_local_pnl': False,
+    'enable_order_chasing': False,
+    'enable_order_book_cache': False,
+    'async_order_execution': False,
+}
+
+
+@pytest.fixture
+def bot_in_position(mock_client):
+    close = mock_client._current_close(SYMBOL)
+    mock_client.set_position(SYMBOL, 0.5, float(close))
+    bot = TradingBot(SYMBOL, TradingParams.from_mapping(BOT_PARAMS))
+    assert bot.in_position and bot.current_state == BotState.IN_POSITION
+    return bot
+
+
+def test_existing_position_gets_tp_sl_and_closure_is_recorded(mock_client, bot_in_position, sqlite_db):
+    bot = bot_in_position
+    bot.run_once()
+    protective = {o['type']: o for o in mock_client.get_orders(symbol=SYMBOL)}
+    assert set(protective) == {'TAKE_PROFIT_MARKET', 'STOP_MARKET'}
+    assert {bot.pending_tp_order_id, bot.pending_sl_order_id} == {o['orderId'] for o in protective.values()}
+
+    while bot.in_position:
+        assert mock_client.advance(SYMBOL), "las velas se acabaron sin tocar el TP ni el SL"
+        bot.run_once()
+
+    assert bot.current_state == BotState.IDLE
+    assert Decimal(mock_client.get_position_risk(symbol=SYMBOL)[0]['positionAmt']) == Decimal('0')
+    assert mock_client.get_orders(symbol=SYMBOL) == [] # La protección que no se disparó se canceló
+    assert database.flush_trade_queue(timeout=5)
+    trades = database.get_last_n_trades_for_symbol(SYMBOL, 5)
+    assert len(trades) == 1
+    # Con estas velas (semilla fija) se toca antes el TP: el PnL sale de los fills de Binance
+    assert trades[0]['close_reason'].startswith('take_profit_order_filled')
+    assert trades[0]['pnl_usdt'] == pytest.approx(0.2)
+    assert database.check_if_binance_trade_exists(1) # tradeId del fill del TP en el exchange simulado
+
+
+def test_reset_state_waits_for_exit_lock(bot_in_position):
+    bot = bot_in_position
+    bot.pnl_trailing_stop_armed = True
+    bot.pnl_peak_since_activation = Decimal('1')
+    resetter = threading.Thread(target=bot._reset_state)
+    with bot._exit_lock: # Como el monitor de ticks a mitad de evaluación
+        resetter.start()
+        resetter.join(timeout=0.2)
+        assert resetter.is_alive()
+        assert bot.in_position and bot.current_position is not None and bot.pnl_trailing_stop_armed
+    resetter.join(timeout=5)
+    assert not resetter.is_alive()
+    assert not bot.in_position and bot.current_position is None
+    assert not bot.pnl_trailing_stop_armed and bot.pnl_peak_since_activation is None
+    assert bot.price_peak_ticks is None and not bot.price_trailing_stop_armed
+
+
+def _wait_for_order_completions(bot, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not bot._order_completions:
+        assert time.monotonic() < deadline, "el ejecutor de órdenes no terminó a tiempo"
+        time.sleep(0.01)
+    bot._process_order_completions()
+
+
+def test_exit_order_is_placed_after_tp_sl_cancellation(mock_client, bot_in_position):
+    bot = bot_in_position
+    bot.run_once()
+    assert bot.pending_tp_order_id and bot.pending_sl_order_id
+    bot.async_order_execution = True
+    close = mock_client._current_close(SYMBOL)
+
+    bot._cancel_tp_sl_then_place_exit(price=close * Decimal('1.01'), reason='test_exit')
+    assert bot.current_state == BotState.PLACING_EXIT
+    assert not bot._order_intent_in_flight('exit') # La venta espera a que terminen las cancelaciones
+    _wait_for_order_completions(bot)
+    assert [o['type'] for o in mock_client.get_orders(symbol=SYMBOL)] == [] # TP y SL ya cancelados
+    _wait_for_order_completions(bot)
+    assert bot.current_state == BotState.WAITING_EXIT_FILL
+    assert [(o['type'], o['side']) for o in mock_client.get_orders(symbol=SYMBOL)] == [('LIMIT', 'SELL')]
@@ -0,0 +1,14 @@
+import pytest
+
+from src.clock_sync import ClockSync
+
+
+def test_offset_is_median_of_samples_ignoring_outliers():
+    clock = ClockSync(server_time_fn=lambda: 0)
+    for server_ms, offset in ((1_000, 500), (2_000, 510), (3_000, 490), (4_000, 505), (5_000, 60_000)):
+        # Envío y recepción simétricos alrededor de server_ms - offset (RTT de 20 ms)
+        local_mid = server_ms - offset
+        clock.add_sample(server_ms, local_mid - 10, local_mid + 10)
+    assert clock.offset_ms == pytest.approx(502.5)
+    assert clock.metrics()['rejected_samples'] == 1
+    assert clock.metrics()['rtt_ms'] == pytest.approx(20)
@@ -0,0 +1,62 @@
+import os
+from datetime import datetime, timedelta
+
+from src import database, sqlite_storage
+
+
+def _enqueue(binance_trade_id, close_timestamp, pnl=1.0):
+    return database.enqueue_trade('AAAUSDT', 'LONG', close_timestamp - timedelta(minutes=5), 100.0, 1.0, 100.0,
+                                  close_timestamp=close_timestamp, close_price=101.0, pnl_usdt=pnl,
+                                  close_reason='take_profit', binance_trade_id=binance_trade_id)
+
+
+def test_enqueued_trades_reach_sqlite_and_page_by_cursor(sqlite_db):
+    base = datetime(2026, 1, 1, 12, 0)
+    for i in range(3):
+        assert _enqueue(100 + i, base + timedelta(minutes=i))
+    assert database.flush_trade_queue(timeout=5)
+
+    assert database.check_if_binance_trade_exists(102)
+    first_page, cursor = database.get_trades_page(limit=2)
+    assert [row['binance_trade_id'] for row in first_page] == [102, 101]
+    second_page, next_cursor = database.get_trades_page(cursor=cursor, limit=2)
+    assert [row['binance_trade_id'] for row in second_page] == [100]
+    assert next_cursor is None
+
+
+def test_failed_insert_spills_to_file_and_replays(sqlite_db, monkeypatch):
+    monkeypatch.setattr(sqlite_storage, 'insert_trade_rows', lambda rows: False)
+    assert _enqueue(200, datetime(2026, 1, 2, 12, 0))
+    assert database.flush_trade_queue(timeout=5)
+    assert os.path.exists(database.TRADE_SPILL_FILE)
+    # Mientras está en el volcado cuenta como registrado (no se vuelve a encolar)
+    assert database.check_if_binance_trade_exists(200)
+
+    monkeypatch.undo()
+    assert database._replay_spilled_trades()
+    assert not database._has_spilled_rows()
+    assert sqlite_storage.check_if_binance_trade_exists(200)
+
+
+def test_postgres_without_url_is_unreachable_instead_of_raising(monkeypatch):
+    monkeypatch.setattr(database, 'DB_BACKEND', 'postgres')
+    monkeypatch.setattr(database, 'DATABASE_URL', None)
+    assert not database._db_reachable()
+
+
+def test_writer_thread_survives_unexpected_insert_error(sqlite_db, monkeypatch):
+    def broken_insert(rows):
+        raise RuntimeError("fallo inesperado")
+
+    monkeypatch.setattr(sqlite_storage, 'insert_trade_rows', broken_insert)
+    assert _enqueue(300, datetime(2026, 1, 3, 12, 0))
+    assert database.flush_trade_queue(timeout=5)
+    assert database._has_spilled_rows() # El lote no se pierde: queda en el volcado
+
+    monkeypatch.undo()
+    assert database._trade_writer_thread.is_alive()
+    assert _enqueue(301, datetime(2026, 1, 3, 12, 1))
+    assert database.flush_trade_queue(timeout=5)
+    assert sqlite_storage.check_if_binance_trade_exists(301)
+    assert database._replay_spilled_trades()
+    assert sqlite_storage.check_if_binance_trade_exists(300)
@@ -0,0 +1,24 @@
+from src.decision_journal import (ACTION_ENTRY_SUBMITTED, ACTION_NO_SIGNAL, COND_RSI_RANGE, COND_VOLUME,
+                                  DecisionJournal, DecisionTrace)
+
+
+def test_ring_keeps_newest_records_and_summarizes_failures(tmp_path):
+    journal = DecisionJournal(str(tmp_path / 'journal.bin'), capacity=3)
+    trace = DecisionTrace('AAAUSDT')
+    for i in range(4):
+        trace.reset(candle_open_ms=i, price=100.0 + i)
+        trace.condition(COND_RSI_RANGE, evaluated=True, passed=True)
+        trace.condition(COND_VOLUME, evaluated=True, passed=i == 3)
+        journal.append(trace, ACTION_ENTRY_SUBMITTED if i == 3 else ACTION_NO_SIGNAL)
+
+    records = journal.query(symbol='aaausdt')
+    assert [r['candle_open_time'] for r in records] == [3, 2, 1] # La primera se sobrescribió
+    assert journal.query(failed=COND_VOLUME, limit=10)[0]['price'] == 102.0
+    summary = journal.summarize()
+    assert summary['evaluations'] == 3
+    assert summary['failed_conditions']['volume'] == 2
+    journal.close()
+
+    reopened = DecisionJournal(str(tmp_path / 'journal.bin'), capacity=3)
+    assert reopened.stats()['written'] == 4
+    reopened.close()
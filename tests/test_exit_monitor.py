@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from src.bot import TradingBot
+from src.exit_monitor import ExitMonitor
+from src.trading_params import TradingParams
+
+from .conftest import SYMBOL
+from .test_bot import BOT_PARAMS
+
+
+class _FakeStream:
+    def __init__(self):
+        self.listeners = []
+
+    def subscribe(self, symbol, listener):
+        self.listeners.append(listener)
+        return True
+
+    def unsubscribe(self, symbol, listener):
+        self.listeners.remove(listener)
+
+
+def test_pnl_trailing_drop_on_a_tick_requests_the_exit(mock_client):
+    entry = mock_client._current_close(SYMBOL)
+    mock_client.set_position(SYMBOL, 0.5, float(entry))
+    params = TradingParams.from_mapping({**BOT_PARAMS, 'enable_tick_exit_monitor': True, 'enable_pnl_trailing_stop': True,
+                                         'pnl_trailing_stop_activation_usdt': 0.1, 'pnl_trailing_stop_drop_usdt': 0.05})
+    bot = TradingBot(SYMBOL, params)
+    stream = _FakeStream()
+    bot.exit_monitor = monitor = ExitMonitor(bot, stream=stream)
+    assert monitor.start()
+
+    monitor._on_tick(SYMBOL, entry + Decimal('0.6'), entry + Decimal('0.61'), 1) # PnL 0.30: se arma
+    assert bot.tick_exit_reason is None and bot.pnl_trailing_stop_armed
+    monitor._on_tick(SYMBOL, entry + Decimal('0.4'), entry + Decimal('0.41'), 2) # PnL 0.20: cae 0.10 desde el pico
+    assert bot.tick_exit_reason is not None
+    assert bot.tick_exit_price == entry + Decimal('0.4')
+    assert bot.wake_event.is_set()
+    assert monitor.ticks_processed == 2
+    monitor.stop()
+    assert stream.listeners == []
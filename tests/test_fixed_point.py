@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+from src.fixed_point import TickScale
+
+
+def test_ticks_round_trip_with_non_decimal_tick():
+    scale = TickScale(Decimal('0.05'), Decimal('0.001'))
+    assert scale.floor_ticks(Decimal('1.07')) == 21
+    assert scale.ceil_ticks(Decimal('1.07')) == 22
+    assert scale.to_price(21) == Decimal('1.05')
+    assert scale.format_price(21) == '1.05'
+    assert scale.ticks_from_float(1.1) == 22 # 1.1 no es exacto en binario
+
+
+def test_floor_lots_is_exact():
+    scale = TickScale(Decimal('0.0001'), Decimal('0.001'))
+    assert scale.floor_lots(Decimal('0.4999')) == 499
+    assert scale.to_quantity(499) == Decimal('0.499')
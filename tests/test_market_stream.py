@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from src import market_stream
+from src.market_stream import MarketStream
+
+
+class _FakeWebsocket:
+    def __init__(self, **kwargs):
+        self.subscriptions = []
+
+    def book_ticker(self, symbol, id, action):
+        self.subscriptions.append((symbol, action))
+
+    def stop(self):
+        pass
+
+
+def test_book_ticker_reaches_symbol_listeners(monkeypatch):
+    monkeypatch.setattr(market_stream, 'UMFuturesWebsocketClient', _FakeWebsocket)
+    stream = MarketStream(stream_url='wss://test')
+    ticks = []
+    assert stream.subscribe('aaausdt', lambda *tick: ticks.append(tick))
+    assert stream._client.subscriptions == [('AAAUSDT', 'SUBSCRIBE')]
+
+    stream.dispatch_book_ticker({'s': 'AAAUSDT', 'b': '99.9', 'a': '100.1', 'E': 5})
+    stream.dispatch_book_ticker({'s': 'BBBUSDT', 'b': '1', 'a': '2', 'E': 6})
+    assert ticks == [('AAAUSDT', Decimal('99.9'), Decimal('100.1'), 5)]
+    assert stream.last_tick('aaausdt') == (Decimal('99.9'), Decimal('100.1'), 5)
+    stream.stop()
+
+
+def test_subscribe_without_websocket_library_fails():
+    assert not MarketStream(stream_url='wss://test').subscribe('AAAUSDT', lambda *tick: None)
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+import pytest
+from binance.error import ClientError
+
+from .conftest import SYMBOL
+
+
+def test_limit_buy_fills_when_candle_low_reaches_price(mock_client):
+    close = mock_client._current_close(SYMBOL)
+    order = mock_client.new_order(symbol=SYMBOL, side='BUY', type='LIMIT', quantity=1, price=str(close), timeInForce='GTC')
+    assert order['status'] == 'NEW'
+
+    while mock_client.query_order(symbol=SYMBOL, orderId=order['orderId'])['status'] == 'NEW':
+        assert mock_client.advance(SYMBOL), "las velas se acabaron sin tocar el precio límite"
+
+    filled = mock_client.query_order(symbol=SYMBOL, orderId=order['orderId'])
+    assert filled['status'] == 'FILLED'
+    assert Decimal(filled['avgPrice']) == close
+    position = mock_client.get_position_risk(symbol=SYMBOL)[0]
+    assert Decimal(position['positionAmt']) == Decimal('1')
+    assert [t['orderId'] for t in mock_client.get_account_trades(symbol=SYMBOL)] == [order['orderId']]
+
+
+def test_take_profit_below_price_would_immediately_trigger(mock_client):
+    close = mock_client._current_close(SYMBOL)
+    mock_client.set_position(SYMBOL, 1, float(close))
+    with pytest.raises(ClientError) as excinfo:
+        mock_client.new_order(symbol=SYMBOL, side='SELL', type='TAKE_PROFIT_MARKET', stopPrice=str(close * Decimal('0.9')),
+                              closePosition='true')
+    assert excinfo.value.error_code == -2021
@@ -0,0 +1,49 @@
+import random
+from decimal import Decimal
+
+from src import order_book
+from src.order_book import LocalOrderBook
+
+
+def _snapshot():
+    return {'lastUpdateId': 100, 'bids': [['99.0', '1'], ['98.5', '2']], 'asks': [['100.0', '1'], ['100.5', '3']]}
+
+
+def test_buffered_and_live_diffs_update_best_levels():
+    book = LocalOrderBook('AAAUSDT')
+    # Llega antes de la foto: se guarda y se aplica al cargarla
+    assert book.apply_diff({'U': 99, 'u': 101, 'pu': 98, 'b': [['99.5', '4']], 'a': []})
+    assert book.apply_snapshot(_snapshot())
+    assert book.best_bid_ask() == (Decimal('99.5'), Decimal('100.0'))
+
+    assert book.apply_diff({'U': 102, 'u': 103, 'pu': 101, 'b': [['99.5', '0']], 'a': [['100.0', '0']]})
+    assert book.best_bid_ask() == (Decimal('99.0'), Decimal('100.5'))
+    assert book.depth(1)['bids'] == [(Decimal('99.0'), Decimal('1'))]
+
+
+def test_sequence_gap_invalidates_the_book():
+    book = LocalOrderBook('AAAUSDT')
+    assert book.apply_snapshot(_snapshot())
+    assert book.apply_diff({'U': 100, 'u': 101, 'pu': 99, 'b': [], 'a': []})
+    assert not book.apply_diff({'U': 105, 'u': 106, 'pu': 104, 'b': [], 'a': []})
+    assert not book.synced
+    assert book.best_bid_ask() is None
+    assert book.gaps == 1
+
+
+def test_sorted_levels_match_the_book_after_many_diffs(monkeypatch):
+    monkeypatch.setattr(order_book, 'ORDER_BOOK_MAX_LEVELS', 5) # Fuerza recortes
+    book = LocalOrderBook('AAAUSDT')
+    assert book.apply_snapshot(_snapshot())
+    rng = random.Random(3)
+    update_id = 100
+    for _ in range(500):
+        bids = [[f"{rng.randint(900, 999) / 10:.1f}", rng.choice(['0', '1', '2.5'])] for _ in range(3)]
+        asks = [[f"{rng.randint(1000, 1099) / 10:.1f}", rng.choice(['0', '1', '2.5'])] for _ in range(3)]
+        assert book.apply_diff({'U': update_id, 'u': update_id + 1, 'pu': update_id, 'b': bids, 'a': asks})
+        update_id += 1
+        assert book._bid_prices == sorted(book.bids) and book._ask_prices == sorted(book.asks)
+        if book.bids and book.asks:
+            assert book.best_bid_ask() == (max(book.bids), min(book.asks))
+    assert book.depth(3)['bids'] == sorted(book.bids.items(), reverse=True)[:3]
+    assert book.depth(3)['asks'] == sorted(book.asks.items())[:3]
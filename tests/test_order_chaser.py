@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+from src.binance_client import create_futures_limit_order
+from src.order_chaser import OrderChaser
+
+from .conftest import SYMBOL
+
+
+def test_step_reprices_resting_buy_to_the_bid(mock_client):
+    bid = Decimal(mock_client.book_ticker(symbol=SYMBOL)['bidPrice'])
+    order = create_futures_limit_order(SYMBOL, 'BUY', 1.0, float(bid - Decimal('0.05')))
+    chaser = OrderChaser(SYMBOL, 'entry', 'BUY', order, post_only=True, max_distance_pct=Decimal('1'),
+                         price_adjuster=lambda price: price.quantize(Decimal('0.0001')))
+
+    assert chaser.step() == {'action': 'modified'}
+    assert chaser.price == bid
+    assert chaser.order_id == order['orderId']
+    assert Decimal(mock_client.query_order(symbol=SYMBOL, orderId=order['orderId'])['price']) == bid
+
+
+def test_combined_fill_adds_fills_of_replaced_orders():
+    chaser = OrderChaser(SYMBOL, 'entry', 'BUY', {'orderId': 2, 'price': '10', 'origQty': '3'}, post_only=False,
+                         max_distance_pct=Decimal('0'), price_adjuster=lambda price: price)
+    chaser.filled_qty, chaser.filled_notional, chaser.filled_order_ids = Decimal('1'), Decimal('9'), [1]
+
+    combined = chaser.combined_fill({'orderId': 2, 'status': 'FILLED', 'executedQty': '2', 'avgPrice': '12'})
+    assert Decimal(combined['executedQty']) == Decimal('3')
+    assert Decimal(combined['avgPrice']) == Decimal('11')
+    assert combined['orderIds'] == [1, 2]
@@ -0,0 +1,53 @@
+import threading
+
+from src.order_executor import OrderExecutor, PRIORITY_CANCEL, PRIORITY_ENTRY, PRIORITY_PROTECTIVE
+
+
+def test_queued_intents_run_by_priority():
+    executor = OrderExecutor(workers=1)
+    release = threading.Event()
+    order = []
+    blocker = executor.submit('AAAUSDT', 'block', PRIORITY_ENTRY, release.wait, 5)
+    intents = [executor.submit('AAAUSDT', kind, priority, order.append, kind)
+               for kind, priority in (('entry', PRIORITY_ENTRY), ('tp_sl', PRIORITY_PROTECTIVE), ('cancel', PRIORITY_CANCEL))]
+    release.set()
+    for intent in [blocker] + intents:
+        assert intent.done.wait(5)
+    executor.stop()
+
+    assert order == ['cancel', 'tp_sl', 'entry']
+    assert executor.stats()['by_priority']['entry']['completed'] == 2
+
+
+def test_intent_errors_are_captured_and_callback_still_runs():
+    executor = OrderExecutor(workers=1)
+    finished = []
+    done = threading.Event()
+
+    def callback(intent):
+        finished.append(intent)
+        done.set()
+
+    intent = executor.submit('AAAUSDT', 'entry', PRIORITY_ENTRY, lambda: 1 / 0, callback=callback)
+    assert done.wait(5)
+    executor.stop()
+    assert isinstance(intent.error, ZeroDivisionError)
+    assert finished == [intent]
+
+
+def test_restart_after_stop_leaves_busy_worker_its_stop_signal():
+    executor = OrderExecutor(workers=1)
+    release = threading.Event()
+    blocker = executor.submit('AAAUSDT', 'block', PRIORITY_ENTRY, release.wait, 5)
+    busy_thread = executor._threads[0]
+    executor.stop(timeout=0.1) # El hilo sigue ocupado tras el join
+    intents = [executor.submit('AAAUSDT', 'tp_sl', PRIORITY_PROTECTIVE, int, n) for n in range(3)]
+    for intent in intents:
+        assert intent.done.wait(5)
+    assert [intent.result for intent in intents] == [0, 1, 2]
+    release.set()
+    assert blocker.done.wait(5)
+    busy_thread.join(5)
+    assert not busy_thread.is_alive() # Su señal de parada no la consumió un hilo nuevo
+    assert executor.stats()['workers'] == 1
+    executor.stop()
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from src.order_filters import SymbolFilters
+
+SYMBOL_INFO = {
+    'symbol': 'AAAUSDT',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01', 'minPrice': '0.01', 'maxPrice': '100000'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '1000'},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+    ],
+}
+
+
+def test_check_rejects_small_notional_except_reduce_only():
+    filters = SymbolFilters(SYMBOL_INFO)
+    entry = filters.check('LIMIT', 'BUY', quantity='0.01', price='100.00')
+    assert not entry.ok
+    assert [r['code'] for r in entry.reasons] == ['NOTIONAL_TOO_SMALL']
+    assert filters.check('LIMIT', 'SELL', quantity='0.01', price='100.00', reduce_only=True).ok
+
+
+def test_normalize_and_min_quantity_round_to_step():
+    filters = SymbolFilters(SYMBOL_INFO)
+    assert filters.normalize_quantity(Decimal('1.23456')) == Decimal('1.234')
+    assert filters.normalize_price(Decimal('10.019')) == Decimal('10.01')
+    assert filters.min_quantity_for(Decimal('3')) == Decimal('1.667')
@@ -0,0 +1,15 @@
+from decimal import Decimal
+
+from src.pnl_engine import PnlEngine
+
+
+def test_unrealized_pnl_from_streamed_mark_price():
+    engine = PnlEngine()
+    # Sin websocket track() avisa de que hay que seguir consultando positionRisk
+    assert not engine.track('AAAUSDT', Decimal('100'), Decimal('2'))
+    assert engine.unrealized_pnl('AAAUSDT') is None
+
+    engine.update_marks([{'e': 'markPriceUpdate', 's': 'AAAUSDT', 'p': '101.5'}, {'e': 'otro', 's': 'AAAUSDT', 'p': '1'}])
+    assert engine.unrealized_pnl('AAAUSDT') == (Decimal('3.0'), Decimal('101.5'))
+    engine.untrack('AAAUSDT')
+    assert engine.unrealized_pnl('AAAUSDT') is None
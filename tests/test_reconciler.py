@@ -0,0 +1,31 @@
+from src.binance_client import create_futures_limit_order
+from src.bot import BotState, TradingBot
+from src.reconciler import OpenOrdersReconciler, is_bot_order, is_long_protective_order
+from src.trading_params import TradingParams
+
+from .conftest import SYMBOL
+from .test_bot import BOT_PARAMS
+
+
+def test_order_classification():
+    assert is_bot_order({'clientOrderId': 'bl-tp-0123'})
+    assert not is_bot_order({'clientOrderId': 'web_abc'})
+    assert is_long_protective_order({'side': 'SELL', 'positionSide': 'LONG', 'type': 'STOP_MARKET'})
+    assert not is_long_protective_order({'side': 'SELL', 'positionSide': 'LONG', 'type': 'LIMIT'})
+
+
+def test_sweep_cancels_bot_orders_the_worker_does_not_expect(mock_client):
+    bot = TradingBot(SYMBOL, TradingParams.from_mapping(BOT_PARAMS))
+    assert bot.current_state == BotState.IDLE
+    close = float(mock_client._current_close(SYMBOL))
+    orphan = create_futures_limit_order(SYMBOL, 'BUY', 1.0, round(close * 0.9, 4)) # Del bot (prefijo bl-) pero olvidada
+    manual = mock_client.new_order(symbol=SYMBOL, side='BUY', type='LIMIT', quantity=1, price=str(round(close * 0.8, 4)),
+                                   newClientOrderId='web_manual')
+
+    reconciler = OpenOrdersReconciler(interval_seconds=0)
+    reconciler._bots_provider = lambda: {SYMBOL: bot}
+    assert reconciler.sweep() == {'open_orders': 2, 'bots': 1, 'unmanaged_bot_orders': 0}
+    bot.run_once() # El barrido se aplica en el hilo del worker
+
+    assert [o['orderId'] for o in mock_client.get_orders(symbol=SYMBOL)] == [manual['orderId']]
+    assert mock_client.query_order(symbol=SYMBOL, orderId=orphan['orderId'])['status'] == 'CANCELED'
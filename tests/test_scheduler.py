@@ -0,0 +1,13 @@
+import pytest
+
+from src.scheduler import SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS, interval_to_seconds, seconds_until_candle_close
+
+
+@pytest.mark.parametrize('interval, seconds', [('1m', 60), ('15m', 900), ('4h', 14400), ('1d', 86400), ('1x', None), ('', None)])
+def test_interval_to_seconds(interval, seconds):
+    assert interval_to_seconds(interval) == seconds
+
+
+def test_seconds_until_candle_close_uses_given_server_time():
+    assert seconds_until_candle_close(60, now=120.0 + 45) == pytest.approx(15 + SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS)
+    assert seconds_until_candle_close(60, now=120.0 + 45, candles_ahead=3) == pytest.approx(135 + SCHEDULER_CANDLE_CLOSE_OFFSET_SECONDS)
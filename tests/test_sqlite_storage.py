@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from src import sqlite_storage
+
+
+def _row(binance_trade_id, pnl, close_timestamp, symbol='AAAUSDT'):
+    return {'symbol': symbol, 'trade_type': 'LONG', 'open_timestamp': close_timestamp - timedelta(minutes=5),
+            'close_timestamp': close_timestamp, 'open_price': 100.0, 'close_price': 101.0, 'quantity': 1.0,
+            'position_size_usdt': 100.0, 'pnl_usdt': pnl, 'close_reason': 'take_profit', 'parameters': None,
+            'binance_trade_id': binance_trade_id}
+
+
+def test_insert_ignores_repeated_binance_trade_id(sqlite_db):
+    now = datetime(2026, 1, 1, 12, 0)
+    assert sqlite_storage.insert_trade_rows([_row(1, 1.5, now), _row(2, -0.5, now)])
+    assert sqlite_storage.insert_trade_rows([_row(1, 1.5, now)])
+
+    assert sqlite_db.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 2
+    assert sqlite_storage.get_cumulative_pnl_by_symbol() == {'AAAUSDT': 1.0}
+    assert sqlite_storage.check_if_binance_trade_exists(2)
+    assert not sqlite_storage.check_if_binance_trade_exists(3)
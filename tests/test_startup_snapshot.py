@@ -0,0 +1,17 @@
+from src.binance_client import create_futures_limit_order
+from src.startup_snapshot import fetch_startup_snapshot
+
+from .conftest import SYMBOL
+
+
+def test_snapshot_indexes_positions_and_open_orders_by_symbol(mock_client):
+    close = float(mock_client._current_close(SYMBOL))
+    mock_client.set_position(SYMBOL, 0.5, close)
+    order = create_futures_limit_order(SYMBOL, 'BUY', 1.0, round(close * 0.9, 4))
+
+    snapshot = fetch_startup_snapshot()
+    assert snapshot.summary() == {'symbols_info': 1, 'open_positions': 1, 'open_orders': 1}
+    assert float(snapshot.position(SYMBOL)['positionAmt']) == 0.5
+    assert [o['orderId'] for o in snapshot.open_orders(SYMBOL)] == [order['orderId']]
+    assert snapshot.symbol_info(SYMBOL)['symbol'] == SYMBOL
+    assert snapshot.position('OTHERUSDT') is None
@@ -0,0 +1,19 @@
+import json
+
+from src.strategy_repository import StrategyRepository
+
+
+def test_filters_by_indexed_values_and_sees_external_edits(tmp_path):
+    repository = StrategyRepository(str(tmp_path), ttl_seconds=0)
+    repository.save('lenta', {'rsiInterval': '15m', 'rsiPeriod': 14, 'apiKey': 'x'})
+    repository.save('rapida', {'rsiInterval': '1m', 'rsiPeriod': 14})
+
+    assert repository.list_names() == (['lenta', 'rapida'], 2)
+    assert repository.list_names({'rsi_interval': '1m'}) == (['rapida'], 1)
+    assert repository.list_names({'apiKey': 'x'}) == ([], 0) # Las credenciales no se indexan
+
+    (tmp_path / 'manual.json').write_text(json.dumps({'rsiInterval': '1m'}), encoding='utf-8')
+    assert repository.list_names({'rsiInterval': '1m'}) == (['manual', 'rapida'], 2)
+    repository.delete('rapida')
+    assert repository.get('rapida') is None
+    assert repository.list_names({'rsiInterval': '1m'}) == (['manual'], 1)
@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+import pytest
+
+from src.trading_params import TradingParams
+
+
+def test_from_mapping_accepts_camel_case_and_parses_types():
+    params = TradingParams.from_mapping({'rsiPeriod': '21', 'positionSizeUSDT': '75.5', 'orderPostOnly': 'sí',
+                                         'symbolsToTrade': 'BTCUSDT'})
+    assert params.rsi_period == 21
+    assert params.position_size_usdt == Decimal('75.5')
+    assert params.position_size_usdt_float == 75.5
+    assert params.order_post_only is True
+
+
+def test_with_overrides_bumps_version_and_diff_lists_changes():
+    params = TradingParams.from_mapping({})
+    changed = params.with_overrides(rsi_period=9)
+    assert changed.version == params.version + 1
+    assert changed.diff(params) == {'rsi_period': (14, 9)}
+    with pytest.raises(AttributeError):
+        changed.rsi_period = 10
+    with pytest.raises(ValueError):
+        TradingParams.from_mapping({'position_size_usdt': '0'})
@@ -0,0 +1,15 @@
+from src.user_stream import UserDataStream
+
+
+def test_events_are_routed_by_type_and_listener_errors_are_contained():
+    stream = UserDataStream(stream_url='wss://test')
+    received = []
+    stream.add_listener('ORDER_TRADE_UPDATE', lambda event: 1 / 0)
+    stream.add_listener('ORDER_TRADE_UPDATE', received.append)
+    stream.add_listener('ORDER_TRADE_UPDATE', received.append) # Registrar dos veces no duplica
+
+    event = {'e': 'ORDER_TRADE_UPDATE', 'o': {'i': 1}}
+    stream.dispatch_event(event)
+    stream.dispatch_event({'e': 'ACCOUNT_UPDATE'})
+    assert received == [event]
+    assert stream.events_received == 2